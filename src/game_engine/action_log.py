@@ -0,0 +1,257 @@
+"""
+action_log.py is written by us.
+
+every action of the current hand in one columnar log the whole table shares.
+each field is its own int array (seat, action code, amount, ...), one row per
+action, so adding an action is a few appends and no dict. the rows are only
+turned into dicts when someone reads them, the Engine hands the GUI and the
+CPUs views of the log instead of copying it into lists every time.
+"""
+from array import array
+from collections.abc import Sequence
+
+from .constants import Action, Street, ACTION_CODES, CODE_ACTIONS
+
+STREET_NAMES = ("preflop", "flop", "turn", "river")
+
+FOLD = ACTION_CODES[Action.FOLD]
+CALL = ACTION_CODES[Action.CALL]
+RAISE = ACTION_CODES[Action.RAISE]
+CHECK = ACTION_CODES[Action.CHECK]
+SMALL_BLIND = ACTION_CODES[Action.SMALL_BLIND]
+BIG_BLIND = ACTION_CODES[Action.BIG_BLIND]
+ANTE = ACTION_CODES[Action.ANTE]
+
+
+class ActionLog:
+    """
+    the actions of one hand, column by column. players is the table's list of
+    players (a reference, not a copy) so names are looked up when a row is read
+    """
+    __slots__ = ("players", "street", "actors", "actions", "amounts", "add_amounts", "paid", "stacks",
+                 "streets", "street_rows", "last_paid", "pending_from", "saved_streets")
+
+    def __init__(self, players):
+        self.players = players
+        # the street new actions are stamped with, the dealer moves it along
+        self.street = Street.PREFLOP.value
+        # per seat: what the seat paid with its last call/raise/blind, the first row
+        # that isn't saved to a street yet and a bit per street it was saved to
+        self.last_paid = []
+        self.pending_from = []
+        self.saved_streets = []
+        self.clear()
+
+    def clear(self):
+        """
+        start a new hand. the columns are new arrays rather than emptied ones,
+        so views of the last hand stay the way they were
+        """
+        self.actors = array('q')
+        self.actions = array('q')
+        self.amounts = array('q')
+        self.add_amounts = array('q')
+        self.paid = array('q')
+        self.stacks = array('q')
+        self.streets = array('q')
+        # row numbers per street (showdown and finished included so any street can stamp)
+        self.street_rows = tuple(array('q') for _ in Street)
+        self.street = Street.PREFLOP.value
+        num_seats = len(self.players)
+        self.last_paid = [0] * num_seats
+        self.pending_from = [0] * num_seats
+        self.saved_streets = [0] * num_seats
+
+    def __len__(self):
+        return len(self.actors)
+
+    def _seat(self, seat):
+        # seats can be added after the log is made (Table.init_players)
+        while len(self.last_paid) <= seat:
+            self.last_paid.append(0)
+            self.pending_from.append(0)
+            self.saved_streets.append(0)
+
+    def append(self, seat, action, amount=0, add_amount=0, stack=0):
+        """
+        add an action for a seat, paid is worked out from the seat's last payment
+        (antes are paid on their own and don't count as one)
+        """
+        code = ACTION_CODES.get(action)
+        if code is None:
+            raise ValueError(f"{action} is not an action")
+        if seat >= len(self.last_paid):
+            self._seat(seat)
+        if code == CALL or code == RAISE:
+            paid = amount - self.last_paid[seat]
+            self.last_paid[seat] = paid
+        elif code == SMALL_BLIND or code == BIG_BLIND:
+            paid = amount
+            add_amount = amount
+            self.last_paid[seat] = paid
+        elif code == CHECK:
+            paid = 0
+            self.last_paid[seat] = 0
+        elif code == ANTE:
+            paid = amount
+        else:
+            paid = 0
+
+        row = len(self.actors)
+        self.actors.append(seat)
+        self.actions.append(code)
+        self.amounts.append(int(amount))
+        self.add_amounts.append(int(add_amount))
+        self.paid.append(int(paid))
+        self.stacks.append(int(stack))
+        self.streets.append(self.street)
+        self.street_rows[self.street].append(row)
+
+    def player_row(self, i):
+        """
+        row i in the shape Player.add_action_history always made it, only
+        the keys that make sense for the action
+        """
+        code = self.actions[i]
+        history = {"action": CODE_ACTIONS[code], "name": self.players[self.actors[i]].name}
+        if code != FOLD and code != CHECK:
+            history["amount"] = self.amounts[i]
+            history["paid"] = self.paid[i]
+            if code != CALL and code != ANTE:
+                history["add_amount"] = self.add_amounts[i]
+        history["stack"] = self.stacks[i]
+        return history
+
+    def histories(self, action_values=False):
+        """
+        the action histories of the hand by street name, each one a view
+        """
+        return {name: ActionLogView(self, self.street_rows[street], action_values)
+                for street, name in enumerate(STREET_NAMES)}
+
+    def raise_counts(self, seat):
+        """
+        the raises of the hand so far, the other seats' on each street then
+        seat's own, counted from the columns without making any dicts
+        """
+        counts = [0] * 5
+        for actor, action, street in zip(self.actors, self.actions, self.streets):
+            if action == RAISE:
+                counts[4 if actor == seat else street] += 1
+        return counts
+
+    def pending(self, seat):
+        """
+        the seat's actions that aren't saved to a street yet
+        """
+        self._seat(seat)
+        actors = self.actors
+        return [self.player_row(i) for i in range(self.pending_from[seat], len(actors)) if actors[i] == seat]
+
+    def saved(self, seat):
+        """
+        the seat's saved actions per street, None for streets it never saved
+        """
+        self._seat(seat)
+        pending_from = self.pending_from[seat]
+        saved = []
+        for street in range(len(STREET_NAMES)):
+            if not self.saved_streets[seat] >> street & 1:
+                saved.append(None)
+                continue
+            saved.append([self.player_row(i) for i in self.street_rows[street]
+                          if i < pending_from and self.actors[i] == seat])
+        return saved
+
+    def save(self, seat, street):
+        """
+        save the seat's pending actions to street, they are stamped with the
+        dealer's street already so usually this only moves the marker along
+        """
+        self._seat(seat)
+        actors = self.actors
+        streets = self.streets
+        restamp = [i for i in range(self.pending_from[seat], len(actors))
+                   if actors[i] == seat and streets[i] != street]
+        if restamp:
+            self._restamp(restamp, street)
+        self.saved_streets[seat] |= 1 << street
+        self.pending_from[seat] = len(actors)
+        self.last_paid[seat] = 0
+
+    def _restamp(self, rows, street):
+        # new arrays again so no view sees rows move under it
+        self.streets = array('q', self.streets)
+        for i in rows:
+            self.streets[i] = street
+        self._index_streets()
+
+    def _index_streets(self):
+        self.street_rows = tuple(array('q', (row for row, s in enumerate(self.streets) if s == street))
+                                 for street in range(len(Street)))
+
+    def clear_seat(self, seat):
+        """
+        forget one seat's actions, the other seats keep theirs
+        """
+        self._seat(seat)
+        keep = [i for i in range(len(self.actors)) if self.actors[i] != seat]
+        if len(keep) != len(self.actors):
+            columns = [array('q', (column[i] for i in keep)) for column in
+                       (self.actors, self.actions, self.amounts, self.add_amounts, self.paid, self.stacks,
+                        self.streets)]
+            (self.actors, self.actions, self.amounts, self.add_amounts, self.paid, self.stacks,
+             self.streets) = columns
+            self._index_streets()
+            # rows moved down, the other seats' markers count the rows they lost
+            for other in range(len(self.pending_from)):
+                self.pending_from[other] = sum(1 for i in keep if i < self.pending_from[other])
+        self.pending_from[seat] = len(self.actors)
+        self.saved_streets[seat] = 0
+        self.last_paid[seat] = 0
+
+
+class ActionLogView(Sequence):
+    """
+    one street of the log as a read only list of action dicts. it keeps the
+    columns it was made from and its length, so later actions (and later
+    hands) don't change it
+    """
+    __slots__ = ("log", "rows", "length", "action_values", "columns")
+
+    def __init__(self, log, rows, action_values=False):
+        self.log = log
+        self.rows = rows
+        self.length = len(rows)
+        self.action_values = action_values
+        self.columns = (log.actors, log.actions, log.amounts, log.add_amounts, log.paid, log.stacks)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("action history index out of range")
+        i = self.rows[index]
+        actors, actions, amounts, add_amounts, paid, stacks = self.columns
+        action = CODE_ACTIONS[actions[i]]
+        return {
+            "name": self.log.players[actors[i]].name,
+            "action": action.value if self.action_values else action,
+            "amount": amounts[i],
+            "add_amount": add_amounts[i],
+            "paid": paid[i],
+            "stack": stacks[i]
+        }
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, ActionLogView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
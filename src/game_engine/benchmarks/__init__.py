@@ -0,0 +1,8 @@
+"""
+benchmarks for the game engine hot paths, run them with
+
+    python -m game_engine.benchmarks --output results.json
+    python -m game_engine.benchmarks --compare baseline.json
+
+(from the src directory), see docs/game_engine_docs/benchmarks_docs.md
+"""
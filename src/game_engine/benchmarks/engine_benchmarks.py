@@ -0,0 +1,378 @@
+"""
+engine_benchmarks.py is written by us.
+
+the benchmarks for the game engine hot paths, every fixture is built inside
+the setup function from the seeded random module so it's the same every run
+"""
+import copy
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from .runner import benchmark
+from ..deck import Deck
+from ..dealer import Dealer
+from ..engine import Engine
+from ..constants import Action
+from ..game_evaluator import GameEvaluator
+from ..hand_evaluator import HandEvaluator
+from ..cfr_solver import CFRSolver
+from ..card_abstraction import CardAbstraction
+from ..table_manager import TableManager, EquityBatchPolicy, NeuralBatchPolicy
+from ..poker_env import NUM_ACTIONS, VectorEnv
+from ..cpu.baselineCPU import baselineCPU
+from ..cpu.equityCPU import equityCPU
+from ..cpu.potOddsCPU import potOddsCPU
+from ..cpu.expectedValueCPU import expectedValueCPU
+from ..cpu.mlCPU import MLCPU
+from ..cpu.neuralCPU import NeuralCPU, ValueNetwork
+from ..cpu.searchCPU import SearchCPU
+
+# how many different hands each benchmark cycles through
+NUM_FIXTURES = 64
+
+STREETS = {0: "preflop", 3: "flop", 4: "turn", 5: "river"}
+
+
+def deal_fixtures(num_community):
+    """
+    NUM_FIXTURES (hole cards, community cards) deals
+    """
+    deals = []
+    for _ in range(NUM_FIXTURES):
+        deck = Deck()
+        deals.append((deck.draw_cards(2), deck.draw_cards(num_community)))
+    return deals
+
+
+def decision_fixtures():
+    """
+    (valid_actions, hole cards, round_state) for every street, in the format
+    the Engine gives the CPUs
+    """
+    fixtures = []
+    for i in range(NUM_FIXTURES):
+        num_community = list(STREETS)[i % 4]
+        deck = Deck()
+        hole_cards = deck.draw_cards(2)
+        community_cards = deck.draw_cards(num_community)
+        current_bet = random.choice([0, 20, 60, 200])
+        stack = random.randint(200, 2000)
+        pot = random.randint(30, 800)
+        valid_actions = [
+            {"action": "fold", "amount": 0},
+            {"action": "call", "amount": current_bet},
+            {"action": "raise", "amount": {"min": current_bet * 2, "max": stack}},
+            {"action": "check", "amount": 0}
+        ]
+        round_state = {
+            "street": STREETS[num_community],
+            "next_player": 1,
+            "blind_pos": 0,
+            "community_card": [str(card) for card in community_cards],
+            "pot": {"main": pot, "side": []},
+            "seats": [
+                {"name": "pc", "stack": random.randint(200, 2000), "state": "active"},
+                {"name": "cpu", "stack": stack, "state": "active"},
+            ],
+            "action_histories": {"preflop": [], "flop": [], "turn": [], "river": []}
+        }
+        fixtures.append((valid_actions, [str(card) for card in hole_cards], round_state))
+    return fixtures
+
+
+def cycle(items, func):
+    """
+    returns a function that calls func on every item once,
+    returning how many items it did
+    """
+    def run():
+        for item in items:
+            func(*item)
+        return len(items)
+    return run
+
+
+@benchmark("hand_eval")
+def bench_hand_eval():
+    return cycle(deal_fixtures(5), HandEvaluator.hand_eval)
+
+
+@benchmark("hand_strength")
+def bench_hand_strength():
+    return cycle(deal_fixtures(5), HandEvaluator.hand_strength)
+
+
+@benchmark("hand_strength_batch")
+def bench_hand_strength_batch():
+    codes = np.array([[card.to_int() for card in hole + community] for hole, community in deal_fixtures(5)] * 16)
+
+    def run():
+        HandEvaluator.hand_strength_batch(codes)
+        return len(codes)
+    return run
+
+
+@benchmark("card_bucket")
+def bench_card_bucket():
+    # a small table, the lookup costs the same for any table
+    abstraction = CardAbstraction.build(samples=2000, runouts=2, opponents=2, seed=0)
+    return cycle(deal_fixtures(3) + deal_fixtures(4) + deal_fixtures(5), abstraction.bucket)
+
+
+@benchmark("determine_winners_6_players")
+def bench_determine_winners():
+    tables = []
+    for _ in range(NUM_FIXTURES):
+        dealer = Dealer(1000, 10, num_players=6, blind_delay=0)
+        dealer.table.deal_hole_cards()
+        dealer.table.deal_community_cards(5)
+        tables.append((dealer.table,))
+    return cycle(tables, GameEvaluator.determine_winners)
+
+
+@benchmark("deck_construct")
+def bench_deck_construct():
+    return Deck
+
+
+@benchmark("deck_shuffle")
+def bench_deck_shuffle():
+    deck = Deck()
+    return deck.shuffle
+
+
+def engine_fixture():
+    """
+    heads up Engine on the flop with a few actions in the histories
+    """
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.dealer.blind_delay = 0
+    engine.dealer.set_up_next_round()
+    engine.dealer.start_street()
+    engine.player_action("call")
+    engine.player_action("check")
+    engine.start_next_street()
+    engine.player_action("raise", 40)
+    return engine
+
+
+@benchmark("engine_current_state_of_game")
+def bench_current_state_of_game():
+    return engine_fixture().current_state_of_game
+
+
+@benchmark("engine_build_round_state")
+def bench_build_round_state():
+    return engine_fixture().build_round_state
+
+
+def dealer_fixtures():
+    """
+    NUM_FIXTURES heads up Dealers after the blinds
+    """
+    dealers = []
+    for _ in range(NUM_FIXTURES):
+        dealer = Dealer(initial_stack=1000, small_blind=10, blind_delay=0)
+        dealer.set_up_next_round()
+        dealer.start_street()
+        dealers.append(dealer)
+    return dealers
+
+
+@benchmark("game_state_apply")
+def bench_game_state_apply():
+    # whole lines played from every fixture, the actions are picked up front. ops are applies
+    lines = []
+    for dealer in dealer_fixtures():
+        state = dealer.game_state()
+        root = state
+        actions = []
+        while not state.is_terminal:
+            legal = state.legal_actions()
+            action = legal[1] if len(legal) > 1 and random.random() < 0.8 else legal[0]
+            amount = random.choice([20, 60, 200]) if action is Action.RAISE else None
+            actions.append((action, amount))
+            state = state.apply(action, amount)
+        lines.append((root, actions))
+    num_applies = sum(len(actions) for _, actions in lines)
+
+    def run():
+        for state, actions in lines:
+            for action, amount in actions:
+                state = state.apply(action, amount)
+        return num_applies
+    return run
+
+
+@benchmark("dealer_deepcopy")
+def bench_dealer_deepcopy():
+    # what trying a line on the engine objects would cost per node, compare with game_state_apply
+    return cycle([(dealer,) for dealer in dealer_fixtures()], copy.deepcopy)
+
+
+def cpu_benchmark(cpu):
+    return cycle(decision_fixtures(), cpu.declare_action)
+
+
+@benchmark("cpu_baseline_declare_action")
+def bench_baseline_cpu():
+    return cpu_benchmark(baselineCPU(1000))
+
+
+@benchmark("cpu_equity_declare_action")
+def bench_equity_cpu():
+    return cpu_benchmark(equityCPU(1000))
+
+
+@benchmark("cpu_pot_odds_declare_action")
+def bench_pot_odds_cpu():
+    return cpu_benchmark(potOddsCPU(1000))
+
+
+@benchmark("cpu_expected_value_declare_action")
+def bench_expected_value_cpu():
+    return cpu_benchmark(expectedValueCPU(1000))
+
+
+@benchmark("cpu_ml_declare_action")
+def bench_ml_cpu():
+    # a model path that doesn't exist so every run starts from the same empty Q-table
+    model_path = os.path.join(tempfile.gettempdir(), "benchmark_missing_model", "ml_cpu_model.pkl")
+    return cpu_benchmark(MLCPU(1000, model_path=model_path, epsilon=0))
+
+
+@benchmark("cpu_ml_replay")
+def bench_ml_cpu_replay():
+    model_path = os.path.join(tempfile.gettempdir(), "benchmark_missing_model", "ml_cpu_model.pkl")
+    cpu = MLCPU(1000, model_path=model_path, replay_capacity=10000, replay_batch_size=32, seed=0)
+    # a full buffer of 4 decision rounds over a few thousand states
+    rng = np.random.default_rng(0)
+    for _ in range(2500):
+        cpu.current_round_history = [{"state": tuple(rng.integers(0, 4, 7).tolist()),
+                                      "action": ("call", int(rng.integers(0, 5)) * 10)} for _ in range(4)]
+        cpu.remember_round(float(rng.normal(0, 100)))
+
+    def run():
+        cpu.replay()
+        return cpu.replay_batch_size
+    return run
+
+
+@benchmark("cpu_neural_declare_action")
+def bench_neural_cpu():
+    return cpu_benchmark(NeuralCPU(1000, network=ValueNetwork.create(seed=0)))
+
+
+@benchmark("cpu_search_declare_action")
+def bench_search_cpu():
+    # a fixed number of iterations instead of the time budget so the work is the same every run
+    return cpu_benchmark(SearchCPU(1000, max_iterations=100, seed=0))
+
+
+def hand_messages_benchmark(native_cards):
+    # whole hands as the Engine sends them: round start, then the street start, an update
+    # and two decisions on every street. the cards are Card objects with native_cards (what
+    # the Engine gives our CPUs), card strings otherwise. ops are decisions
+    cpu = equityCPU(1000)
+    seats = [{"name": "pc", "stack": 1000}, {"name": "cpu", "stack": 1000}]
+    valid_actions = [
+        {"action": "fold", "amount": 0},
+        {"action": "call", "amount": 20},
+        {"action": "raise", "amount": {"min": 40, "max": 1000}},
+        {"action": "check", "amount": 0}
+    ]
+    hands = []
+    for _ in range(NUM_FIXTURES // 4):
+        deck = Deck()
+        hole_cards = deck.draw_cards(2)
+        board = deck.draw_cards(5)
+        hands.append((hole_cards, board))
+    update = {"player_name": "pc", "action": "call", "amount": 20}
+
+    def run():
+        decisions = 0
+        for round_count, (hole_cards, board) in enumerate(hands):
+            # the cards are put together again for every message, like the Engine does
+            hole_card = list(hole_cards) if native_cards else [str(card) for card in hole_cards]
+            cpu.receive_round_start_message(round_count, hole_card, seats)
+            for num_community, street in STREETS.items():
+                for street_start in (True, False):
+                    community_card = board[:num_community] if native_cards else \
+                        [str(card) for card in board[:num_community]]
+                    round_state = {"street": street, "community_card": community_card, "pot": {"main": 100},
+                                   "seats": seats}
+                    if street_start:
+                        cpu.receive_street_start_message(street, round_state)
+                    else:
+                        cpu.receive_game_update_message(update, round_state)
+                    cpu.declare_action(valid_actions, hole_card, round_state)
+                    decisions += 1
+        return decisions
+    return run
+
+
+@benchmark("cpu_hand_messages")
+def bench_cpu_hand_messages():
+    return hand_messages_benchmark(native_cards=False)
+
+
+@benchmark("cpu_hand_messages_native")
+def bench_cpu_hand_messages_native():
+    return hand_messages_benchmark(native_cards=True)
+
+
+@benchmark("cfr_iteration")
+def bench_cfr_iteration():
+    solver = CFRSolver(seed=0)
+
+    def run():
+        solver.run_iterations(64, deal_batch=64)
+        return 64
+    return run
+
+
+def hands_benchmark(num_tables, num_players, steps, policy=None):
+    manager = TableManager(initial_stack=1000, blind=10)
+    if policy is None:
+        policy = EquityBatchPolicy()
+    for _ in range(num_tables):
+        manager.add_table([policy] * num_players)
+
+    def run():
+        hands_before = manager.hands_played()
+        manager.run(steps)
+        return manager.hands_played() - hands_before
+    return run
+
+
+@benchmark("headless_hands_heads_up")
+def bench_headless_hands():
+    return hands_benchmark(num_tables=1, num_players=2, steps=100)
+
+
+@benchmark("headless_hands_100_tables_6_max")
+def bench_headless_hands_many_tables():
+    return hands_benchmark(num_tables=100, num_players=6, steps=10)
+
+
+@benchmark("headless_hands_100_tables_neural")
+def bench_headless_hands_neural():
+    return hands_benchmark(num_tables=100, num_players=2, steps=10,
+                           policy=NeuralBatchPolicy(ValueNetwork.create(seed=0)))
+
+
+@benchmark("env_vector_step")
+def bench_env_vector_step():
+    abstraction = CardAbstraction.build(samples=2000, runouts=2, opponents=2, seed=0)
+    env = VectorEnv(64, card_abstraction=abstraction, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).integers(0, NUM_ACTIONS, (16, 64))
+
+    def run():
+        for step_actions in actions:
+            env.step(step_actions)
+        return len(actions) * 64
+    return run
@@ -0,0 +1,199 @@
+"""
+runner.py is written by us.
+
+times the registered benchmarks, writes the results as JSON and compares
+them against a stored baseline so slowdowns are caught before they ship.
+
+a benchmark is a setup function registered with @benchmark, it builds its fixtures
+(not timed) and returns the function to time. that function can return how many
+operations it did (ex. hands played), otherwise one call is one operation.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# every fixture is built from this seed so runs are comparable
+SEED = 1234
+
+# name -> setup function
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name):
+    """
+    register a benchmark setup function under name
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def time_benchmark(setup, repeat=5, min_time=0.2) -> dict:
+    """
+    time one benchmark: the number of loops is picked so a repeat takes
+    at least min_time seconds, then the loops are run repeat times
+    """
+    random.seed(SEED)
+    func = setup()
+
+    # like timeit, garbage collection is off while timing
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            elapsed, ops = _run_loops(func, loops)
+            if elapsed >= min_time or loops >= 1 << 20:
+                break
+            loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+        times = []
+        for _ in range(repeat):
+            elapsed, ops = _run_loops(func, loops)
+            times.append(elapsed / ops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "ops_per_repeat": ops,
+        "mean_us": statistics.mean(times) * 1e6,
+        "min_us": min(times) * 1e6,
+        "stdev_us": (statistics.stdev(times) if len(times) > 1 else 0.0) * 1e6,
+        "ops_per_sec": 1 / min(times),
+    }
+
+
+def _run_loops(func, loops):
+    ops = 0
+    start = time.perf_counter()
+    for _ in range(loops):
+        done = func()
+        # anything but an int (a count of operations) is one operation
+        ops += done if isinstance(done, int) else 1
+    return time.perf_counter() - start, max(ops, 1)
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat=5, min_time=0.2) -> dict:
+    """
+    run the benchmarks in names (all of them if None), returns the
+    results with some info about the machine they ran on
+    """
+    # registers the benchmarks
+    from . import engine_benchmarks  # noqa: F401
+    from ..cpu import think_time
+
+    if names is None:
+        names = list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise KeyError(f"unknown benchmarks: {unknown}")
+
+    # the CPUs shouldn't sleep while being timed
+    think_enabled = think_time.ENABLED
+    think_time.set_enabled(False)
+
+    results = {}
+    try:
+        for name in names:
+            results[name] = time_benchmark(BENCHMARKS[name], repeat=repeat, min_time=min_time)
+    finally:
+        think_time.set_enabled(think_enabled)
+
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": SEED,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold=0.2) -> List[dict]:
+    """
+    compare the best time per operation of every benchmark in both runs (the
+    best repeat is the least noisy), returns a row per benchmark with the ratio (current / baseline),
+    rows with a ratio over 1 + threshold are marked as regressions
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base = baseline["results"][name]["min_us"]
+        ratio = result["min_us"] / base if base > 0 else float("inf")
+        rows.append({
+            "name": name,
+            "baseline_us": base,
+            "current_us": result["min_us"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'benchmark':<36}{'mean us':>14}{'min us':>14}{'ops/sec':>14}"]
+    for name, result in results["results"].items():
+        lines.append(f"{name:<36}{result['mean_us']:>14.2f}{result['min_us']:>14.2f}{result['ops_per_sec']:>14.1f}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[dict]) -> str:
+    lines = [f"{'benchmark':<36}{'baseline us':>14}{'current us':>14}{'ratio':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<36}{row['baseline_us']:>14.2f}{row['current_us']:>14.2f}"
+                     f"{row['ratio']:>8.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point, returns 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(description="game engine benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown allowed before a benchmark counts as a regression (0.2 = 20%%)")
+    parser.add_argument("--only", nargs="*", help="only run these benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        from . import engine_benchmarks  # noqa: F401
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    results = run_benchmarks(args.only, repeat=args.repeat, min_time=args.min_time)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compare(results, baseline, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,22 +19,33 @@ class BettingManager:
         self.current_bet = 0
         self.blind = blind
 
-        # this array represents active
-        # players who haven't responded to a bet yet
-        self.pending_betters = []
+        # bit i is set if the player in seat i is active
+        # and hasn't responded to a bet yet
+        self.pending_mask = 0
+
+        # optional HandRecorder (see hand_history.py), set with Dealer.set_recorder
+        self.recorder = None
+
+    @property
+    def pending_betters(self):
+        """
+        players who haven't responded to a bet yet, in seat order
+        """
+        return [player for player in self.table.players if self.pending_mask >> player.seat & 1]
 
     def reset_betting_round(self):
         """
         set up betting state, for the next street
         """
         self.current_bet = 0
-        self.pending_betters = self.table.active_players()
+        self.pending_mask = self.table.acting_mask
         self.table.reset_contribution()
 
     def apply_player_action(self, current_player, action: Action, raise_amount = None):
         """
         declare action for the current player
         """
+        contribuition_before = current_player.contribuition
         if action == Action.CALL:
             call_amount = self.current_bet - current_player.contribuition
             self._call(current_player)
@@ -57,6 +68,12 @@ class BettingManager:
             self.current_bet = self.blind*2
             self._blind(current_player, self.blind*2)
             current_player.add_action_history(action, bb_amount=self.blind*2)
+
+        if self.recorder is not None:
+            self.recorder.record_action(current_player, action, current_player.contribuition - contribuition_before)
+            # everyone else folded, the pot was paid in _fold
+            if action == Action.FOLD and len(self.table.players_in_hand()) == 1:
+                self.recorder.end_hand(self.table)
         self.table.next_player()
         
         
@@ -68,7 +85,7 @@ class BettingManager:
             all_in_amount = current_player.stack
             current_player.collect_bet(all_in_amount)
             self.table.pot.add_to_pot(all_in_amount)
-            current_player.state = PlayerState.ALLIN
+            self._all_in(current_player)
         else: 
             current_player.collect_bet(blind)
             self.table.pot.add_to_pot(blind)
@@ -78,15 +95,16 @@ class BettingManager:
     def _fold(self, current_player):
         """
         change playerState, remove from pending betters
-        NOTE: since its 1v1 can just add pot to opposite player's stack
+        if only one player is left in the hand they win the pot
         """
         # Remove from pending betters first before changing state
-        if current_player in self.pending_betters:
-            self.pending_betters.remove(current_player)
-            
+        self.pending_mask &= ~(1 << current_player.seat)
+        self.table.remove_from_action(current_player)
+
         current_player.state = PlayerState.FOLDED
-        winner = [player for player in self.table.players if player.state != PlayerState.FOLDED]
-        GameEvaluator.add_money_to_winners(self.table, winner)
+        players_left = self.table.players_in_hand()
+        if len(players_left) == 1:
+            GameEvaluator.add_money_to_winners(self.table, players_left)
 
     def _raise(self, current_player, raise_amount):
         """
@@ -94,7 +112,6 @@ class BettingManager:
         """
         
         call_amount = self.current_bet - current_player.contribuition
-        print(f"call_amount for player {current_player.name}: {call_amount}")
         current_player.collect_bet(call_amount)
         self.table.pot.add_to_pot(call_amount)
 
@@ -102,10 +119,10 @@ class BettingManager:
             all_in_amount = current_player.stack
         
             self._raise_bet(all_in_amount)
-            current_player.state = PlayerState.ALLIN
             self.table.pot.add_to_pot(all_in_amount)
             current_player.collect_bet(all_in_amount)
             self._add_betters(current_player)
+            self._all_in(current_player)
         else:
             # do the raise action
             self._raise_bet(raise_amount)
@@ -128,11 +145,12 @@ class BettingManager:
             all_in_amount = current_player.stack
             current_player.collect_bet(all_in_amount)
             self.table.pot.add_to_pot(all_in_amount)
-            current_player.state = PlayerState.ALLIN
+            self._remove_better(current_player)
+            self._all_in(current_player)
         else:
             current_player.collect_bet(call_amount)
             self.table.pot.add_to_pot(call_amount)
-        self._remove_better(current_player)
+            self._remove_better(current_player)
     
 
     def _check(self, current_player):
@@ -148,23 +166,31 @@ class BettingManager:
         check if betting is over (to be used in dealer),
         if betting is over than the street is over
         """
-        return len(self.pending_betters) == 0
+        return self.pending_mask == 0
 
     def _remove_better(self, current_player):
         """
         remove current player from current_betters
         """
-        self.pending_betters.remove(current_player)
+        bit = 1 << current_player.seat
+        if not self.pending_mask & bit:
+            raise ValueError(f"{current_player.name} is not waiting to act")
+        self.pending_mask &= ~bit
 
     def _add_betters(self, current_player):
         """
         add all other active players to current betters
         this will be called when a player raises the bet
         """
-        self.pending_betters = []
-        for player in self.table.active_players():
-            if player != current_player:
-                self.pending_betters.append(player)
+        self.pending_mask = self.table.acting_mask & ~(1 << current_player.seat)
+
+    def _all_in(self, current_player):
+        """
+        player has no chips left, they stay in the hand but can't act anymore
+        """
+        current_player.state = PlayerState.ALLIN
+        self.pending_mask &= ~(1 << current_player.seat)
+        self.table.remove_from_action(current_player)
 
     def _raise_bet(self, amount):
         """
@@ -23,6 +23,8 @@ class Card:
         'K': 13,
         'A': 14,
     }
+    # suit order used for int card codes, same order the Deck is built in
+    SUIT_INDEX = {'H': 0, 'D': 1, 'C': 2, 'S': 3}
 
     def __init__(self, suit: str, card_val: str):
         assert len(suit) == 1
@@ -70,3 +72,10 @@ class Card:
         """
         assert self.card_val in self.CARD_RANK_MAP
         return self.CARD_RANK_MAP[self.card_val]
+
+    def to_int(self) -> int:
+        """
+        returns the card as an int 0-51 (suit index * 13 + rank - 2),
+        used when cards are stored in numpy arrays
+        """
+        return self.SUIT_INDEX[self.suit] * 13 + self.get_card_rank() - 2
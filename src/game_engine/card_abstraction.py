@@ -0,0 +1,418 @@
+"""
+card_abstraction.py is written by us.
+
+puts every hand (hole cards + the board so far) in one of a few buckets of similar
+strength, for the Q-learning MLCPU's state and as a bucketer for the CFR solver.
+
+offline (build / the command line) we deal lots of random situations for every street and work out
+    E[HS]: the expected hand strength, the chance of beating a random hand once the board is dealt out
+    E[HS^2]: the mean of the squared hand strength over the runouts, high for hands that
+             are either very strong or drawing (they're worth more than their E[HS])
+    the histogram of the hand strength over the runouts
+each situation is reduced to a key (situation_keys) and the histograms of every key are
+clustered with k-means into num_buckets buckets, ordered from weakest to strongest.
+the result is a uint8 table per street, so at runtime a bucket is one table index.
+
+the keys can't tell apart every situation (there are ~123 million canonical river
+situations), preflop is exact (the 169 starting hands) and after the flop a key is:
+    made hand, its top rank, how many board ranks are above it,
+    flush draw, straight draw and the highest hole card
+
+run it from the src directory:
+
+    python -m game_engine.card_abstraction --samples 200000 --output ../models/card_buckets.npz
+"""
+import argparse
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+
+from .hand_evaluator import HandEvaluator
+
+# where the CPUs look for the table
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models", "card_buckets.npz")
+
+NUM_STREETS = 4
+BOARD_SIZES = (0, 3, 4, 5)
+
+PREFLOP_KEYS = 13 * 13
+# straight flush and royal flush share a category
+NUM_CATEGORIES = 9
+POSTFLOP_KEYS = NUM_CATEGORIES * 13 * 4 * 2 * 3 * 4
+KEYS_PER_STREET = (PREFLOP_KEYS, POSTFLOP_KEYS, POSTFLOP_KEYS, POSTFLOP_KEYS)
+
+TABLE_VERSION = 1
+
+# rank masks of the 5 rank windows a straight can use, the ace also plays low
+_WINDOW_LIST = [0b1000000001111] + [0b11111 << low for low in range(9)]
+_WINDOWS = np.array(_WINDOW_LIST)
+
+
+def preflop_keys(hole) -> np.ndarray:
+    """
+    index of the starting hand in a 13x13 grid: pairs on the diagonal,
+    suited hands above it and offsuit hands below it
+    """
+    hole = np.asarray(hole)
+    ranks = hole % 13
+    high = ranks.max(axis=1)
+    low = ranks.min(axis=1)
+    suited = hole[:, 0] // 13 == hole[:, 1] // 13
+    return np.where(suited, low * 13 + high, high * 13 + low)
+
+
+def postflop_keys(cards) -> np.ndarray:
+    """
+    the key of (hands, 7) card codes with at least 3 board cards (-1 for cards not dealt)
+    """
+    cards = np.asarray(cards)
+    dealt = cards >= 0
+    codes = np.where(dealt, cards, 0)
+    ranks = codes % 13
+    suits = codes // 13
+    board_dealt = dealt[:, 2:]
+    river = board_dealt.all(axis=1)
+
+    strength = HandEvaluator.hand_strength_batch(cards)
+    category = np.minimum(strength >> 20, NUM_CATEGORIES) - 1
+    top_rank = ((strength >> 16) & 15) - 2
+
+    board_bits = np.where(board_dealt, 1 << ranks[:, 2:], 0)
+    board_mask = np.bitwise_or.reduce(board_bits, axis=1)
+    above = HandEvaluator.BIT_COUNTS[board_mask >> (top_rank + 1)]
+    above = np.minimum(above, 3)
+
+    # a flush draw is four of a suit using a hole card, not on the river
+    suit_counts = ((suits[:, :, None] == np.arange(4)) & dealt[:, :, None]).sum(axis=1)
+    hole_suits = suits[:, :2]
+    hole_suit_counts = np.take_along_axis(suit_counts, hole_suits, axis=1)
+    flush_draw = (hole_suit_counts == 4).any(axis=1) & (category < 5) & ~river
+
+    # straight draws: windows with four ranks that use a hole card, two or more is open ended
+    all_bits = np.bitwise_or.reduce(np.where(dealt, 1 << ranks, 0), axis=1)
+    hole_bits = (1 << ranks[:, 0]) | (1 << ranks[:, 1])
+    in_window = HandEvaluator.BIT_COUNTS[all_bits[:, None] & _WINDOWS]
+    uses_hole = (hole_bits[:, None] & _WINDOWS) != 0
+    draws = ((in_window == 4) & uses_hole).sum(axis=1)
+    straight_draw = np.where((category < 4) & ~river, np.minimum(draws, 2), 0)
+
+    # highest hole card: 2-9, 10-J, Q-K, A
+    kicker = np.searchsorted([8, 10, 12], ranks[:, :2].max(axis=1), side="right")
+
+    key = category * 13 + top_rank
+    key = key * 4 + above
+    key = key * 2 + flush_draw
+    key = key * 3 + straight_draw
+    return key * 4 + kicker
+
+
+def situation_key(hole_cards, community_cards) -> int:
+    """
+    postflop_keys / preflop_keys for one hand of Card objects, in plain python
+    since numpy is slow on one row at a time
+    """
+    hole = [card.to_int() for card in hole_cards]
+    board = [card.to_int() for card in community_cards]
+    ranks = [code % 13 for code in hole + board]
+    if not board:
+        high, low = max(ranks), min(ranks)
+        return low * 13 + high if hole[0] // 13 == hole[1] // 13 else high * 13 + low
+
+    strength = HandEvaluator.hand_strength(hole_cards, community_cards)
+    category = min(strength >> 20, NUM_CATEGORIES) - 1
+    top_rank = ((strength >> 16) & 15) - 2
+    above = min(len({code % 13 for code in board if code % 13 > top_rank}), 3)
+    river = len(board) == 5
+
+    suits = [code // 13 for code in hole + board]
+    flush_draw = not river and category < 5 and any(suits.count(suit) == 4 for suit in suits[:2])
+
+    straight_draw = 0
+    if not river and category < 4:
+        all_bits = 0
+        for rank in ranks:
+            all_bits |= 1 << rank
+        hole_bits = (1 << ranks[0]) | (1 << ranks[1])
+        draws = sum(1 for window in _WINDOW_LIST
+                    if bin(all_bits & window).count("1") == 4 and hole_bits & window)
+        straight_draw = min(draws, 2)
+
+    high_hole = max(ranks[:2])
+    kicker = (high_hole >= 8) + (high_hole >= 10) + (high_hole >= 12)
+    return ((((category * 13 + top_rank) * 4 + above) * 2 + flush_draw) * 3 + straight_draw) * 4 + kicker
+
+
+def situation_keys(cards):
+    """
+    (streets, keys) for (hands, 7) card codes, -1 for board cards not dealt yet
+    """
+    cards = np.asarray(cards)
+    streets = np.searchsorted(BOARD_SIZES, (cards[:, 2:] >= 0).sum(axis=1))
+    keys = np.zeros(len(cards), dtype=np.int64)
+    preflop = streets == 0
+    if preflop.any():
+        keys[preflop] = preflop_keys(cards[preflop, :2])
+    if (~preflop).any():
+        keys[~preflop] = postflop_keys(cards[~preflop])
+    return streets, keys
+
+
+def hand_strength_stats(cards, runouts, opponents, rng, bins=10):
+    """
+    E[HS], E[HS^2] and the (hands, bins) histogram of the hand strength over runouts,
+    for (hands, 7) card codes. every runout deals the rest of the board and is
+    scored against opponents random hands
+    """
+    cards = np.asarray(cards)
+    num = len(cards)
+    rows = num * runouts
+    cards = np.repeat(cards, runouts, axis=0)
+    board = cards[:, 2:]
+
+    # shuffle the unseen cards, the known ones sort to the end
+    keys = rng.random((rows, 52))
+    known = cards >= 0
+    row_index = np.repeat(np.arange(rows), 7)
+    keys[row_index[known.ravel()], cards[known]] = 2
+    drawn = np.argsort(keys, axis=1)[:, :5 + 2 * opponents]
+
+    missing = board < 0
+    fill_index = np.clip(np.cumsum(missing, axis=1) - 1, 0, 4)
+    full_board = np.where(missing, np.take_along_axis(drawn, fill_index, axis=1), board)
+
+    ours = HandEvaluator.hand_strength_batch(np.concatenate([cards[:, :2], full_board], axis=1))
+    score = np.zeros(rows)
+    for opponent in range(opponents):
+        hole = drawn[:, 5 + 2 * opponent:7 + 2 * opponent]
+        theirs = HandEvaluator.hand_strength_batch(np.concatenate([hole, full_board], axis=1))
+        score += (ours > theirs) + 0.5 * (ours == theirs)
+    strength = (score / opponents).reshape(num, runouts)
+
+    histogram = np.zeros((num, bins))
+    bin_index = np.minimum((strength * bins).astype(np.int64), bins - 1)
+    np.add.at(histogram, (np.repeat(np.arange(num), runouts), bin_index.ravel()), 1.0 / runouts)
+    return strength.mean(axis=1), (strength ** 2).mean(axis=1), histogram
+
+
+def kmeans(points, weights, k, rng, iterations=50):
+    """
+    weighted k-means with k-means++ starting centers, returns (centers, labels)
+    """
+    num = len(points)
+    k = min(k, num)
+    probabilities = weights / weights.sum()
+    centers = [points[rng.choice(num, p=probabilities)]]
+    distances = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        chance = distances * weights
+        if chance.sum() <= 0:
+            break
+        centers.append(points[rng.choice(num, p=chance / chance.sum())])
+        distances = np.minimum(distances, ((points - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = np.zeros(num, dtype=np.int64)
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        for center in range(len(centers)):
+            members = new_labels == center
+            if members.any():
+                centers[center] = np.average(points[members], axis=0, weights=weights[members])
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return centers, labels
+
+
+def deal_situations(num, street, rng):
+    """
+    num random (hands, 7) card codes on street
+    """
+    cards = np.argsort(rng.random((num, 52)), axis=1)[:, :7]
+    cards[:, 2 + BOARD_SIZES[street]:] = -1
+    return cards
+
+
+class CardAbstraction:
+    """
+    the bucket tables, one uint8 table per street indexed by the situation key.
+    ehs and ehs2 are every key's mean E[HS] and E[HS^2] (NaN for keys never dealt)
+    """
+
+    def __init__(self, tables, ehs, ehs2, num_buckets, path: Optional[str] = None):
+        self.tables = [np.asarray(table, dtype=np.uint8) for table in tables]
+        self.ehs = [np.asarray(values, dtype=np.float32) for values in ehs]
+        self.ehs2 = [np.asarray(values, dtype=np.float32) for values in ehs2]
+        self.num_buckets = num_buckets
+        self.path = path
+
+    def bucket_batch(self, cards) -> np.ndarray:
+        """
+        the bucket of (hands, 7) card codes, -1 for board cards not dealt yet
+        """
+        streets, keys = situation_keys(cards)
+        buckets = np.empty(len(keys), dtype=np.int64)
+        for street in range(NUM_STREETS):
+            on_street = streets == street
+            if on_street.any():
+                buckets[on_street] = self.tables[street][keys[on_street]]
+        return buckets
+
+    def bucket(self, hole_cards, community_cards) -> int:
+        """
+        the bucket of one hand, the cards are Card objects. 0 (the weakest) until
+        both hole cards are known, the CPUs can be asked before the deal
+        """
+        if len(hole_cards) < 2:
+            return 0
+        street = BOARD_SIZES.index(len(community_cards))
+        return int(self.tables[street][situation_key(hole_cards, community_cards)])
+
+    # the bucketer interface of cfr_solver.MonteCarloBucketer
+
+    def buckets(self, hole, board, rng=None) -> np.ndarray:
+        return self.bucket_batch(np.concatenate([np.asarray(hole), np.asarray(board)], axis=1))
+
+    def deal_buckets(self, holes, boards, rng=None) -> np.ndarray:
+        num = len(holes)
+        cards = np.full((num, 2, NUM_STREETS, 7), -1, dtype=np.int64)
+        cards[:, :, :, :2] = holes[:, :, None, :]
+        for street, count in enumerate(BOARD_SIZES):
+            cards[:, :, street, 2:2 + count] = boards[:, None, :count]
+        return self.bucket_batch(cards.reshape(-1, 7)).reshape(num, 2, NUM_STREETS)
+
+    def to_dict(self) -> dict:
+        return {"kind": "table", "num_buckets": self.num_buckets, "path": self.path}
+
+    @classmethod
+    def build(cls, samples=200000, num_buckets=8, runouts=16, opponents=8, bins=10, chunk=20000,
+              seed=None, verbose=False) -> "CardAbstraction":
+        """
+        the offline job: deal samples random situations per street, work out their
+        hand strength stats and cluster the keys into num_buckets buckets
+        """
+        rng = np.random.default_rng(seed)
+        tables, all_ehs, all_ehs2 = [], [], []
+        for street in range(NUM_STREETS):
+            num_keys = KEYS_PER_STREET[street]
+            counts = np.zeros(num_keys)
+            ehs = np.zeros(num_keys)
+            ehs2 = np.zeros(num_keys)
+            histograms = np.zeros((num_keys, bins))
+            done = 0
+            while done < samples:
+                cards = deal_situations(min(chunk, samples - done), street, rng)
+                _, keys = situation_keys(cards)
+                hs, hs2, histogram = hand_strength_stats(cards, runouts, opponents, rng, bins)
+                np.add.at(counts, keys, 1)
+                np.add.at(ehs, keys, hs)
+                np.add.at(ehs2, keys, hs2)
+                np.add.at(histograms, keys, histogram)
+                done += len(cards)
+
+            seen = counts > 0
+            ehs[seen] /= counts[seen]
+            ehs2[seen] /= counts[seen]
+            histograms[seen] /= counts[seen, None]
+            ehs[~seen] = np.nan
+            ehs2[~seen] = np.nan
+
+            # cumulative histograms, so the distance between them is like the earth mover's distance
+            points = np.cumsum(histograms[seen], axis=1)
+            centers, labels = kmeans(points, counts[seen], num_buckets, rng)
+            center_ehs = np.array([np.average(ehs[seen][labels == c], weights=counts[seen][labels == c])
+                                   if (labels == c).any() else 0.0 for c in range(len(centers))])
+            rank = np.argsort(np.argsort(center_ehs))
+
+            table = np.zeros(num_keys, dtype=np.uint8)
+            table[seen] = rank[labels]
+            # keys never dealt get the bucket closest to the mean E[HS] of their made hand
+            if (~seen).any():
+                table[~seen] = cls._fill_unseen(np.flatnonzero(~seen), street, ehs, counts, np.sort(center_ehs))
+            tables.append(table)
+            all_ehs.append(ehs)
+            all_ehs2.append(ehs2)
+            if verbose:
+                print(f"street {street}: {int(seen.sum())} of {num_keys} keys seen")
+        return cls(tables, all_ehs, all_ehs2, num_buckets)
+
+    @staticmethod
+    def _fill_unseen(unseen, street, ehs, counts, sorted_center_ehs):
+        if street == 0:
+            groups = np.zeros(PREFLOP_KEYS, dtype=np.int64)
+        else:
+            groups = np.arange(POSTFLOP_KEYS) // (POSTFLOP_KEYS // NUM_CATEGORIES)
+        seen = counts > 0
+        overall = np.average(ehs[seen], weights=counts[seen])
+        buckets = np.zeros(len(unseen), dtype=np.uint8)
+        for i, key in enumerate(unseen):
+            same = seen & (groups == groups[key])
+            mean = np.average(ehs[same], weights=counts[same]) if same.any() else overall
+            buckets[i] = np.abs(sorted_center_ehs - mean).argmin()
+        return buckets
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {"version": TABLE_VERSION, "num_buckets": self.num_buckets}
+        for street in range(NUM_STREETS):
+            arrays[f"table{street}"] = self.tables[street]
+            arrays[f"ehs{street}"] = self.ehs[street].astype(np.float16)
+            arrays[f"ehs2_{street}"] = self.ehs2[street].astype(np.float16)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        self.path = str(path)
+
+    @classmethod
+    def load(cls, path) -> "CardAbstraction":
+        with np.load(path) as arrays:
+            if int(arrays["version"]) != TABLE_VERSION:
+                raise ValueError(f"{path} is version {int(arrays['version'])}, expected {TABLE_VERSION}")
+            tables = [arrays[f"table{street}"] for street in range(NUM_STREETS)]
+            ehs = [arrays[f"ehs{street}"] for street in range(NUM_STREETS)]
+            ehs2 = [arrays[f"ehs2_{street}"] for street in range(NUM_STREETS)]
+            num_buckets = int(arrays["num_buckets"])
+        if [len(table) for table in tables] != list(KEYS_PER_STREET):
+            raise ValueError(f"{path} was built with different situation keys")
+        return cls(tables, ehs, ehs2, num_buckets, str(path))
+
+
+_default: Optional[CardAbstraction] = None
+
+
+def default_abstraction() -> CardAbstraction:
+    """
+    the table at DEFAULT_PATH, loaded once. the repo ships it (built by the command
+    line with --seed 0), if it's missing a small one is built (a few seconds) and saved there
+    """
+    global _default
+    if _default is None:
+        if os.path.exists(DEFAULT_PATH):
+            _default = CardAbstraction.load(DEFAULT_PATH)
+        else:
+            _default = CardAbstraction.build(samples=20000, runouts=8, opponents=4, seed=0)
+            _default.save(DEFAULT_PATH)
+    return _default
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="build the card bucket table")
+    parser.add_argument("--samples", type=int, default=200000, help="situations dealt per street")
+    parser.add_argument("--buckets", type=int, default=8)
+    parser.add_argument("--runouts", type=int, default=16, help="board runouts per situation")
+    parser.add_argument("--opponents", type=int, default=8, help="opponent hands per runout")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    abstraction = CardAbstraction.build(args.samples, args.buckets, args.runouts, args.opponents,
+                                        seed=args.seed, verbose=True)
+    abstraction.save(args.output)
+    print(f"saved {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,558 @@
+"""
+cfr_solver.py is written by us.
+
+Monte Carlo CFR (external sampling, with regret matching+) for heads up games
+played by the Dealer/BettingManager rules: the small blind acts first on every
+street, a raise is an amount on top of the call, and the betting round is over
+once nobody is left to respond to a bet.
+
+the real game is too big to solve so it is abstracted:
+    bets: the betting tree only has fold, check/call, raises of a few pot
+          fractions and all in, with a cap on raises per street (BettingAbstraction)
+    cards: every hand is put in one of a few buckets per street, by its equity
+           against a random hand (MonteCarloBucketer) or from the precomputed
+           table in card_abstraction.py
+
+the betting tree is built once into flat numpy arrays, the regrets and strategy sums are
+(decision nodes * buckets, actions) arrays so an information set is one row.
+iterations can be split over processes and the solver can be checkpointed to disk.
+the average strategy is saved as a blueprint that BlueprintCPU plays by looking up one row.
+
+run it from the src directory:
+
+    python -m game_engine.cfr_solver --iterations 20000 --processes 4 --output ../models/blueprint.npz
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .hand_evaluator import HandEvaluator
+from .card_abstraction import CardAbstraction, default_abstraction
+
+# abstract actions, the raises come after CALL (one per raise size) then ALL_IN
+FOLD = 0
+CALL = 1
+
+# terminal kinds
+NOT_TERMINAL = 0
+FOLDED = 1
+SHOWDOWN = 2
+
+NUM_STREETS = 4
+
+# 2: MonteCarloBucketer.deal_buckets gives each player their own buckets (1 gave both the same)
+CHECKPOINT_VERSION = 2
+
+
+class BettingAbstraction:
+    """
+    the bets the solver considers, raise_sizes are fractions of the pot after
+    calling and at most max_raises raises are allowed per street
+    """
+
+    def __init__(self, stack=1000, blind=10, raise_sizes: Sequence[float] = (0.5, 1.0), max_raises=2):
+        self.stack = stack
+        self.blind = blind
+        self.raise_sizes = tuple(raise_sizes)
+        self.max_raises = max_raises
+
+    @property
+    def num_actions(self) -> int:
+        # fold, call, the raise sizes and all in
+        return len(self.raise_sizes) + 3
+
+    @property
+    def all_in(self) -> int:
+        return len(self.raise_sizes) + 2
+
+    def to_dict(self) -> dict:
+        return {"stack": self.stack, "blind": self.blind,
+                "raise_sizes": list(self.raise_sizes), "max_raises": self.max_raises}
+
+    @classmethod
+    def from_dict(cls, data) -> "BettingAbstraction":
+        return cls(data["stack"], data["blind"], data["raise_sizes"], data["max_raises"])
+
+
+class BettingTree:
+    """
+    every betting sequence of a BettingAbstraction, as flat arrays indexed by node:
+
+    player: who acts (0 small blind, 1 big blind), -1 at terminals
+    street: 0 preflop to 3 river
+    contributions: (nodes, 2) chips each player has put in the hand
+    children: (nodes, actions) child node for every action, -1 if it isn't allowed
+    terminal: NOT_TERMINAL, FOLDED or SHOWDOWN
+    folder: who folded at FOLDED terminals
+    decision_index: index of every decision node (-1 at terminals), an information
+                    set is the row decision_index * num_buckets + bucket
+    """
+
+    def __init__(self, abstraction: BettingAbstraction):
+        self.abstraction = abstraction
+        self._player: List[int] = []
+        self._street: List[int] = []
+        self._contributions: List[tuple] = []
+        self._children: List[List[int]] = []
+        self._terminal: List[int] = []
+        self._folder: List[int] = []
+
+        blind = abstraction.blind
+        self.root = self._build(0, [blind, 2 * blind], 0, {0, 1}, 0)
+
+        self.player = np.array(self._player, dtype=np.int8)
+        self.street = np.array(self._street, dtype=np.int8)
+        self.contributions = np.array(self._contributions, dtype=np.int64)
+        self.children = np.array(self._children, dtype=np.int32)
+        self.terminal = np.array(self._terminal, dtype=np.int8)
+        self.folder = np.array(self._folder, dtype=np.int8)
+
+        decision = self.terminal == NOT_TERMINAL
+        self.decision_index = np.full(len(self.player), -1, dtype=np.int32)
+        self.decision_index[decision] = np.arange(decision.sum())
+        self.num_decisions = int(decision.sum())
+
+        del self._player, self._street, self._contributions, self._children, self._terminal, self._folder
+
+    def __len__(self):
+        return len(self.player)
+
+    def _add_node(self, player, street, contributions, terminal=NOT_TERMINAL, folder=-1):
+        self._player.append(player)
+        self._street.append(street)
+        self._contributions.append(tuple(contributions))
+        self._children.append([-1] * self.abstraction.num_actions)
+        self._terminal.append(terminal)
+        self._folder.append(folder)
+        return len(self._player) - 1
+
+    def _build(self, street, contributions, player, pending, raises):
+        """
+        adds the node where player acts (and everything below it), returns its index
+        """
+        abstraction = self.abstraction
+        stack = abstraction.stack
+        node = self._add_node(player, street, contributions)
+        other = 1 - player
+        to_call = contributions[other] - contributions[player]
+
+        if to_call > 0:
+            self._children[node][FOLD] = self._add_node(-1, street, contributions, FOLDED, player)
+
+        # check or call
+        called = list(contributions)
+        called[player] = min(contributions[other], stack)
+        still_pending = pending - {player}
+        if still_pending:
+            child = self._build(street, called, other, still_pending, raises)
+        elif street == NUM_STREETS - 1 or stack in called:
+            # river is over or someone is all in, the rest of the cards are dealt
+            child = self._add_node(-1, street, called, SHOWDOWN)
+        else:
+            child = self._build(street + 1, called, 0, {0, 1}, 0)
+        self._children[node][CALL] = child
+
+        # raises, only if both players have chips behind
+        if raises < abstraction.max_raises and max(contributions) < stack:
+            pot_after_call = 2 * contributions[other]
+            amounts = set()
+            for size_index, size in enumerate(abstraction.raise_sizes):
+                amount = max(int(size * pot_after_call), 2 * abstraction.blind)
+                if contributions[other] + amount >= stack or amount in amounts:
+                    continue
+                amounts.add(amount)
+                raised = list(contributions)
+                raised[player] = contributions[other] + amount
+                self._children[node][2 + size_index] = self._build(street, raised, other, {other}, raises + 1)
+            raised = list(contributions)
+            raised[player] = stack
+            self._children[node][abstraction.all_in] = self._build(street, raised, other, {other}, raises + 1)
+        return node
+
+    def raise_fraction(self, node, action) -> float:
+        """
+        the raise a raise action makes at node, as a fraction of the pot after calling
+        """
+        child = self.children[node, action]
+        player = self.player[node]
+        contributions = self.contributions[node]
+        amount = self.contributions[child, player] - contributions[1 - player]
+        return amount / max(2 * contributions[1 - player], 1)
+
+
+class MonteCarloBucketer:
+    """
+    buckets a hand by its equity against one random hand, estimated by dealing
+    samples random opponent hands and the missing board cards.
+    equity 0 to 1 is split into num_buckets equal buckets
+    """
+
+    def __init__(self, num_buckets=8, samples=32):
+        self.num_buckets = num_buckets
+        self.samples = samples
+
+    def to_dict(self) -> dict:
+        return {"kind": "monte_carlo", "num_buckets": self.num_buckets, "samples": self.samples}
+
+    def equity(self, hole, board, rng) -> np.ndarray:
+        """
+        hole is (hands, 2) and board (hands, 5) card codes, -1 for board cards
+        not dealt yet. returns every hand's equity against a random hand
+        """
+        hole = np.asarray(hole)
+        board = np.asarray(board)
+        num = len(hole)
+        rows = num * self.samples
+        hole = np.repeat(hole, self.samples, axis=0)
+        board = np.repeat(board, self.samples, axis=0)
+
+        # shuffle the cards we can't see, known cards sort to the end
+        keys = rng.random((rows, 52))
+        known = np.concatenate([hole, board], axis=1)
+        row_index = np.repeat(np.arange(rows), known.shape[1])
+        known_flat = known.ravel()
+        keys[row_index[known_flat >= 0], known_flat[known_flat >= 0]] = 2
+        drawn = np.argsort(keys, axis=1)[:, :7]
+
+        # fill the missing board cards in order, then 2 cards for the opponent
+        missing = board < 0
+        fill_index = np.clip(np.cumsum(missing, axis=1) - 1, 0, 4)
+        full_board = np.where(missing, np.take_along_axis(drawn, fill_index, axis=1), board)
+        opponent = drawn[:, 5:7]
+
+        ours = HandEvaluator.hand_strength_batch(np.concatenate([hole, full_board], axis=1))
+        theirs = HandEvaluator.hand_strength_batch(np.concatenate([opponent, full_board], axis=1))
+        wins = (ours > theirs) + 0.5 * (ours == theirs)
+        return wins.reshape(num, self.samples).mean(axis=1)
+
+    def buckets(self, hole, board, rng) -> np.ndarray:
+        """
+        the bucket of every hand, same arguments as equity
+        """
+        equity = self.equity(hole, board, rng)
+        return np.minimum((equity * self.num_buckets).astype(np.int64), self.num_buckets - 1)
+
+    def deal_buckets(self, holes, boards, rng) -> np.ndarray:
+        """
+        holes (deals, 2, 2) and full boards (deals, 5), returns the (deals, 2, 4)
+        bucket of each player on each street
+        """
+        num = len(holes)
+        shown = [0, 3, 4, 5]
+        hole_rows = np.repeat(holes[:, :, None, :], NUM_STREETS, axis=2).reshape(-1, 2)
+        board_rows = np.full((num, 2, NUM_STREETS, 5), -1, dtype=np.int64)
+        for street, count in enumerate(shown):
+            board_rows[:, :, street, :count] = boards[:, None, :count]
+        buckets = self.buckets(hole_rows, board_rows.reshape(-1, 5), rng)
+        return buckets.reshape(num, 2, NUM_STREETS)
+
+
+def make_bucketer(data):
+    """
+    the bucketer described by a to_dict() result
+    """
+    if data.get("kind") == "table":
+        return CardAbstraction.load(data["path"]) if data.get("path") else default_abstraction()
+    return MonteCarloBucketer(data["num_buckets"], data["samples"])
+
+
+class CFRSolver:
+    """
+    external sampling MCCFR over a BettingTree, see train
+    """
+
+    def __init__(self, abstraction: Optional[BettingAbstraction] = None, bucketer=None, seed=None):
+        self.abstraction = abstraction or BettingAbstraction()
+        self.bucketer = bucketer or MonteCarloBucketer()
+        self.tree = BettingTree(self.abstraction)
+        self.num_buckets = self.bucketer.num_buckets
+        rows = self.tree.num_decisions * self.num_buckets
+        self.regrets = np.zeros((rows, self.abstraction.num_actions))
+        self.strategy_sum = np.zeros((rows, self.abstraction.num_actions))
+        self.iterations = 0
+        self.rng = np.random.default_rng(seed)
+
+        # python lists are faster than numpy for the per node lookups in _traverse
+        self._children = self.tree.children.tolist()
+        self._player = self.tree.player.tolist()
+        self._street = self.tree.street.tolist()
+        self._terminal = self.tree.terminal.tolist()
+        self._folder = self.tree.folder.tolist()
+        self._contributions = self.tree.contributions.tolist()
+        self._decision_index = self.tree.decision_index.tolist()
+        self._legal = [[action for action, child in enumerate(children) if child >= 0]
+                       for children in self._children]
+
+    def __getstate__(self):
+        # the lists are rebuilt from the tree after unpickling
+        state = {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state["abstraction"], state["bucketer"])
+        self.__dict__.update(state)
+
+    def deal(self, num_deals):
+        """
+        random deals: (deals, 2, 2) hole cards, (deals, 5) boards,
+        the (deals, 2, 4) buckets and the showdown winner of each deal (-1 for a tie)
+        """
+        cards = np.argsort(self.rng.random((num_deals, 52)), axis=1)[:, :9]
+        holes = cards[:, :4].reshape(num_deals, 2, 2)
+        boards = cards[:, 4:]
+        buckets = self.bucketer.deal_buckets(holes, boards, self.rng)
+        strengths = [HandEvaluator.hand_strength_batch(np.concatenate([holes[:, player], boards], axis=1))
+                     for player in range(2)]
+        winners = np.where(strengths[0] > strengths[1], 0, np.where(strengths[1] > strengths[0], 1, -1))
+        return holes, boards, buckets, winners
+
+    def _strategy(self, row, legal):
+        """
+        regret matching: play actions in proportion to their positive regret
+        """
+        regrets = self.regrets[row]
+        positive = [max(regrets[action], 0.0) for action in legal]
+        total = sum(positive)
+        if total > 0:
+            return [value / total for value in positive]
+        return [1.0 / len(legal)] * len(legal)
+
+    def _traverse(self, node, traverser, buckets, winner, weight):
+        """
+        returns the value of node for traverser, updating the traverser's regrets
+        and the opponent's strategy sums on the way
+        """
+        terminal = self._terminal[node]
+        if terminal == FOLDED:
+            folder = self._folder[node]
+            return -self._contributions[node][traverser] if folder == traverser \
+                else self._contributions[node][folder]
+        if terminal == SHOWDOWN:
+            if winner < 0:
+                return 0.0
+            return self._contributions[node][1 - traverser] if winner == traverser \
+                else -self._contributions[node][traverser]
+
+        player = self._player[node]
+        row = self._decision_index[node] * self.num_buckets + buckets[player][self._street[node]]
+        legal = self._legal[node]
+        strategy = self._strategy(row, legal)
+        children = self._children[node]
+
+        if player == traverser:
+            values = [self._traverse(children[action], traverser, buckets, winner, weight) for action in legal]
+            node_value = sum(p * v for p, v in zip(strategy, values))
+            regrets = self.regrets[row]
+            for action, value in zip(legal, values):
+                # regret matching+, regrets never go below zero
+                regrets[action] = max(regrets[action] + value - node_value, 0.0)
+            return node_value
+
+        # the opponent plays one action sampled from its strategy,
+        # the average strategy is weighted by the iteration (linear averaging)
+        sums = self.strategy_sum[row]
+        for action, probability in zip(legal, strategy):
+            sums[action] += weight * probability
+        action = legal[self._sample(strategy)]
+        return self._traverse(children[action], traverser, buckets, winner, weight)
+
+    def _sample(self, strategy):
+        pick = self.rng.random()
+        total = 0.0
+        for index, probability in enumerate(strategy):
+            total += probability
+            if pick < total:
+                return index
+        return len(strategy) - 1
+
+    def run_iterations(self, iterations, deal_batch=256):
+        """
+        run iterations in this process, every iteration is one deal traversed once for each player
+        """
+        done = 0
+        while done < iterations:
+            num_deals = min(deal_batch, iterations - done)
+            _, _, buckets, winners = self.deal(num_deals)
+            buckets = buckets.tolist()
+            winners = winners.tolist()
+            for deal in range(num_deals):
+                self.iterations += 1
+                for traverser in (0, 1):
+                    self._traverse(self.tree.root, traverser, buckets[deal], winners[deal], self.iterations)
+            done += num_deals
+
+    def train(self, iterations, processes=1, round_iterations=1000, checkpoint_path=None, verbose=False):
+        """
+        run iterations, split into rounds of round_iterations. with processes > 1
+        every process runs round_iterations / processes iterations from the same
+        regrets each round and the changes are added together. saves a checkpoint
+        after every round if checkpoint_path is set
+        """
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+        try:
+            done = 0
+            while done < iterations:
+                round_size = min(round_iterations, iterations - done)
+                if pool is None:
+                    self.run_iterations(round_size)
+                else:
+                    self._parallel_round(pool, processes, round_size)
+                done += round_size
+                if checkpoint_path is not None:
+                    self.save_checkpoint(checkpoint_path)
+                if verbose:
+                    print(f"{self.iterations} iterations")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def _parallel_round(self, pool, processes, iterations):
+        shares = [iterations // processes + (i < iterations % processes) for i in range(processes)]
+        seeds = self.rng.integers(0, 2 ** 63, size=processes)
+        jobs = [(self, share, int(seed)) for share, seed in zip(shares, seeds) if share > 0]
+        for regret_change, strategy_change in pool.map(_run_worker, jobs):
+            self.regrets += regret_change
+            self.strategy_sum += strategy_change
+        np.maximum(self.regrets, 0, out=self.regrets)
+        self.iterations += iterations
+
+    def average_strategy(self) -> np.ndarray:
+        """
+        the (rows, actions) average strategy, rows never reached are uniform over the legal actions
+        """
+        legal = np.repeat(self.tree.children[self.tree.terminal == NOT_TERMINAL] >= 0, self.num_buckets, axis=0)
+        sums = self.strategy_sum * legal
+        totals = sums.sum(axis=1, keepdims=True)
+        uniform = legal / legal.sum(axis=1, keepdims=True)
+        return np.where(totals > 0, sums / np.maximum(totals, 1e-12), uniform)
+
+    def save_checkpoint(self, path):
+        """
+        save everything needed to keep training, written to a temporary file first
+        so a crash never leaves half a checkpoint
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = {"version": CHECKPOINT_VERSION, "iterations": self.iterations,
+                "abstraction": self.abstraction.to_dict(), "bucketer": self.bucketer.to_dict()}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez(file, regrets=self.regrets, strategy_sum=self.strategy_sum, meta=json.dumps(meta))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, seed=None) -> "CFRSolver":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != CHECKPOINT_VERSION:
+                raise ValueError(f"unsupported checkpoint version {meta['version']}")
+            solver = cls(BettingAbstraction.from_dict(meta["abstraction"]), make_bucketer(meta["bucketer"]), seed)
+            solver.regrets = data["regrets"]
+            solver.strategy_sum = data["strategy_sum"]
+        solver.iterations = meta["iterations"]
+        return solver
+
+    def save_blueprint(self, path):
+        """
+        save the average strategy for BlueprintCPU
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = {"version": CHECKPOINT_VERSION, "iterations": self.iterations,
+                "abstraction": self.abstraction.to_dict(), "bucketer": self.bucketer.to_dict()}
+        with open(path, "wb") as file:
+            np.savez(file, strategy=self.average_strategy().astype(np.float32), meta=json.dumps(meta))
+
+
+def _run_worker(job):
+    """
+    runs in a worker process: iterations from the given solver state,
+    returns how much the regrets and strategy sums changed
+    """
+    solver, iterations, seed = job
+    solver.rng = np.random.default_rng(seed)
+    regrets = solver.regrets.copy()
+    strategy_sum = solver.strategy_sum.copy()
+    solver.run_iterations(iterations)
+    return solver.regrets - regrets, solver.strategy_sum - strategy_sum
+
+
+class Blueprint:
+    """
+    a solved strategy loaded from save_blueprint, strategy(node, bucket) is one row lookup
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != CHECKPOINT_VERSION:
+                raise ValueError(f"unsupported blueprint version {meta['version']}")
+            self.strategy_table = data["strategy"]
+        self.abstraction = BettingAbstraction.from_dict(meta["abstraction"])
+        self.bucketer = make_bucketer(meta["bucketer"])
+        self.tree = BettingTree(self.abstraction)
+        self.num_buckets = self.bucketer.num_buckets
+        self.iterations = meta["iterations"]
+
+    @staticmethod
+    def is_current(path, stack=None, blind=None) -> bool:
+        """
+        True if path is a blueprint this version can load, solved for this stack
+        and blind when they are given (the tree's pot sizes depend on them)
+        """
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+        except (OSError, ValueError, KeyError):
+            return False
+        abstraction = meta.get("abstraction", {})
+        return (meta.get("version") == CHECKPOINT_VERSION
+                and (stack is None or abstraction.get("stack") == stack)
+                and (blind is None or abstraction.get("blind") == blind))
+
+    def strategy(self, node, bucket) -> np.ndarray:
+        """
+        probability of every abstract action at node for a hand in bucket
+        """
+        return self.strategy_table[self.tree.decision_index[node] * self.num_buckets + bucket]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="solve heads up poker with MCCFR")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--round-iterations", type=int, default=1000,
+                        help="iterations between merging the processes and checkpointing")
+    parser.add_argument("--checkpoint", help="checkpoint file, training resumes from it if it exists")
+    parser.add_argument("--output", required=True, help="where to write the blueprint")
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--blind", type=int, default=10)
+    parser.add_argument("--raise-sizes", type=float, nargs="+", default=[0.5, 1.0])
+    parser.add_argument("--max-raises", type=int, default=2)
+    parser.add_argument("--buckets", type=int, default=8)
+    parser.add_argument("--bucket-table", help="card_abstraction.py table to bucket with instead of Monte Carlo equity")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        solver = CFRSolver.load_checkpoint(args.checkpoint, seed=args.seed)
+    else:
+        abstraction = BettingAbstraction(args.stack, args.blind, args.raise_sizes, args.max_raises)
+        if args.bucket_table:
+            bucketer = CardAbstraction.load(args.bucket_table)
+        else:
+            bucketer = MonteCarloBucketer(args.buckets)
+        solver = CFRSolver(abstraction, bucketer, seed=args.seed)
+    print(f"{len(solver.tree)} nodes, {solver.regrets.shape[0]} information sets")
+
+    solver.train(args.iterations, args.processes, args.round_iterations, args.checkpoint, verbose=True)
+    solver.save_blueprint(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,10 @@ class Action(Enum):
     BIG_BLIND = "bb"
     ANTE = "ante"
 
+# small int codes for actions, used when actions are stored in binary (hand_history.py)
+ACTION_CODES = {action: code for code, action in enumerate(Action)}
+CODE_ACTIONS = list(Action)
+
 class Street(Enum):
     """
     current poker street
@@ -0,0 +1,476 @@
+"""
+baseCPU.py is written by us.
+
+the base every CPU is built on. it has the player bookkeeping (stack,
+contribuition, action histories), the pypokerengine message handlers and
+count_outs that each CPU used to carry its own copy of.
+
+it also keeps the cards it has been told about parsed between messages: the
+hole cards once per hand and the community cards as they are dealt, so a
+decision only parses card strings it hasn't seen yet. the Engine and the
+TableManager skip the strings altogether for CPUs built on this (NATIVE_CARDS)
+and hand over their Card objects, see cards_for. the per decision values
+go in one DecisionState (slots, reused for every decision) instead of being
+pulled out of valid_actions and round_state by each CPU.
+
+    class myCPU(BaseCPU):
+        def declare_action(self, valid_actions, hole_card, round_state):
+            decision = self.read_decision(valid_actions, hole_card, round_state)
+            if decision.call_amount == 0:
+                return 'check', 0
+            return 'call', decision.call_amount
+"""
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
+
+from pypokerengine.players import BasePokerPlayer
+
+from game_engine.constants import Action, PlayerState, Street
+from game_engine.cpu.opponent_model import OpponentModel
+from game_engine.deck import Card
+
+# assuming that round_state is a dictionary with the following structure:
+
+# {
+#     'street': 'preflop',  # Current phase (preflop, flop, turn, river)
+#     'next_player': 1,  # Index of the next player to act
+#     'small_blind_pos': 0,  # Position of small blind player
+#     'big_blind_pos': 1,  # Position of big blind player
+#     'community_card': ['H1', 'D5', 'C9'],  # Cards on the table
+#     'pot': {
+#         'main': 300,  # Total chips in the pot
+#         'side': []  # Side pots (if applicable)
+#     },
+#     'seats': [
+#         {
+#             'name': 'Player1',
+#             'stack': 800,  # Chips left
+#             'state': 'participating',  # 'participating', 'folded', 'allin'
+#         },
+#         {
+#             'name': 'cpu',
+#             'stack': 1200,
+#             'state': 'participating'
+#         }
+#     ],
+#     'action_histories': {
+#         'preflop': [
+#             {'name': 'player1', 'action': 'small_blind', 'amount': 10},
+#             {'name': 'ai', 'action': 'big_blind', 'amount': 20},
+#             {'name': 'player1', 'action': 'call', 'amount': 10},
+#             {'name': 'ai', 'action': 'check', 'amount': 0}
+#         ],
+#         'flop': [],
+#         'turn': [],
+#         'river': []
+#     }
+# }
+
+STREET_INDEX = {'preflop': 0, 'flop': 1, 'turn': 2, 'river': 3}
+
+# every card string seen so far, cards are never changed once made so all the CPUs share them
+CARD_CACHE: Dict[str, Card] = {}
+
+
+def parse_card_str(card_str: str) -> Card:
+    """
+    Helper function to parse card strings into Card objects.
+    Card strings are in format like '2H', 'AD', 'KC', etc.
+    where first char is rank and second char is suit.
+    Also handles '10H' format for ten.
+    """
+    card = CARD_CACHE.get(card_str)
+    if card is not None:
+        return card
+
+    # Get suit and rank from the string
+    if len(card_str) == 3:  # Handle '10H' format
+        suit = card_str[2].upper()  # 'H'
+        rank = card_str[0:2]  # '10'
+    else:  # Handle '2H' format
+        suit = card_str[1].upper()
+        rank = card_str[0]
+
+    card = Card(suit=suit, card_val=rank)
+    CARD_CACHE[card_str] = card
+    return card
+
+
+def to_card(card: Union[Card, str]) -> Card:
+    """
+    a Card as it is, a card string parsed
+    """
+    return card if isinstance(card, Card) else parse_card_str(card)
+
+
+def cards_for(player, cards: Sequence[Card]) -> list:
+    """
+    cards in the form player takes them: the Card objects for CPUs that take them
+    (NATIVE_CARDS, every BaseCPU), card strings for any other PyPokerEngine player
+    """
+    if getattr(player, 'NATIVE_CARDS', False):
+        return list(cards)
+    return [str(card) for card in cards]
+
+
+class DecisionState:
+    """
+    what a CPU needs for one declare_action, each CPU has one and fills it in again
+    for every decision
+    """
+    __slots__ = ('street', 'pot', 'call_amount', 'can_check', 'can_raise', 'min_raise', 'max_raise',
+                 'hole_cards', 'community_cards')
+
+    def __init__(self):
+        self.street = 'preflop'
+        self.pot = 0
+        self.call_amount = 0
+        self.can_check = False
+        self.can_raise = False
+        # max_raise is capped at our stack
+        self.min_raise = 0
+        self.max_raise = 0
+        self.hole_cards: List[Card] = []
+        self.community_cards: List[Card] = []
+
+
+class BaseCPU(BasePokerPlayer):
+    """
+    shared state and message handling for the CPUs, subclasses write declare_action
+    """
+    # the messages can give us Card objects instead of card strings (see cards_for)
+    NATIVE_CARDS = True
+
+    # BasePokerPlayer has no slots so instances still get a __dict__ (subclasses keep
+    # adding their own fields to it), the shared fields live in the slots
+    __slots__ = ('hole_cards', 'stack', 'state', 'round_action_histories', 'contribuition', 'action_histories',
+                 'game_info', 'name', 'round_count', 'seats', 'street', 'community_cards', 'opponent_actions',
+                 'opponent_model', 'hole_card_keys', 'community_card_keys', 'hole_codes', 'community_codes',
+                 'decision')
+
+    def __init__(self, initial_stack):
+        self.hole_cards: List[Card] = []
+        self.stack = initial_stack
+        self.state = PlayerState.ACTIVE
+        self.round_action_histories: List[Optional[List[Dict[str, Any]]]] = [None] * 4
+        self.contribuition = 0
+        self.action_histories: List[Dict[str, Any]] = []
+
+        # Game state tracking
+        self.game_info: Optional[Dict[str, Any]] = None
+        self.name = "cpu"  # Set name to "ai" for testing
+        self.round_count = 0
+        self.seats: List[Dict[str, Any]] = []
+        self.street: Optional[str] = None
+        self.community_cards: List[Card] = []
+        self.opponent_actions: List[Dict[str, Any]] = []
+        # running stats on every player seen, kept between rounds
+        self.opponent_model = OpponentModel()
+
+        # what hole_cards and community_cards were made from (card strings or Cards), and their int codes
+        self.hole_card_keys: list = []
+        self.community_card_keys: list = []
+        self.hole_codes: List[int] = []
+        self.community_codes: List[int] = []
+        self.decision = DecisionState()
+
+    def add_hole_card(self, cards: List[Card]):
+        if len(self.hole_cards) != 0:
+            raise ValueError("Player already has hold cards")
+        if len(cards) != 2:
+            raise ValueError("Player can osnly have 2 hole cards")
+        if not all(isinstance(card, Card) for card in cards):
+            raise ValueError("Player can only have cards as hole cards")
+        self.hole_cards = cards
+        self.hole_card_keys = list(cards)
+        self.hole_codes = [card.to_int() for card in cards]
+
+    def clear_hole_cards(self):
+        self.hole_cards = []
+        self.hole_card_keys = []
+        self.hole_codes = []
+
+    def add_to_stack(self, amount):
+        self.stack += amount
+
+    def collect_bet(self, amount: float | int):
+        if self.stack < amount:
+            raise ValueError("Player cannot afford this bet")
+        self.stack -= amount
+        self.contribuition += amount
+
+    def reset_contribuition(self):
+        self.contribuition = 0
+
+    def is_active(self):
+        return self.state == PlayerState.ACTIVE
+
+    def is_folded(self):
+        return self.state == PlayerState.FOLDED
+
+    def is_allin(self):
+        return self.state == PlayerState.ALLIN
+
+    def is_waiting(self):
+        return self.state == PlayerState.WAITING
+
+    def is_winner(self):
+        return self.state == PlayerState.WINNER
+
+    def add_action_history(
+        self,
+        action: Action,
+        chip_amount: Union[int, float] = 0,
+        add_amount: Union[int, float] = 0,
+        sb_amount: Union[int, float] = 0,
+        bb_amount: Union[int, float] = 0,
+    ):
+        """
+        add action to player's action history
+        """
+        history = None
+        if action == Action.FOLD:
+            history = {"action": action, "name": self.name, "stack": self.stack}
+        elif action == Action.CALL:
+            pay_history = [
+                h
+                for h in self.action_histories
+                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
+            ]
+            last_pay = pay_history[-1] if len(pay_history) != 0 else None
+            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
+            history = {
+                "name": self.name,
+                "action": action,
+                "amount": chip_amount,
+                "paid": chip_amount - last_pay_amount,
+                "stack": self.stack
+            }
+        elif action == Action.RAISE:
+            pay_history = [
+                h
+                for h in self.action_histories
+                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
+            ]
+            last_pay = pay_history[-1] if len(pay_history) != 0 else None
+            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
+            history = {
+                "name": self.name,
+                "action": action,
+                "amount": chip_amount,
+                "paid": chip_amount - last_pay_amount,
+                "add_amount": add_amount,
+                "stack": self.stack
+            }
+        elif action == Action.SMALL_BLIND:
+            assert sb_amount is not None
+            add_amount = sb_amount
+            history = {
+                "action": action,
+                "amount": sb_amount,
+                "add_amount": add_amount,
+                "name": self.name,
+                "paid": sb_amount,
+                "stack": self.stack
+            }
+        elif action == Action.BIG_BLIND:
+            assert bb_amount is not None
+            add_amount = bb_amount
+            history = {
+                "action": action,
+                "amount": bb_amount,
+                "add_amount": add_amount,
+                "name": self.name,
+                "paid": bb_amount,
+                "stack": self.stack
+            }
+        elif action == Action.CHECK:
+            history = {
+                "action": action,
+                "name": self.name,
+                "stack": self.stack
+            }
+
+        if history is not None:
+            self.action_histories.append(history)
+
+    def save_round_action_histories(self, street: Street):
+        """
+        Save the current action histories to the round action histories for the given street.
+        If there are already histories for this street, append to them instead of overwriting.
+        """
+        if self.round_action_histories[street.value] is None:
+            self.round_action_histories[street.value] = []
+
+        histories = cast(List[dict], self.round_action_histories[street.value])
+        histories.extend(self.action_histories)
+        self.action_histories = []
+
+    def clear_action_histories(self):
+        self.round_action_histories = [None for _ in range(4)]
+        self.action_histories = []
+
+    @staticmethod
+    def count_outs(hole_cards, community_cards):
+        """
+        Count the number of outs for the current hand.
+        """
+        # Initialize counters for suits and ranks
+        suits = {'H': 0, 'D': 0, 'C': 0, 'S': 0}
+        ranks = {2: 0, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0, 13: 0, 14: 0}
+
+        # Count occurrences of each suit and rank
+        for card in hole_cards:
+            suits[card.suit] += 1
+            rank = card.get_card_rank()
+            ranks[rank] += 1
+
+        for card in community_cards:
+            suits[card.suit] += 1
+            rank = card.get_card_rank()
+            ranks[rank] += 1
+
+        # Check for flush draw
+        flush_outs = 0
+        for suit, count in suits.items():
+            if count == 4:
+                flush_outs = 9  # 9 cards of the same suit remaining
+
+        # Check for straight draw
+        straight_outs = 0
+        for i in range(2, 11):
+            if ranks[i] > 0 and ranks[i+1] > 0 and ranks[i+2] > 0 and ranks[i+3] > 0:
+                straight_outs = 8  # 8 cards to complete the straight
+
+        # Check for overcards
+        overcard_outs = 0
+        if len(hole_cards) == 2:
+            max_hole_rank = max(card.get_card_rank() for card in hole_cards)
+            for rank in range(max_hole_rank + 1, 15):
+                if ranks[rank] == 0:
+                    overcard_outs += 1
+
+        # Return total outs
+        return flush_outs + straight_outs + overcard_outs
+
+    def update_cards(self, hole_card: Optional[Sequence[Union[Card, str]]], community_card: Sequence[Union[Card, str]]) -> None:
+        """
+        bring hole_cards and community_cards up to date with the cards of a message (card
+        strings or Cards). only cards we haven't seen yet are looked at, when they don't
+        carry on from what we have (a new hand) we start again from the first card
+        """
+        if hole_card is not None and (hole_card != self.hole_card_keys or len(self.hole_cards) != len(hole_card)):
+            self.hole_cards = [to_card(card) for card in hole_card]
+            self.hole_card_keys = list(hole_card)
+            self.hole_codes = [card.to_int() for card in self.hole_cards]
+
+        known = len(self.community_card_keys)
+        if len(self.community_cards) == known and community_card == self.community_card_keys:
+            return
+        if len(community_card) < known or community_card[:known] != self.community_card_keys \
+                or len(self.community_cards) != known:
+            # not the board we have, start again
+            self.community_cards = []
+            self.community_card_keys = []
+            self.community_codes = []
+            known = 0
+        for key in community_card[known:]:
+            card = to_card(key)
+            self.community_cards.append(card)
+            self.community_card_keys.append(key)
+            self.community_codes.append(card.to_int())
+
+    def read_decision(self, valid_actions: List[Dict[str, Any]], hole_card: List[str], round_state: Dict[str, Any]) -> DecisionState:
+        """
+        fill in the DecisionState for a declare_action call
+        """
+        self.update_cards(hole_card, round_state['community_card'])
+
+        decision = self.decision
+        decision.street = round_state.get('street', self.street)
+        decision.pot = round_state['pot']['main']
+        decision.call_amount = valid_actions[1]['amount']  # Index 1 is always call
+        decision.can_check = len(valid_actions) > 3 and valid_actions[3]['action'] == 'check'
+        decision.can_raise = len(valid_actions) > 2
+        if decision.can_raise:
+            raise_amounts = valid_actions[2]['amount']
+            decision.min_raise = raise_amounts['min']
+            decision.max_raise = min(raise_amounts['max'], self.stack)
+        else:
+            decision.min_raise = decision.max_raise = 0
+        decision.hole_cards = self.hole_cards
+        decision.community_cards = self.community_cards
+        return decision
+
+    @staticmethod
+    def raise_amount(decision: DecisionState):
+        """
+        2x the minimum raise, or all we can put in if that's less
+        """
+        return min(decision.max_raise, decision.min_raise * 2)
+
+    def receive_game_start_message(self, game_info: Dict[str, Any]) -> None:
+        """
+        Called when a new game begins. Store initial game settings.
+        """
+        self.game_info = game_info
+        self.stack = game_info['rule']['initial_stack']
+
+    def receive_round_start_message(self, round_count: int, hole_card: List[str], seats: List[Dict[str, Any]]) -> None:
+        """
+        Called at the beginning of each round.
+        """
+        self.round_count = round_count
+        self.update_cards(hole_card, [])
+        self.seats = seats
+        self.opponent_model.start_hand(seat['name'] for seat in seats)
+        self.opponent_actions = []
+
+        # Reset action histories for new round
+        self.round_action_histories = [None] * 4
+        self.action_histories = []
+
+    def receive_street_start_message(self, street: str, round_state: Dict[str, Any]) -> None:
+        """
+        Called at the start of each street.
+        """
+        self.street = street
+        self.update_cards(None, round_state['community_card'])
+
+        # Save action histories for the previous street if any
+        street_index = STREET_INDEX.get(street)
+        if street_index is None:
+            return
+
+        if self.action_histories:
+            self.round_action_histories[street_index-1] = self.action_histories
+            self.action_histories = []
+
+    def receive_game_update_message(self, new_action: Dict[str, Any], round_state: Dict[str, Any]) -> None:
+        """
+        Called after any player takes an action.
+        """
+        self.opponent_model.update(new_action.get('player_name'), new_action.get('action'),
+                                   round_state.get('street', self.street))
+
+        # Track opponent actions
+        if new_action.get('player_name') != self.name:
+            self.opponent_actions.append(new_action)
+
+        # Update community cards
+        self.update_cards(None, round_state['community_card'])
+
+    def receive_round_result_message(self, winners: List[Dict[str, Any]], hand_info: Dict[str, Any], round_state: Dict[str, Any]) -> None:
+        """
+        Called when the round is over and winners are determined.
+        """
+        # Check if we won
+        for winner in winners:
+            if isinstance(winner, dict) and winner.get('name') == self.name:
+                self.state = PlayerState.WINNER
+                break
+
+        # Update stack sizes
+        for seat in round_state['seats']:
+            if seat.get('name') == self.name:
+                self.stack = seat['stack']
+                break
@@ -0,0 +1,127 @@
+"""
+blueprintCPU.py is written by us.
+
+CPU that plays the blueprint strategy solved by cfr_solver.py. it follows the
+hand through the abstract betting tree (every action it is told about moves it
+to the closest abstract action), buckets its cards and reads its strategy for
+that node and bucket, one row lookup per decision.
+"""
+from typing import Any, Dict, List, Optional, Union
+import os
+
+import numpy as np
+
+from game_engine.cfr_solver import Blueprint, FOLD, CALL, NOT_TERMINAL
+from game_engine.cpu.baseCPU import BaseCPU
+from game_engine.cpu.think_time import think
+
+STREETS = ('preflop', 'flop', 'turn', 'river')
+
+
+class BlueprintCPU(BaseCPU):
+    """
+    CPU that plays a solved Blueprint, it checks or calls whenever the hand has
+    left the abstract tree
+    """
+
+    def __init__(self, initial_stack, blueprint_path=None, blueprint: Optional[Blueprint] = None, seed=None):
+        super().__init__(initial_stack)
+        self.name = "blueprint_cpu"
+        if blueprint is None and blueprint_path is not None and os.path.exists(blueprint_path):
+            blueprint = Blueprint(blueprint_path)
+        self.blueprint = blueprint
+        self.rng = np.random.default_rng(seed)
+        # where the hand is in the abstract betting tree, None once it has left it
+        self.node: Optional[int] = None
+        # 0 when we are the small blind (first to act), 1 when we are the big blind
+        self.position: Optional[int] = None
+
+    def receive_round_start_message(self, round_count: int, hole_card: List[str], seats: List[Dict[str, Any]]) -> None:
+        super().receive_round_start_message(round_count, hole_card, seats)
+        self.node = self.blueprint.tree.root if self.blueprint is not None else None
+        self.position = None
+
+    def receive_game_update_message(self, new_action: Dict[str, Any], round_state: Dict[str, Any]) -> None:
+        super().receive_game_update_message(new_action, round_state)
+        self.node = self.follow_action(self.node, new_action, round_state['pot']['main'])
+
+    def follow_action(self, node: Optional[int], new_action: Dict[str, Any], pot_after) -> Optional[int]:
+        """
+        the abstract node after new_action, raises go to the abstract raise with the
+        closest pot fraction (or a call when no raise is left in the tree)
+        """
+        if node is None or self.blueprint is None:
+            return None
+        tree = self.blueprint.tree
+        if tree.terminal[node] != NOT_TERMINAL:
+            return None
+
+        action = new_action.get('action')
+        children = tree.children[node]
+        if action == 'fold':
+            return None
+        if action in ('call', 'check'):
+            return int(children[CALL])
+        if action == 'raise':
+            amount = new_action.get('amount', 0) or 0
+            fraction = amount / max(pot_after - amount, 1)
+            raises = [a for a in range(CALL + 1, len(children)) if children[a] >= 0]
+            if not raises:
+                return int(children[CALL])
+            # compare sizes by ratio, a 2x overbet is as far from 1x as 0.5x is
+            closest = min(raises, key=lambda a: abs(np.log(max(tree.raise_fraction(node, a), 1e-3) /
+                                                            max(fraction, 1e-3))))
+            return int(children[closest])
+        return None
+
+    def find_position(self, round_state: Dict[str, Any]) -> Optional[int]:
+        for seat_index, seat in enumerate(round_state['seats']):
+            if seat.get('name') == self.name:
+                return 0 if round_state.get('blind_pos') == seat_index else 1
+        return None
+
+    def bucket(self, hole_card: List[str], community_card: List[str]) -> int:
+        self.update_cards(hole_card, community_card)
+        hole = np.array([self.hole_codes])
+        board = np.full((1, 5), -1, dtype=np.int64)
+        board[0, :len(self.community_codes)] = self.community_codes
+        return int(self.blueprint.bucketer.buckets(hole, board, self.rng)[0])
+
+    def action_probabilities(self, hole_card: List[str], round_state: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        the blueprint strategy for this decision, None if the hand isn't on the abstract tree
+        """
+        if self.blueprint is None or self.node is None:
+            return None
+        if self.position is None:
+            self.position = self.find_position(round_state)
+        tree = self.blueprint.tree
+        street = STREETS.index(round_state.get('street', 'preflop'))
+        if tree.terminal[self.node] != NOT_TERMINAL or tree.player[self.node] != self.position \
+                or tree.street[self.node] != street:
+            return None
+        return self.blueprint.strategy(self.node, self.bucket(hole_card, round_state['community_card']))
+
+    def declare_action(self, valid_actions: List[Dict[str, Any]], hole_card: List[str], round_state: Dict[str, Any]) -> tuple[str, Union[int, float]]:
+        """
+        sample an action from the blueprint strategy, check or call off the tree
+        """
+        think(1.0)
+
+        call_amount = valid_actions[1]['amount']
+        raise_amounts = valid_actions[2]['amount']
+        probabilities = self.action_probabilities(hole_card, round_state)
+        if probabilities is None:
+            return ('call', call_amount) if call_amount > 0 else ('check', 0)
+
+        action = int(self.rng.choice(len(probabilities), p=probabilities / probabilities.sum()))
+        if action == FOLD and call_amount > 0:
+            return 'fold', 0
+        if action in (FOLD, CALL) or raise_amounts['max'] <= 0:
+            return ('call', call_amount) if call_amount > 0 else ('check', 0)
+
+        if action == self.blueprint.abstraction.all_in:
+            return 'raise', raise_amounts['max']
+        pot = round_state['pot']['main']
+        amount = self.blueprint.abstraction.raise_sizes[action - CALL - 1] * (pot + call_amount)
+        return 'raise', int(min(max(amount, raise_amounts['min']), raise_amounts['max']))
@@ -1,57 +1,60 @@
-from pypokerengine.players import BasePokerPlayer
-from game_engine.deck import Card
-from game_engine.constants import Action, PlayerState, Street
-from typing import List, Union, Dict, Any, Optional, cast
+from game_engine.constants import PlayerState
+from typing import List, Union, Dict, Any, Optional
 import numpy as np
 import pickle
 import os
 import random
 from collections import defaultdict
-import time
+from game_engine import instrumentation
+from game_engine.cpu.think_time import think
+from game_engine.cpu.opponent_model import OpponentModel
+from game_engine.cpu.replay_buffer import ReplayBuffer
+from game_engine.cpu.baseCPU import BaseCPU, parse_card_str
+from game_engine.card_abstraction import CardAbstraction, default_abstraction
 
-def parse_card_str(card_str: str) -> Card:
+# how many values each extract_features feature after the hand bucket can take
+# (pot odds, position, street, stack to pot, opponent aggression, hand rank)
+FEATURE_SIZES = (11, 2, 4, 11, 6, 11)
+
+# version of the saved model, a model saved by another version isn't loaded.
+# unversioned models (a bare Q-table) keyed the hand by its number of outs
+MODEL_VERSION = 2
+
+
+def discretize_features(hand_bucket, pot, call_amount, position, street, stack, opponent_aggression, hand_rank):
     """
-    Helper function to parse card strings into Card objects.
-    Card strings are in format like '2H', 'AD', 'KC', etc.
-    where first char is rank and second char is suit.
-    Also handles '10H' format for ten.
+    the Q-table features from the raw numbers, in extract_features order.
+    the arguments can be numpy arrays (one entry per decision), then so is every feature.
+    the buckets are whole numbers but can come back as floats, int() them
     """
-    # Get suit and rank from the string
-    if len(card_str) == 3:  # Handle '10H' format
-        suit = card_str[2].upper()  # 'H'
-        rank = card_str[0:2]  # '10'
-    else:  # Handle '2H' format
-        suit = card_str[1].upper()
-        rank = card_str[0]
-    
-    return Card(suit=suit, card_val=rank)
+    # Discretize continuous values to reduce state space, in whole number arithmetic so
+    # plain numbers don't go through numpy arrays (floor division buckets the same as int())
+    total = pot + call_amount
+    pot_odds_bucket = call_amount * 10 // (total + (total == 0))  # 0-1 pot odds, bucketed into 10 categories
+    stack_to_pot_bucket = np.minimum(stack // (pot + 1), 10)  # 0-10+ stack to pot ratio, 1 added to avoid division by zero
+    aggression_bucket = np.minimum(opponent_aggression * 2 // 1, 5)  # 0-2.5+ aggression, 6 categories
+    return (hand_bucket, pot_odds_bucket, position, street, stack_to_pot_bucket, aggression_bucket, hand_rank)
+
 
-class MLCPU(BasePokerPlayer):
+class MLCPU(BaseCPU):
     """
     CPU that uses reinforcement learning to improve its poker strategy over time.
     Implements Q-learning to learn optimal actions in different game states.
     """
-    def __init__(self, initial_stack, model_path=None, learning_rate=0.1, discount_factor=0.95, epsilon=0.1):
-        self.hole_cards: List[Card] = []
-        self.stack = initial_stack
-        self.state = PlayerState.ACTIVE
-        self.round_action_histories: List[Optional[List[Dict[str, Any]]]] = [None] * 4
-        self.contribuition = 0
-        self.action_histories: List[Dict[str, Any]] = []
-        
-        # Game state tracking
-        self.game_info: Optional[Dict[str, Any]] = None
+    def __init__(self, initial_stack, model_path=None, learning_rate=0.1, discount_factor=0.95, epsilon=0.1,
+                 card_abstraction: Optional[CardAbstraction] = None, replay_capacity=10000, replay_batch_size=32,
+                 seed=None):
+        super().__init__(initial_stack)
         self.name = "ml_cpu"
-        self.round_count = 0
-        self.seats: List[Dict[str, Any]] = []
-        self.street: Optional[str] = None
-        self.community_cards: List[Card] = []
-        self.opponent_actions: List[Dict[str, Any]] = []
+        self.opponent_name: Optional[str] = None
         
         # ML parameters
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.epsilon = epsilon  # Exploration rate
+
+        # Hand strength buckets (see card_abstraction.py), the default table is loaded when first needed
+        self.card_abstraction = card_abstraction
         
         # Use the provided model path or default to the project's models directory
         if model_path is None:
@@ -69,207 +72,32 @@ class MLCPU(BasePokerPlayer):
         self.current_state = None
         self.current_action = None
         
-        # Track game history for training
-        self.game_history = []
+        # Track the round's decisions for training
         self.current_round_history = []
-    
-    def add_hole_card(self, cards: List[Card]):
-        if len(self.hole_cards) != 0:
-            raise ValueError("Player already has hold cards")
-        if len(cards) != 2:
-            raise ValueError("Player can osnly have 2 hole cards")
-        if not all(isinstance(card, Card) for card in cards):
-            raise ValueError("Player can only have cards as hole cards")
-        self.hole_cards = cards
-
-    def clear_hole_cards(self):
-        self.hole_cards = []
-
-    def add_to_stack(self, amount):
-        self.stack += amount
-    
-    def collect_bet(self, amount: float | int):
-        if self.stack < amount:
-            raise ValueError("Player cannot afford this bet")
-        self.stack -= amount
-        self.contribuition += amount
-
-    def reset_contribuition(self):
-        self.contribuition = 0
-
-    def is_active(self):
-        return self.state == PlayerState.ACTIVE
-
-    def is_folded(self):
-        return self.state == PlayerState.FOLDED
-
-    def is_allin(self):
-        return self.state == PlayerState.ALLIN
-
-    def is_waiting(self):
-        return self.state == PlayerState.WAITING
-
-    def is_winner(self):
-        return self.state == PlayerState.WINNER
-    
-    def add_action_history(
-        self,
-        action: Action,
-        chip_amount: Union[int, float] = 0,
-        add_amount: Union[int, float] = 0,
-        sb_amount: Union[int, float] = 0,
-        bb_amount: Union[int, float] = 0,
-    ):
-        """
-        add action to player's action history
-        """
-        history = None
-        if action == Action.FOLD:
-            history = {"action": action, "name": self.name, "stack": self.stack}
-        elif action == Action.CALL:
-            pay_history = [
-                h
-                for h in self.action_histories
-                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
-            ]
-            last_pay = pay_history[-1] if len(pay_history) != 0 else None
-            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
-            history = {
-                "name": self.name,
-                "action": action,
-                "amount": chip_amount,
-                "paid": chip_amount - last_pay_amount,
-                "stack": self.stack
-            }
-        elif action == Action.RAISE:
-            pay_history = [
-                h
-                for h in self.action_histories
-                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
-            ]
-            last_pay = pay_history[-1] if len(pay_history) != 0 else None
-            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
-            history = {
-                "name": self.name,
-                "action": action,
-                "amount": chip_amount,
-                "paid": chip_amount - last_pay_amount,
-                "add_amount": add_amount,
-                "stack": self.stack
-            }
-        elif action == Action.SMALL_BLIND:
-            assert sb_amount is not None
-            add_amount = sb_amount
-            history = {
-                "action": action,
-                "amount": sb_amount,
-                "add_amount": add_amount,
-                "name": self.name,
-                "paid": sb_amount,
-                "stack": self.stack
-            }
-        elif action == Action.BIG_BLIND:
-            assert bb_amount is not None
-            add_amount = bb_amount
-            history = {
-                "action": action,
-                "amount": bb_amount,
-                "add_amount": add_amount,
-                "name": self.name,
-                "paid": bb_amount,
-                "stack": self.stack
-            }
-        elif action == Action.CHECK:
-            history = {
-                "action": action,
-                "name": self.name,
-                "stack": self.stack
-            }
-
-        if history is not None:
-            self.action_histories.append(history)
-            # Add to current round history for training
-            self.current_round_history.append({
-                "state": self.current_state,
-                "action": self.current_action,
-                "reward": 0  # Will be updated at the end of the round
-            })
-
-    def save_round_action_histories(self, street: Street):
-        """
-        Save the current action histories to the round action histories for the given street.
-        If there are already histories for this street, append to them instead of overwriting.
-        """
-        if self.round_action_histories[street.value] is None:
-            self.round_action_histories[street.value] = []
-        
-        histories = cast(List[dict], self.round_action_histories[street.value])
-        histories.extend(self.action_histories)
-        self.action_histories = []
-
-    def clear_action_histories(self):
-        self.round_action_histories = [None for _ in range(4)]
-        self.action_histories = []
 
-    @staticmethod
-    def count_outs(hole_cards, community_cards):
-        """
-        Count the number of outs for the current hand.
-        """
-        # Initialize counters for suits and ranks
-        suits = {'H': 0, 'D': 0, 'C': 0, 'S': 0}
-        ranks = {2: 0, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0, 13: 0, 14: 0}
-        
-        # Count occurrences of each suit and rank
-        for card in hole_cards:
-            suits[card.suit] += 1
-            rank = int(card.card_val) if card.card_val.isdigit() else {'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}[card.card_val]
-            ranks[rank] += 1
-            
-        for card in community_cards:
-            suits[card.suit] += 1
-            rank = int(card.card_val) if card.card_val.isdigit() else {'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}[card.card_val]
-            ranks[rank] += 1
-            
-        # Check for flush draw
-        flush_outs = 0
-        for suit, count in suits.items():
-            if count == 4:
-                flush_outs = 9  # 9 cards of the same suit remaining
-                
-        # Check for straight draw
-        straight_outs = 0
-        for i in range(2, 11):
-            if ranks[i] > 0 and ranks[i+1] > 0 and ranks[i+2] > 0 and ranks[i+3] > 0:
-                straight_outs = 8  # 8 cards to complete the straight
-                
-        # Check for overcards
-        overcard_outs = 0
-        if len(hole_cards) == 2:
-            hole_ranks = [int(card.card_val) if card.card_val.isdigit() else {'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}[card.card_val] for card in hole_cards]
-            max_hole_rank = max(hole_ranks)
-            for rank in range(max_hole_rank + 1, 15):
-                if ranks[rank] == 0:
-                    overcard_outs += 1
-                    
-        # Return total outs
-        return flush_outs + straight_outs + overcard_outs
+        # Experience replay: the last replay_capacity transitions, Q-values are updated from
+        # prioritized batches of them at the end of every round (see replay_buffer.py)
+        self.replay_buffer = ReplayBuffer(replay_capacity, seed=seed)
+        self.replay_batch_size = replay_batch_size
+        # Q-table keys <-> the ids the buffer stores
+        self.state_ids: Dict[Any, int] = {}
+        self.state_keys: List[Any] = []
+        self.action_ids: Dict[Any, int] = {}
+        self.action_keys: List[Any] = []
+        self.rounds_played = 0
     
     def extract_features(self, hole_cards, community_cards, pot, call_amount, round_state):
         """
         Extract numerical features from the current game state.
         Returns a tuple that can be used as a key in the Q-table.
         """
-        # Count outs as a measure of hand strength
-        outs = self.count_outs(hole_cards, community_cards)
+        # Hand strength bucket, one table lookup
+        hand_bucket = self.hand_bucket(hole_cards, community_cards)
         
-        # Calculate pot odds
         # Handle case where call_amount is a dictionary with min and max values
         if isinstance(call_amount, dict) and 'min' in call_amount:
             call_amount = call_amount['min']  # Use minimum call amount for pot odds calculation
         
-        pot_odds = call_amount / (pot + call_amount) if pot + call_amount > 0 else 0
-        
         # Calculate position (0 = small blind, 1 = big blind)
         position = 0
         if round_state.get('small_blind_pos') == 1:  # We're small blind
@@ -281,30 +109,30 @@ class MLCPU(BasePokerPlayer):
         street_map = {'preflop': 0, 'flop': 1, 'turn': 2, 'river': 3}
         street = street_map.get(round_state.get('street', 'preflop'), 0)
         
-        # Calculate stack to pot ratio
-        stack_to_pot = self.stack / (pot + 1)  # Add 1 to avoid division by zero
-        
-        # Calculate opponent aggression (ratio of raises to calls)
+        # Calculate opponent aggression (ratio of raises to calls) from the running opponent stats
         opponent_aggression = 0
-        if self.opponent_actions:
-            raises = sum(1 for action in self.opponent_actions if action.get('action') == 'raise')
-            calls = sum(1 for action in self.opponent_actions if action.get('action') == 'call')
-            opponent_aggression = raises / (calls + 1)  # Add 1 to avoid division by zero
+        if self.opponent_name is not None:
+            stats = self.opponent_model.get(self.opponent_name)
+            opponent_aggression = sum(stats.raises) / (sum(stats.calls) + 1)  # Add 1 to avoid division by zero
             
         # Evaluate hand strength
         from game_engine.hand_evaluator import HandEvaluator
         hand_strength = HandEvaluator.hand_eval(hole_cards, community_cards)
         hand_rank = hand_strength['hand_rank']
         
-        # Discretize continuous values to reduce state space
-        outs_bucket = min(outs // 2, 10)  # 0-20 outs, bucketed into 11 categories
-        pot_odds_bucket = int(pot_odds * 10)  # 0-1 pot odds, bucketed into 10 categories
-        stack_to_pot_bucket = min(int(stack_to_pot), 10)  # 0-10+ stack to pot ratio
-        aggression_bucket = min(int(opponent_aggression * 2), 5)  # 0-2.5+ aggression, bucketed into 6 categories
-        
         # Return a tuple of discretized features
-        return (outs_bucket, pot_odds_bucket, position, street, stack_to_pot_bucket, aggression_bucket, hand_rank)
+        features = discretize_features(hand_bucket, pot, call_amount, position, street, self.stack,
+                                       opponent_aggression, hand_rank)
+        return tuple(int(feature) for feature in features)
     
+    def hand_bucket(self, hole_cards, community_cards):
+        """
+        The hand strength bucket of the cards, 0 is the weakest
+        """
+        if self.card_abstraction is None:
+            self.card_abstraction = default_abstraction()
+        return self.card_abstraction.bucket(hole_cards, community_cards)
+
     def get_action_from_q_table(self, state, valid_actions):
         """
         Get the best action from the Q-table based on the current state.
@@ -378,7 +206,8 @@ class MLCPU(BasePokerPlayer):
             reward += 10
             
         # Add penalty for folding with a strong hand
-        if self.state == PlayerState.FOLDED and self.count_outs(self.hole_cards, self.community_cards) > 10:
+        if self.state == PlayerState.FOLDED and len(self.hole_cards) == 2 and \
+                self.hand_bucket(self.hole_cards, self.community_cards) >= 2 * self.card_abstraction.num_buckets // 3:
             reward -= 5
             
         return reward
@@ -388,15 +217,14 @@ class MLCPU(BasePokerPlayer):
         Declare action based on Q-learning.
         """
         
-        # Convert hole cards from strings
-        hole_cards = [parse_card_str(card_str) for card_str in hole_card]
-            
-        # Convert community cards from strings
-        community_cards = [parse_card_str(card_str) for card_str in round_state['community_card']]
-        
+        # Cards parsed so far this hand
+        decision = self.read_decision(valid_actions, hole_card, round_state)
+        hole_cards = decision.hole_cards
+        community_cards = decision.community_cards
+
         # Get the current pot and call amount
-        pot = round_state['pot']['main']
-        call_amount = valid_actions[1]['amount']  # Index 1 is always call
+        pot = decision.pot
+        call_amount = decision.call_amount
         
         # Count high cards
         high_cards = [10, 11, 12, 13, 14]
@@ -404,28 +232,20 @@ class MLCPU(BasePokerPlayer):
         
         # Preflop logic
         if round_state['street'] == 'preflop':
-            if valid_actions[3]['action'] == 'check' and call_amount == 0:
+            if decision.can_check and call_amount == 0:
                 if num_high_cards >= 1:
-                    if len(valid_actions) > 2:  # Raise is available
-                        raise_action = valid_actions[2]
-                        min_raise = raise_action['amount']['min']
-                        max_raise = min(raise_action['amount']['max'], self.stack)
-                        raise_amount = min(max_raise, min_raise * 2)  # Raise 2x minimum
-                        return 'raise', raise_amount
+                    if decision.can_raise:
+                        return 'raise', self.raise_amount(decision)  # Raise 2x minimum
                 return 'check', 0
             elif num_high_cards >= 2:
-                if len(valid_actions) > 2:  # Raise is available
-                    raise_action = valid_actions[2]
-                    min_raise = raise_action['amount']['min']
-                    max_raise = min(raise_action['amount']['max'], self.stack)
-                    raise_amount = min(max_raise, min_raise * 2)  # Raise 2x minimum
-                    return 'raise', raise_amount
+                if decision.can_raise:
+                    return 'raise', self.raise_amount(decision)  # Raise 2x minimum
             elif num_high_cards >= 1 and call_amount < 0.10 * self.stack:
                 return 'call', call_amount
             elif call_amount == 0:
                 return 'check', 0
             # Add extra delay before folding to make it more natural
-            time.sleep(1.0)
+            think(1.0)
             return 'fold', 0
         
         # Extract features from the current state
@@ -435,25 +255,23 @@ class MLCPU(BasePokerPlayer):
         # Get the best action from the Q-table
         action, amount = self.get_action_from_q_table(state, valid_actions)
         self.current_action = (action, amount)
+        # Kept for the replay buffer when the round is over
+        self.current_round_history.append({"state": state, "action": self.current_action})
         
         # If facing a check (call_amount is 0), decide between check and raise
         if call_amount == 0:
             if action == 'raise':
                 return action, amount
             # If we have a strong hand, raise
-            if state[0] >= 3 or num_high_cards >= 2:  # Good number of outs or strong high cards
-                if len(valid_actions) > 2:  # Raise is available
-                    raise_action = valid_actions[2]
-                    min_raise = raise_action['amount']['min']
-                    max_raise = min(raise_action['amount']['max'], self.stack)
-                    raise_amount = min(max_raise, min_raise * 2)  # Raise 2x minimum
-                    return 'raise', raise_amount
-            time.sleep(0.5)
+            if state[0] >= 3 or num_high_cards >= 2:  # Decent hand strength bucket or strong high cards
+                if decision.can_raise:
+                    return 'raise', self.raise_amount(decision)  # Raise 2x minimum
+            think(0.5)
             return 'check', 0
         
         # Add extra delay before folding to make it more natural
         if action == 'fold':
-            time.sleep(1.0)
+            think(1.0)
         
         return action, amount
 
@@ -461,68 +279,25 @@ class MLCPU(BasePokerPlayer):
         """
         Called when a new game begins. Store initial game settings.
         """
-        self.game_info = game_info
-        self.stack = game_info['rule']['initial_stack']
-        
-        # Find our seat
-        for seat in game_info['seats']:
-            if seat['name'] == self.name:
-                break
-                
-        # Reset game history
-        self.game_history = []
+        super().receive_game_start_message(game_info)
 
     def receive_round_start_message(self, round_count: int, hole_card: List[str], seats: List[Dict[str, Any]]) -> None:
         """
         Called at the beginning of each round.
         """
-        self.round_count = round_count
-        self.hole_cards = [parse_card_str(card_str) for card_str in hole_card]
-        self.seats = seats
-        self.community_cards = []
-        self.opponent_actions = []
-        
-        # Reset action histories for new round
-        self.round_action_histories = [None] * 4
-        self.action_histories = []
-        
+        super().receive_round_start_message(round_count, hole_card, seats)
+
         # Reset current round history
         self.current_round_history = []
 
-    def receive_street_start_message(self, street: str, round_state: Dict[str, Any]) -> None:
-        """
-        Called at the start of each street.
-        """
-        self.street = street
-        self.community_cards = [parse_card_str(card_str) for card_str in round_state['community_card']]
-        
-        # Save action histories for the previous street if any
-        if street == 'preflop':
-            street_index = 0
-        elif street == 'flop':
-            street_index = 1
-        elif street == 'turn':
-            street_index = 2
-        elif street == 'river':
-            street_index = 3
-        else:
-            return
-            
-        if self.action_histories:
-            self.round_action_histories[street_index-1] = self.action_histories
-            self.action_histories = []
-
     def receive_game_update_message(self, new_action: Dict[str, Any], round_state: Dict[str, Any]) -> None:
         """
         Called after any player takes an action.
         """
-        # Track opponent actions
+        super().receive_game_update_message(new_action, round_state)
         if new_action.get('player_name') != self.name:
-            self.opponent_actions.append(new_action)
-        
-        # Update community cards
-        self.community_cards = [parse_card_str(card_str) for card_str in round_state['community_card']]
-        
+            self.opponent_name = new_action.get('player_name')
+
         # Update Q-values for the previous state-action pair if we have one
         if self.current_state and self.current_action:
             # Extract features for the new state
@@ -543,51 +318,95 @@ class MLCPU(BasePokerPlayer):
         """
         Called when the round is over and winners are determined.
         """
-        # Check if we won
-        for winner in winners:
-            if isinstance(winner, dict) and winner.get('name') == self.name:
-                self.state = PlayerState.WINNER
-                break
+        super().receive_round_result_message(winners, hand_info, round_state)
 
-        # Update stack sizes
-        for seat in round_state['seats']:
-            if seat.get('name') == self.name:
-                self.stack = seat['stack']
-                break
-                
         # Calculate reward for the round
         reward = self.calculate_reward(winners, hand_info)
         
-        # Update Q-values for all state-action pairs in the round
-        for i, history in enumerate(self.current_round_history):
-            state = history['state']
-            action = history['action']
-            
-            # For the last action, use the final reward
-            # For earlier actions, use a discounted reward
-            if i == len(self.current_round_history) - 1:
-                final_reward = reward
-            else:
-                # Use a small negative reward for intermediate actions to encourage efficiency
-                final_reward = -0.1
-                
-            # Extract features for the next state (use the next state in history or a dummy state)
-            if i < len(self.current_round_history) - 1:
-                next_state = self.current_round_history[i + 1]['state']
-            else:
-                # For the last action, use a dummy terminal state
-                next_state = (-1, -1, -1, -1, -1, -1)
-                
-            # Update Q-value
-            self.update_q_value(state, action, final_reward, next_state)
-            
-        # Add the round history to the game history
-        self.game_history.append(self.current_round_history)
-        
+        # Store the round's transitions and learn from a batch of past ones
+        self.remember_round(reward)
+        self.replay()
+        self.rounds_played += 1
+
         # Save the model periodically
-        if self.model_path and len(self.game_history) % 10 == 0:
+        if self.model_path and self.rounds_played % 10 == 0:
             self.save_model(self.model_path)
-    
+
+    def state_id(self, state):
+        """
+        The replay buffer id of a Q-table state, given out the first time it's seen.
+        """
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self.state_ids[state] = len(self.state_keys)
+            self.state_keys.append(state)
+        return state_id
+
+    def action_id(self, action):
+        """
+        The replay buffer id of a Q-table (action, amount) key.
+        """
+        action_id = self.action_ids.get(action)
+        if action_id is None:
+            action_id = self.action_ids[action] = len(self.action_keys)
+            self.action_keys.append(action)
+        return action_id
+
+    def remember_round(self, reward):
+        """
+        Add the round's decisions to the replay buffer as transitions. The last one gets the
+        round's reward and ends the episode, the earlier ones a small negative reward to
+        encourage efficiency. Preflop decisions are made by rule and have no state.
+        """
+        history = [entry for entry in self.current_round_history
+                   if entry['state'] is not None and entry['action'] is not None]
+        if not history:
+            return
+        state_ids = [self.state_id(entry['state']) for entry in history]
+        action_ids = [self.action_id(entry['action']) for entry in history]
+        rewards = [-0.1] * (len(history) - 1) + [reward]
+        next_state_ids = state_ids[1:] + [-1]
+        dones = [False] * (len(history) - 1) + [True]
+        self.replay_buffer.add_batch(state_ids, action_ids, rewards, next_state_ids, dones)
+
+    def replay(self, batch_size=None):
+        """
+        One batched Q-learning update from a prioritized sample of the replay buffer.
+        The targets and TD errors are worked out for the whole batch at once, a state-action
+        pair drawn more than once is updated once with the mean of its TD errors.
+
+        Returns:
+            The TD errors of the batch (empty if there is nothing to replay)
+        """
+        if len(self.replay_buffer) == 0:
+            return np.zeros(0)
+        indices, batch, weights = self.replay_buffer.sample(batch_size or self.replay_batch_size)
+        state_ids, action_ids, rewards, next_state_ids, dones = batch
+
+        # Read the Q-values the batch needs from the Q-table, unknown next states are worth 0
+        current_q = np.array([self.q_table[self.state_keys[state_id]][self.action_keys[action_id]]
+                              for state_id, action_id in zip(state_ids.tolist(), action_ids.tolist())])
+        next_max_q = np.zeros(len(indices))
+        for i, next_state_id in enumerate(next_state_ids.tolist()):
+            if next_state_id >= 0:
+                next_q = self.q_table.get(self.state_keys[next_state_id])
+                if next_q:
+                    next_max_q[i] = max(next_q.values())
+
+        # Q-learning update rule, weighted for the prioritized sampling
+        targets = rewards + self.discount_factor * next_max_q * ~dones
+        td_errors = targets - current_q
+        pairs = state_ids * len(self.action_keys) + action_ids
+        _, first, inverse = np.unique(pairs, return_index=True, return_inverse=True)
+        updates = np.bincount(inverse, weights=weights * td_errors) / np.bincount(inverse)
+        new_q = current_q[first] + self.learning_rate * updates
+        for state_id, action_id, q_value in zip(state_ids[first].tolist(), action_ids[first].tolist(),
+                                                new_q.tolist()):
+            self.q_table[self.state_keys[state_id]][self.action_keys[action_id]] = q_value
+
+        self.replay_buffer.update_priorities(indices, td_errors)
+        return td_errors
+
     def save_model(self, path):
         """
         Save the Q-table to a file.
@@ -595,15 +414,21 @@ class MLCPU(BasePokerPlayer):
         # Ensure the directory exists
         os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
         with open(path, 'wb') as f:
-            pickle.dump(dict(self.q_table), f)
+            pickle.dump({"version": MODEL_VERSION, "q_table": dict(self.q_table)}, f)
             
     def load_model(self, path):
         """
-        Load the Q-table from a file.
+        Load the Q-table from a file. A model saved with different features is refused
+        (the CPU keeps its current Q-table) since its states mean something else.
+        Returns True if the model was loaded.
         """
         with open(path, 'rb') as f:
-            q_table_dict = pickle.load(f)
-            self.q_table = defaultdict(lambda: defaultdict(float), q_table_dict) 
+            model = pickle.load(f)
+        if not isinstance(model, dict) or model.get("version") != MODEL_VERSION:
+            instrumentation.event("mlcpu.stale_model", path=path)
+            return False
+        self.q_table = defaultdict(lambda: defaultdict(float), model["q_table"])
+        return True
             
     def train_model(self, num_rounds=100, opponent_strategy="random"):
         """
@@ -628,6 +453,12 @@ class MLCPU(BasePokerPlayer):
         # Create a simulated opponent
         from game_engine.cpu.baselineCPU import baselineCPU
         opponent = baselineCPU(original_stack)
+
+        # The simulated opponent gets its own stats, the real ones are put back after training
+        original_opponent_model = self.opponent_model
+        original_opponent_name = self.opponent_name
+        self.opponent_model = OpponentModel()
+        self.opponent_name = "player"
         
         # Simulate rounds
         completed_rounds = 0
@@ -640,6 +471,7 @@ class MLCPU(BasePokerPlayer):
             self.community_cards = []
             self.opponent_actions = []
             self.current_round_history = []
+            self.opponent_model.start_hand(["player", self.name])
             
             # Deal hole cards
             from game_engine.deck import Deck
@@ -657,7 +489,7 @@ class MLCPU(BasePokerPlayer):
                     "street": street,
                     "small_blind_pos": 0,
                     "big_blind_pos": 1,
-                    "community_card": [str(card) for card in self.community_cards],
+                    "community_card": list(self.community_cards),
                     "pot": {"main": pot},
                     "seats": [
                         {"name": "player", "stack": 1000, "state": "participating"},
@@ -672,7 +504,7 @@ class MLCPU(BasePokerPlayer):
                     self.community_cards.extend(deck.draw_cards(1))
                 
                 # Update round state with new community cards
-                round_state["community_card"] = [str(card) for card in self.community_cards]
+                round_state["community_card"] = list(self.community_cards)
                 
                 # Simulate betting rounds
                 valid_actions = [
@@ -682,15 +514,8 @@ class MLCPU(BasePokerPlayer):
                     {"action": "check", "amount": 0}
                 ]
                 
-                # CPU acts
-                action, amount = self.declare_action(valid_actions, [str(card) for card in self.hole_cards], round_state)
-                
-                # Record action in history
-                self.current_round_history.append({
-                    "state": self.current_state,
-                    "action": self.current_action,
-                    "reward": 0  # Will be updated at the end of the round
-                })
+                # CPU acts (declare_action records the decision in the round history)
+                action, amount = self.declare_action(valid_actions, list(self.hole_cards), round_state)
                 
                 # Opponent acts based on strategy
                 opponent_action = "call"
@@ -735,6 +560,7 @@ class MLCPU(BasePokerPlayer):
                     "action": opponent_action,
                     "amount": opponent_amount
                 })
+                self.opponent_model.update("player", opponent_action, street)
                 
                 # Check if round is over (someone folded)
                 if self.state == PlayerState.FOLDED or opponent.state == PlayerState.FOLDED:
@@ -771,31 +597,9 @@ class MLCPU(BasePokerPlayer):
                     opponent.add_to_stack(pot // 2)
                     reward = 0
             
-            # Update Q-values for all state-action pairs in the round
-            for i, history in enumerate(self.current_round_history):
-                state = history['state']
-                action = history['action']
-                
-                # For the last action, use the final reward
-                # For earlier actions, use a discounted reward
-                if i == len(self.current_round_history) - 1:
-                    final_reward = reward
-                else:
-                    # Use a small negative reward for intermediate actions to encourage efficiency
-                    final_reward = -0.1
-                    
-                # Extract features for the next state (use the next state in history or a dummy state)
-                if i < len(self.current_round_history) - 1:
-                    next_state = self.current_round_history[i + 1]['state']
-                else:
-                    # For the last action, use a dummy terminal state
-                    next_state = (-1, -1, -1, -1, -1, -1)
-                    
-                # Update Q-value
-                self.update_q_value(state, action, final_reward, next_state)
-            
-            # Add the round history to the game history
-            self.game_history.append(self.current_round_history)
+            # Store the round's transitions and learn from a batch of past ones
+            self.remember_round(reward)
+            self.replay()
             
             # Increment completed rounds counter
             completed_rounds += 1
@@ -810,6 +614,8 @@ class MLCPU(BasePokerPlayer):
         
         # Restore original epsilon
         self.epsilon = original_epsilon
+        self.opponent_model = original_opponent_model
+        self.opponent_name = original_opponent_name
         
         # Save the final model
         if self.model_path:
@@ -0,0 +1,292 @@
+"""
+neuralCPU.py is written by us.
+
+CPU that scores fold / call / raise with a small neural network (an MLP) and
+picks the best one. inference is plain numpy so TensorFlow is never imported
+when playing, the network is trained by neural_trainer.py from hands played by
+the headless TableManager.
+
+features are encoded for many decisions at once (encode_features) so the
+TableManager can decide for every table in one predict call (see NeuralBatchPolicy).
+"""
+from typing import Any, Dict, List, Optional, Union
+import os
+
+import numpy as np
+
+from game_engine.cpu.baseCPU import BaseCPU
+from game_engine.cpu.equityCPU import equityCPU
+from game_engine.cpu.think_time import think
+
+# the network has one output per action, call is a check when there is nothing to call
+ACTIONS = ("fold", "call", "raise")
+FOLD, CALL, RAISE = range(3)
+
+STREETS = ('preflop', 'flop', 'turn', 'river')
+
+# card features (17) + street (4) + betting features (8) + raises this hand (5)
+FEATURE_SIZE = 34
+# raise counts are capped here, a fourth raise doesn't say much more than the third
+MAX_RAISES = 3
+
+HIDDEN_SIZES = (64, 32)
+
+
+def count_raises(action_histories, name) -> List[int]:
+    """
+    the raises of the hand so far from round_state['action_histories'], the
+    opponents' raises on each street then the player's own (the raises input
+    of encode_features). the actions can be Action members or their values
+    """
+    counts = [0] * 5
+    for street, street_name in enumerate(STREETS):
+        for history in action_histories.get(street_name, ()):
+            action = history['action']
+            if getattr(action, 'value', action) == 'raise':
+                counts[4 if history['name'] == name else street] += 1
+    return counts
+
+
+def encode_features(cards, street, pot, call_amount, stack, invested, opponents, opponent_stack, raises):
+    """
+    the network input for many decisions at once, every argument has one entry per decision:
+
+    cards: (decisions, 7) card codes (see Card.to_int), hole cards first, -1 for cards not dealt
+    street: 0 preflop to 3 river
+    pot, call_amount, stack: chips in the pot, to call, and behind
+    invested: chips the player has put in the pot this hand
+    opponents: opponents still in the hand
+    opponent_stack: the biggest opponent stack
+    raises: (decisions, 5) raises this hand, the opponents' on each street then the player's own
+
+    chip amounts are divided by the chips the player started the hand with
+    so the network sees the same numbers at any stack size.
+    returns a float32 array of shape (decisions, FEATURE_SIZE)
+    """
+    cards = np.asarray(cards)
+    num = len(cards)
+    dealt = cards >= 0
+    codes = np.where(dealt, cards, 0)
+    suits = codes // 13
+    ranks = codes % 13  # 0 is a 2, 12 is an ace
+
+    rank_counts = ((ranks[:, :, None] == np.arange(13)) & dealt[:, :, None]).sum(axis=1)
+    suit_counts = ((suits[:, :, None] == np.arange(4)) & dealt[:, :, None]).sum(axis=1)
+
+    # made hand from the rank and suit counts (straight flushes count as flushes)
+    pairs = (rank_counts >= 2).sum(axis=1)
+    trips = (rank_counts >= 3).any(axis=1)
+    quads = (rank_counts >= 4).any(axis=1)
+    flush = suit_counts.max(axis=1) >= 5
+    present = rank_counts > 0
+    # the ace also plays low in a straight
+    present = np.concatenate([present[:, 12:13], present], axis=1)
+    window_counts = sum(present[:, i:i + 10] for i in range(5))
+    straight = (window_counts == 5).any(axis=1)
+    hand_class = np.select(
+        [quads, trips & (pairs >= 2), flush, straight, trips, pairs >= 2, pairs == 1],
+        [7, 6, 5, 4, 3, 2, 1], 0)
+
+    hole_ranks = ranks[:, :2]
+    high = hole_ranks.max(axis=1)
+    low = hole_ranks.min(axis=1)
+    pocket_pair = hole_ranks[:, 0] == hole_ranks[:, 1]
+    board_rank_counts = ((ranks[:, 2:, None] == np.arange(13)) & dealt[:, 2:, None]).sum(axis=1)
+    # how many of the board cards match a hole card
+    hits = np.take_along_axis(board_rank_counts, hole_ranks, axis=1)
+    hole_hits = np.where(pocket_pair, hits[:, 0], hits.sum(axis=1))
+    board_pairs = (board_rank_counts >= 2).sum(axis=1)
+
+    card_features = [
+        high / 12, low / 12,
+        suits[:, 0] == suits[:, 1],
+        pocket_pair,
+        (high - low) / 12,
+        hand_class / 7,
+        pairs / 3,
+        trips, quads, flush, straight,
+        suit_counts.max(axis=1) == 4,
+        (window_counts == 4).any(axis=1),
+        np.minimum(equityCPU.count_outs_batch(cards), 20) / 20,
+        hole_hits / 3,
+        board_pairs / 2,
+        dealt[:, 2:].sum(axis=1) / 5,
+    ]
+
+    street = np.asarray(street)
+    street_features = [street == i for i in range(4)]
+
+    pot = np.asarray(pot, dtype=np.float64)
+    call_amount = np.asarray(call_amount, dtype=np.float64)
+    stack = np.asarray(stack, dtype=np.float64)
+    invested = np.asarray(invested, dtype=np.float64)
+    chips = np.maximum(stack + invested, 1)
+    betting_features = [
+        np.minimum(pot / chips, 5) / 5,
+        np.minimum(call_amount / chips, 1),
+        stack / chips,
+        invested / chips,
+        call_amount / np.maximum(pot + call_amount, 1),
+        np.minimum(np.asarray(opponent_stack, dtype=np.float64) / chips, 5) / 5,
+        np.asarray(opponents) / 5,
+        call_amount == 0,
+    ]
+
+    # how the hand has been bet, a raise on an earlier street says something about the opponent's range
+    raises = np.minimum(np.asarray(raises, dtype=np.float64).reshape(num, 5), MAX_RAISES) / MAX_RAISES
+    raise_features = list(raises.T)
+
+    features = np.empty((num, FEATURE_SIZE), dtype=np.float32)
+    for i, column in enumerate(card_features + street_features + betting_features + raise_features):
+        features[:, i] = column
+    return features
+
+
+def choose_actions(values, call_amounts, can_raise):
+    """
+    the best allowed action index (FOLD, CALL or RAISE) for every row of network outputs,
+    folding isn't allowed when there is nothing to call
+    """
+    values = np.array(values, dtype=np.float64)
+    values[np.asarray(call_amounts) <= 0, FOLD] = -np.inf
+    values[~np.asarray(can_raise, dtype=bool), RAISE] = -np.inf
+    return values.argmax(axis=1)
+
+
+def raise_size(pot, min_raise, max_raise):
+    """
+    raises are half the pot, kept between the minimum and all in
+    """
+    return int(min(max(pot // 2, min_raise), max_raise))
+
+
+class ValueNetwork:
+    """
+    MLP from the features to the value (in starting stacks) of each action,
+    relu hidden layers and a linear output
+    """
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray]):
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+
+    @classmethod
+    def create(cls, hidden_sizes=HIDDEN_SIZES, seed=None) -> "ValueNetwork":
+        """
+        a new network with random (He initialized) weights
+        """
+        rng = np.random.default_rng(seed)
+        sizes = [FEATURE_SIZE, *hidden_sizes, len(ACTIONS)]
+        weights = [rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out)) for n_in, n_out in zip(sizes, sizes[1:])]
+        biases = [np.zeros(n_out) for n_out in sizes[1:]]
+        return cls(weights, biases)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        (decisions, FEATURE_SIZE) features to (decisions, 3) action values
+        """
+        hidden = features
+        for weights, biases in zip(self.weights[:-1], self.biases[:-1]):
+            hidden = np.maximum(hidden @ weights + biases, 0)
+        return hidden @ self.weights[-1] + self.biases[-1]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {}
+        for i, (weights, biases) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"] = weights
+            arrays[f"b{i}"] = biases
+        # np.savez adds .npz to paths that don't end with it
+        with open(path, "wb") as file:
+            np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, path) -> "ValueNetwork":
+        with np.load(path) as arrays:
+            num_layers = len(arrays.files) // 2
+            weights = [arrays[f"w{i}"] for i in range(num_layers)]
+            biases = [arrays[f"b{i}"] for i in range(num_layers)]
+        if weights[0].shape[0] != FEATURE_SIZE:
+            raise ValueError(f"{path} was trained on {weights[0].shape[0]} features, expected {FEATURE_SIZE}")
+        return cls(weights, biases)
+
+    @staticmethod
+    def is_current(path) -> bool:
+        """
+        True if path is a network trained on the features encode_features makes now
+        """
+        try:
+            with np.load(path) as arrays:
+                return arrays["w0"].shape[0] == FEATURE_SIZE
+        except (OSError, ValueError, KeyError):
+            return False
+
+
+class NeuralCPU(BaseCPU):
+    """
+    CPU that plays the action its ValueNetwork scores highest
+    """
+
+    def __init__(self, initial_stack, model_path=None, network: Optional[ValueNetwork] = None):
+        super().__init__(initial_stack)
+        self.name = "neural_cpu"
+        self.model_path = model_path
+        if network is None:
+            if model_path is not None and os.path.exists(model_path):
+                network = ValueNetwork.load(model_path)
+            else:
+                network = ValueNetwork.create()
+        self.network = network
+        # our stack when the hand started, to work out what we've put in this hand
+        self.hand_start_stack = initial_stack
+
+    def receive_round_start_message(self, round_count: int, hole_card: List[str], seats: List[Dict[str, Any]]) -> None:
+        super().receive_round_start_message(round_count, hole_card, seats)
+        for seat in seats:
+            if seat.get('name') == self.name:
+                self.hand_start_stack = seat['stack']
+                break
+        else:
+            self.hand_start_stack = self.stack
+
+    def encode_decision(self, valid_actions, hole_card, round_state) -> np.ndarray:
+        """
+        the features for one declare_action call, shape (1, FEATURE_SIZE)
+        """
+        self.update_cards(hole_card, round_state['community_card'])
+        codes = self.hole_codes + self.community_codes
+        cards = np.full((1, 7), -1, dtype=np.int16)
+        cards[0, :len(codes)] = codes
+
+        stack = self.stack
+        opponents = 0
+        opponent_stack = 0
+        for seat in round_state['seats']:
+            if seat.get('name') == self.name:
+                stack = seat['stack']
+            elif seat.get('state') not in ('folded',):
+                opponents += 1
+                opponent_stack = max(opponent_stack, seat['stack'])
+
+        street = STREETS.index(round_state.get('street', 'preflop'))
+        invested = max(self.hand_start_stack - stack, 0)
+        raises = count_raises(round_state.get('action_histories', {}), self.name)
+        return encode_features(cards, [street], [round_state['pot']['main']], [valid_actions[1]['amount']],
+                               [stack], [invested], [opponents], [opponent_stack], [raises])
+
+    def declare_action(self, valid_actions: List[Dict[str, Any]], hole_card: List[str], round_state: Dict[str, Any]) -> tuple[str, Union[int, float]]:
+        """
+        score every action with the network and play the best one
+        """
+        think(1.0)
+
+        call_amount = valid_actions[1]['amount']
+        raise_amounts = valid_actions[2]['amount']
+        values = self.network.predict(self.encode_decision(valid_actions, hole_card, round_state))
+        action = choose_actions(values, [call_amount], [raise_amounts['max'] > 0])[0]
+
+        if action == RAISE:
+            return 'raise', raise_size(round_state['pot']['main'], raise_amounts['min'], raise_amounts['max'])
+        if action == CALL:
+            return ('call', call_amount) if call_amount > 0 else ('check', 0)
+        return 'fold', 0
@@ -0,0 +1,190 @@
+"""
+neural_trainer.py is written by us.
+
+trains NeuralCPU's ValueNetwork on the CPU from hands played by the headless
+TableManager. every generation the current network plays itself on many tables
+(with some random actions to explore), each decision is labelled with the chips
+the player won or lost in that hand, then the network is fitted so the value
+of the action taken gets closer to that result.
+
+the default trainer is numpy (no extra dependencies), backend="keras" fits
+with TensorFlow instead (imported only then, GPUs hidden). run it from the src directory:
+
+    python -m game_engine.cpu.neural_trainer --generations 10 --hands 5000
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import numpy as np
+
+from game_engine.cpu.neuralCPU import ValueNetwork, ACTIONS
+from game_engine.table_manager import TableManager, NeuralBatchPolicy
+
+# where the Engine looks for the NeuralCPU weights
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                  "models", "neural_cpu.npz")
+
+
+def collect_samples(network: ValueNetwork, num_hands, num_tables=64, num_players=2, epsilon=0.1,
+                    initial_stack=1000, blind=10, seed=None):
+    """
+    play at least num_hands hands with the network in every seat, returns
+    (features, actions, returns) arrays with one row per decision, returns are
+    the chips won in the hand divided by the starting stack
+    """
+    policy = NeuralBatchPolicy(network, epsilon=epsilon, record=True, seed=seed)
+    samples = []
+
+    def hand_over(table, chips_won):
+        samples.extend(policy.finish_hand(table.table_id, chips_won))
+
+    manager = TableManager(initial_stack=initial_stack, blind=blind, on_hand_over=hand_over)
+    for _ in range(num_tables):
+        manager.add_table([policy] * num_players)
+
+    hands_done = 0
+    while hands_done < num_hands:
+        manager.step()
+        hands_done = manager.hands_played() - num_tables
+
+    features = np.array([sample[0] for sample in samples], dtype=np.float32)
+    actions = np.array([sample[1] for sample in samples], dtype=np.int64)
+    returns = np.array([sample[2] for sample in samples], dtype=np.float32) / initial_stack
+    return features, actions, returns
+
+
+def fit(network: ValueNetwork, features, actions, returns, epochs=5, batch_size=256,
+        learning_rate=1e-3, seed=None) -> List[float]:
+    """
+    fit the network in place with Adam so the value of the action taken moves
+    towards the return (the other actions have no target), returns the mean loss of each epoch
+    """
+    rng = np.random.default_rng(seed)
+    params = [param for pair in zip(network.weights, network.biases) for param in pair]
+    moments = [np.zeros_like(param) for param in params]
+    velocities = [np.zeros_like(param) for param in params]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+
+    losses = []
+    for _ in range(epochs):
+        order = rng.permutation(len(features))
+        epoch_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x, taken, target = features[batch], actions[batch], returns[batch]
+            rows = np.arange(len(batch))
+
+            # forward, keeping every layer's input for the backward pass
+            layer_inputs = [x]
+            for weights, biases in zip(network.weights[:-1], network.biases[:-1]):
+                layer_inputs.append(np.maximum(layer_inputs[-1] @ weights + biases, 0))
+            output = layer_inputs[-1] @ network.weights[-1] + network.biases[-1]
+
+            error = output[rows, taken] - target
+            epoch_loss += float((error ** 2).sum())
+            grad = np.zeros_like(output)
+            grad[rows, taken] = 2 * error / len(batch)
+
+            grads = []
+            for layer in range(len(network.weights) - 1, -1, -1):
+                grads.append(grad.sum(axis=0))
+                grads.append(layer_inputs[layer].T @ grad)
+                if layer > 0:
+                    grad = (grad @ network.weights[layer].T) * (layer_inputs[layer] > 0)
+            grads.reverse()
+
+            step += 1
+            for param, grad_param, moment, velocity in zip(params, grads, moments, velocities):
+                moment *= beta1
+                moment += (1 - beta1) * grad_param
+                velocity *= beta2
+                velocity += (1 - beta2) * grad_param ** 2
+                moment_hat = moment / (1 - beta1 ** step)
+                velocity_hat = velocity / (1 - beta2 ** step)
+                param -= (learning_rate * moment_hat / (np.sqrt(velocity_hat) + eps)).astype(param.dtype)
+        losses.append(epoch_loss / max(len(features), 1))
+    return losses
+
+
+def fit_keras(network: ValueNetwork, features, actions, returns, epochs=5, batch_size=256,
+              learning_rate=1e-3) -> List[float]:
+    """
+    same as fit but with TensorFlow/Keras, on the CPU only.
+    the fitted weights are copied back into the (numpy) network
+    """
+    # hide any GPU, the network is too small to gain from one
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+    import tensorflow as tf
+
+    num_actions = len(ACTIONS)
+    layers = [tf.keras.Input(shape=(network.weights[0].shape[0],))]
+    for weights in network.weights[:-1]:
+        layers.append(tf.keras.layers.Dense(weights.shape[1], activation="relu"))
+    layers.append(tf.keras.layers.Dense(num_actions))
+    model = tf.keras.Sequential(layers)
+    model.set_weights([param for pair in zip(network.weights, network.biases) for param in pair])
+
+    def taken_action_loss(y_true, y_pred):
+        # y_true is the one hot taken action times the return, then the one hot mask
+        target, mask = y_true[:, :num_actions], y_true[:, num_actions:]
+        return tf.reduce_sum(mask * tf.square(y_pred - target), axis=1)
+
+    mask = np.eye(num_actions, dtype=np.float32)[actions]
+    y_true = np.concatenate([mask * returns[:, None], mask], axis=1)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss=taken_action_loss)
+    history = model.fit(features, y_true, epochs=epochs, batch_size=batch_size, verbose=0)
+
+    params = model.get_weights()
+    network.weights = [np.asarray(param, dtype=np.float32) for param in params[0::2]]
+    network.biases = [np.asarray(param, dtype=np.float32) for param in params[1::2]]
+    return [float(loss) for loss in history.history["loss"]]
+
+
+def train(network: Optional[ValueNetwork] = None, generations=5, hands_per_generation=2000,
+          num_tables=64, epsilon=0.1, epochs=5, backend="numpy", path=None, seed=None, verbose=False) -> ValueNetwork:
+    """
+    alternate playing hands with the network and fitting it on them,
+    saves the network to path (if set) after every generation
+    """
+    if network is None:
+        network = ValueNetwork.create(seed=seed)
+
+    for generation in range(generations):
+        generation_seed = None if seed is None else seed + generation
+        features, actions, returns = collect_samples(network, hands_per_generation, num_tables=num_tables,
+                                                     epsilon=epsilon, seed=generation_seed)
+        if backend == "keras":
+            losses = fit_keras(network, features, actions, returns, epochs=epochs)
+        else:
+            losses = fit(network, features, actions, returns, epochs=epochs, seed=generation_seed)
+        if verbose:
+            print(f"generation {generation + 1}: {len(features)} decisions, loss {losses[-1]:.4f}")
+        if path is not None:
+            network.save(path)
+    return network
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="train the NeuralCPU value network")
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--hands", type=int, default=5000, help="hands played per generation")
+    parser.add_argument("--tables", type=int, default=64)
+    parser.add_argument("--epsilon", type=float, default=0.1, help="share of random actions while playing")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--backend", choices=["numpy", "keras"], default="numpy")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--resume", action="store_true", help="keep training the network at --output")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    network = ValueNetwork.load(args.output) if args.resume and os.path.exists(args.output) else None
+    train(network, args.generations, args.hands, num_tables=args.tables, epsilon=args.epsilon,
+          epochs=args.epochs, backend=args.backend, path=args.output, seed=args.seed, verbose=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
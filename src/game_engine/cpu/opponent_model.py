@@ -0,0 +1,205 @@
+"""
+opponent_model.py is written by us.
+
+keeps running stats on every player a CPU has seen: VPIP, PFR, aggression
+factor per street and fold to cbet. every action is one update of a few
+counters (no scanning the action history), the stats carry over between
+rounds and can be saved to / loaded from a small JSON file between sessions.
+
+    model = OpponentModel.load("opponents.json")
+    model.start_hand(["pc", "cpu"])
+    model.update("pc", "raise", "preflop")
+    model.get("pc").vpip()
+    model.save("opponents.json")
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+STREET_INDEX = {"preflop": 0, "flop": 1, "turn": 2, "river": 3}
+
+FILE_VERSION = 1
+
+
+class OpponentStats:
+    """
+    the counters for one player, the rates are worked out from them when asked
+    """
+    # order of the counters in the saved file
+    FIELDS = ("hands", "vpip_hands", "pfr_hands", "cbets_faced", "cbets_folded",
+              "raises", "calls", "checks", "folds")
+    __slots__ = FIELDS
+
+    def __init__(self):
+        self.hands = 0
+        self.vpip_hands = 0
+        self.pfr_hands = 0
+        self.cbets_faced = 0
+        self.cbets_folded = 0
+        # per street, indexed with STREET_INDEX
+        self.raises = [0, 0, 0, 0]
+        self.calls = [0, 0, 0, 0]
+        self.checks = [0, 0, 0, 0]
+        self.folds = [0, 0, 0, 0]
+
+    def vpip(self) -> float:
+        """
+        how often the player put money in the pot preflop when they didn't have to
+        """
+        return self.vpip_hands / self.hands if self.hands else 0.0
+
+    def pfr(self) -> float:
+        """
+        how often the player raised preflop
+        """
+        return self.pfr_hands / self.hands if self.hands else 0.0
+
+    def aggression_factor(self, street: Optional[str] = None) -> float:
+        """
+        raises / calls, on one street or all of them
+        (just the raises if the player never called)
+        """
+        if street is None:
+            raises, calls = sum(self.raises), sum(self.calls)
+        else:
+            raises, calls = self.raises[STREET_INDEX[street]], self.calls[STREET_INDEX[street]]
+        return raises / calls if calls else float(raises)
+
+    def fold_to_cbet(self) -> float:
+        """
+        how often the player folded to a continuation bet on the flop
+        """
+        return self.cbets_folded / self.cbets_faced if self.cbets_faced else 0.0
+
+    def to_list(self) -> List[int]:
+        values = [self.hands, self.vpip_hands, self.pfr_hands, self.cbets_faced, self.cbets_folded]
+        return values + self.raises + self.calls + self.checks + self.folds
+
+    @classmethod
+    def from_list(cls, values: List[int]) -> "OpponentStats":
+        stats = cls()
+        (stats.hands, stats.vpip_hands, stats.pfr_hands,
+         stats.cbets_faced, stats.cbets_folded) = values[:5]
+        stats.raises = list(values[5:9])
+        stats.calls = list(values[9:13])
+        stats.checks = list(values[13:17])
+        stats.folds = list(values[17:21])
+        return stats
+
+
+class OpponentModel:
+    """
+    OpponentStats for every player by name, fed one action at a time
+    """
+    def __init__(self):
+        self.players: Dict[str, OpponentStats] = {}
+        self._reset_hand()
+
+    def _reset_hand(self):
+        # who has been counted in this hand and who already got vpip / pfr
+        self._in_hand = set()
+        self._vpip = set()
+        self._pfr = set()
+        # last preflop raiser, they can cbet the flop
+        self._preflop_raiser: Optional[str] = None
+        self._flop_raised = False
+        # the cbet is open until someone raises over it
+        self._cbet_open = False
+        self._cbet_responded = set()
+
+    def get(self, name: str) -> OpponentStats:
+        """
+        the stats for name (empty stats if they haven't been seen)
+        """
+        stats = self.players.get(name)
+        if stats is None:
+            stats = self.players[name] = OpponentStats()
+        return stats
+
+    def start_hand(self, names: Iterable[str] = ()):
+        """
+        call at the start of every hand with the players dealt in,
+        players not passed in are counted the first time they act
+        """
+        self._reset_hand()
+        for name in names:
+            self._count_hand(name)
+
+    def _count_hand(self, name):
+        self._in_hand.add(name)
+        self.get(name).hands += 1
+
+    def update(self, name: str, action: str, street: str):
+        """
+        record that name did action ("fold", "call", "raise", "check") on street,
+        anything else (blinds, antes) is ignored
+        """
+        street_index = STREET_INDEX.get(street)
+        if street_index is None or name is None:
+            return
+        stats = self.get(name)
+        if name not in self._in_hand:
+            self._count_hand(name)
+
+        if action == "raise":
+            stats.raises[street_index] += 1
+        elif action == "call":
+            stats.calls[street_index] += 1
+        elif action == "check":
+            stats.checks[street_index] += 1
+        elif action == "fold":
+            stats.folds[street_index] += 1
+        else:
+            return
+
+        if street_index == 0:
+            if action in ("call", "raise") and name not in self._vpip:
+                self._vpip.add(name)
+                stats.vpip_hands += 1
+            if action == "raise":
+                self._preflop_raiser = name
+                if name not in self._pfr:
+                    self._pfr.add(name)
+                    stats.pfr_hands += 1
+        elif street_index == 1:
+            self._update_cbet(name, action, stats)
+
+    def _update_cbet(self, name, action, stats):
+        if self._cbet_open and name != self._preflop_raiser and name not in self._cbet_responded:
+            self._cbet_responded.add(name)
+            stats.cbets_faced += 1
+            if action == "fold":
+                stats.cbets_folded += 1
+        if action == "raise":
+            # the first bet on the flop is a cbet if the preflop raiser made it
+            self._cbet_open = not self._flop_raised and name == self._preflop_raiser
+            self._flop_raised = True
+
+    def save(self, path):
+        """
+        write the counters for every player to path
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "version": FILE_VERSION,
+            "fields": list(OpponentStats.FIELDS),
+            "players": {name: stats.to_list() for name, stats in self.players.items()},
+        }
+        with open(path, "w") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path) -> "OpponentModel":
+        """
+        the model saved at path, or an empty one if there is no file yet
+        """
+        model = cls()
+        if not os.path.exists(path):
+            return model
+        with open(path) as file:
+            data = json.load(file)
+        if data.get("version") != FILE_VERSION:
+            raise ValueError(f"unsupported opponent model version {data.get('version')}")
+        for name, values in data["players"].items():
+            model.players[name] = OpponentStats.from_list(values)
+        return model
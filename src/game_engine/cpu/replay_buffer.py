@@ -0,0 +1,110 @@
+"""
+replay_buffer.py is written by us.
+
+a fixed capacity experience replay buffer for the Q-learning CPUs. the
+transitions (state_id, action_id, reward, next_state_id, done) are kept in
+preallocated numpy arrays used as a ring, so once it's full the oldest
+transition is overwritten and the memory never grows however long the CPU
+plays. states and actions are ints, the CPU maps its own keys to ids.
+
+sampling is prioritized: a transition is drawn with probability
+priority ** alpha (priority is its last TD error), new transitions get the
+biggest priority so far so they are replayed soon after they are added, and sample gives
+the importance sampling weights that correct for it.
+
+    buffer = ReplayBuffer(10000, seed=0)
+    buffer.add_batch(states, actions, rewards, next_states, dones)
+    indices, batch, weights = buffer.sample(32)
+    buffer.update_priorities(indices, td_errors)
+"""
+from typing import Tuple
+
+import numpy as np
+
+# added to every priority so no transition stops being sampled
+MIN_PRIORITY = 1e-3
+
+
+class ReplayBuffer:
+    """
+    the last capacity transitions. alpha is how much the priorities count
+    (0 samples uniformly), beta how much the sampling weights correct for them
+    """
+
+    def __init__(self, capacity, alpha=0.6, beta=0.4, seed=None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.alpha = alpha
+        self.beta = beta
+        self.rng = np.random.default_rng(seed)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        # -1 when done
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        # priority ** alpha, what sampling is proportional to
+        self.scaled_priorities = np.zeros(capacity, dtype=np.float64)
+        # where the next transition goes and how many are kept
+        self.position = 0
+        self.size = 0
+        self.max_priority = 1.0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.states, self.actions, self.rewards, self.next_states,
+                                             self.dones, self.scaled_priorities))
+
+    def add(self, state_id, action_id, reward, next_state_id, done):
+        self.add_batch([state_id], [action_id], [reward], [next_state_id], [done])
+
+    def add_batch(self, state_ids, action_ids, rewards, next_state_ids, dones):
+        """
+        add transitions, the oldest ones are overwritten once the buffer is full
+        """
+        count = len(state_ids)
+        if count > self.capacity:
+            # only the last capacity of them would be kept
+            skip = count - self.capacity
+            state_ids, action_ids, rewards = state_ids[skip:], action_ids[skip:], rewards[skip:]
+            next_state_ids, dones = next_state_ids[skip:], dones[skip:]
+            count = self.capacity
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.states[slots] = state_ids
+        self.actions[slots] = action_ids
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_state_ids
+        self.dones[slots] = dones
+        self.scaled_priorities[slots] = self.max_priority ** self.alpha
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size) -> Tuple[np.ndarray, Tuple[np.ndarray, ...], np.ndarray]:
+        """
+        batch_size transitions drawn by priority (with replacement).
+
+        :return: (indices, (state_ids, action_ids, rewards, next_state_ids, dones), weights),
+                 indices are for update_priorities and weights are at most 1
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        # inverse transform sampling on the running sum of the scaled priorities
+        cumulative = np.cumsum(self.scaled_priorities[:self.size])
+        total = cumulative[-1]
+        indices = np.searchsorted(cumulative, self.rng.random(batch_size) * total, side="right")
+        np.minimum(indices, self.size - 1, out=indices)
+
+        weights = (self.size * self.scaled_priorities[indices] / total) ** -self.beta
+        weights /= weights.max()
+        batch = (self.states[indices], self.actions[indices], self.rewards[indices],
+                 self.next_states[indices], self.dones[indices])
+        return indices, batch, weights
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + MIN_PRIORITY
+        self.scaled_priorities[indices] = priorities ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
@@ -0,0 +1,301 @@
+"""
+searchCPU.py is written by us.
+
+CPU that searches the betting tree on every decision with Monte Carlo tree
+search over GameStates (see game_state.py). every iteration deals the
+opponents' hole cards and the runout again at random from the cards it can't
+see, walks down the tree picking actions by UCB1, adds one node, then plays
+check or call to the end of the hand from there (the depth limit stops the
+tree, the check down is the estimate of a leaf). the action it visited most
+is played when the time budget for the decision runs out.
+
+the tree is open loop: a node is the betting actions taken so far, not the
+cards, so every iteration goes through the same nodes with different cards.
+that also means the tree is still good after the next actions are taken, the
+CPU follows the hand down it from the receive_game_update_message calls and
+the next decision starts from the node the hand got to (the visits there are
+kept). a real raise that isn't one of the tree's raise sizes drops the tree.
+
+bets are abstracted like BettingAbstraction in cfr_solver.py: fold,
+check/call, raises of a few pot fractions and all in.
+"""
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from game_engine import instrumentation
+from game_engine.constants import Action
+from game_engine.cpu.baseCPU import BaseCPU, STREET_INDEX
+from game_engine.game_state import GameState
+
+FOLD = (Action.FOLD, None)
+CHECK = (Action.CHECK, None)
+CALL = (Action.CALL, None)
+
+ACTION_NAMES = {Action.FOLD: 'fold', Action.CHECK: 'check', Action.CALL: 'call', Action.RAISE: 'raise'}
+NAME_ACTIONS = {name: action for action, name in ACTION_NAMES.items()}
+
+
+def betting_key(state: GameState) -> tuple:
+    """
+    what a node's betting looks like, the same for every deal of the cards
+    """
+    return state.stacks, state.pot, state.street, state.current, state.call_amount()
+
+
+class SearchNode:
+    """
+    one betting history in the search tree. value is the reward summed over
+    visits for the seat that acted to get here, rewards are chips won or
+    lost from the root as a fraction of what was at stake at the root
+    """
+    __slots__ = ('seat', 'key', 'actions', 'children', 'visits', 'value')
+
+    def __init__(self):
+        # seat to act, betting_key and (action, amount) pairs, set the first time the node is reached
+        self.seat = -1
+        self.key = None
+        self.actions: Optional[List[Tuple[Action, Optional[int]]]] = None
+        self.children: List[Optional["SearchNode"]] = []
+        self.visits = 0
+        self.value = 0.0
+
+    def child(self, action: Action, amount: Optional[int]) -> Optional["SearchNode"]:
+        """
+        the child after action, raises have to be the same amount
+        """
+        if self.actions is None:
+            return None
+        for (child_action, child_amount), child in zip(self.actions, self.children):
+            if child_action is action and (action is not Action.RAISE or child_amount == amount):
+                return child
+        return None
+
+
+class SearchCPU(BaseCPU):
+    """
+    CPU that plays the action its tree search likes best after time_budget seconds
+    (or max_iterations iterations, whichever comes first). stats has the numbers
+    of the last search
+    """
+
+    def __init__(self, initial_stack, time_budget=1.0, max_iterations: Optional[int] = None, max_depth=6,
+                 raise_sizes: Sequence[float] = (0.5, 1.0), exploration=0.7, blind=10, seed=None):
+        super().__init__(initial_stack)
+        self.name = "search_cpu"
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        # betting actions in the tree below the decision, past it the hand is checked down
+        self.max_depth = max_depth
+        self.raise_sizes = tuple(raise_sizes)
+        self.exploration = exploration
+        # small blind, the game start message has the real one
+        self.blind = blind
+        self.rng = random.Random(seed)
+        # where the hand is in the tree, None when there is no tree to reuse
+        self.node: Optional[SearchNode] = None
+        self.stats: Dict[str, Union[int, float]] = {}
+
+    def receive_game_start_message(self, game_info: Dict[str, Any]) -> None:
+        super().receive_game_start_message(game_info)
+        self.blind = game_info.get('rule', {}).get('small_blind', self.blind)
+
+    def receive_round_start_message(self, round_count: int, hole_card: List[str], seats: List[Dict[str, Any]]) -> None:
+        super().receive_round_start_message(round_count, hole_card, seats)
+        self.node = None
+
+    def receive_game_update_message(self, new_action: Dict[str, Any], round_state: Dict[str, Any]) -> None:
+        super().receive_game_update_message(new_action, round_state)
+        # our own actions were followed when we picked them
+        if self.node is None or new_action.get('player_name') == self.name:
+            return
+        action = NAME_ACTIONS.get(new_action.get('action'))
+        if action is None or action is Action.FOLD:
+            self.node = None
+            return
+        amount = int(new_action.get('amount') or 0) if action is Action.RAISE else None
+        self.node = self.node.child(action, amount)
+
+    def game_state(self, decision, round_state: Dict[str, Any]) -> GameState:
+        """
+        the hand as a GameState from what we are told. heads up this is exact,
+        with more players the other seats' contributions and who still has to
+        act are a guess (round_state doesn't have them)
+        """
+        seats = round_state['seats']
+        seat = round_state['next_player']
+        num_seats = len(seats)
+        call_amount = decision.call_amount
+        folded = acting = 0
+        for index, seat_info in enumerate(seats):
+            state = seat_info.get('state', 'active')
+            if state == 'folded':
+                folded |= 1 << index
+            elif state != 'allin':
+                acting |= 1 << index
+        acting |= 1 << seat
+        in_hand = [index for index in range(num_seats) if not folded >> index & 1]
+
+        # everyone else in the hand has put in the bet we are facing
+        contributions = tuple(call_amount if index != seat and index in in_hand else 0 for index in range(num_seats))
+        ours = max(0, (decision.pot - call_amount * (len(in_hand) - 1)) // len(in_hand))
+        round_contributions = tuple(0 if index not in in_hand else ours if index == seat else ours + call_amount
+                                    for index in range(num_seats))
+
+        street = STREET_INDEX.get(decision.street, 0)
+        blind_pos = round_state.get('blind_pos', 0)
+        pending = 1 << seat
+        if call_amount == 0 and street > 0:
+            # nobody has bet, the seats after us up to the first to act haven't acted yet
+            order = [(blind_pos + offset) % num_seats for offset in range(num_seats)]
+            order = [index for index in order if acting >> index & 1]
+            for index in order[order.index(seat) + 1:]:
+                pending |= 1 << index
+
+        return GameState(
+            stacks=tuple(seat_info['stack'] for seat_info in seats),
+            contributions=contributions,
+            round_contributions=round_contributions,
+            pending=pending,
+            acting=acting,
+            folded=folded,
+            street=street,
+            current=seat,
+            current_bet=call_amount,
+            pot=decision.pot,
+            blind=self.blind,
+            blind_pos=blind_pos,
+            holes=tuple(tuple(self.hole_codes) if index == seat else (-1, -1) for index in range(num_seats)),
+            board=tuple(self.community_codes),
+            deck=(),
+            deck_index=0,
+        )
+
+    def abstract_actions(self, state: GameState) -> List[Tuple[Action, Optional[int]]]:
+        """
+        the (action, amount) pairs searched at state: fold when facing a bet,
+        check or call, the pot fraction raises and all in
+        """
+        call_amount = state.call_amount()
+        actions = [FOLD, CALL] if call_amount > 0 else [CHECK]
+        max_raise = state.max_raise()
+        if max_raise > 0:
+            pot = state.pot + call_amount
+            for fraction in self.raise_sizes:
+                amount = max(int(fraction * pot), 2 * state.blind)
+                if amount < max_raise and (Action.RAISE, amount) not in actions:
+                    actions.append((Action.RAISE, amount))
+            actions.append((Action.RAISE, max_raise))
+        return actions
+
+    def select(self, node: SearchNode) -> int:
+        """
+        index of the action to try at node, untried actions first then UCB1
+        """
+        children = node.children
+        for index, child in enumerate(children):
+            if child is None:
+                return index
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best_index, best_score = 0, -math.inf
+        for index, child in enumerate(children):
+            score = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_index, best_score = index, score
+        return best_index
+
+    def root_for(self, state: GameState) -> SearchNode:
+        """
+        the node the hand has got to if it's this decision, a new tree otherwise
+        """
+        node = self.node
+        if node is not None and node.key == betting_key(state) and node.visits > 0:
+            return node
+        return SearchNode()
+
+    def search(self, state: GameState, deadline: float) -> SearchNode:
+        """
+        run iterations from state until the deadline (or max_iterations), at least one
+        """
+        root = self.root_for(state)
+        seat = state.current
+        root_stacks = state.stacks
+        # the most that can change hands from here
+        scale = state.pot + 2 * max(root_stacks)
+        reused = root.visits
+        start = time.perf_counter()
+        iterations = nodes = new_nodes = 0
+
+        while iterations == 0 or time.perf_counter() < deadline:
+            if self.max_iterations is not None and iterations >= self.max_iterations:
+                break
+            sampled = state.resample(seat, self.rng)
+            node = root
+            path = [root]
+            depth = 0
+            while not sampled.is_terminal and depth < self.max_depth:
+                if node.actions is None:
+                    node.seat = sampled.current
+                    node.key = betting_key(sampled)
+                    node.actions = self.abstract_actions(sampled)
+                    node.children = [None] * len(node.actions)
+                index = self.select(node)
+                sampled = sampled.apply(*node.actions[index])
+                nodes += 1
+                depth += 1
+                child = node.children[index]
+                if child is None:
+                    child = node.children[index] = SearchNode()
+                    new_nodes += 1
+                    path.append(child)
+                    break
+                node = child
+                path.append(child)
+
+            # past the tree, check or call to the end of the hand
+            while not sampled.is_terminal:
+                sampled = sampled.apply(Action.CALL if sampled.call_amount() > 0 else Action.CHECK)
+                nodes += 1
+
+            final_stacks = sampled.stacks
+            root.visits += 1
+            for parent, child in zip(path, path[1:]):
+                child.visits += 1
+                child.value += (final_stacks[parent.seat] - root_stacks[parent.seat]) / scale
+            iterations += 1
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "iterations": iterations,
+            "nodes": nodes,
+            "new_nodes": new_nodes,
+            "reused_visits": reused,
+            "elapsed": elapsed,
+            "nodes_per_second": nodes / elapsed if elapsed > 0 else 0.0,
+        }
+        instrumentation.count("search.nodes", nodes)
+        instrumentation.event("search.decision", **self.stats)
+        return root
+
+    def declare_action(self, valid_actions: List[Dict[str, Any]], hole_card: List[str], round_state: Dict[str, Any]) -> tuple[str, Union[int, float]]:
+        """
+        search until the time budget runs out and play the most visited action
+        """
+        deadline = time.perf_counter() + self.time_budget
+        decision = self.read_decision(valid_actions, hole_card, round_state)
+        state = self.game_state(decision, round_state)
+
+        root = self.search(state, deadline)
+        index = max(range(len(root.actions)), key=lambda index: root.children[index].visits
+                    if root.children[index] is not None else -1)
+        # follow our own action now, the update message for it is skipped
+        self.node = root.children[index]
+        action, amount = root.actions[index]
+
+        if action is Action.CALL:
+            return 'call', decision.call_amount
+        if action is Action.RAISE:
+            return 'raise', amount
+        return ACTION_NAMES[action], 0
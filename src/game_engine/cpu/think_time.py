@@ -0,0 +1,40 @@
+"""
+think_time.py is written by us.
+
+the CPUs pause before some actions so they feel more natural in the GUI,
+simulations (the table manager, benchmarks) turn the pauses off
+"""
+import time
+from contextlib import contextmanager
+
+# CPUs only pause when this is True
+ENABLED = True
+
+
+def set_enabled(enabled: bool):
+    """
+    turn the CPU pauses on or off for every CPU
+    """
+    global ENABLED
+    ENABLED = enabled
+
+
+@contextmanager
+def disabled():
+    """
+    turn the CPU pauses off inside the with block, what was set before is put back after
+    """
+    enabled = ENABLED
+    set_enabled(False)
+    try:
+        yield
+    finally:
+        set_enabled(enabled)
+
+
+def think(seconds: float):
+    """
+    pause for seconds, does nothing if think time is disabled
+    """
+    if ENABLED:
+        time.sleep(seconds)
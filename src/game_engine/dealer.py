@@ -10,6 +10,8 @@ from .constants import PlayerState
 from .player import Player
 from .betting_manager import BettingManager
 from .game_evaluator import GameEvaluator
+from .game_state import GameState
+from . import instrumentation
 import pygame
 
 
@@ -18,19 +20,32 @@ class Dealer:
     dealer provides manages street state, and provides functions to 
     """
 
-    def __init__(self, initial_stack, small_blind):
+    def __init__(self, initial_stack, small_blind, num_players=2, blind_delay=1000):
 
         self.current_street = Street.PREFLOP
         self.blind = small_blind
         self.initial_stack = initial_stack
 
         self.table = Table()
-        self.table.init_players(initial_stack=initial_stack, num_players=2)
+        self.table.init_players(initial_stack=initial_stack, num_players=num_players)
 
         self.betting_manager = BettingManager(self.table, self.blind)
 
         self.game_over = False
 
+        # ms to wait before each blind so the GUI can show them, 0 for simulations
+        self.blind_delay = blind_delay
+
+        # optional HandRecorder that logs every hand (see hand_history.py)
+        self.recorder = None
+
+    def set_recorder(self, recorder):
+        """
+        log every hand played from now on with recorder, None stops logging
+        """
+        self.recorder = recorder
+        self.betting_manager.recorder = recorder
+
 
     def next_street(self):
         """
@@ -47,6 +62,7 @@ class Dealer:
         elif self.current_street == Street.TURN:
             self.current_street = Street.RIVER
 
+    @instrumentation.timed("dealer.start_street")
     def start_street(self):
         """
         start the round by calling street functions
@@ -54,7 +70,15 @@ class Dealer:
 
         # reset betting round information
         self.betting_manager.reset_betting_round()
-        
+
+        # after the flop betting starts from the small blind
+        if self.current_street != Street.PREFLOP:
+            self.table.current_player = self.table.first_to_act()
+
+        self.table.action_log.street = self.current_street.value
+        if self.recorder is not None:
+            self.recorder.set_street(self.current_street)
+
         if self.current_street == Street.PREFLOP:
             self._start_preflop()
         elif self.current_street == Street.FLOP:
@@ -72,14 +96,21 @@ class Dealer:
         self.table.deal_hole_cards()
 
         # blinds
-        pygame.time.delay(1000)
+        self._blind_delay()
         self.betting_manager.apply_player_action(
             self.table.current_player, Action.SMALL_BLIND)
 
-        pygame.time.delay(1000)
+        self._blind_delay()
         self.betting_manager.apply_player_action(
             self.table.current_player, Action.BIG_BLIND)
 
+    def _blind_delay(self):
+        """
+        wait before posting a blind (skipped when blind_delay is 0)
+        """
+        if self.blind_delay > 0:
+            pygame.time.delay(self.blind_delay)
+
     def _start_flop(self):
         """
         do start of flop actions
@@ -111,7 +142,7 @@ class Dealer:
 
     def is_round_over(self) -> bool:
         """
-        ignoring not 1v1 for now. 
+        round is over when everyone but one player folded, or it's showdown
         """
         # a player folded
         if len(self.table.players_in_hand()) == 1:
@@ -130,8 +161,10 @@ class Dealer:
         or a player is all in and river is over
         """
 
-        # If any player has folded, don't do showdown (pot already distributed in _fold)
-        if any(player.state == PlayerState.FOLDED for player in self.table.players):
+        players_in_hand = self.table.players_in_hand()
+
+        # If everyone else folded, don't do showdown (pot already distributed in _fold)
+        if len(players_in_hand) <= 1:
             return False
 
         #check if betting is over
@@ -142,10 +175,9 @@ class Dealer:
         if self.current_street == Street.RIVER:
             return True
             
-        #if a player is all in + betting over showdown
-        if len(self.table.players_in_hand()) == 2:
-            if any(player.state == PlayerState.ALLIN for player in self.table.players_in_hand()):
-                return True
+        #if everyone (or everyone but one player) is all in + betting over showdown
+        if sum(1 for player in players_in_hand if player.is_active()) <= 1:
+            return True
 
         return False
             
@@ -158,6 +190,12 @@ class Dealer:
         self.betting_manager.apply_player_action(
             current_player, action, raise_amount)
 
+    def game_state(self) -> GameState:
+        """
+        an immutable snapshot of the hand for search (see game_state.py)
+        """
+        return GameState.from_dealer(self)
+
     def set_up_next_round(self):
         """
         reset table and betting manager for the next round
@@ -166,6 +204,10 @@ class Dealer:
         self.table.reset_table()
         self.betting_manager.reset_betting_round()
 
+        if self.recorder is not None:
+            self.recorder.begin_hand(self.table, self.blind)
+
+    @instrumentation.timed("dealer.showdown")
     def showdown(self):
         """
         this will be called when the round is over and we need to determine the winner/winners
@@ -173,8 +215,10 @@ class Dealer:
         #draw more cards if needed
         self._start_showdown()
 
-        winners = GameEvaluator.determine_winners(self.table)
-        GameEvaluator.add_money_to_winners(self.table, winners)
+        GameEvaluator.award_pots(self.table)
+
+        if self.recorder is not None:
+            self.recorder.end_hand(self.table)
 
         #think blinds are getting through first so negative stack happens
         for player in self.table.players:
@@ -12,6 +12,13 @@ from .cpu.equityCPU import equityCPU
 from .cpu.potOddsCPU import potOddsCPU
 from .cpu.expectedValueCPU import expectedValueCPU
 from .cpu.mlCPU import MLCPU
+from .cpu.opponent_model import OpponentModel
+from .cpu.baseCPU import cards_for
+from .cpu.neuralCPU import NeuralCPU, ValueNetwork
+from .cpu.blueprintCPU import BlueprintCPU
+from .cfr_solver import Blueprint
+from .cpu.searchCPU import SearchCPU
+from . import instrumentation
 import os
 
 
@@ -22,6 +29,9 @@ class Difficulty(Enum):
     EASY = 0
     MEDIUM = 1
     HARD = 2
+    NEURAL = 3
+    BLUEPRINT = 4
+    SEARCH = 5
 
 
 class Engine():
@@ -42,7 +52,7 @@ It needs to return information that the GUI needs
         self.num_players = num_players
         self.blind = blind
         self.initial_stack = initial_stack
-        self.dealer = Dealer(self.initial_stack, self.blind)
+        self.dealer = Dealer(self.initial_stack, self.blind, self.num_players)
         self.cpu_player = None  # Single CPU player
         # Initialize game_info
         self.game_info = {
@@ -68,6 +78,15 @@ It needs to return information that the GUI needs
         # Define the path for the ML model file
         self.ml_model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models", "ml_cpu_model.pkl")
         
+        # Weights for the NeuralCPU, trained by cpu/neural_trainer.py
+        self.neural_model_path = os.path.join(os.path.dirname(self.ml_model_path), "neural_cpu.npz")
+
+        # Strategy for the BlueprintCPU, solved by cfr_solver.py
+        self.blueprint_path = os.path.join(os.path.dirname(self.ml_model_path), "blueprint.npz")
+
+        # Opponent stats the CPUs keep between sessions
+        self.opponent_model_path = os.path.join(os.path.dirname(self.ml_model_path), "opponent_model.json")
+
         # Create directory for ML model if it doesn't exist
         os.makedirs(os.path.dirname(self.ml_model_path), exist_ok=True)
 
@@ -85,6 +104,12 @@ It needs to return information that the GUI needs
         
         # Set the name of the CPU player in the table
         self.dealer.table.players[1].name = cpu_player.__class__.__name__
+        # The CPU goes by its seat name so it can tell its own actions from the opponent's
+        cpu_player.name = cpu_player.__class__.__name__
+
+        # Opponent stats from earlier sessions
+        if hasattr(cpu_player, "opponent_model"):
+            cpu_player.opponent_model = OpponentModel.load(self.opponent_model_path)
         
         # Update the game_info seats with the CPU player's name
         self.game_info['seats'][1]['name'] = cpu_player.__class__.__name__
@@ -101,26 +126,49 @@ It needs to return information that the GUI needs
         """
         if difficulty == Difficulty.EASY:
             self.cpu_player = baselineCPU(self.initial_stack)
-            print("cpu player set to baselineCPU")
+            instrumentation.event("engine.set_cpu", cpu="baselineCPU")
             self.set_cpu_player(self.cpu_player)
         elif difficulty == Difficulty.MEDIUM:
             self.cpu_player = equityCPU(self.initial_stack)
-            print("cpu player set to equityCPU")
+            instrumentation.event("engine.set_cpu", cpu="equityCPU")
             self.set_cpu_player(self.cpu_player)
         elif difficulty == Difficulty.HARD:
             # Initialize MLCPU with the model path
             self.cpu_player = MLCPU(self.initial_stack, model_path=self.ml_model_path)
-            print("cpu player set to MLCPU")
+            instrumentation.event("engine.set_cpu", cpu="MLCPU")
             self.set_cpu_player(self.cpu_player)
-            # Try to load existing model
-            if os.path.exists(self.ml_model_path):
-                print(f"Loading model from {self.ml_model_path}")
-                self.cpu_player.load_model(self.ml_model_path)
+            # Try to load existing model, one saved with older features is trained again
+            if os.path.exists(self.ml_model_path) and self.cpu_player.load_model(self.ml_model_path):
+                instrumentation.event("engine.load_ml_model", path=self.ml_model_path)
             else:
-                print(f"No model found at {self.ml_model_path}, training a new model...")
+                instrumentation.event("engine.train_ml_model", path=self.ml_model_path)
                 # Train the model - it will automatically save to self.ml_model_path
                 self.cpu_player.train_model(num_rounds=100, opponent_strategy="random")
-                print(f"Model trained and saved to {self.ml_model_path}")
+                instrumentation.event("engine.ml_model_trained", path=self.ml_model_path)
+        elif difficulty == Difficulty.NEURAL:
+            # The repo ships the weights, training here would freeze the GUI.
+            # Missing or trained on other features, neural_trainer.py makes new ones and MEDIUM plays until then
+            if ValueNetwork.is_current(self.neural_model_path):
+                self.cpu_player = NeuralCPU(self.initial_stack, model_path=self.neural_model_path)
+                instrumentation.event("engine.set_cpu", cpu="NeuralCPU")
+            else:
+                instrumentation.event("engine.neural_model_missing", path=self.neural_model_path)
+                self.cpu_player = equityCPU(self.initial_stack)
+                instrumentation.event("engine.set_cpu", cpu="equityCPU")
+        elif difficulty == Difficulty.BLUEPRINT:
+            # The repo ships a blueprint for main.py's game, solving one here would freeze the GUI.
+            # Another stack or blind needs one from cfr_solver.py's command line, until then MEDIUM plays
+            if Blueprint.is_current(self.blueprint_path, self.initial_stack, self.blind):
+                self.cpu_player = BlueprintCPU(self.initial_stack, blueprint_path=self.blueprint_path)
+                instrumentation.event("engine.set_cpu", cpu="BlueprintCPU")
+            else:
+                instrumentation.event("engine.blueprint_missing", path=self.blueprint_path,
+                                      stack=self.initial_stack, blind=self.blind)
+                self.cpu_player = equityCPU(self.initial_stack)
+                instrumentation.event("engine.set_cpu", cpu="equityCPU")
+        elif difficulty == Difficulty.SEARCH:
+            self.cpu_player = SearchCPU(self.initial_stack, blind=self.blind)
+            instrumentation.event("engine.set_cpu", cpu="SearchCPU")
         else:
             # Default to baseline CPU
             self.cpu_player = baselineCPU(self.initial_stack)
@@ -151,29 +199,8 @@ It needs to return information that the GUI needs
                 "amount_to_call": amount_to_call
             })
    
-        # Create action histories structure
-        action_histories = {
-            "preflop": [],
-            "flop": [],
-            "turn": [],
-            "river": []
-        }
-        
-        # Populate action histories from each player
-        for player in self.dealer.table.players:
-            for i, history in enumerate(player.round_action_histories):
-                if history is not None:
-                    street_name = list(action_histories.keys())[i]
-                    for action in history:
-                        action_entry = {
-                            "name": action["name"],
-                            "action": action["action"].value,
-                            "amount": action.get("amount", 0),
-                            "add_amount": action.get("add_amount", 0),
-                            "paid": action.get("paid", 0),
-                            "stack": action.get("stack", player.stack)  # Include stack value from action history
-                        }
-                        action_histories[street_name].append(action_entry)
+        # Views of the hand's action log, the GUI gets the action values
+        action_histories = self.dealer.table.action_log.histories(action_values=True)
    
         state = {
             "player_max_raise": self.dealer.betting_manager.get_max_raise(pc),
@@ -200,16 +227,14 @@ It needs to return information that the GUI needs
         
         # Get the index of the next player to act
         next_player_index = 0
-        for i, player in enumerate(self.dealer.table.players):
-            if player == self.dealer.table.current_player:
-                next_player_index = i
-                break
+        if self.dealer.table.current_player is not None:
+            next_player_index = self.dealer.table.current_player.seat
         
         # Get the blind position
         blind_pos = self.dealer.table.blind_pos
 
-        # Format community cards
-        community_cards = [str(card) for card in self.dealer.table.community_cards]
+        # Community cards in the form the CPU takes them (Card objects for our CPUs)
+        community_cards = cards_for(self.cpu_player, self.dealer.table.community_cards)
         
         # Create pot structure
         pot = {
@@ -234,29 +259,8 @@ It needs to return information that the GUI needs
             }
             seats.append(seat)
         
-        # Create action histories
-        action_histories = {
-            "preflop": [],
-            "flop": [],
-            "turn": [],
-            "river": []
-        }
-        
-        # Populate action histories from each player
-        for player in self.dealer.table.players:
-            for i, history in enumerate(player.round_action_histories):
-                if history is not None:
-                    street_name = list(action_histories.keys())[i]
-                    for action in history:
-                        action_entry = {
-                            "name": action["name"],
-                            "action": action["action"],
-                            "amount": action.get("amount", 0),
-                            "add_amount": action.get("add_amount", 0),
-                            "paid": action.get("paid", 0),
-                            "stack": action.get("stack", 0)
-                        }
-                        action_histories[street_name].append(action_entry)
+        # Views of the hand's action log
+        action_histories = self.dealer.table.action_log.histories()
         
         # Build the complete round_state dictionary
         round_state = {
@@ -275,7 +279,7 @@ It needs to return information that the GUI needs
         function that will be called when the street is over.
         """
         if self.dealer.is_round_over():
-            print("round over")
+            instrumentation.event("engine.round_over")
             self.start_next_round()
         else:
             # Save action histories for all players before moving to next street
@@ -298,7 +302,7 @@ It needs to return information that the GUI needs
         function that will be called when the round is over
         (so call this when river is done)
         """
-        print("starting next round")
+        instrumentation.event("engine.start_next_round")
         
         # Update CPU player with the results of the previous round first
         self.update_cpu_player_with_round_result()
@@ -309,7 +313,7 @@ It needs to return information that the GUI needs
         # Send round start message to CPU if one is set
         if self.cpu_player is not None:
             # Get hole cards for CPU player
-            cpu_hole_cards = [str(card) for card in self.dealer.table.players[1].hole_cards]
+            cpu_hole_cards = cards_for(self.cpu_player, self.dealer.table.players[1].hole_cards)
             
             # Get current seats information
             seats = []
@@ -368,7 +372,7 @@ It needs to return information that the GUI needs
         """
         function that will be called when its the cpu's turn
         """
-        print("\nCPU's turn to act...")
+        instrumentation.event("engine.cpu_turn")
         
         # Build the round_state dictionary for the CPU
         round_state = self.build_round_state()
@@ -381,7 +385,7 @@ It needs to return information that the GUI needs
             return
         
         # Get the CPU's hole cards
-        hole_cards = [str(card) for card in cpu_player.hole_cards]
+        hole_cards = cards_for(self.cpu_player, cpu_player.hole_cards)
         
         # Define valid actions (simplified for now)
         valid_actions = [
@@ -394,7 +398,8 @@ It needs to return information that the GUI needs
         # Check if we have a CPU player set
         if self.cpu_player is not None:
             # Use the CPU player's declare_action method
-            action, amount = self.cpu_player.declare_action(valid_actions, hole_cards, round_state)
+            with instrumentation.timer("cpu.declare_action"):
+                action, amount = self.cpu_player.declare_action(valid_actions, hole_cards, round_state)
         else:
             # Default behavior if no CPU player is set
             action = "call"
@@ -404,7 +409,7 @@ It needs to return information that the GUI needs
         action_enum = Action(action)
         
         # Apply the action
-        print(f"CPU is applying action: {action_enum} with amount: {amount}")
+        instrumentation.event("engine.cpu_action", action=action, amount=amount)
         self.dealer.apply_action(action_enum, int(amount) if action == "raise" else None)
         
         # Save action histories for all players after the action
@@ -471,3 +476,6 @@ It needs to return information that the GUI needs
         
         # Update the CPU's stack to match the player's stack
         self.cpu_player.stack = self.dealer.table.players[1].stack
+
+        if hasattr(self.cpu_player, "opponent_model"):
+            self.cpu_player.opponent_model.save(self.opponent_model_path)
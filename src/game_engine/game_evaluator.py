@@ -1,19 +1,18 @@
 """
-    game_evaluator.py was inspired by 
+    game_evaluator.py was inspired by
     https://github.com/ishikota/PyPokerEngine/blob/master/pypokerengine/engine/game_evaluator.py
     the code is written by us, but the structure is based loosely on pypokerengine.
 """
 from .table import Table
 from .hand_evaluator import HandEvaluator
-from functools import reduce
 
 
 class GameEvaluator():
 
     """
 Game Evaluator will:
-     decide who the winners are 
-     handle side pots (will worry about this once, 1v1 is working)
+     decide who the winners are
+     handle side pots, built from how much each player put in during the round
         #see https://github.com/ishikota/PyPokerEngine/blob/master/pypokerengine/engine/game_evaluator.py
      distribute money to winners
 """
@@ -21,76 +20,144 @@ Game Evaluator will:
     def determine_winners(cls, table):
         """
         Uses hand evaluator to determine the winners of the hand,
-        NOTE: only 1v1 for now 
+        every eligible player's hand is turned into one int (see HandEvaluator.hand_strength)
+        so this is a single pass over the players
         """
-        #get each hand 
-        hands = {}
-        
-        
-        for player in table.players:
-            hand_info = HandEvaluator.hand_eval(player.hole_cards, table.community_cards)
-            hands[player.name] = hand_info
-               
-        print("hands", hands)
-        player1 = table.players[0]
-        player2 = table.players[1]
-        hand1 = hands[table.players[0].name]
-        hand2 = hands[table.players[1].name]
-
-        #check hand ranks first
-        if hand1["hand_rank"] > hand2["hand_rank"]:
-            return [player1]
-        if hand1["hand_rank"] < hand2["hand_rank"]:
-            return [player2]
-        
-        #NOTE: in these loops we are assuming every card array is in decending order
-        #check primary cards 
-        for i in range(len(hand1["primary_cards_rank"])):
-            if hand1["primary_cards_rank"][i] > hand2["primary_cards_rank"][i]:
-                return [player1]
-            if hand1["primary_cards_rank"][i] < hand2["primary_cards_rank"][i]:
-                return [player2]
-        
-        #check kickers
-        for i in range(len(hand1["kickers"])):
-            if hand1["kickers"][i] > hand2["kickers"][i]:
-                return [player1]
-            if hand1["kickers"][i] < hand2["kickers"][i]:
-                return [player2]
-        
-        # if passed other checks, then the hands are tied 
-        return [player1, player2]
-        
+        strengths = cls._hand_strengths(table)
+
+        winners = []
+        best_strength = -1
+        for player in cls._eligible_players(table):
+            strength = strengths[id(player)]
+            if strength > best_strength:
+                best_strength = strength
+                winners = [player]
+            elif strength == best_strength:
+                winners.append(player)
+
+        return winners
 
     # distribute money to winners
     @classmethod
     def add_money_to_winners(cls, table, winners):
         """
         Once winners are determine, add money to winners stacks based on pot.
-        NOTE: doesn't handle side pots rn 
+        NOTE: this gives the whole pot to the winners, use award_pots at showdown
+        so side pots are handled
+        """
+        cls._split_pot(table.pot.value, winners)
+
+    @classmethod
+    def award_pots(cls, table):
+        """
+        splits the pot into a main pot and side pots and gives each pot
+        to the best hands that are eligible for it.
+
+        returns a list of (amount, winners) for every pot that was paid out
+        """
+        strengths = cls._hand_strengths(table)
+        contributors, pots = cls._get_side_pots(table)
+
+        # everyone that put money in ranked from least to most, so the players eligible
+        # for a pot are always a suffix of contributors. walking backwards once gives
+        # the best hands of every suffix without comparing hands per pot
+        best_from = [[] for _ in range(len(contributors) + 1)]
+        best_strength = -1
+        for i in range(len(contributors) - 1, -1, -1):
+            player = contributors[i]
+            best_from[i] = best_from[i + 1]
+            if player.is_folded():
+                continue
+            strength = strengths[id(player)]
+            if strength > best_strength:
+                best_strength = strength
+                best_from[i] = [player]
+            elif strength == best_strength:
+                best_from[i] = best_from[i + 1] + [player]
+
+        results = []
+        carried = 0
+        for amount, first_eligible in reversed(pots):
+            winners = best_from[first_eligible]
+            if not winners:
+                # nobody left in the hand put in this much, so it goes to the pot below
+                carried += amount
+                continue
+            # suffix lists were built backwards, put winners back in seat order
+            winners = sorted(winners, key=table.players.index)
+            cls._split_pot(amount + carried, winners)
+            results.append((amount + carried, winners))
+            carried = 0
+
+        results.reverse()
+        return results
+
+    @classmethod
+    def _split_pot(cls, amount, winners):
         """
-        share_of_pot = table.pot.value // len(winners)
-        remainder = table.pot.value % len(winners)
-        #add the pot to the winners stacks  
+        splits amount between the winners, odd chips go to the first winner
+        """
+        share_of_pot = amount // len(winners)
+        remainder = amount % len(winners)
+        #add the pot to the winners stacks
         for winner in winners:
             winner.stack += share_of_pot
-        
+
         if remainder > 0:
             #give remainder to p1
             winners[0].stack += remainder
-            
-           
-    #NOTE: these will be unimplemented for now, because just 1v1
+
+    @classmethod
+    def _hand_strengths(cls, table):
+        """
+        evaluate every eligible player's hand once, keyed by id(player)
+        """
+        return {
+            id(player): HandEvaluator.hand_strength(player.hole_cards, table.community_cards)
+            for player in cls._eligible_players(table)
+        }
+
     @classmethod
     def _eligible_players(cls, table):
         """
         To be called in determine, winners, to get the players that are still in the hand
         """
         #eligible players are active players and players that are all in
-
+        return [player for player in table.players if not player.is_folded()]
 
     @classmethod
-    def _get_side_pots(cls):
+    def _get_side_pots(cls, table):
         """
-        handle side pots 
+        handle side pots
+
+        sorts the players that put money in by their round contribuition, then every
+        new contribuition level makes a pot of (level - previous level) * players at or above it.
+
+        returns (contributors, pots) where pots is a list of (amount, first_eligible),
+        the players that can win a pot are contributors[first_eligible:] that haven't folded.
+        the main pot is pots[0]
         """
+        contributors = sorted(
+            (player for player in table.players if player.round_contribuition > 0),
+            key=lambda player: player.round_contribuition
+        )
+
+        pots = []
+        previous_level = 0
+        for i, player in enumerate(contributors):
+            level = player.round_contribuition
+            if level > previous_level:
+                pots.append(((level - previous_level) * (len(contributors) - i), i))
+                previous_level = level
+
+        # money in the pot that no one is tracked for (pot set directly, antes, ...)
+        # is dead money that goes in the main pot
+        dead_money = table.pot.value - sum(amount for amount, _ in pots)
+        if not pots:
+            contributors = cls._eligible_players(table)
+            pots.append((dead_money, 0))
+        elif dead_money > 0:
+            amount, first_eligible = pots[0]
+            pots[0] = (amount + dead_money, first_eligible)
+
+        return contributors, pots
@@ -0,0 +1,350 @@
+"""
+game_state.py is written by us.
+
+an immutable snapshot of a hand as a tuple of ints, for search. the Dealer,
+Table, BettingManager, Players and Pot are one mutable object graph, so trying
+a line of play on them means deep copying all of it (deck and action log too).
+a GameState is a NamedTuple of ints and tuples of ints, apply returns a new
+state and never changes the old one, and the tuples that don't change are
+shared between the two. expanding a node is building one small tuple.
+
+the transitions follow the BettingManager and Dealer rules exactly (a raise is
+an amount on top of the call, the betting round is over once nobody is left to
+respond, a street is dealt as soon as its betting round is over) so a line
+played on a state ends the same way it would in the engine.
+
+cards are int codes (see Card.to_int). the deck is a tuple in the order it will
+be dealt and deck_index is how many of it have been dealt, so dealing a street
+doesn't copy the deck either.
+"""
+import random
+from typing import NamedTuple, Optional, Tuple
+
+from .card import Card
+from .constants import Action, Street
+from .deck import Deck
+from .hand_evaluator import HandEvaluator
+
+PREFLOP = Street.PREFLOP.value
+RIVER = Street.RIVER.value
+SHOWDOWN = Street.SHOWDOWN.value
+FINISHED = Street.FINISHED.value
+
+# community cards dealt at the start of the flop, turn and river
+CARDS_DEALT = {Street.FLOP.value: 3, Street.TURN.value: 1, Street.RIVER.value: 1}
+
+# card code -> Card, only used to evaluate hands at showdown
+CARDS = [Card(suit, rank) for suit in Deck.SUITS for rank in Deck.RANKS]
+
+
+def _set(values, seat, value):
+    """
+    values with values[seat] replaced, values is a tuple
+    """
+    return values[:seat] + (value,) + values[seat + 1:]
+
+
+class GameState(NamedTuple):
+    """
+    one point in a hand.
+
+    stacks, contributions (this street) and round_contributions (this hand) are per seat.
+    pending, acting and folded are seat masks, bit i is seat i:
+        pending: still has to respond to the bet (BettingManager.pending_mask)
+        acting: can still act, not folded or all in (Table.acting_mask)
+        folded: folded this hand
+    street is a Street value, SHOWDOWN or FINISHED once the hand is over
+    (FINISHED when everyone else folded). holes is the two card codes per seat.
+    """
+    stacks: Tuple[int, ...]
+    contributions: Tuple[int, ...]
+    round_contributions: Tuple[int, ...]
+    pending: int
+    acting: int
+    folded: int
+    street: int
+    current: int
+    current_bet: int
+    pot: int
+    blind: int
+    blind_pos: int
+    holes: Tuple[Tuple[int, int], ...]
+    board: Tuple[int, ...]
+    deck: Tuple[int, ...]
+    deck_index: int
+
+    @classmethod
+    def from_dealer(cls, dealer) -> "GameState":
+        """
+        snapshot the dealer's hand. the deck is the dealer's real deck, a
+        bot searching from its own seat should use resample so it doesn't
+        see cards it couldn't know
+        """
+        table = dealer.table
+        betting_manager = dealer.betting_manager
+        players = table.players
+        folded = 0
+        for player in players:
+            if player.is_folded():
+                folded |= 1 << player.seat
+        return cls(
+            stacks=tuple(player.stack for player in players),
+            contributions=tuple(player.contribuition for player in players),
+            round_contributions=tuple(player.round_contribuition for player in players),
+            pending=betting_manager.pending_mask,
+            acting=table.acting_mask,
+            folded=folded,
+            street=dealer.current_street.value,
+            current=table.current_player.seat,
+            current_bet=betting_manager.current_bet,
+            pot=table.pot.value,
+            blind=dealer.blind,
+            blind_pos=table.blind_pos,
+            holes=tuple(tuple(card.to_int() for card in player.hole_cards) for player in players),
+            board=tuple(card.to_int() for card in table.community_cards),
+            # Deck draws from the end of its list
+            deck=tuple(card.to_int() for card in reversed(table.deck.cards)),
+            deck_index=0,
+        )
+
+    @property
+    def num_seats(self) -> int:
+        return len(self.stacks)
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.street >= SHOWDOWN
+
+    @property
+    def in_hand(self) -> int:
+        """
+        mask of the seats that haven't folded
+        """
+        return ((1 << len(self.stacks)) - 1) & ~self.folded
+
+    def call_amount(self, seat: Optional[int] = None) -> int:
+        if seat is None:
+            seat = self.current
+        return self.current_bet - self.contributions[seat]
+
+    def max_raise(self, seat: Optional[int] = None) -> int:
+        """
+        the most seat can raise by, same as BettingManager.get_max_raise
+        """
+        if seat is None:
+            seat = self.current
+        if self.folded >> seat & 1:
+            return 0
+        return self.stacks[seat] - self.call_amount(seat)
+
+    def legal_actions(self) -> Tuple[Action, ...]:
+        """
+        the actions the current seat can take, none once the hand is over
+        """
+        if self.is_terminal:
+            return ()
+        call_amount = self.call_amount()
+        can_raise = self.stacks[self.current] > call_amount
+        if call_amount > 0:
+            return (Action.FOLD, Action.CALL, Action.RAISE) if can_raise else (Action.FOLD, Action.CALL)
+        return (Action.CHECK, Action.RAISE) if can_raise else (Action.CHECK,)
+
+    def apply(self, action: Action, amount: Optional[int] = None) -> "GameState":
+        """
+        the state after the current seat takes action, amount is what a raise
+        adds on top of the call. when the betting round ends the next street
+        is dealt (or the hand is paid out) in the same step, so the returned
+        state is always a seat to act or a finished hand.
+
+        raises ValueError for an action the BettingManager wouldn't allow
+        """
+        if self.is_terminal:
+            raise ValueError("The hand is over")
+        seat = self.current
+        bit = 1 << seat
+        stacks = self.stacks
+        contributions = self.contributions
+        round_contributions = self.round_contributions
+        pending = self.pending
+        acting = self.acting
+        folded = self.folded
+        current_bet = self.current_bet
+        paid = 0
+
+        if action is Action.CALL:
+            call_amount = current_bet - contributions[seat]
+            if stacks[seat] <= call_amount:
+                # can't pay it all, all in
+                paid = stacks[seat]
+                acting &= ~bit
+            elif pending & bit == 0:
+                raise ValueError(f"Seat {seat} is not waiting to act")
+            else:
+                paid = call_amount
+            pending &= ~bit
+        elif action is Action.CHECK:
+            if contributions[seat] < current_bet:
+                raise ValueError("Cannot check when facing a bet.")
+            if pending & bit == 0:
+                raise ValueError(f"Seat {seat} is not waiting to act")
+            pending &= ~bit
+        elif action is Action.RAISE:
+            if amount is None:
+                raise ValueError("Raise amount cannot be None for a raise action")
+            call_amount = current_bet - contributions[seat]
+            if stacks[seat] < call_amount:
+                raise ValueError("Player cannot afford this bet")
+            left = stacks[seat] - call_amount
+            # BettingManager checks the stack left after calling against the call plus the raise
+            if left <= call_amount + amount:
+                amount = left
+                acting &= ~bit
+            current_bet += amount
+            paid = call_amount + amount
+            pending = acting & ~bit
+        elif action is Action.FOLD:
+            pending &= ~bit
+            acting &= ~bit
+            folded |= bit
+        else:
+            raise ValueError(f"{action} is not a betting action")
+
+        if paid:
+            stacks = _set(stacks, seat, stacks[seat] - paid)
+            contributions = _set(contributions, seat, contributions[seat] + paid)
+            round_contributions = _set(round_contributions, seat, round_contributions[seat] + paid)
+
+        state = self._replace(
+            stacks=stacks, contributions=contributions, round_contributions=round_contributions,
+            pending=pending, acting=acting, folded=folded, current_bet=current_bet,
+            pot=self.pot + paid, current=self._next_seat(seat, acting),
+        )
+        return state._advance()
+
+    def _next_seat(self, seat, acting) -> int:
+        """
+        the next seat after seat that can still act (Table.next_player)
+        """
+        num_seats = len(self.stacks)
+        for offset in range(1, num_seats + 1):
+            next_seat = (seat + offset) % num_seats
+            if acting >> next_seat & 1:
+                return next_seat
+        return (seat + 1) % num_seats
+
+    def _advance(self) -> "GameState":
+        """
+        after an action: pay out a hand that is over, or deal the next street
+        if the betting round is over (the Dealer and Engine rules)
+        """
+        in_hand = self.in_hand
+        if in_hand & (in_hand - 1) == 0:
+            # everyone else folded, the last player gets the whole pot
+            winner = in_hand.bit_length() - 1
+            return self._replace(stacks=_set(self.stacks, winner, self.stacks[winner] + self.pot),
+                                 street=FINISHED, pending=0)
+        if self.pending:
+            return self
+        if self.street == RIVER or (self.acting & (self.acting - 1)) == 0:
+            return self._showdown()
+
+        street = self.street + 1
+        dealt = CARDS_DEALT[street]
+        deck_index = self.deck_index + dealt
+        return self._replace(
+            street=street,
+            board=self.board + self.deck[self.deck_index:deck_index],
+            deck_index=deck_index,
+            contributions=(0,) * len(self.stacks),
+            current_bet=0,
+            pending=self.acting,
+            current=self._first_to_act(),
+        )
+
+    def _first_to_act(self) -> int:
+        """
+        the first seat from the small blind that can still act (Table.first_to_act)
+        """
+        if self.acting == 0:
+            return self.current
+        return self._next_seat(self.blind_pos - 1, self.acting)
+
+    def _showdown(self) -> "GameState":
+        """
+        deal the rest of the board and pay the main pot and side pots
+        (GameEvaluator.award_pots)
+        """
+        board = self.board
+        deck_index = self.deck_index
+        if len(board) < 5:
+            deck_index += 5 - len(board)
+            board = board + self.deck[self.deck_index:deck_index]
+        return self._replace(stacks=self._award_pots(board), board=board,
+                             deck_index=deck_index, street=SHOWDOWN, pending=0)
+
+    def hand_strengths(self, board=None) -> dict:
+        """
+        seat -> HandEvaluator.hand_strength of every seat still in the hand
+        """
+        community = [CARDS[code] for code in (self.board if board is None else board)]
+        return {
+            seat: HandEvaluator.hand_strength([CARDS[code] for code in self.holes[seat]], community)
+            for seat in range(len(self.stacks)) if not self.folded >> seat & 1
+        }
+
+    def _award_pots(self, board) -> Tuple[int, ...]:
+        """
+        the stacks after every pot is split between the best hands eligible for it,
+        odd chips go to the first winner in seat order
+        """
+        strengths = self.hand_strengths(board)
+        contributions = self.round_contributions
+        contributors = sorted((seat for seat in range(len(contributions)) if contributions[seat] > 0),
+                              key=lambda seat: contributions[seat])
+
+        pots = []
+        previous_level = 0
+        for i, seat in enumerate(contributors):
+            level = contributions[seat]
+            if level > previous_level:
+                pots.append([(level - previous_level) * (len(contributors) - i), i])
+                previous_level = level
+        dead_money = self.pot - sum(amount for amount, _ in pots)
+        if not pots:
+            contributors = list(strengths)
+            pots.append([dead_money, 0])
+        elif dead_money > 0:
+            pots[0][0] += dead_money
+
+        stacks = list(self.stacks)
+        carried = 0
+        for amount, first_eligible in reversed(pots):
+            eligible = [seat for seat in contributors[first_eligible:] if seat in strengths]
+            if not eligible:
+                carried += amount
+                continue
+            best = max(strengths[seat] for seat in eligible)
+            winners = sorted(seat for seat in eligible if strengths[seat] == best)
+            amount += carried
+            carried = 0
+            for winner in winners:
+                stacks[winner] += amount // len(winners)
+            stacks[winners[0]] += amount % len(winners)
+        return tuple(stacks)
+
+    def resample(self, seat: int, rng=random) -> "GameState":
+        """
+        the same state as seat sees it: the other seats' hole cards and the
+        cards still to come are dealt again at random from the cards seat
+        can't see. for sampling opponent hands and runouts in a search
+        """
+        known = set(self.holes[seat]) | set(self.board)
+        unseen = [code for code in range(52) if code not in known]
+        rng.shuffle(unseen)
+        holes = []
+        for other, hole in enumerate(self.holes):
+            if other == seat:
+                holes.append(hole)
+            else:
+                holes.append((unseen.pop(), unseen.pop()))
+        return self._replace(holes=tuple(holes), deck=tuple(unseen), deck_index=0)
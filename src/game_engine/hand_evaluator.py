@@ -3,7 +3,40 @@
    not based on pypoker, will look to refactor in future 
 """
 
+import numpy as np
+
 from .deck import Deck
+from . import instrumentation
+
+
+def _build_straight_table():
+    """
+    maps every 13 bit rank mask (bit 0 = 2, bit 12 = ace) to the rank
+    of the highest card of the best straight in it, or 0 if there is none
+    """
+    # windows from ace high down to six high, the wheel (A-2-3-4-5) is five high
+    windows = [(0b11111 << low, low + 6) for low in range(8, -1, -1)]
+    windows.append((0b1000000001111, 5))
+
+    table = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        for window, high in windows:
+            if mask & window == window:
+                table[mask] = high
+                break
+    return table
+
+
+def _build_top_ranks_table():
+    """
+    the ranks (2-14) of the five highest bits of every 13 bit rank mask,
+    highest first and 0 where the mask has fewer bits
+    """
+    table = np.zeros((1 << 13, 5), dtype=np.int64)
+    for mask in range(1 << 13):
+        ranks = [bit + 2 for bit in range(12, -1, -1) if mask >> bit & 1][:5]
+        table[mask, :len(ranks)] = ranks
+    return table
 
 
 class HandEvaluator():
@@ -41,7 +74,16 @@ class HandEvaluator():
         "high_card": 1,
     }
 
+    # highest straight for every rank mask, used by hand_strength
+    STRAIGHT_HIGH = _build_straight_table()
+
+    # numpy versions for hand_strength_batch
+    STRAIGHT_HIGH_ARRAY = np.array(STRAIGHT_HIGH, dtype=np.int64)
+    TOP_RANKS = _build_top_ranks_table()
+    BIT_COUNTS = np.array([bin(mask).count("1") for mask in range(1 << 13)], dtype=np.int64)
+
     @classmethod
+    @instrumentation.timed("hand_eval")
     def hand_eval(cls, hole_cards, community_cards):
         """
         main function to evaluate the hand, will call helper functions to determine the strength 
@@ -81,6 +123,177 @@ class HandEvaluator():
             "kickers": kickers,
         }
 
+    @classmethod
+    def hand_strength(cls, hole_cards, community_cards) -> int:
+        """
+        evaluates the hand into a single integer, a higher number is always a better hand
+        and equal numbers are a tie, so showdowns only need to compare ints.
+
+        the hand rank (see STRENGTH_MAP) is stored above bit 20, and the ranks of the
+        five cards that make up the hand (primary cards first, then kickers) are packed
+        4 bits each below it
+        """
+        rank_counts = [0] * 15
+        suit_masks = {"H": 0, "D": 0, "C": 0, "S": 0}
+        rank_mask = 0
+
+        for cards in (hole_cards, community_cards):
+            for card in cards:
+                rank = card.get_card_rank()
+                rank_counts[rank] += 1
+                suit_masks[card.suit] |= 1 << (rank - 2)
+                rank_mask |= 1 << (rank - 2)
+
+        flush_mask = 0
+        for mask in suit_masks.values():
+            if mask.bit_count() >= 5:
+                flush_mask = mask
+
+        if flush_mask:
+            straight_high = cls.STRAIGHT_HIGH[flush_mask]
+            if straight_high == 14:
+                return cls._pack(cls.STRENGTH_MAP["royal_flush"], [14])
+            if straight_high:
+                return cls._pack(cls.STRENGTH_MAP["straight_flush"], [straight_high])
+
+        # group the ranks by how many times they show up, highest rank first
+        quads, trips, pairs, singles = [], [], [], []
+        for rank in range(14, 1, -1):
+            count = rank_counts[rank]
+            if count >= 4:
+                quads.append(rank)
+            elif count == 3:
+                trips.append(rank)
+            elif count == 2:
+                pairs.append(rank)
+            elif count == 1:
+                singles.append(rank)
+
+        if quads:
+            kickers = sorted(quads[1:] + trips + pairs + singles, reverse=True)
+            return cls._pack(cls.STRENGTH_MAP["four_of_a_kind"], [quads[0]] + kickers[:1])
+
+        if trips and (len(trips) > 1 or pairs):
+            # a second set of trips can be used as the pair
+            pair_rank = max(trips[1:] + pairs)
+            return cls._pack(cls.STRENGTH_MAP["full_house"], [trips[0], pair_rank])
+
+        if flush_mask:
+            return cls._pack(cls.STRENGTH_MAP["flush"], cls._top_ranks(flush_mask, 5))
+
+        straight_high = cls.STRAIGHT_HIGH[rank_mask]
+        if straight_high:
+            return cls._pack(cls.STRENGTH_MAP["straight"], [straight_high])
+
+        if trips:
+            return cls._pack(cls.STRENGTH_MAP["three_of_a_kind"], [trips[0]] + singles[:2])
+
+        if len(pairs) >= 2:
+            kickers = sorted(pairs[2:] + singles, reverse=True)
+            return cls._pack(cls.STRENGTH_MAP["two_pair"], pairs[:2] + kickers[:1])
+
+        if pairs:
+            return cls._pack(cls.STRENGTH_MAP["pair"], [pairs[0]] + singles[:3])
+
+        return cls._pack(cls.STRENGTH_MAP["high_card"], singles[:5])
+
+    @classmethod
+    def hand_strength_batch(cls, cards) -> np.ndarray:
+        """
+        hand_strength for many hands at once. cards is an int array of shape (hands, cards)
+        of card codes (see Card.to_int), -1 for cards not dealt.
+        returns an int64 array with the same numbers hand_strength gives
+        """
+        cards = np.asarray(cards)
+        dealt = cards >= 0
+        codes = np.where(dealt, cards, 0)
+        bits = np.where(dealt, 1 << (codes % 13), 0)
+        suits = codes // 13
+
+        rank_counts = ((codes[:, :, None] % 13 == np.arange(13)) & dealt[:, :, None]).sum(axis=1)
+        suit_masks = np.stack([np.where(suits == suit, bits, 0).sum(axis=1) for suit in range(4)], axis=1)
+        rank_mask = np.bitwise_or.reduce(bits, axis=1)
+
+        # a rank mask per count, bit r is set if rank r + 2 shows up that many times
+        powers = 1 << np.arange(13)
+        quads_mask = ((rank_counts >= 4) * powers).sum(axis=1)
+        trips_mask = ((rank_counts == 3) * powers).sum(axis=1)
+        pairs_mask = ((rank_counts == 2) * powers).sum(axis=1)
+        singles_mask = ((rank_counts == 1) * powers).sum(axis=1)
+
+        flush_suits = cls.BIT_COUNTS[suit_masks] >= 5
+        flush_mask = np.where(flush_suits, suit_masks, 0).max(axis=1)
+        flush_straight = cls.STRAIGHT_HIGH_ARRAY[flush_mask]
+        straight = cls.STRAIGHT_HIGH_ARRAY[rank_mask]
+
+        top = cls.TOP_RANKS
+        quad = top[quads_mask, 0]
+        trip = top[trips_mask, 0]
+        pair_tops = top[pairs_mask]
+        singles = top[singles_mask]
+        rank_bit = lambda rank: np.where(rank > 0, 1 << np.maximum(rank - 2, 0), 0)
+
+        strength = cls.STRENGTH_MAP
+        # (hand rank, up to five ranks) for every hand type, the first that applies is used
+        options = [
+            (flush_straight == 14, strength["royal_flush"], [np.full_like(quad, 14)]),
+            (flush_straight > 0, strength["straight_flush"], [flush_straight]),
+            (quad > 0, strength["four_of_a_kind"], [quad, top[rank_mask & ~rank_bit(quad), 0]]),
+            ((trip > 0) & ((trips_mask & ~rank_bit(trip)) | pairs_mask > 0), strength["full_house"],
+             [trip, top[(trips_mask | pairs_mask) & ~rank_bit(trip), 0]]),
+            (flush_mask > 0, strength["flush"], list(top[flush_mask].T)),
+            (straight > 0, strength["straight"], [straight]),
+            (trip > 0, strength["three_of_a_kind"], [trip, singles[:, 0], singles[:, 1]]),
+            (pair_tops[:, 1] > 0, strength["two_pair"],
+             [pair_tops[:, 0], pair_tops[:, 1],
+              top[rank_mask & ~rank_bit(pair_tops[:, 0]) & ~rank_bit(pair_tops[:, 1]), 0]]),
+            (pair_tops[:, 0] > 0, strength["pair"], [pair_tops[:, 0], singles[:, 0], singles[:, 1], singles[:, 2]]),
+            (np.ones_like(quad, dtype=bool), strength["high_card"], list(singles.T)),
+        ]
+
+        result = np.zeros(len(cards), dtype=np.int64)
+        done = np.zeros(len(cards), dtype=bool)
+        for applies, hand_rank, ranks in options:
+            use = applies & ~done
+            packed = np.int64(hand_rank) << 20
+            for shift, rank in zip((16, 12, 8, 4, 0), ranks):
+                packed = packed | (rank << shift)
+            result = np.where(use, packed, result)
+            done |= use
+        return result
+
+    @staticmethod
+    def _pack(hand_rank, ranks):
+        """
+        packs the hand rank and up to 5 card ranks into one int
+        """
+        strength = hand_rank << 20
+        shift = 16
+        for rank in ranks:
+            strength |= rank << shift
+            shift -= 4
+        return strength
+
+    @staticmethod
+    def _top_ranks(mask, amount):
+        """
+        returns the ranks of the highest amount bits set in a rank mask
+        """
+        ranks = []
+        for bit in range(12, -1, -1):
+            if mask >> bit & 1:
+                ranks.append(bit + 2)
+                if len(ranks) == amount:
+                    break
+        return ranks
+
+    @classmethod
+    def strength_hand_rank(cls, strength) -> int:
+        """
+        gets the hand rank (see STRENGTH_MAP) back out of a packed hand strength
+        """
+        return strength >> 20
+
     # gets the kickers based on the cards used to make up hand rank
 
     @classmethod
@@ -111,7 +324,6 @@ class HandEvaluator():
             card_rank = card.get_card_rank()
             card_match_map[card_rank].append(card)
 
-        print("MAP", card_match_map)
         return card_match_map
 
     @classmethod
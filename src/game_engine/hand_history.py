@@ -0,0 +1,334 @@
+"""
+hand_history.py is written by us.
+
+logs every hand to an append-only binary file, so millions of simulated hands can
+be kept without building a dict per action (see Player.action_histories).
+
+file format:
+    header: MAGIC then one version byte
+    records: varint length, one record type byte, then the payload
+
+    NAME record: varint name_id, utf-8 name
+        gives a player name an id for the HAND records after it
+        (a writer starts ids at 0 again, the latest NAME for an id wins)
+
+    HAND record:
+        varint blind, varint blind_pos, varint number of players
+        for every seat: varint name_id, varint starting stack, varint final stack,
+                        2 card bytes
+        one byte number of community cards, then a card byte for each
+        varint number of actions
+        for every action: one byte street << 3 | action code, varint seat, varint chips paid
+
+cards are Card.to_int codes (NO_CARD if the card wasn't dealt), action codes are
+constants.ACTION_CODES. a hand's id is its position in the file (0 is the first hand)
+"""
+import mmap
+import os
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .constants import ACTION_CODES
+
+MAGIC = b"PKHH"
+VERSION = 1
+
+NAME_RECORD = 1
+HAND_RECORD = 2
+
+NO_CARD = 255
+
+
+def write_varint(buffer: bytearray, value: int):
+    """
+    append value to buffer as an unsigned LEB128 varint (7 bits per byte)
+    """
+    if value < 0:
+        raise ValueError("varints can't be negative")
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, pos: int) -> Tuple[int, int]:
+    """
+    read a varint from data at pos, returns (value, position after the varint)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class HandRecord:
+    """
+    one hand read back from a hand history file
+
+    seats are in table order, actions are (street, action code, seat, chips paid)
+    ints, use CODE_ACTIONS[code] to get the Action back
+    """
+
+    def __init__(self, hand_id, blind, blind_pos, names, start_stacks, final_stacks,
+                 hole_cards, community_cards, actions):
+        self.hand_id = hand_id
+        self.blind = blind
+        self.blind_pos = blind_pos
+        self.names: List[str] = names
+        self.start_stacks: List[int] = start_stacks
+        self.final_stacks: List[int] = final_stacks
+        self.hole_cards: List[Tuple[int, int]] = hole_cards
+        self.community_cards: List[int] = community_cards
+        self.actions: List[Tuple[int, int, int, int]] = actions
+
+    def pot(self) -> int:
+        """
+        chips put in by every player during the hand
+        """
+        return sum(action[3] for action in self.actions)
+
+    def winnings(self) -> List[int]:
+        """
+        chips won (or lost if negative) by each seat
+        """
+        return [final - start for start, final in zip(self.start_stacks, self.final_stacks)]
+
+
+class HandHistoryWriter:
+    """
+    appends hands to a hand history file, every fsync_every hands
+    the file is flushed and fsynced so a crash loses at most that many hands
+    """
+
+    def __init__(self, path, fsync_every=1000):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.hands_written = 0
+        self._names: Dict[str, int] = {}
+
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC + bytes([VERSION]))
+
+    def name_id(self, name: str) -> int:
+        """
+        returns the id for a player name, writing a NAME record the first time it's seen
+        """
+        if name not in self._names:
+            name_id = len(self._names)
+            self._names[name] = name_id
+            payload = bytearray()
+            write_varint(payload, name_id)
+            payload += name.encode("utf-8")
+            self._write_record(NAME_RECORD, payload)
+        return self._names[name]
+
+    def write_hand(self, payload: bytearray):
+        """
+        append an encoded hand (see HandRecorder) to the file
+        """
+        self._write_record(HAND_RECORD, payload)
+        self.hands_written += 1
+        if self.hands_written % self.fsync_every == 0:
+            self.sync()
+
+    def _write_record(self, record_type: int, payload: bytearray):
+        header = bytearray()
+        write_varint(header, len(payload) + 1)
+        header.append(record_type)
+        self._file.write(header)
+        self._file.write(payload)
+
+    def sync(self):
+        """
+        push everything written so far to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        sync and close the file
+        """
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HandRecorder:
+    """
+    records the hands played at one table into a HandHistoryWriter,
+    set it with Dealer.set_recorder. many recorders can share a writer.
+
+    actions are encoded into a bytearray as they happen, so nothing
+    is kept per action besides a few bytes
+    """
+
+    def __init__(self, writer: HandHistoryWriter):
+        self.writer = writer
+        self.street = 0
+        self.in_hand = False
+        self._start_stacks: List[int] = []
+        self._blind = 0
+        self._blind_pos = 0
+        self._actions = bytearray()
+        self._num_actions = 0
+
+    def begin_hand(self, table, blind):
+        """
+        called when the table is set up for a new hand, before the blinds
+        """
+        self.in_hand = True
+        self.street = 0
+        self._blind = blind
+        self._blind_pos = table.blind_pos
+        self._start_stacks = [int(player.stack) for player in table.players]
+        self._actions = bytearray()
+        self._num_actions = 0
+
+    def set_street(self, street):
+        """
+        actions recorded after this are on street
+        """
+        self.street = street.value
+
+    def record_action(self, player, action, paid):
+        """
+        record a player's action and how many chips it put in the pot
+        """
+        if not self.in_hand:
+            return
+        self._actions.append(self.street << 3 | ACTION_CODES[action])
+        write_varint(self._actions, player.seat)
+        write_varint(self._actions, int(paid))
+        self._num_actions += 1
+
+    def end_hand(self, table):
+        """
+        called once the pot is paid out, encodes the hand and gives it to the writer
+        """
+        if not self.in_hand:
+            return
+        self.in_hand = False
+
+        payload = bytearray()
+        write_varint(payload, self._blind)
+        write_varint(payload, self._blind_pos)
+        write_varint(payload, len(table.players))
+        for player, start_stack in zip(table.players, self._start_stacks):
+            write_varint(payload, self.writer.name_id(player.name))
+            write_varint(payload, start_stack)
+            write_varint(payload, int(player.stack))
+            cards = [card.to_int() for card in player.hole_cards]
+            cards += [NO_CARD] * (2 - len(cards))
+            payload += bytes(cards)
+
+        payload.append(len(table.community_cards))
+        payload += bytes(card.to_int() for card in table.community_cards)
+
+        write_varint(payload, self._num_actions)
+        payload += self._actions
+        self.writer.write_hand(payload)
+
+
+def read_hands(path) -> Iterator[HandRecord]:
+    """
+    iterate over the hands in a hand history file in the order they were played,
+    a record cut off at the end of the file (crash while writing) is ignored.
+    the file is memory mapped rather than read in, so only the pages being
+    decoded are in memory however big the log gets
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError("not a hand history file")
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for _, record in iter_records(data):
+                if record is not None:
+                    yield record
+        finally:
+            data.close()
+
+
+def iter_records(data) -> Iterator[Tuple[int, Optional[HandRecord]]]:
+    """
+    iterate over the records in the bytes of a hand history file,
+    yields (offset of the record, HandRecord) for every hand and (offset, None) for name records
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a hand history file")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"unsupported hand history version {data[len(MAGIC)]}")
+
+    names: Dict[int, str] = {}
+    hand_id = 0
+    pos = len(MAGIC) + 1
+    end = len(data)
+    while pos < end:
+        offset = pos
+        try:
+            length, pos = read_varint(data, pos)
+        except IndexError:
+            return
+        if pos + length > end:
+            return
+
+        record_type = data[pos]
+        record_end = pos + length
+        if record_type == NAME_RECORD:
+            name_id, name_pos = read_varint(data, pos + 1)
+            names[name_id] = bytes(data[name_pos:record_end]).decode("utf-8")
+            yield offset, None
+        elif record_type == HAND_RECORD:
+            yield offset, decode_hand(data, pos + 1, hand_id, names)
+            hand_id += 1
+        pos = record_end
+
+
+def decode_hand(data, pos, hand_id, names) -> HandRecord:
+    """
+    decode the payload of a HAND record starting at pos,
+    names maps the name ids in the record to names
+    """
+    blind, pos = read_varint(data, pos)
+    blind_pos, pos = read_varint(data, pos)
+    num_players, pos = read_varint(data, pos)
+
+    seat_names = []
+    start_stacks = []
+    final_stacks = []
+    hole_cards = []
+    for _ in range(num_players):
+        name_id, pos = read_varint(data, pos)
+        start_stack, pos = read_varint(data, pos)
+        final_stack, pos = read_varint(data, pos)
+        seat_names.append(names.get(name_id, f"player{name_id}"))
+        start_stacks.append(start_stack)
+        final_stacks.append(final_stack)
+        hole_cards.append((data[pos], data[pos + 1]))
+        pos += 2
+
+    num_community = data[pos]
+    community_cards = list(data[pos + 1:pos + 1 + num_community])
+    pos += 1 + num_community
+
+    num_actions, pos = read_varint(data, pos)
+    actions = []
+    for _ in range(num_actions):
+        street_action = data[pos]
+        seat, pos = read_varint(data, pos + 1)
+        paid, pos = read_varint(data, pos)
+        actions.append((street_action >> 3, street_action & 0x7, seat, paid))
+
+    return HandRecord(hand_id, blind, blind_pos, seat_names, start_stacks, final_stacks,
+                      hole_cards, community_cards, actions)
@@ -0,0 +1,249 @@
+"""
+hand_history_index.py is written by us.
+
+an index over a hand history file (see hand_history.py) saved as .npy columns
+that are opened memory-mapped, so queries over tens of millions of hands only
+touch the columns they filter on and never parse the log. a hand can still be
+read from the log with read_hand, which seeks straight to its offset.
+
+the index has three tables:
+    hands:   one row per hand (offset in the log, pot, players, last street, ...)
+    seats:   one row per player per hand (player id, winnings)
+    actions: one row per action (hand, player, street, action code, paid,
+             call amount faced, whether they were facing a raise, pot before the action)
+"""
+import json
+import mmap
+import os
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .constants import ACTION_CODES, Action, Street
+from .hand_history import HAND_RECORD, iter_records, read_varint, decode_hand
+
+# column name -> (array typecode used while building, numpy dtype)
+# columns starting with hand_ have a row per hand, seat_ per player per hand, action_ per action
+COLUMNS = {
+    "hand_offset": ("q", np.int64),
+    "hand_pot": ("q", np.int64),
+    "hand_num_players": ("B", np.uint8),
+    "hand_last_street": ("B", np.uint8),
+    "hand_first_seat": ("q", np.int64),
+    "hand_first_action": ("q", np.int64),
+    "hand_num_actions": ("H", np.uint16),
+
+    "seat_hand": ("q", np.int64),
+    "seat_player": ("i", np.int32),
+    "seat_winnings": ("q", np.int64),
+
+    "action_hand": ("q", np.int64),
+    "action_player": ("i", np.int32),
+    "action_seat": ("B", np.uint8),
+    "action_street": ("B", np.uint8),
+    "action_code": ("B", np.uint8),
+    "action_paid": ("q", np.int64),
+    "action_to_call": ("q", np.int64),
+    "action_facing_raise": ("B", np.bool_),
+    "action_pot_before": ("q", np.int64),
+}
+
+RAISE = ACTION_CODES[Action.RAISE]
+ADDS_TO_BET = {ACTION_CODES[Action.SMALL_BLIND], ACTION_CODES[Action.BIG_BLIND],
+               ACTION_CODES[Action.CALL], RAISE}
+
+
+class HandHistoryIndex:
+    """
+    memory-mapped index over a hand history file, build it with
+    HandHistoryIndex.build and open an existing one with HandHistoryIndex(index_dir)
+
+    every column in COLUMNS is an attribute (a read only numpy memmap)
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json")) as file:
+            meta = json.load(file)
+        self.log_path = meta["log_path"]
+        self.names: List[str] = meta["names"]
+        self.player_ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+        for column in COLUMNS:
+            path = os.path.join(index_dir, f"{column}.npy")
+            # np.load can't memory map an empty file
+            if os.path.getsize(path) > 128:
+                setattr(self, column, np.load(path, mmap_mode="r"))
+            else:
+                setattr(self, column, np.load(path))
+
+    @classmethod
+    def build(cls, log_path, index_dir) -> "HandHistoryIndex":
+        """
+        read the whole log once and write the index columns to index_dir
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        columns = {column: array(typecode) for column, (typecode, _) in COLUMNS.items()}
+        player_ids: Dict[str, int] = {}
+
+        with open(log_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("hand history file is empty")
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for offset, hand in iter_records(data):
+                    if hand is not None:
+                        cls._add_hand(columns, player_ids, offset, hand)
+            finally:
+                data.close()
+
+        for column, (_, dtype) in COLUMNS.items():
+            np.save(os.path.join(index_dir, f"{column}.npy"), np.asarray(columns[column], dtype=dtype))
+
+        names = sorted(player_ids, key=player_ids.get)
+        with open(os.path.join(index_dir, "meta.json"), "w") as file:
+            json.dump({"log_path": os.path.abspath(log_path), "names": names}, file)
+
+        return cls(index_dir)
+
+    @staticmethod
+    def _add_hand(columns, player_ids, offset, hand):
+        """
+        add a row to every table for a HandRecord
+        """
+        hand_id = hand.hand_id
+        seat_players = [player_ids.setdefault(name, len(player_ids)) for name in hand.names]
+
+        columns["hand_offset"].append(offset)
+        columns["hand_pot"].append(hand.pot())
+        columns["hand_num_players"].append(len(hand.names))
+        columns["hand_last_street"].append(max((action[0] for action in hand.actions), default=0))
+        columns["hand_first_seat"].append(len(columns["seat_hand"]))
+        columns["hand_first_action"].append(len(columns["action_hand"]))
+        columns["hand_num_actions"].append(len(hand.actions))
+
+        for player_id, winnings in zip(seat_players, hand.winnings()):
+            columns["seat_hand"].append(hand_id)
+            columns["seat_player"].append(player_id)
+            columns["seat_winnings"].append(winnings)
+
+        # replay the betting to know what each player was facing
+        street = -1
+        street_bets = [0] * len(seat_players)
+        current_bet = 0
+        raised = False
+        pot = 0
+        for action_street, code, seat, paid in hand.actions:
+            if action_street != street:
+                street = action_street
+                street_bets = [0] * len(seat_players)
+                current_bet = 0
+                raised = False
+
+            to_call = current_bet - street_bets[seat]
+            columns["action_hand"].append(hand_id)
+            columns["action_player"].append(seat_players[seat])
+            columns["action_seat"].append(seat)
+            columns["action_street"].append(street)
+            columns["action_code"].append(code)
+            columns["action_paid"].append(paid)
+            columns["action_to_call"].append(max(to_call, 0))
+            columns["action_facing_raise"].append(raised and to_call > 0)
+            columns["action_pot_before"].append(pot)
+
+            if code in ADDS_TO_BET:
+                street_bets[seat] += paid
+                current_bet = max(current_bet, street_bets[seat])
+            if code == RAISE:
+                raised = True
+            pot += paid
+
+    def __len__(self):
+        return len(self.hand_offset)
+
+    def player_id(self, name: str) -> int:
+        """
+        id of a player name in the index
+        """
+        if name not in self.player_ids:
+            raise KeyError(f"{name} is not in the hand history")
+        return self.player_ids[name]
+
+    def action_mask(self, player: Optional[str] = None, street: Optional[Street] = None,
+                    action: Optional[Action] = None, facing_raise: Optional[bool] = None) -> np.ndarray:
+        """
+        boolean mask over the actions table, filters that are None are ignored
+        """
+        mask = np.ones(len(self.action_hand), dtype=bool)
+        if player is not None:
+            mask &= self.action_player == self.player_id(player)
+        if street is not None:
+            mask &= self.action_street == street.value
+        if action is not None:
+            mask &= self.action_code == ACTION_CODES[action]
+        if facing_raise is not None:
+            mask &= self.action_facing_raise == facing_raise
+        return mask
+
+    def find_actions(self, **filters) -> np.ndarray:
+        """
+        row numbers of the actions matching the filters (see action_mask),
+        use them to index any action_ column
+        """
+        return np.flatnonzero(self.action_mask(**filters))
+
+    def find_hands(self, min_pot: Optional[int] = None, max_pot: Optional[int] = None,
+                   **filters) -> np.ndarray:
+        """
+        ids of the hands with at least one action matching the filters,
+        and a final pot between min_pot and max_pot.
+
+        ex. all hands where MLCPU folded on the river facing a raise:
+            index.find_hands(player="MLCPU", street=Street.RIVER, action=Action.FOLD, facing_raise=True)
+        """
+        if filters:
+            hand_ids = np.unique(self.action_hand[self.action_mask(**filters)])
+        else:
+            hand_ids = np.arange(len(self))
+
+        pots = self.hand_pot[hand_ids]
+        keep = np.ones(len(hand_ids), dtype=bool)
+        if min_pot is not None:
+            keep &= pots >= min_pot
+        if max_pot is not None:
+            keep &= pots <= max_pot
+        return hand_ids[keep]
+
+    def player_winnings(self, name: str) -> np.ndarray:
+        """
+        chips won or lost by a player in every hand they played, in hand order
+        """
+        return self.seat_winnings[self.seat_player == self.player_id(name)]
+
+    def hand_actions(self, hand_id: int) -> slice:
+        """
+        slice of the actions table for a hand, ex. index.action_code[index.hand_actions(3)]
+        """
+        first = int(self.hand_first_action[hand_id])
+        return slice(first, first + int(self.hand_num_actions[hand_id]))
+
+    def read_hand(self, hand_id: int):
+        """
+        read one hand from the log by seeking to its offset
+        """
+        hand_id = int(hand_id)
+        with open(self.log_path, "rb") as file:
+            file.seek(int(self.hand_offset[hand_id]))
+            header = file.read(10)
+            length, header_size = read_varint(header, 0)
+            file.seek(int(self.hand_offset[hand_id]) + header_size)
+            record = file.read(length)
+
+        if record[0] != HAND_RECORD:
+            raise ValueError(f"no hand at the offset for hand {hand_id}")
+        hand = decode_hand(record, 1, hand_id, {})
+        first_seat = int(self.hand_first_seat[hand_id])
+        seat_players = self.seat_player[first_seat:first_seat + len(hand.names)]
+        hand.names = [self.names[player_id] for player_id in seat_players]
+        return hand
@@ -0,0 +1,198 @@
+"""
+instrumentation.py is written by us.
+
+named timers, counters and events for seeing where time goes in a session,
+used instead of printing. everything is off by default and costs one flag check
+when disabled. turn it on with enable(), read the numbers with snapshot() or
+write a Chrome trace (chrome://tracing or https://ui.perfetto.dev) with write_chrome_trace().
+
+    instrumentation.enable(trace=True)
+    ... play ...
+    print(instrumentation.snapshot())
+    instrumentation.write_chrome_trace("session.json")
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Dict, List
+
+# set with enable() / disable(), checked before anything is recorded
+ENABLED = False
+TRACING = False
+
+# most trace events kept, the oldest are dropped after this
+MAX_TRACE_EVENTS = 1_000_000
+
+_counters: Dict[str, int] = {}
+# name -> [count, total seconds, max seconds]
+_timers: Dict[str, List[float]] = {}
+_trace_events: deque = deque(maxlen=MAX_TRACE_EVENTS)
+_start_time = time.perf_counter()
+
+
+def enable(trace=False):
+    """
+    start recording, with trace=True every timer and event is also kept for the Chrome trace
+    """
+    global ENABLED, TRACING
+    ENABLED = True
+    TRACING = trace
+
+
+def disable():
+    """
+    stop recording (what was recorded is kept until reset)
+    """
+    global ENABLED, TRACING
+    ENABLED = False
+    TRACING = False
+
+
+def reset():
+    """
+    clear every counter, timer and trace event
+    """
+    global _start_time
+    _counters.clear()
+    _timers.clear()
+    _trace_events.clear()
+    _start_time = time.perf_counter()
+
+
+def count(name: str, amount: int = 1):
+    """
+    add amount to the counter name
+    """
+    if not ENABLED:
+        return
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def event(name: str, **args: Any):
+    """
+    something happened (what used to be a print), counted under name
+    and kept with its args in the trace
+    """
+    if not ENABLED:
+        return
+    _counters[name] = _counters.get(name, 0) + 1
+    if TRACING:
+        _trace_events.append({
+            "name": name, "ph": "i", "s": "t", "ts": _timestamp(time.perf_counter()),
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+        })
+
+
+class _Timer:
+    """
+    context manager that adds the time spent inside it to a named timer
+    """
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter())
+
+
+class _NullTimer:
+    """
+    what timer returns when instrumentation is disabled
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """
+    time a block of code:
+
+        with instrumentation.timer("dealer.showdown"):
+            ...
+    """
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(name: str):
+    """
+    decorator that times every call of a function under name
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter())
+        return wrapper
+    return decorator
+
+
+def _record(name, start, end):
+    elapsed = end - start
+    stats = _timers.get(name)
+    if stats is None:
+        _timers[name] = [1, elapsed, elapsed]
+    else:
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+    if TRACING:
+        _trace_events.append({
+            "name": name, "ph": "X", "ts": _timestamp(start), "dur": elapsed * 1e6,
+            "pid": os.getpid(), "tid": threading.get_ident(),
+        })
+
+
+def _timestamp(perf_time):
+    # trace timestamps are microseconds
+    return (perf_time - _start_time) * 1e6
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    the counters and timer stats recorded so far
+    """
+    return {
+        "counters": dict(_counters),
+        "timers": {
+            name: {
+                "count": int(calls),
+                "total_ms": total * 1e3,
+                "mean_us": total / calls * 1e6,
+                "max_us": longest * 1e6,
+            }
+            for name, (calls, total, longest) in _timers.items()
+        },
+    }
+
+
+def write_chrome_trace(path):
+    """
+    write the trace events (recorded with enable(trace=True)) in the Chrome trace format
+    """
+    with open(path, "w") as file:
+        json.dump({"traceEvents": list(_trace_events), "displayTimeUnit": "ms"}, file, default=str)
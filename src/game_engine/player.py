@@ -4,7 +4,8 @@ This module contains the Player class
 
 from .constants import Action, Street, PlayerState
 from .card import Card
-from typing import Union, List, Optional, cast
+from .action_log import ActionLog
+from typing import Union, List, Optional
 
 
 class Player:
@@ -16,13 +17,28 @@ class Player:
         self.hole_cards = []
         self.stack = initial_stack
         self.state = PlayerState.ACTIVE
-        self.round_action_histories: List[Union[None, List[dict]]] = [
-            None for _ in range(4)
-        ]
-        # 4 == len(["preflop", "flop", "turn", "river"])
         self.contribuition = 0
-        self.action_histories = []
+        # everything the player has put in the pot this round (hand), used for side pots
+        self.round_contribuition = 0
         self.name = name
+        # index in table.players, set by Table.init_players
+        self.seat = 0
+        # the actions go in a columnar log, Table.init_players swaps this for the one the table shares
+        self.action_log = ActionLog([self])
+
+    @property
+    def action_histories(self) -> List[dict]:
+        """
+        the actions not saved to a street yet
+        """
+        return self.action_log.pending(self.seat)
+
+    @property
+    def round_action_histories(self) -> List[Union[None, List[dict]]]:
+        """
+        the saved actions per street (preflop, flop, turn, river), None for a street never saved
+        """
+        return self.action_log.saved(self.seat)
 
     def add_hole_card(self, cards: List[Card]):
         if len(self.hole_cards) != 0:
@@ -33,12 +49,6 @@ class Player:
             raise ValueError("Player can only have cards as hole cards")
         self.hole_cards = cards
 
-    # eq's for removing from pending_betters, assuming names are unique
-    def __eq__(self, other_player):
-        if isinstance(other_player, Player):
-            return self.name == other_player.name
-        return False
-
     def clear_hole_cards(self):
         """
         clears the hole cards of the player
@@ -56,6 +66,7 @@ class Player:
             raise ValueError("Player cannot afford this bet")
         self.stack -= amount
         self.contribuition += amount
+        self.round_contribuition += amount
 
     def reset_contribuition(self):
         self.contribuition = 0
@@ -86,84 +97,18 @@ class Player:
         """
         add action to player's action history
         """
-        history = None
-        if action == Action.FOLD:
-            history = {"action": action, "name": self.name, "stack": self.stack}
-        elif action == Action.CALL:
-            pay_history = [
-                h
-                for h in self.action_histories
-                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
-            ]
-            last_pay = pay_history[-1] if len(pay_history) != 0 else None
-            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
-            history = {
-                "name": self.name,
-                "action": action,
-                "amount": chip_amount,
-                "paid": chip_amount - last_pay_amount,
-                "stack": self.stack
-            }
-        elif action == Action.RAISE:
-            pay_history = [
-                h
-                for h in self.action_histories
-                if h["action"] != Action.FOLD and h["action"] != Action.ANTE
-            ]
-            last_pay = pay_history[-1] if len(pay_history) != 0 else None
-            last_pay_amount = last_pay.get("paid", 0) if last_pay else 0
-            history = {
-                "name": self.name,
-                "action": action,
-                "amount": chip_amount,
-                "paid": chip_amount - last_pay_amount,
-                "add_amount": add_amount,
-                "stack": self.stack
-            }
-        elif action == Action.SMALL_BLIND:
-            assert sb_amount is not None
-            add_amount = sb_amount
-            history = {
-                "action": action,
-                "amount": sb_amount,
-                "add_amount": add_amount,
-                "name": self.name,
-                "paid": sb_amount,
-                "stack": self.stack
-            }
+        if action == Action.SMALL_BLIND:
+            chip_amount = sb_amount
         elif action == Action.BIG_BLIND:
-            assert bb_amount is not None
-            add_amount = bb_amount
-            history = {
-                "action": action,
-                "amount": bb_amount,
-                "add_amount": add_amount,
-                "name": self.name,
-                "paid": bb_amount,
-                "stack": self.stack
-            }
-        elif action == Action.CHECK:
-            history = {
-                "action": action,
-                "name": self.name,
-                "stack": self.stack
-            }
-
-        if history is not None:
-            self.action_histories.append(history)
+            chip_amount = bb_amount
+        self.action_log.append(self.seat, action, chip_amount, add_amount, self.stack)
 
     def save_round_action_histories(self, street: Street):
         """
         Save the current action histories to the round action histories for the given street.
         If there are already histories for this street, append to them instead of overwriting.
         """
-        if self.round_action_histories[street.value] is None:
-            self.round_action_histories[street.value] = []
-        
-        histories = cast(List[dict], self.round_action_histories[street.value])
-        histories.extend(self.action_histories)
-        self.action_histories = []
+        self.action_log.save(self.seat, street.value)
 
     def clear_action_histories(self):
-        self.round_action_histories = [None for _ in range(4)]
-        self.action_histories = []
+        self.action_log.clear_seat(self.seat)
@@ -0,0 +1,372 @@
+"""
+poker_env.py is written by us.
+
+gym style environments for reinforcement learning on the real game. every
+environment is a ManagedTable (a Dealer and its BettingManager, see
+table_manager.py) with the agent in seat 0 and an opponent policy in seat 1.
+an episode is one hand, every hand starts from initial_stack, and the reward
+is the chips the agent won or lost in it.
+
+observations are the MLCPU.extract_features features (see discretize_features
+in cpu/mlCPU.py) as a fixed size int32 array, so a Q-table learned here is
+keyed the same way MLCPU plays:
+
+    hand bucket, pot odds, position, street, stack to pot, opponent aggression, hand rank
+
+the hand rank is HandEvaluator.hand_strength's (MLCPU uses hand_eval, which
+misses some flushes and straights) and the aggression is counted from the
+opponent's actions at the table since reset.
+
+the API is gymnasium's: reset(seed) returns (observation, info) and step(action)
+returns (observation, reward, terminated, truncated, info). gym itself isn't needed.
+
+    VectorEnv: num_envs tables stepped in lockstep in this process, the opponent
+               decisions of every table are one decide_batch call and the
+               observations are one numpy pass
+    SubprocVectorEnv: the tables split over worker processes, each a VectorEnv,
+               writing observations, rewards and dones into shared memory
+    PokerEnv: one table
+"""
+import multiprocessing
+import random
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .card_abstraction import CardAbstraction, default_abstraction
+from .cpu import think_time
+from .cpu.mlCPU import FEATURE_SIZES, discretize_features
+from .hand_evaluator import HandEvaluator
+from .table_manager import BotPolicy, DecisionRequest, EquityBatchPolicy, ManagedTable
+
+# agent actions, raises are a fraction of the pot after calling
+FOLD = 0
+CALL = 1
+RAISE_HALF_POT = 2
+RAISE_POT = 3
+ALL_IN = 4
+NUM_ACTIONS = 5
+RAISE_FRACTIONS = {RAISE_HALF_POT: 0.5, RAISE_POT: 1.0}
+
+OBSERVATION_SIZE = 1 + len(FEATURE_SIZES)
+
+AGENT_SEAT = 0
+OPPONENT_SEAT = 1
+
+
+def observation_high(card_abstraction: CardAbstraction) -> np.ndarray:
+    """
+    one more than the biggest value of each observation entry
+    """
+    return np.array((card_abstraction.num_buckets,) + FEATURE_SIZES, dtype=np.int32)
+
+
+class VectorEnv:
+    """
+    num_envs heads up tables stepped together. step takes one action per table
+    and plays every table up to the agent's next decision. a table whose hand
+    ended starts the next one straight away, its terminated entry is True and
+    its observation is the new hand's first (like gymnasium's vector envs).
+
+    opponent is a TableManager policy (decide_batch, like EquityBatchPolicy, the
+    default) or a CPU, which is wrapped in a BotPolicy
+    """
+
+    def __init__(self, num_envs, opponent=None, initial_stack=1000, blind=10,
+                 card_abstraction: Optional[CardAbstraction] = None, seed=None, copy=True, observations=None):
+        if opponent is None:
+            opponent = EquityBatchPolicy()
+        elif not hasattr(opponent, "decide_batch"):
+            opponent = BotPolicy(opponent)
+        self.opponent = opponent
+        self.num_envs = num_envs
+        self.initial_stack = initial_stack
+        self.card_abstraction = card_abstraction if card_abstraction is not None else default_abstraction()
+        self.observation_high = observation_high(self.card_abstraction)
+        # with copy False step and reset return the buffers themselves, overwritten every step
+        self.copy = copy
+        if seed is not None:
+            random.seed(seed)
+
+        self.tables = [ManagedTable(i, [None, opponent], initial_stack, blind, on_hand_over=self._hand_over)
+                       for i in range(num_envs)]
+        # observations can be a buffer owned by someone else (SubprocVectorEnv's shared memory)
+        if observations is None:
+            observations = np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.int32)
+        self.observations = observations
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        # opponent raises and calls seen at each table, for the aggression feature
+        self.opponent_raises = np.zeros(num_envs)
+        self.opponent_calls = np.zeros(num_envs)
+        self.hands = 0
+
+    def _hand_over(self, table, chips_won: List[int]):
+        """
+        ManagedTable callback, the hand's reward and fresh stacks for the next hand
+        """
+        self.rewards[table.table_id] += chips_won[AGENT_SEAT]
+        self.terminated[table.table_id] = True
+        self.hands += 1
+        for player in table.dealer.table.players:
+            player.stack = self.initial_stack
+        table.dealer.game_over = False
+
+    def reset(self, seed=None):
+        """
+        start a new hand at every table.
+
+        :return: (observations, info)
+        """
+        if seed is not None:
+            random.seed(seed)
+        for table in self.tables:
+            for player in table.dealer.table.players:
+                player.stack = self.initial_stack
+            table.dealer.game_over = False
+            table.hand_over = True
+        self.opponent_raises[:] = 0
+        self.opponent_calls[:] = 0
+        self._advance(range(self.num_envs))
+        self.rewards[:] = 0
+        self.terminated[:] = False
+        return self._output(self._observe()), {}
+
+    def step(self, actions):
+        """
+        one agent action per table (FOLD, CALL, RAISE_HALF_POT, RAISE_POT or ALL_IN).
+
+        :return: (observations, rewards, terminated, truncated, info)
+        """
+        self.rewards[:] = 0
+        self.terminated[:] = False
+        for table, action in zip(self.tables, np.asarray(actions).tolist()):
+            self._apply(table, action)
+        self._advance(range(self.num_envs))
+        return (self._output(self._observe()), self._output(self.rewards), self._output(self.terminated),
+                self._output(self.truncated), {})
+
+    def _output(self, array):
+        return array.copy() if self.copy else array
+
+    def _apply(self, table, action):
+        """
+        the agent's action at a table, ManagedTable.apply_action turns what isn't
+        allowed into the closest action that is
+        """
+        dealer = table.dealer
+        player = dealer.table.current_player
+        if action == FOLD:
+            table.apply_action("fold")
+        elif action == CALL:
+            table.apply_action("call")
+        elif action == ALL_IN:
+            table.apply_action("raise", dealer.betting_manager.get_max_raise(player))
+        else:
+            call_amount = dealer.betting_manager.current_bet - player.contribuition
+            table.apply_action("raise", int(RAISE_FRACTIONS[action] * (dealer.table.pot.value + call_amount)))
+
+    def _advance(self, indices):
+        """
+        play the opponent at every table in indices until it's the agent's turn,
+        the waiting opponent decisions are made in one batch each time round
+        """
+        # CPUs don't pause in training
+        with think_time.disabled():
+            self._advance_tables(indices)
+
+    def _advance_tables(self, indices):
+        waiting = list(indices)
+        while waiting:
+            requests = []
+            for index in waiting:
+                table = self.tables[index]
+                player = table.advance()
+                if player.seat != AGENT_SEAT:
+                    requests.append(DecisionRequest(table, player))
+            if not requests:
+                return
+            decisions = self.opponent.decide_batch(requests)
+            for request, (action, amount) in zip(requests, decisions):
+                if action == "raise":
+                    self.opponent_raises[request.table_id] += 1
+                elif action == "call":
+                    self.opponent_calls[request.table_id] += 1
+                self.tables[request.table_id].apply_action(action, amount)
+            waiting = [request.table_id for request in requests]
+
+    def _observe(self) -> np.ndarray:
+        """
+        every table's observation for the agent in one numpy pass
+        """
+        num = self.num_envs
+        cards = np.full((num, 7), -1, dtype=np.int64)
+        numbers = np.zeros((num, 5), dtype=np.int64)
+        for i, table in enumerate(self.tables):
+            dealer = table.dealer
+            player = dealer.table.players[AGENT_SEAT]
+            codes = [card.to_int() for card in player.hole_cards] + \
+                    [card.to_int() for card in dealer.table.community_cards]
+            cards[i, :len(codes)] = codes
+            numbers[i] = (dealer.table.pot.value, dealer.betting_manager.current_bet - player.contribuition,
+                          # 0 small blind, 1 big blind
+                          0 if dealer.table.blind_pos == AGENT_SEAT else 1,
+                          dealer.current_street.value, player.stack)
+        pot, call_amount, position, street, stack = numbers.T
+
+        hand_buckets = self.card_abstraction.bucket_batch(cards)
+        hand_ranks = HandEvaluator.hand_strength_batch(cards) >> 20
+        aggression = self.opponent_raises / (self.opponent_calls + 1)
+        features = discretize_features(hand_buckets, pot, call_amount, position, street, stack,
+                                       aggression, hand_ranks)
+        for column, feature in enumerate(features):
+            self.observations[:, column] = feature
+        return self.observations
+
+
+class PokerEnv:
+    """
+    one table, observations are (OBSERVATION_SIZE,) and the reward is a float.
+    after a terminated step the next hand has already started, reset starts another
+    """
+
+    def __init__(self, **kwargs):
+        self.vector = VectorEnv(1, **kwargs)
+        self.observation_high = self.vector.observation_high
+
+    def reset(self, seed=None):
+        observations, info = self.vector.reset(seed)
+        return observations[0], info
+
+    def step(self, action):
+        observations, rewards, terminated, truncated, info = self.vector.step([action])
+        return observations[0], float(rewards[0]), bool(terminated[0]), bool(truncated[0]), info
+
+
+def _buffer_views(buffer, num_envs) -> Dict[str, np.ndarray]:
+    """
+    the arrays laid out in a SubprocVectorEnv's shared memory
+    """
+    layout = (("observations", (num_envs, OBSERVATION_SIZE), np.int32), ("actions", (num_envs,), np.int64),
+              ("rewards", (num_envs,), np.float32), ("terminated", (num_envs,), bool))
+    views = {}
+    offset = 0
+    for name, shape, dtype in layout:
+        views[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        # keep every array 8 byte aligned
+        offset += -(-views[name].nbytes // 8) * 8
+    return views
+
+
+def _buffer_size(num_envs) -> int:
+    return sum(-(-nbytes // 8) * 8 for nbytes in (num_envs * OBSERVATION_SIZE * 4, num_envs * 8, num_envs * 4, num_envs))
+
+
+def _worker(connection, memory_name, num_envs, start, stop, seed, env_kwargs):
+    """
+    runs the tables start:stop of a SubprocVectorEnv, commands come over connection
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        views = _buffer_views(memory.buf, num_envs)
+        env = VectorEnv(stop - start, seed=seed, copy=False, observations=views["observations"][start:stop],
+                        **env_kwargs)
+        while True:
+            command, argument = connection.recv()
+            if command == "reset":
+                env.reset(argument)
+            elif command == "step":
+                env.step(views["actions"][start:stop])
+                views["rewards"][start:stop] = env.rewards
+                views["terminated"][start:stop] = env.terminated
+            elif command == "close":
+                break
+            connection.send(env.hands)
+        # the views have to go before the memory is closed
+        del env, views
+    finally:
+        memory.close()
+        connection.close()
+
+
+class SubprocVectorEnv:
+    """
+    VectorEnv with the tables split over num_workers processes. the actions,
+    observations, rewards and dones live in one shared memory block, so a step
+    sends each worker a short command and nothing else is pickled. the other
+    keyword arguments go to every worker's VectorEnv (and have to be picklable).
+    call close when done with it
+    """
+
+    def __init__(self, num_envs, num_workers=2, seed=None, copy=True, **env_kwargs):
+        self.num_envs = num_envs
+        self.copy = copy
+        self.memory = shared_memory.SharedMemory(create=True, size=_buffer_size(num_envs))
+        self.views = _buffer_views(self.memory.buf, num_envs)
+        self.hands = 0
+
+        context = multiprocessing.get_context()
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self.connections = []
+        self.processes = []
+        for worker, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            parent, child = context.Pipe()
+            worker_seed = None if seed is None else seed + worker
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(child, self.memory.name, num_envs, int(start), int(stop),
+                                            worker_seed, env_kwargs))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    def _command(self, command, arguments):
+        for connection, argument in zip(self.connections, arguments):
+            connection.send((command, argument))
+        self.hands = sum(connection.recv() for connection in self.connections)
+
+    def _output(self, name):
+        view = self.views[name]
+        return view.copy() if self.copy else view
+
+    def reset(self, seed=None):
+        """
+        :return: (observations, info)
+        """
+        seeds = [None if seed is None else seed + worker for worker in range(len(self.connections))]
+        self._command("reset", seeds)
+        self.views["rewards"][:] = 0
+        self.views["terminated"][:] = False
+        return self._output("observations"), {}
+
+    def step(self, actions):
+        """
+        :return: (observations, rewards, terminated, truncated, info)
+        """
+        self.views["actions"][:] = actions
+        self._command("step", [None] * len(self.connections))
+        return (self._output("observations"), self._output("rewards"), self._output("terminated"),
+                np.zeros(self.num_envs, dtype=bool), {})
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+        for connection in self.connections:
+            connection.close()
+        self.views = {}
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
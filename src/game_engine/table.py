@@ -8,6 +8,7 @@ from .constants import Street
 from .constants import Action
 from .constants import PlayerState
 from .pot import Pot
+from .action_log import ActionLog
 
 
 class Table:
@@ -25,6 +26,16 @@ class Table:
         self.pot = Pot()
         self.players: list[Player] = []
         self.current_player = None
+        # every action of the hand, shared by the players
+        self.action_log = ActionLog(self.players)
+
+        # seats are a circular linked list of the players that can still act
+        # (not folded or all in), so moving to the next player and removing
+        # a player from the action are both O(1)
+        self.next_seat: list[int] = []
+        self.prev_seat: list[int] = []
+        # bit i is set if the player in seat i can still act
+        self.acting_mask = 0
 
     def init_players(self, initial_stack, num_players):
         """
@@ -32,13 +43,60 @@ class Table:
         """
         # if not pc, cpu1, cpu2, etc
         for i in range(num_players):
-            self.players.append(Player(initial_stack, f"cpu{i}"))
+            player = Player(initial_stack, f"cpu{i}")
+            player.seat = i
+            player.action_log = self.action_log
+            self.players.append(player)
 
         # name gui player pc
         self.players[0].name = "pc"
 
-        # init current player to first player
+        # init current player to first player, the first round starts with
+        # the small blind on the first player (set_blind_pos moves it one seat)
         self.current_player = self.players[0]
+        self.blind_pos = num_players - 1
+        self.reset_seats()
+
+    def reset_seats(self):
+        """
+        put every seat back in the action, in seat order
+        """
+        num_seats = len(self.players)
+        self.next_seat = [(seat + 1) % num_seats for seat in range(num_seats)]
+        self.prev_seat = [(seat - 1) % num_seats for seat in range(num_seats)]
+        self.acting_mask = (1 << num_seats) - 1
+
+    def remove_from_action(self, player):
+        """
+        take a player that folded or went all in out of the seat ring.
+        the removed seat keeps its next_seat so next_player still works
+        if they are the current player
+        """
+        seat = player.seat
+        if not self.acting_mask >> seat & 1:
+            return
+        self.acting_mask &= ~(1 << seat)
+
+        prev_seat = self.prev_seat[seat]
+        next_seat = self.next_seat[seat]
+        self.next_seat[prev_seat] = next_seat
+        self.prev_seat[next_seat] = prev_seat
+
+    def first_to_act(self):
+        """
+        returns the first player from the small blind (left of the button) that can still act,
+        this is who starts the betting after the flop
+        """
+        if self.acting_mask == 0:
+            return self.current_player
+
+        # rotate the mask so the small blind is bit 0, then the lowest set bit is the first to act
+        num_seats = len(self.players)
+        all_seats = (1 << num_seats) - 1
+        rotated = ((self.acting_mask >> self.blind_pos) |
+                   (self.acting_mask << (num_seats - self.blind_pos))) & all_seats
+        offset = (rotated & -rotated).bit_length() - 1
+        return self.players[(self.blind_pos + offset) % num_seats]
 
     def reset_table(self):
         """
@@ -49,12 +107,15 @@ class Table:
         self.deck = Deck()
         self.community_cards = []
         self.pot.value = 0
+        self.action_log.clear()
 
         for player in self.players:
             player.clear_hole_cards()
             player.contribuition = 0
+            player.round_contribuition = 0
             player.state = PlayerState.ACTIVE
-        
+        self.reset_seats()
+
         self.set_blind_pos()
         #change to the player paying the small blind
         self.current_player = self.players[self.blind_pos]
@@ -62,14 +123,13 @@ class Table:
     # set this to whos turn it is
     def next_player(self):
         """
-        set current player to the next player
+        set current player to the next player in the seat ring that can still act
         """
-        # For heads up, don't need to change this because when a player folds the round is over
-        # more players needs to be based on active players
-        if self.current_player == self.players[1]:
-            self.current_player = self.players[0]
-        else:
-            self.current_player = self.players[1]
+        seat = self.next_seat[self.current_player.seat]
+        # only loops if the current player and the seat after them were both taken out of the ring
+        while not self.acting_mask >> seat & 1 and seat != self.current_player.seat and self.acting_mask:
+            seat = self.next_seat[seat]
+        self.current_player = self.players[seat]
 
     def deal_hole_cards(self):
         """
@@ -80,14 +140,10 @@ class Table:
 
     def set_blind_pos(self):
         """
-        start of the round set the small blind pos,
-        since we are playing heads up, for now just swapping between
-        2 players
+        start of the round move the small blind to the next seat,
+        heads up this just swaps between the 2 players
         """
-        if self.blind_pos == 0:
-            self.blind_pos = 1
-        else:
-            self.blind_pos = 0
+        self.blind_pos = (self.blind_pos + 1) % len(self.players)
 
     def deal_community_cards(self, num_cards):
         """
@@ -0,0 +1,467 @@
+"""
+table_manager.py is written by us.
+
+runs many games in one process. every table is its own Dealer, the manager moves
+each table forward until someone has to act, then makes all the CPU decisions that
+are waiting (across every table) in one batch per policy. this way equity for
+hundreds of tables is one numpy call instead of hundreds of declare_action calls.
+
+human seats don't block the other tables, their table waits until submit_action is called.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .dealer import Dealer
+from .constants import Action
+from .cpu import think_time
+from .cpu.equityCPU import equityCPU
+from .cpu.baseCPU import cards_for
+from .cpu.neuralCPU import encode_features, choose_actions, raise_size, RAISE, CALL
+from .hand_history import HandRecorder
+from . import instrumentation
+
+
+class DecisionRequest:
+    """
+    everything a policy needs to decide for the player that has to act
+    """
+
+    def __init__(self, managed_table, player):
+        dealer = managed_table.dealer
+        betting_manager = dealer.betting_manager
+
+        self.table_id = managed_table.table_id
+        self.player = player
+        self.street = dealer.current_street
+        self.hole_cards = player.hole_cards
+        self.community_cards = dealer.table.community_cards
+        self.pot = dealer.table.pot.value
+        self.blind = dealer.blind
+        self.current_bet = betting_manager.current_bet
+        self.call_amount = betting_manager.current_bet - player.contribuition
+        self.max_raise = betting_manager.get_max_raise(player)
+        self._dealer = dealer
+
+    def card_codes(self) -> List[int]:
+        """
+        hole cards then community cards as int codes (see Card.to_int)
+        """
+        return [card.to_int() for card in self.hole_cards] + \
+            [card.to_int() for card in self.community_cards]
+
+    def raise_counts(self) -> List[int]:
+        """
+        the opponents' raises on each street of the hand then the player's own
+        (see ActionLog.raise_counts)
+        """
+        return self._dealer.table.action_log.raise_counts(self.player.seat)
+
+    def opponents(self) -> list:
+        """
+        the other players still in the hand
+        """
+        return [other for other in self._dealer.table.players_in_hand() if other is not self.player]
+
+    def valid_actions(self) -> List[Dict[str, Any]]:
+        """
+        same valid_actions the Engine gives the CPU
+        """
+        return [
+            {"action": "fold", "amount": 0},
+            {"action": "call", "amount": self.call_amount},
+            {"action": "raise", "amount": {"min": self.current_bet * 2, "max": self.player.stack}},
+            {"action": "check", "amount": 0}
+        ]
+
+    def round_state(self, bot=None) -> Dict[str, Any]:
+        """
+        a round_state in the format the CPUs expect (see Engine.build_round_state),
+        action histories are left empty since the manager doesn't save them.
+        the community cards are in the form bot takes them (see cards_for)
+        """
+        table = self._dealer.table
+        return {
+            "street": self.street.name.lower(),
+            "next_player": self.player.seat,
+            "blind_pos": table.blind_pos,
+            "community_card": cards_for(bot, self.community_cards),
+            "pot": {"main": self.pot, "side": []},
+            "seats": [
+                {"name": player.name, "stack": player.stack, "state": player.state.value}
+                for player in table.players
+            ],
+            "action_histories": {"preflop": [], "flop": [], "turn": [], "river": []}
+        }
+
+
+class BotPolicy:
+    """
+    wraps one of the CPUs in game_engine/cpu, decisions are made one at a time
+    through declare_action. CPUs that remember things between decisions (MLCPU)
+    should get their own BotPolicy per seat
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def decide_batch(self, requests: List[DecisionRequest]):
+        """
+        returns a list of (action, amount) for the requests
+        """
+        decisions = []
+        for request in requests:
+            self.bot.stack = request.player.stack
+            hole_cards = cards_for(self.bot, request.hole_cards)
+            with instrumentation.timer("cpu.declare_action"):
+                decisions.append(
+                    self.bot.declare_action(request.valid_actions(), hole_cards, request.round_state(self.bot)))
+        return decisions
+
+
+class EquityBatchPolicy:
+    """
+    equityCPU's strategy for every request at once, outs are counted
+    with equityCPU.count_outs_batch over a (requests, 7) array of cards
+    """
+
+    def decide_batch(self, requests: List[DecisionRequest]):
+        """
+        returns a list of (action, amount) for the requests
+        """
+        cards = np.full((len(requests), 7), -1, dtype=np.int16)
+        for i, request in enumerate(requests):
+            codes = request.card_codes()
+            cards[i, :len(codes)] = codes
+
+        # Each out is roughly 4% equity
+        equity = np.minimum(equityCPU.count_outs_batch(cards) * 4, 100)
+        # ranks 10 and up are high cards (rank index 8 is a 10)
+        num_high_cards = (cards[:, :2] % 13 >= 8).sum(axis=1)
+        call_amounts = np.array([request.call_amount for request in requests])
+
+        checked_to = call_amounts == 0
+        raise_checked = checked_to & ((equity > 20) | (num_high_cards >= 1))
+        raise_bet = ~checked_to & ((equity > 30) | (num_high_cards >= 2))
+        call_bet = ~checked_to & ~raise_bet & ((equity > 15) | (num_high_cards >= 1))
+
+        decisions = []
+        for i, request in enumerate(requests):
+            if raise_checked[i] or raise_bet[i]:
+                # Raise 2x minimum
+                decisions.append(("raise", min(request.player.stack, request.current_bet * 4)))
+            elif checked_to[i]:
+                decisions.append(("check", 0))
+            elif call_bet[i]:
+                decisions.append(("call", int(call_amounts[i])))
+            else:
+                decisions.append(("fold", 0))
+        return decisions
+
+
+class NeuralBatchPolicy:
+    """
+    NeuralCPU's strategy for every request at once, the features of all the
+    requests are encoded together and scored with one network.predict call.
+
+    with epsilon above 0 some actions are picked at random (for training),
+    with record=True every decision is kept in pending until finish_hand
+    is called for its table (see neural_trainer.py)
+    """
+
+    def __init__(self, network, epsilon=0.0, record=False, seed=None):
+        self.network = network
+        self.epsilon = epsilon
+        self.record = record
+        self.rng = np.random.default_rng(seed)
+        # (table_id, seat) -> [(features, action index)] for the hand being played
+        self.pending: Dict[Any, list] = {}
+
+    def encode(self, requests: List[DecisionRequest]) -> np.ndarray:
+        """
+        the network features for every request
+        """
+        num = len(requests)
+        cards = np.full((num, 7), -1, dtype=np.int16)
+        numbers = np.zeros((num, 7))
+        raises = np.zeros((num, 5))
+        for i, request in enumerate(requests):
+            codes = request.card_codes()
+            cards[i, :len(codes)] = codes
+            player = request.player
+            opponents = request.opponents()
+            numbers[i] = (request.street.value, request.pot, request.call_amount, player.stack,
+                          player.round_contribuition, len(opponents),
+                          max((other.stack for other in opponents), default=0))
+            raises[i] = request.raise_counts()
+        return encode_features(cards, *numbers.T, raises)
+
+    def decide_batch(self, requests: List[DecisionRequest]):
+        """
+        returns a list of (action, amount) for the requests
+        """
+        features = self.encode(requests)
+        call_amounts = np.array([request.call_amount for request in requests])
+        can_raise = np.array([request.max_raise > 0 for request in requests])
+        actions = choose_actions(self.network.predict(features), call_amounts, can_raise)
+
+        if self.epsilon > 0:
+            explore = self.rng.random(len(requests)) < self.epsilon
+            # a random allowed action, 0 fold, 1 call or check, 2 raise
+            low = (call_amounts <= 0).astype(int)
+            high = np.where(can_raise, 3, 2)
+            actions = np.where(explore, self.rng.integers(low, high), actions)
+
+        decisions = []
+        for i, request in enumerate(requests):
+            action = actions[i]
+            if self.record:
+                self.pending.setdefault((request.table_id, request.player.seat), []).append((features[i], action))
+            if action == RAISE:
+                decisions.append(("raise", raise_size(request.pot, request.blind * 2, request.max_raise)))
+            elif action == CALL:
+                decisions.append(("call", request.call_amount) if request.call_amount > 0 else ("check", 0))
+            else:
+                decisions.append(("fold", 0))
+        return decisions
+
+    def finish_hand(self, table_id, chips_won: List[int]):
+        """
+        the recorded (features, action, chips won) for every decision made
+        at table_id in the hand that just ended
+        """
+        samples = []
+        for seat, won in enumerate(chips_won):
+            for features, action in self.pending.pop((table_id, seat), ()):
+                samples.append((features, action, won))
+        return samples
+
+
+class ManagedTable:
+    """
+    one game hosted by the TableManager, policies has one entry
+    per seat, None means the seat is a human player.
+    on_hand_over is called with the table and every seat's chips won (or lost) when a hand ends
+    """
+
+    def __init__(self, table_id, policies, initial_stack, blind, history_writer=None,
+                 on_hand_over: Optional[Callable] = None):
+        self.table_id = table_id
+        self.policies = policies
+        self.initial_stack = initial_stack
+        self.dealer = Dealer(initial_stack, blind, len(policies), blind_delay=0)
+        if history_writer is not None:
+            self.dealer.set_recorder(HandRecorder(history_writer))
+        self.on_hand_over = on_hand_over
+
+        self.hands_played = 0
+        self.waiting_for_human = False
+        self.hand_over = True
+        # every seat's stack before the blinds of the current hand
+        self.start_stacks: List[int] = []
+
+    def advance(self):
+        """
+        deal, change streets and pay out pots until a player has to act,
+        returns the player that has to act
+        """
+        dealer = self.dealer
+        while True:
+            if self.hand_over:
+                self._start_hand()
+            elif dealer.is_showdown():
+                dealer.showdown()
+                self._end_hand()
+            elif len(dealer.table.players_in_hand()) <= 1:
+                # everyone else folded, the pot was paid in the fold
+                self._end_hand()
+            elif dealer.betting_manager.is_betting_over():
+                dealer.next_street()
+                dealer.start_street()
+            else:
+                return dealer.table.current_player
+
+    def apply_action(self, action, amount=None):
+        """
+        apply an action for the player that has to act, actions that aren't
+        allowed right now are turned into the closest one that is
+        (check facing a bet is a call, raises are kept between the big blind and all in)
+        """
+        dealer = self.dealer
+        player = dealer.table.current_player
+        action = Action(action) if isinstance(action, str) else action
+        call_amount = dealer.betting_manager.current_bet - player.contribuition
+
+        if action == Action.RAISE:
+            max_raise = dealer.betting_manager.get_max_raise(player)
+            if max_raise <= 0:
+                action = Action.CALL
+            else:
+                amount = min(max(int(amount or 0), dealer.blind * 2), max_raise)
+        if action == Action.CHECK and call_amount > 0:
+            action = Action.CALL
+        if action == Action.CALL and call_amount == 0:
+            action = Action.CHECK
+
+        dealer.apply_action(action, amount if action == Action.RAISE else None)
+        if len(dealer.table.players_in_hand()) <= 1:
+            # everyone else folded, the pot is already paid so the hand is over now
+            self._end_hand()
+
+    def _start_hand(self):
+        """
+        set up the next hand, if someone went broke everyone gets their stack back
+        """
+        dealer = self.dealer
+        if dealer.game_over:
+            for player in dealer.table.players:
+                player.stack = self.initial_stack
+            dealer.game_over = False
+
+        self.start_stacks = [player.stack for player in dealer.table.players]
+
+        dealer.set_up_next_round()
+        dealer.start_street()
+        self.hands_played += 1
+        self.hand_over = False
+
+    def _end_hand(self):
+        self.hand_over = True
+        if self.on_hand_over is not None:
+            players = self.dealer.table.players
+            self.on_hand_over(self, [player.stack - start for player, start in zip(players, self.start_stacks)])
+
+
+class TableManager:
+    """
+    hosts many independent games and steps them together,
+    see step, run and run_async
+    """
+
+    def __init__(self, initial_stack=1000, blind=10, on_human_turn: Optional[Callable] = None,
+                 history_writer=None, on_hand_over: Optional[Callable] = None):
+        self.initial_stack = initial_stack
+        self.blind = blind
+        # every table logs its hands here if set (see hand_history.py)
+        self.history_writer = history_writer
+        self.tables: Dict[Any, ManagedTable] = {}
+        self.running = False
+
+        # called with the ManagedTable when a human has to act
+        self.on_human_turn = on_human_turn
+        # called with the ManagedTable and the chips each seat won when a hand ends
+        self.on_hand_over = on_hand_over
+
+    def add_table(self, policies, table_id=None, names=None) -> ManagedTable:
+        """
+        add a game with one policy per seat (None for human seats),
+        names optionally renames the players (this is the name used in hand histories),
+        returns the new table
+        """
+        if table_id is None:
+            table_id = len(self.tables)
+        if table_id in self.tables:
+            raise ValueError(f"table {table_id} already exists")
+
+        table = ManagedTable(table_id, policies, self.initial_stack, self.blind, self.history_writer,
+                             self.on_hand_over)
+        if names is not None:
+            for player, name in zip(table.dealer.table.players, names):
+                player.name = name
+        self.tables[table_id] = table
+        return table
+
+    def remove_table(self, table_id):
+        """
+        stop running a game
+        """
+        del self.tables[table_id]
+
+    def submit_action(self, table_id, action, amount=None):
+        """
+        apply a human player's action, the table is stepped again on the next step
+        """
+        table = self.tables[table_id]
+        if not table.waiting_for_human:
+            raise ValueError(f"table {table_id} is not waiting for a human player")
+        table.apply_action(action, amount)
+        table.waiting_for_human = False
+
+    def waiting_tables(self) -> List[ManagedTable]:
+        """
+        tables waiting for a human player to act
+        """
+        return [table for table in self.tables.values() if table.waiting_for_human]
+
+    def step(self) -> int:
+        """
+        moves every table to its next decision, then makes all the CPU decisions
+        with one decide_batch call per policy. returns how many actions were applied.
+        CPUs don't pause while the tables are stepped, the think time setting is put
+        back after so a GUI in the same process still gets its pauses
+        """
+        with think_time.disabled():
+            return self._step()
+
+    def _step(self) -> int:
+        batches: Dict[int, Any] = {}
+        for table in self.tables.values():
+            if table.waiting_for_human:
+                continue
+
+            player = table.advance()
+            policy = table.policies[player.seat]
+            if policy is None:
+                table.waiting_for_human = True
+                if self.on_human_turn is not None:
+                    self.on_human_turn(table)
+                continue
+
+            batches.setdefault(id(policy), (policy, []))[1].append(table)
+
+        applied = 0
+        for policy, tables in batches.values():
+            requests = [DecisionRequest(table, table.dealer.table.current_player) for table in tables]
+            with instrumentation.timer(f"table_manager.{type(policy).__name__}.decide_batch"):
+                decisions = policy.decide_batch(requests)
+            instrumentation.count("table_manager.decisions", len(requests))
+            for table, (action, amount) in zip(tables, decisions):
+                table.apply_action(action, amount)
+                applied += 1
+
+        return applied
+
+    def run(self, steps):
+        """
+        step every table steps times
+        """
+        for _ in range(steps):
+            self.step()
+
+    async def run_async(self, steps=None, idle_sleep=0.01):
+        """
+        step the tables on the running event loop until stop is called
+        (or steps is reached), giving other coroutines (like the ones
+        handling human players) a turn between steps
+        """
+        self.running = True
+        done = 0
+        while self.running and (steps is None or done < steps):
+            applied = self.step()
+            done += 1
+            # every table is waiting on a human, don't spin
+            await asyncio.sleep(0 if applied else idle_sleep)
+        self.running = False
+
+    def stop(self):
+        """
+        stop run_async after the current step
+        """
+        self.running = False
+
+    def hands_played(self) -> int:
+        """
+        total hands started across all tables
+        """
+        return sum(table.hands_played for table in self.tables.values())
@@ -0,0 +1,111 @@
+"""
+tests for the columnar action log
+"""
+from game_engine.action_log import ActionLog
+from game_engine.constants import Action, Street
+from game_engine.engine import Engine
+from game_engine.player import Player
+from game_engine.table import Table
+
+
+def make_table():
+    table = Table()
+    table.init_players(1000, 2)
+    return table
+
+
+def test_players_share_the_table_log():
+    table = make_table()
+    assert all(player.action_log is table.action_log for player in table.players)
+    pc, cpu = table.players
+    pc.add_action_history(Action.SMALL_BLIND, sb_amount=10)
+    cpu.add_action_history(Action.BIG_BLIND, bb_amount=20)
+    pc.add_action_history(Action.CALL, chip_amount=20)
+
+    # rows are in the order they happened, paid counts what was in already
+    preflop = table.action_log.histories()["preflop"]
+    assert [row["name"] for row in preflop] == ["pc", "cpu1", "pc"]
+    assert preflop[-1] == {"name": "pc", "action": Action.CALL, "amount": 20, "add_amount": 0, "paid": 10,
+                           "stack": 1000}
+    assert pc.action_histories[-1]["paid"] == 10
+    assert len(cpu.action_histories) == 1
+
+
+def test_paid_after_a_check_and_a_save():
+    player = Player(1000, "pc")
+    player.add_action_history(Action.RAISE, chip_amount=40, add_amount=20)
+    player.add_action_history(Action.RAISE, chip_amount=100, add_amount=60)
+    assert player.action_histories[-1]["paid"] == 60
+    player.add_action_history(Action.CHECK)
+    player.add_action_history(Action.CALL, chip_amount=30)
+    assert player.action_histories[-1]["paid"] == 30
+
+    player.save_round_action_histories(Street.PREFLOP)
+    player.add_action_history(Action.CALL, chip_amount=30)
+    assert player.action_histories == [{"name": "pc", "action": Action.CALL, "amount": 30, "paid": 30,
+                                        "stack": 1000}]
+    assert len(player.round_action_histories[0]) == 4
+    assert player.round_action_histories[1:] == [None, None, None]
+
+
+def test_saving_to_another_street_moves_the_rows():
+    player = Player(1000, "pc")
+    player.add_action_history(Action.CHECK)
+    views = player.action_log.histories()
+    player.save_round_action_histories(Street.FLOP)
+    assert player.round_action_histories[0] is None
+    assert len(player.round_action_histories[1]) == 1
+    assert len(player.action_log.histories()["flop"]) == 1
+    # views handed out before keep what they had
+    assert len(views["preflop"]) == 1 and len(views["flop"]) == 0
+
+
+def test_views_are_snapshots():
+    table = make_table()
+    pc = table.players[0]
+    pc.add_action_history(Action.CHECK)
+    view = table.action_log.histories(action_values=True)["preflop"]
+    pc.add_action_history(Action.CHECK)
+    assert len(view) == 1 and view[0]["action"] == "check"
+    assert view == [view[-1]] and list(reversed(view)) == view[:]
+
+    table.reset_table()
+    assert len(table.action_log) == 0
+    assert len(view) == 1
+
+
+def test_clearing_one_player_keeps_the_others():
+    table = make_table()
+    pc, cpu = table.players
+    pc.add_action_history(Action.CHECK)
+    cpu.add_action_history(Action.CHECK)
+    pc.save_round_action_histories(Street.PREFLOP)
+    pc.add_action_history(Action.CALL, chip_amount=20)
+    cpu.clear_action_histories()
+    assert cpu.action_histories == [] and cpu.round_action_histories == [None] * 4
+    assert len(pc.round_action_histories[0]) == 1
+    assert [row["action"] for row in pc.action_histories] == [Action.CALL]
+
+
+def test_engine_histories_follow_the_streets():
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.dealer.blind_delay = 0
+    engine.dealer.set_up_next_round()
+    engine.dealer.start_street()
+    engine.player_action("call")
+    engine.player_action("check")
+    engine.start_next_street()
+    engine.player_action("raise", 40)
+
+    histories = engine.current_state_of_game()["action_histories"]
+    assert [row["action"] for row in histories["preflop"]] == ["sb", "bb", "call", "check"]
+    assert [row["action"] for row in histories["flop"]] == ["raise"]
+    assert engine.build_round_state()["action_histories"]["flop"][0]["action"] == Action.RAISE
+
+
+def test_log_grows_with_seats():
+    players = []
+    log = ActionLog(players)
+    players.append(Player(1000, "a"))
+    log.append(0, Action.CHECK)
+    assert log.histories()["preflop"][0]["name"] == "a"
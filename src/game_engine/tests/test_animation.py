@@ -0,0 +1,126 @@
+"""
+tests for the GUI's tween pool, driven by a fake clock
+"""
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from gui.animation import (Animations, FrameClock, FLIP_STEPS, REVEAL_TIME, flip_frames,  # noqa: E402
+                           flip_frames_cache)
+
+
+class FakeTime:
+    """
+    a time source that only moves when the test says so
+    """
+    def __init__(self):
+        self.ms = 0
+
+    def __call__(self):
+        return self.ms
+
+
+class RecordingScreen:
+    def __init__(self):
+        self.blits = []
+
+    def blit(self, surface, position):
+        self.blits.append((surface, position))
+
+
+def make_animations(capacity):
+    time = FakeTime()
+    return time, Animations(capacity, clock=FrameClock(time_source=time))
+
+
+def test_tick_finishes_tweens_and_draw_eases():
+    time, animations = make_animations(4)
+    sprite = pygame.Surface((2, 2))
+    animations.start("card", sprite, (0, 0), (100, 0), duration=100, delay=20)
+    assert animations.is_animating("card")
+
+    # not drawn before its delay is up
+    screen = RecordingScreen()
+    animations.draw(screen)
+    assert screen.blits == []
+
+    time.ms = 70
+    assert animations.tick() == 70
+    animations.draw(screen)
+    # halfway in time is 7/8 of the way with the ease out
+    assert screen.blits == [(sprite, (87, 0))]
+
+    time.ms = 119
+    animations.tick()
+    assert animations.is_animating("card")
+    time.ms = 120
+    animations.tick()
+    assert not animations.is_animating("card")
+    assert not any(tween.active for tween in animations.tweens)
+    # a finished tween lets go of its sprite
+    assert all(tween.sprite is None for tween in animations.tweens)
+
+
+def test_same_key_replaces_the_tween():
+    time, animations = make_animations(2)
+    first, second = pygame.Surface((1, 1)), pygame.Surface((1, 1))
+    animations.start("chip", first, (0, 0), (10, 10), duration=100)
+    time.ms = 50
+    animations.tick()
+    animations.start("chip", second, (10, 10), (20, 20), duration=100)
+
+    assert sum(tween.active for tween in animations.tweens) == 1
+    tween = animations.active["chip"]
+    assert tween.sprite is second
+    assert tween.start == 50
+    # the first one would have been done at 100, the new one runs to 150
+    time.ms = 100
+    animations.tick()
+    assert animations.is_animating("chip")
+
+
+def test_full_pool_finishes_the_tween_closest_to_done():
+    time, animations = make_animations(3)
+    sprite = pygame.Surface((1, 1))
+    animations.start("a", sprite, (0, 0), (1, 1), duration=300)
+    animations.start("b", sprite, (0, 0), (1, 1), duration=100)
+    animations.start("c", sprite, (0, 0), (1, 1), duration=200)
+    tweens = list(animations.tweens)
+
+    animations.start("d", sprite, (0, 0), (1, 1), duration=50)
+
+    # b ends first so its tween is reused, the pool never grows
+    assert animations.tweens == tweens
+    assert set(animations.active) == {"a", "c", "d"}
+    assert not animations.is_animating("b")
+
+    animations.clear()
+    assert animations.active == {}
+
+
+def test_flip_frames_are_made_once_per_card():
+    back = pygame.Surface((8, 12))
+    face = pygame.Surface((8, 12))
+    frames = flip_frames(back, face)
+
+    assert flip_frames(back, face) is frames
+    assert flip_frames_cache[(id(back), id(face))] is frames
+    # the back narrowing, the face widening, then the face itself
+    assert len(frames) == 2 * FLIP_STEPS + 1
+    assert frames[-1] == (face, 0)
+    widths = [surface.get_width() for surface, _ in frames]
+    assert widths[:FLIP_STEPS] == sorted(widths[:FLIP_STEPS], reverse=True)
+    # every frame is centered on the card
+    assert all(offset == (8 - width) // 2 for width, (_, offset) in zip(widths, frames))
+    assert flip_frames(face, back) is not frames
+
+    time, animations = make_animations(2)
+    animations.reveal("hole", back, face, (30, 40))
+    screen = RecordingScreen()
+    animations.draw(screen)
+    assert screen.blits[0] == (frames[0][0], (30 + frames[0][1], 40))
+    # the draw uses the frame's time, the last slice of the flip is the face in place
+    time.ms = REVEAL_TIME - 1
+    animations.tick()
+    animations.draw(screen)
+    assert screen.blits[-1] == (face, (30, 40))
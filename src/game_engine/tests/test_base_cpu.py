@@ -0,0 +1,159 @@
+"""
+tests for the shared CPU base class
+"""
+import pytest
+from pypokerengine.players import BasePokerPlayer
+
+from game_engine.card import Card
+from game_engine.cpu import baseCPU
+from game_engine.cpu.baseCPU import BaseCPU, DecisionState, cards_for, parse_card_str
+from game_engine.cpu.baselineCPU import baselineCPU
+from game_engine.cpu.equityCPU import equityCPU
+from game_engine.cpu.expectedValueCPU import expectedValueCPU
+from game_engine.cpu.potOddsCPU import potOddsCPU
+from game_engine.cpu.mlCPU import MLCPU
+from game_engine.engine import Engine
+
+
+def round_state(community_card, street="flop"):
+    return {
+        "street": street,
+        "community_card": community_card,
+        "pot": {"main": 100},
+        "seats": [{"name": "pc", "stack": 950}, {"name": "cpu", "stack": 950}],
+    }
+
+
+VALID_ACTIONS = [
+    {"action": "fold", "amount": 0},
+    {"action": "call", "amount": 20},
+    {"action": "raise", "amount": {"min": 40, "max": 2000}},
+    {"action": "check", "amount": 0}
+]
+
+
+def test_parse_card_str_is_cached():
+    card = parse_card_str("10H")
+    assert card == Card("H", "10")
+    assert parse_card_str("10H") is card
+    assert parse_card_str("AS").to_int() == Card("S", "A").to_int()
+
+
+@pytest.mark.parametrize("cpu_class", [baselineCPU, equityCPU, potOddsCPU, expectedValueCPU])
+def test_cpus_share_the_base(cpu_class):
+    cpu = cpu_class(1000)
+    assert isinstance(cpu, BaseCPU)
+    assert cpu.count_outs is BaseCPU.count_outs
+
+
+def test_community_cards_are_parsed_as_they_come(monkeypatch):
+    cpu = BaseCPU(1000)
+    cpu.receive_round_start_message(1, ["AH", "KH"], [{"name": "pc"}, {"name": "cpu"}])
+    assert cpu.hole_cards == [Card("H", "A"), Card("H", "K")]
+    assert cpu.hole_codes == [card.to_int() for card in cpu.hole_cards]
+
+    cpu.receive_street_start_message("flop", round_state(["2H", "7D", "9C"]))
+    flop = list(cpu.community_cards)
+
+    # only the turn card is parsed when the turn comes
+    parsed = []
+    original = baseCPU.parse_card_str
+    monkeypatch.setattr(baseCPU, "parse_card_str", lambda card_str: parsed.append(card_str) or original(card_str))
+    cpu.receive_street_start_message("turn", round_state(["2H", "7D", "9C", "JS"], "turn"))
+    cpu.receive_game_update_message({"player_name": "pc", "action": "call", "amount": 20},
+                                    round_state(["2H", "7D", "9C", "JS"], "turn"))
+    decision = cpu.read_decision(VALID_ACTIONS, ["AH", "KH"], round_state(["2H", "7D", "9C", "JS"], "turn"))
+    assert parsed == ["JS"]
+    assert decision.community_cards[:3] == flop
+    assert decision.community_cards[3] == Card("S", "J")
+    assert cpu.community_codes == [card.to_int() for card in decision.community_cards]
+
+    # a new hand starts over
+    cpu.receive_round_start_message(2, ["2C", "3C"], [{"name": "pc"}, {"name": "cpu"}])
+    assert cpu.community_cards == [] and cpu.hole_cards == [Card("C", "2"), Card("C", "3")]
+
+
+def test_decisions_on_other_boards_are_not_stale():
+    cpu = BaseCPU(1000)
+    decision = cpu.read_decision(VALID_ACTIONS, ["AH", "KH"], round_state(["2H", "7D", "9C"]))
+    assert decision.community_cards == [Card("H", "2"), Card("D", "7"), Card("C", "9")]
+    # same number of cards, different board and hand
+    decision = cpu.read_decision(VALID_ACTIONS, ["QS", "QD"], round_state(["3S", "8S", "KD"]))
+    assert decision.hole_cards == [Card("S", "Q"), Card("D", "Q")]
+    assert decision.community_cards == [Card("S", "3"), Card("S", "8"), Card("D", "K")]
+
+
+def test_decision_state():
+    cpu = BaseCPU(1000)
+    decision = cpu.read_decision(VALID_ACTIONS, ["AH", "KH"], round_state([]))
+    assert decision is cpu.decision
+    assert (decision.pot, decision.call_amount, decision.min_raise, decision.max_raise) == (100, 20, 40, 1000)
+    assert decision.can_check and decision.can_raise
+    assert cpu.raise_amount(decision) == 80
+
+    # per decision state is slot only
+    with pytest.raises(AttributeError):
+        DecisionState().extra = 1
+    assert not hasattr(DecisionState(), "__dict__")
+    assert "hole_cards" in BaseCPU.__slots__
+
+
+def test_ml_cpu_handlers():
+    cpu = MLCPU(1000, model_path="does_not_exist.pkl")
+    cpu.receive_round_start_message(1, ["AH", "KH"], [{"name": "pc"}, {"name": "ml_cpu"}])
+    assert cpu.current_round_history == []
+    cpu.receive_game_update_message({"player_name": "pc", "action": "raise", "amount": 40}, round_state([], "preflop"))
+    assert cpu.opponent_name == "pc"
+    assert cpu.opponent_actions[-1]["action"] == "raise"
+
+
+class ExternalPlayer(BasePokerPlayer):
+    """
+    a PyPokerEngine player that isn't one of ours, it only takes card strings
+    """
+
+
+def test_cards_for():
+    cards = [Card("H", "A"), Card("S", "10")]
+    assert cards_for(BaseCPU(1000), cards) == cards
+    assert cards_for(BaseCPU(1000), cards)[0] is cards[0]
+    assert cards_for(ExternalPlayer(), cards) == ["AH", "10S"]
+    assert cards_for(None, cards) == ["AH", "10S"]
+
+
+def test_native_cards_are_not_parsed(monkeypatch):
+    cpu = BaseCPU(1000)
+    monkeypatch.setattr(baseCPU, "parse_card_str", lambda card_str: pytest.fail("parsed " + card_str))
+    hole_cards = [Card("H", "A"), Card("H", "K")]
+    board = [Card("C", "2"), Card("D", "7"), Card("S", "9"), Card("S", "J")]
+    cpu.receive_round_start_message(1, hole_cards, [{"name": "pc"}, {"name": "cpu"}])
+    cpu.receive_street_start_message("flop", round_state(board[:3]))
+    decision = cpu.read_decision(VALID_ACTIONS, hole_cards, round_state(board, "turn"))
+    assert decision.hole_cards[0] is hole_cards[0]
+    assert decision.community_cards == board
+    assert cpu.community_codes == [card.to_int() for card in board]
+
+
+class RecordingCPU(baselineCPU):
+    def declare_action(self, valid_actions, hole_card, round_state):
+        self.hole_card = hole_card
+        return 'call', valid_actions[1]['amount']
+
+
+def test_engine_sends_cards_in_the_players_format():
+    engine = Engine(num_players=2, initial_stack=1000, blind=1)
+    cpu = RecordingCPU(1000)
+    engine.set_cpu_player(cpu)
+    engine.start_next_round()
+    engine.player_action("raise", 10)
+    engine.cpu_action()
+    # our CPUs get the table's Card objects
+    table_cards = engine.dealer.table.players[1].hole_cards
+    assert cpu.hole_card[0] is table_cards[0]
+    engine.dealer.table.deal_community_cards(3)
+    assert engine.build_round_state()["community_card"][0] is engine.dealer.table.community_cards[0]
+
+    # anything else gets strings
+    external = ExternalPlayer()
+    engine.cpu_player = external
+    assert engine.build_round_state()["community_card"] == [str(card) for card in engine.dealer.table.community_cards]
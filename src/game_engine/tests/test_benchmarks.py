@@ -0,0 +1,47 @@
+"""
+smoke test for the benchmark suite, every benchmark runs once
+(the numbers aren't checked, that's what --compare is for)
+"""
+import json
+
+from game_engine.benchmarks.runner import BENCHMARKS, run_benchmarks, compare, main
+from game_engine.cpu import think_time
+
+
+def test_every_benchmark_runs():
+    think_enabled = think_time.ENABLED
+    results = run_benchmarks(repeat=1, min_time=0)
+
+    assert set(results["results"]) == set(BENCHMARKS)
+    for result in results["results"].values():
+        assert result["min_us"] > 0
+        assert result["ops_per_sec"] > 0
+    # think time is put back the way it was
+    assert think_time.ENABLED == think_enabled
+
+
+def test_compare_marks_regressions():
+    baseline = {"results": {"a": {"min_us": 10.0}, "b": {"min_us": 10.0}}}
+    current = {"results": {"a": {"min_us": 10.5}, "b": {"min_us": 15.0}, "new": {"min_us": 1.0}}}
+
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.2)}
+
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regression"]
+    assert rows["b"]["regression"]
+    assert rows["b"]["ratio"] == 1.5
+
+
+def test_main_writes_json_and_compares(tmp_path):
+    output = tmp_path / "results.json"
+    args = ["--only", "deck_shuffle", "--repeat", "1", "--min-time", "0"]
+
+    assert main(args + ["--output", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert "deck_shuffle" in results["results"]
+
+    # a baseline that is impossibly fast is always a regression
+    results["results"]["deck_shuffle"]["min_us"] = 1e-9
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results))
+    assert main(args + ["--compare", str(baseline)]) == 1
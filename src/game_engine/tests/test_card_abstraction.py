@@ -0,0 +1,84 @@
+"""
+tests for the card bucket table
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from game_engine.card import Card
+from game_engine.card_abstraction import (CardAbstraction, KEYS_PER_STREET, deal_situations, preflop_keys,
+                                          situation_key, situation_keys, hand_strength_stats)
+from game_engine.cpu.mlCPU import MLCPU
+
+
+def card_from_int(code):
+    rank = code % 13 + 2
+    card_val = {10: "10", 11: "J", 12: "Q", 13: "K", 14: "A"}.get(rank, str(rank))
+    return Card("HDCS"[code // 13], card_val)
+
+
+@pytest.fixture(scope="module")
+def abstraction():
+    return CardAbstraction.build(samples=4000, num_buckets=6, runouts=4, opponents=2, seed=0)
+
+
+def test_preflop_keys_are_the_169_starting_hands():
+    hands = np.array(list(itertools.combinations(range(52), 2)))
+    keys = preflop_keys(hands)
+    assert len(set(keys.tolist())) == 169
+    # the same hand in other suits has the same key
+    aces = [[12, 25], [38, 51]]
+    suited = [[0, 12], [13, 25]]
+    assert len(set(preflop_keys(np.array(aces)).tolist())) == 1
+    assert len(set(preflop_keys(np.array(suited)).tolist())) == 1
+    assert preflop_keys(np.array([[0, 12]]))[0] != preflop_keys(np.array([[0, 25]]))[0]
+
+
+def test_situation_key_matches_batch():
+    rng = np.random.default_rng(1)
+    for street in range(4):
+        cards = deal_situations(300, street, rng)
+        streets, keys = situation_keys(cards)
+        assert (streets == street).all()
+        assert keys.max() < KEYS_PER_STREET[street]
+        for row, key in zip(cards, keys):
+            hand = [card_from_int(int(code)) for code in row if code >= 0]
+            assert situation_key(hand[:2], hand[2:]) == key
+
+
+def test_hand_strength_stats():
+    rng = np.random.default_rng(2)
+    cards = np.full((2, 7), -1)
+    # aces against 7 2 offsuit preflop
+    cards[0, :2] = [12, 25]
+    cards[1, :2] = [5, 13]
+    ehs, ehs2, histogram = hand_strength_stats(cards, runouts=100, opponents=8, rng=rng)
+    assert ehs[0] > 0.75 and ehs[1] < 0.45
+    assert (ehs2 <= ehs + 1e-9).all() and (ehs2 >= ehs ** 2 - 1e-9).all()
+    assert np.allclose(histogram.sum(axis=1), 1)
+
+
+def test_build_and_lookup(abstraction, tmp_path):
+    assert [len(table) for table in abstraction.tables] == list(KEYS_PER_STREET)
+    assert all(table.max() < 6 for table in abstraction.tables)
+
+    aces = abstraction.bucket([Card("H", "A"), Card("D", "A")], [])
+    seven_two = abstraction.bucket([Card("H", "7"), Card("D", "2")], [])
+    assert aces > seven_two
+
+    path = tmp_path / "buckets.npz"
+    abstraction.save(path)
+    loaded = CardAbstraction.load(path)
+    cards = deal_situations(200, 2, np.random.default_rng(3))
+    assert loaded.bucket_batch(cards).tolist() == abstraction.bucket_batch(cards).tolist()
+    assert loaded.to_dict() == {"kind": "table", "num_buckets": 6, "path": str(path)}
+
+
+def test_ml_cpu_uses_the_table(abstraction):
+    cpu = MLCPU(1000, model_path="does_not_exist.pkl", card_abstraction=abstraction)
+    hole_cards = [Card("H", "A"), Card("H", "K")]
+    community_cards = [Card("H", "2"), Card("H", "9"), Card("S", "J")]
+    round_state = {"street": "flop", "seats": []}
+    features = cpu.extract_features(hole_cards, community_cards, 100, 20, round_state)
+    assert features[0] == abstraction.bucket(hole_cards, community_cards)
@@ -0,0 +1,205 @@
+"""
+tests for the CFR solver and the blueprint CPU
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from game_engine.cfr_solver import (BettingAbstraction, BettingTree, CFRSolver, MonteCarloBucketer, Blueprint,
+                                    FOLD, CALL, NOT_TERMINAL, FOLDED, SHOWDOWN)
+from game_engine.cpu.blueprintCPU import BlueprintCPU
+from game_engine.cpu.equityCPU import equityCPU
+from game_engine.cpu import think_time
+from game_engine.engine import Engine, Difficulty
+
+
+def small_solver(seed=0):
+    abstraction = BettingAbstraction(stack=200, blind=10, raise_sizes=(1.0,), max_raises=1)
+    return CFRSolver(abstraction, MonteCarloBucketer(num_buckets=3, samples=8), seed=seed)
+
+
+def test_betting_tree():
+    tree = BettingTree(BettingAbstraction(stack=1000, blind=10, raise_sizes=(0.5, 1.0), max_raises=2))
+    root = tree.root
+
+    # the small blind acts first facing the big blind, it can fold, call, raise or go all in
+    assert tree.player[root] == 0 and tree.street[root] == 0
+    assert tree.contributions[root].tolist() == [10, 20]
+    assert (tree.children[root] >= 0).all()
+    assert tree.terminal[tree.children[root, FOLD]] == FOLDED
+
+    # after the call the big blind still has the option, checking ends preflop
+    limp = tree.children[root, CALL]
+    assert tree.player[limp] == 1 and tree.street[limp] == 0
+    assert tree.children[limp, FOLD] == -1
+    flop = tree.children[limp, CALL]
+    assert tree.street[flop] == 1 and tree.player[flop] == 0
+    assert tree.contributions[flop].tolist() == [20, 20]
+
+    # pot raise: 40 pot after calling, so 40 on top of the 20
+    pot_raise = tree.children[root, 3]
+    assert tree.contributions[pot_raise].tolist() == [60, 20]
+    assert tree.raise_fraction(root, 3) == 1.0
+
+    # calling an all in goes straight to showdown
+    all_in = tree.children[root, tree.abstraction.all_in]
+    assert tree.terminal[tree.children[all_in, CALL]] == SHOWDOWN
+    assert (tree.children[all_in, 2:] == -1).all()
+
+    decisions = tree.terminal == NOT_TERMINAL
+    assert tree.num_decisions == decisions.sum()
+    assert sorted(tree.decision_index[decisions].tolist()) == list(range(tree.num_decisions))
+
+
+def test_bucketer():
+    bucketer = MonteCarloBucketer(num_buckets=8, samples=200)
+    rng = np.random.default_rng(0)
+    # aces and 7 2 offsuit preflop, then the nut flush against a missed hand on the river
+    hole = np.array([[12, 25], [5, 13], [12, 3], [28, 44]])
+    board = np.full((4, 5), -1)
+    board[2:] = [0, 7, 9, 17, 36]
+    equity = bucketer.equity(hole, board, rng)
+
+    assert equity[0] > 0.8 and equity[1] < 0.4
+    assert equity[2] > 0.95 and equity[3] < 0.3
+    buckets = bucketer.buckets(hole, board, rng)
+    assert buckets[0] > buckets[1] and buckets[2] == 7
+
+    holes = np.array([[[0, 1], [2, 3]]])
+    boards = np.array([[4, 5, 6, 7, 8]])
+    assert bucketer.deal_buckets(holes, boards, rng).shape == (1, 2, 4)
+
+    # each player's buckets are for their own hole cards: aces against 7 2 offsuit on a dry board
+    holes = np.array([[[12, 25], [31, 39]]])
+    boards = np.array([[37, 20, 41, 9, 27]])
+    buckets = bucketer.deal_buckets(holes, boards, rng)
+    assert (buckets[0, 0] > buckets[0, 1]).all()
+
+
+def test_solver_learns_and_checkpoints(tmp_path):
+    solver = small_solver()
+    solver.run_iterations(300)
+    assert solver.iterations == 300
+    assert solver.regrets.min() >= 0
+    assert solver.strategy_sum.sum() > 0
+
+    strategy = solver.average_strategy()
+    assert np.allclose(strategy.sum(axis=1), 1)
+    legal = np.repeat(solver.tree.children[solver.tree.terminal == NOT_TERMINAL] >= 0, 3, axis=0)
+    assert (strategy[~legal] == 0).all()
+
+    path = tmp_path / "checkpoint.npz"
+    solver.save_checkpoint(path)
+    loaded = CFRSolver.load_checkpoint(path)
+    assert loaded.iterations == 300
+    assert np.array_equal(loaded.regrets, solver.regrets)
+    loaded.run_iterations(10)
+    assert loaded.iterations == 310
+
+
+def test_parallel_training():
+    solver = small_solver(seed=1)
+    solver.train(40, processes=2, round_iterations=20)
+    assert solver.iterations == 40
+    assert solver.strategy_sum.sum() > 0
+    assert solver.regrets.min() >= 0
+
+
+def test_blueprint_cpu(tmp_path):
+    solver = small_solver(seed=2)
+    solver.run_iterations(200)
+    path = tmp_path / "blueprint.npz"
+    solver.save_blueprint(path)
+    blueprint = Blueprint(path)
+    assert np.allclose(blueprint.strategy(blueprint.tree.root, 1), solver.average_strategy()[1])
+    assert Blueprint.is_current(path)
+
+    # blueprints solved with the old (same buckets for both players) bucketer are refused
+    old_path = tmp_path / "old_blueprint.npz"
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        meta["version"] = 1
+        np.savez(old_path, strategy=data["strategy"], meta=json.dumps(meta))
+    assert not Blueprint.is_current(old_path)
+    assert not Blueprint.is_current(tmp_path / "missing.npz")
+    # the tree's pot sizes only fit the stack and blind it was solved for
+    assert Blueprint.is_current(path, 200, 10)
+    assert not Blueprint.is_current(path, 1000, 10)
+    assert not Blueprint.is_current(path, 200, 20)
+    with pytest.raises(ValueError):
+        Blueprint(old_path)
+
+    cpu = BlueprintCPU(200, blueprint_path=str(path), seed=2)
+    cpu.receive_round_start_message(1, ["AH", "AD"], [])
+    round_state = {
+        "street": "preflop",
+        "blind_pos": 1,
+        "community_card": [],
+        "pot": {"main": 30},
+        "seats": [{"name": "pc", "stack": 190}, {"name": "blueprint_cpu", "stack": 180}],
+    }
+    # we are the small blind so it's our turn at the root
+    assert cpu.action_probabilities(["AH", "AD"], round_state) is not None
+
+    enabled = think_time.ENABLED
+    think_time.set_enabled(False)
+    try:
+        valid_actions = [
+            {"action": "fold", "amount": 0},
+            {"action": "call", "amount": 10},
+            {"action": "raise", "amount": {"min": 20, "max": 180}},
+            {"action": "check", "amount": 0}
+        ]
+        action, amount = cpu.declare_action(valid_actions, ["AH", "AD"], round_state)
+        assert action in ("fold", "call", "raise")
+
+        # a pot sized raise follows the pot raise child, then a call reaches the flop
+        cpu.receive_game_update_message({"player_name": "blueprint_cpu", "action": "raise", "amount": 40},
+                                        dict(round_state, pot={"main": 80}))
+        assert cpu.node == blueprint.tree.children[blueprint.tree.root, 2]
+        cpu.receive_game_update_message({"player_name": "pc", "action": "call", "amount": 0},
+                                        dict(round_state, pot={"main": 120}))
+        assert blueprint.tree.street[cpu.node] == 1
+
+        # off the tree it checks or calls
+        cpu.receive_game_update_message({"player_name": "pc", "action": "fold", "amount": 0}, round_state)
+        assert cpu.node is None
+        assert cpu.declare_action(valid_actions, ["AH", "AD"], round_state) == ("call", 10)
+    finally:
+        think_time.set_enabled(enabled)
+
+
+def test_engine_blueprint_difficulty(tmp_path):
+    engine = Engine(num_players=2, initial_stack=200, blind=10)
+    engine.blueprint_path = str(tmp_path / "blueprint.npz")
+    small_solver().save_blueprint(engine.blueprint_path)
+    engine.set_cpu_difficulty(Difficulty.BLUEPRINT)
+
+    assert isinstance(engine.cpu_player, BlueprintCPU)
+    assert engine.dealer.table.players[1].name == "BlueprintCPU"
+
+
+def test_engine_blueprint_for_another_game(tmp_path):
+    """
+    nothing is solved when the difficulty is picked, a game the blueprint
+    wasn't solved for gets the MEDIUM CPU
+    """
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.blueprint_path = str(tmp_path / "blueprint.npz")
+    small_solver().save_blueprint(engine.blueprint_path)
+    engine.set_cpu_difficulty(Difficulty.BLUEPRINT)
+    assert isinstance(engine.cpu_player, equityCPU)
+
+    engine.blueprint_path = str(tmp_path / "missing.npz")
+    engine.set_cpu_difficulty(Difficulty.BLUEPRINT)
+    assert isinstance(engine.cpu_player, equityCPU)
+    assert not os.path.exists(engine.blueprint_path)
+
+
+def test_shipped_blueprint_fits_the_gui_game():
+    engine = Engine(num_players=2, initial_stack=500, blind=10)
+    assert Blueprint.is_current(engine.blueprint_path, 500, 10)
+    engine.set_cpu_difficulty(Difficulty.BLUEPRINT)
+    assert isinstance(engine.cpu_player, BlueprintCPU)
@@ -6,12 +6,13 @@ from game_engine.cpu.potOddsCPU import potOddsCPU
 from game_engine.cpu.baselineCPU import baselineCPU
 from game_engine.card import Card
 from game_engine.engine import Engine
-from game_engine.cpu.mlCPU import MLCPU
+from game_engine.cpu.mlCPU import MLCPU, MODEL_VERSION
 from game_engine.cpu.mlCPU import parse_card_str
 import tempfile
 import os
 from game_engine.constants import Action, Street
 import pickle
+import random
 from collections import defaultdict
 
 @pytest.fixture
@@ -587,8 +588,8 @@ def test_ml_cpu_load_model():
     with tempfile.NamedTemporaryFile(delete=False) as temp_file:
         # Create a simple dictionary instead of using defaultdict with lambda
         q_table = {}
-        q_table[(1, 2, 3, 4, 5, 6)] = {"call": 5.0}
-        pickle.dump(q_table, temp_file)
+        q_table[(1, 2, 3, 4, 5, 6, 1)] = {"call": 5.0}
+        pickle.dump({"version": MODEL_VERSION, "q_table": q_table}, temp_file)
         model_path = temp_file.name
     
     # Create an MLCPU instance with the model path
@@ -597,6 +598,13 @@ def test_ml_cpu_load_model():
     # Verify that the Q-table was loaded correctly
     assert len(ml_cpu.q_table) > 0
     
+    # A bare Q-table (saved before the model was versioned, keyed by outs) is not loaded
+    with open(model_path, 'wb') as f:
+        pickle.dump({(1, 2, 3, 4, 5, 6): {"call": 5.0}}, f)
+    old_ml_cpu = MLCPU(initial_stack=1000, model_path=model_path)
+    assert len(old_ml_cpu.q_table) == 0
+    assert not old_ml_cpu.load_model(model_path)
+    
     # Clean up
     os.unlink(model_path)
 
@@ -611,7 +619,8 @@ def test_ml_cpu_train_model():
     # Create an MLCPU instance with the model path
     ml_cpu = MLCPU(initial_stack=1000, epsilon=0.1)
     
-    # Train the model with a small number of rounds
+    # Train the model with a small number of rounds, seeded so that some reach the flop
+    random.seed(0)
     ml_cpu.train_model(num_rounds=10, opponent_strategy="random")
     
     # Verify that the Q-table has been updated
@@ -626,7 +635,7 @@ def test_ml_cpu_train_model():
     
     # Load the model from the file to verify it was saved correctly
     with open(model_path, 'rb') as f:
-        loaded_q_table = pickle.load(f)
+        loaded_q_table = pickle.load(f)["q_table"]
     
     # Verify that the loaded Q-table has the same keys as the original
     assert set(loaded_q_table.keys()) == set(ml_cpu.q_table.keys())
@@ -698,3 +707,67 @@ def test_ml_cpu_load_and_train_model():
     
     # Clean up
     os.unlink(model_path)
+
+
+def play_engine_hands(engine, hands, max_steps=5000):
+    """
+    drive the Engine like the GUI does (the human seat checks or calls) for a number of hands
+    """
+    played = 0
+    for _ in range(max_steps):
+        state = engine.current_state_of_game()
+        if state["game_over"] or played == hands:
+            break
+        if state["round_over"]:
+            played += 1
+            engine.start_next_round()
+        elif state["betting_over"]:
+            engine.start_next_street()
+        elif not state["players_turn"]:
+            engine.cpu_action()
+        else:
+            engine.player_action("call" if state["players"][0]["amount_to_call"] else "check")
+    return played
+
+
+def test_ml_cpu_plays_engine_hands():
+    from game_engine.cpu import think_time
+
+    random.seed(0)
+    enabled = think_time.ENABLED
+    think_time.set_enabled(False)
+    try:
+        engine = Engine(num_players=2, initial_stack=1000, blind=10)
+        engine.dealer.blind_delay = 0
+        with tempfile.TemporaryDirectory() as model_dir:
+            # the CPU is asked about the old hand's state before the new hand's cards are dealt
+            cpu = MLCPU(initial_stack=1000, model_path=os.path.join(model_dir, "ml_cpu_model.pkl"), epsilon=0)
+            engine.set_cpu_player(cpu)
+            engine.start_next_round()
+            assert play_engine_hands(engine, 10) == 10
+    finally:
+        think_time.set_enabled(enabled)
+
+
+def test_ml_cpu_replays_engine_hands():
+    from game_engine.cpu import think_time
+
+    random.seed(1)
+    enabled = think_time.ENABLED
+    think_time.set_enabled(False)
+    try:
+        engine = Engine(num_players=2, initial_stack=1000, blind=10)
+        engine.dealer.blind_delay = 0
+        with tempfile.TemporaryDirectory() as model_dir:
+            cpu = MLCPU(initial_stack=1000, model_path=os.path.join(model_dir, "ml_cpu_model.pkl"), epsilon=0)
+            engine.set_cpu_player(cpu)
+            engine.start_next_round()
+            # the human calls down, so the CPU's postflop decisions reach the replay buffer
+            played = 0
+            while len(cpu.replay_buffer) == 0 and played < 20:
+                played += play_engine_hands(engine, 1)
+            assert len(cpu.replay_buffer) > 0
+            assert cpu.replay_buffer.dones[:len(cpu.replay_buffer)].any()
+            assert len(cpu.q_table) > 0
+    finally:
+        think_time.set_enabled(enabled)
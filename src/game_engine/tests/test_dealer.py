@@ -218,3 +218,107 @@ class TestDealer:
 
         assert dealer.is_round_over() is True
         assert dealer.table.pot.value == 84
+
+
+class TestRingGame:
+    """
+    tests for tables with more than 2 players
+    """
+
+    def test_preflop_action_order(self):
+        """
+        after the blinds action starts left of the big blind and goes around the table
+        """
+        dealer = Dealer(small_blind=1, initial_stack=1000, num_players=6)
+        table = dealer.table
+
+        dealer.set_up_next_round()
+        dealer.start_street()
+
+        # pc paid the small blind, cpu1 the big blind, so cpu2 is first to act
+        assert table.players[0].stack == 999
+        assert table.players[1].stack == 998
+        assert table.current_player is table.players[2]
+
+        seen = []
+        for _ in range(6):
+            seen.append(table.current_player.seat)
+            dealer.apply_action(Action.CALL)
+
+        # big blind gets the last action
+        assert seen == [2, 3, 4, 5, 0, 1]
+        assert dealer.betting_manager.is_betting_over() is True
+        assert table.pot.value == 12
+
+    def test_fold_and_all_in_skip_seats(self):
+        """
+        players that fold or go all in are skipped, a raise reopens the action
+        for everyone else that can still act
+        """
+        dealer = Dealer(small_blind=1, initial_stack=1000, num_players=4)
+        table = dealer.table
+        table.players[3].stack = 50
+
+        dealer.set_up_next_round()
+        dealer.start_street()
+        assert table.current_player is table.players[2]
+
+        dealer.apply_action(Action.FOLD)
+        assert table.current_player is table.players[3]
+
+        # cpu3 shoves
+        dealer.apply_action(Action.RAISE, 100)
+        assert table.players[3].is_allin()
+        assert dealer.betting_manager.pending_betters == [table.players[0], table.players[1]]
+
+        dealer.apply_action(Action.CALL)
+        assert table.current_player is table.players[1]
+        dealer.apply_action(Action.CALL)
+
+        assert dealer.betting_manager.is_betting_over() is True
+        assert dealer.is_round_over() is False
+
+        # after the flop the small blind acts first, the folded and all in seats are skipped
+        dealer.next_street()
+        dealer.start_street()
+        assert table.current_player is table.players[0]
+        dealer.apply_action(Action.CHECK)
+        assert table.current_player is table.players[1]
+        dealer.apply_action(Action.CHECK)
+        assert table.current_player is table.players[0]
+
+    def test_blind_pos_moves_around_table(self):
+        """
+        small blind moves one seat every round
+        """
+        dealer = Dealer(small_blind=1, initial_stack=1000, num_players=3)
+
+        positions = []
+        for _ in range(4):
+            dealer.set_up_next_round()
+            positions.append(dealer.table.blind_pos)
+
+        assert positions == [0, 1, 2, 0]
+
+    def test_multiway_all_in_showdown(self):
+        """
+        3 players all in for different amounts goes to showdown and the pot is split into side pots
+        """
+        dealer = Dealer(small_blind=1, initial_stack=1000, num_players=3)
+        table = dealer.table
+        table.players[0].stack = 100
+        table.players[2].stack = 300
+
+        dealer.set_up_next_round()
+        dealer.start_street()
+        dealer.apply_action(Action.RAISE, 500)
+        dealer.apply_action(Action.CALL)
+        dealer.apply_action(Action.CALL)
+
+        assert dealer.betting_manager.is_betting_over() is True
+        assert dealer.is_showdown() is True
+
+        dealer.showdown()
+
+        assert len(table.community_cards) == 5
+        assert sum(player.stack for player in table.players) == 1400
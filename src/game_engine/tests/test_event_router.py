@@ -0,0 +1,145 @@
+"""
+tests for the GUI event router: the grid hit test, mouse capture and keyboard
+focus, with real Buttons and Sliders on the SDL dummy driver
+"""
+import os
+
+import pytest
+
+# no window, must be set before pygame makes a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+pygame = pytest.importorskip("pygame")
+
+from gui.button import Button  # noqa: E402
+from gui.event_router import EventRouter  # noqa: E402
+from gui.slider import Slider  # noqa: E402
+from gui.util import SPRITESHEET_PATH  # noqa: E402
+
+SCALE = 4
+
+# the GUI loads its assets relative to the src directory
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def display(monkeypatch):
+    monkeypatch.chdir(SRC_DIR)
+    pygame.init()
+    # images are converted for the display, so there has to be one
+    pygame.display.set_mode((200 * SCALE, 150 * SCALE))
+
+
+def mouse(event_type, pos, button=1):
+    if event_type == pygame.MOUSEMOTION:
+        return pygame.event.Event(event_type, pos=pos, rel=(0, 0), buttons=(1, 0, 0))
+    return pygame.event.Event(event_type, pos=pos, button=button)
+
+
+class KeyTarget:
+    """
+    an element that only records the events it gets
+    """
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.events = []
+
+    def handle_event(self, event):
+        self.events.append(event.type)
+
+
+def test_clicks_on_and_next_to_a_scaled_button(display):
+    clicks = []
+    # the raise button of the game screen, 23x9 at scale 4
+    button = Button(SPRITESHEET_PATH, (51 * SCALE, 79 * SCALE), (SCALE, SCALE), 23, 9, "raise",
+                    callback=lambda: clicks.append(1))
+    router = EventRouter()
+    router.rebuild(SCALE, [button])
+
+    # the button starts 4 pixels into its grid cell, the start of the cell isn't the button
+    assert button.rect.topleft == (204, 316)
+    assert router.hit((202, 320)) == []
+    assert router.hit(button.rect.topleft) == [button]
+    assert router.hit((button.rect.right - 1, button.rect.bottom - 1)) == [button]
+    assert router.hit(button.rect.bottomright) == []
+    # off the screen
+    assert router.hit((-1, 5)) == []
+    assert router.hit((200 * SCALE, 5)) == []
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, (button.rect.right, button.rect.centery)))
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (button.rect.right, button.rect.centery)))
+    assert clicks == []
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, button.rect.center))
+    assert clicks == [1]
+    assert button.current_sprite is button.pressed_sprite
+    # released somewhere else, the button still gets it and pops back up
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (10, 10)))
+    assert button.current_sprite is button.unpressed_sprite
+    assert router.captured == []
+
+
+def test_slider_drag_is_captured_outside_its_rect(display):
+    # the raise slider of the game screen
+    slider = Slider(SPRITESHEET_PATH, (183 * SCALE, 101 * SCALE), (SCALE, SCALE), 9, 42, 9, 5)
+    router = EventRouter()
+    router.rebuild(SCALE, [slider])
+    thumb = (slider.thumb_position[0] + 2, slider.thumb_position[1] + 2)
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, thumb))
+    assert slider.dragging
+    assert router.captured == [slider]
+
+    # dragged up and far to the left of the slider, it keeps following the mouse
+    router.dispatch(mouse(pygame.MOUSEMOTION, (100, 300)))
+    assert slider.get_value() == 1.0
+    router.dispatch(mouse(pygame.MOUSEMOTION, (100, 599)))
+    assert slider.get_value() == 0.0
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (100, 599)))
+    assert not slider.dragging
+    assert router.captured == []
+    # released, motion over the slider doesn't move it any more
+    router.dispatch(mouse(pygame.MOUSEMOTION, (slider.position[0] + 2, slider.min_y)))
+    assert slider.get_value() == 0.0
+
+
+def test_only_the_button_that_pressed_releases_the_capture(display):
+    slider = Slider(SPRITESHEET_PATH, (183 * SCALE, 101 * SCALE), (SCALE, SCALE), 9, 42, 9, 5)
+    router = EventRouter()
+    router.rebuild(SCALE, [slider])
+    thumb = (slider.thumb_position[0] + 2, slider.thumb_position[1] + 2)
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, thumb))
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, (10, 10), button=3))
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (10, 10), button=3))
+    assert router.captured == [slider]
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (10, 10)))
+    assert router.captured == []
+
+
+def test_keys_go_to_the_last_element_clicked(display):
+    first = KeyTarget((0, 0, 40, 40))
+    second = KeyTarget((400, 400, 40, 40))
+    router = EventRouter()
+    router.rebuild(SCALE, [first, second])
+    key = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a", scancode=4)
+
+    # nothing focused yet
+    router.dispatch(key)
+    assert first.events == second.events == []
+
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, (410, 410)))
+    router.dispatch(mouse(pygame.MOUSEBUTTONUP, (410, 410)))
+    router.dispatch(key)
+    assert second.events[-1] == pygame.KEYDOWN
+    assert pygame.KEYDOWN not in first.events
+
+    # clicking nothing drops the focus, a new screen does too
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, (200, 200)))
+    assert router.focus is None
+    router.dispatch(mouse(pygame.MOUSEBUTTONDOWN, (10, 10)))
+    assert router.focus is first
+    router.rebuild(SCALE, [first, second])
+    assert router.focus is None and router.captured == []
@@ -0,0 +1,29 @@
+"""
+smoke test for the headless GUI frame benchmark, a few frames are drawn
+with the SDL dummy driver (the frame times aren't checked)
+"""
+import os
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from gui import frame_benchmark  # noqa: E402
+
+# the GUI loads its assets relative to the src directory
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_frames_run_headless(monkeypatch, native):
+    monkeypatch.chdir(SRC_DIR)
+    # pygame isn't quit after, the GUI keeps its fonts for the whole process
+    results = frame_benchmark.run_benchmark(num_frames=5, warmup=2, track_memory=False, native=native)
+
+    assert results["native"] == native
+    assert results["frame_time"]["frames"] == 5
+    assert results["frame_time"]["min_us"] > 0
+    # the counting pass ran over every frame
+    assert "surfaces_per_frame" in results["counters"]
+    # a run is never a regression against itself
+    assert not any(row["regression"] for row in frame_benchmark.compare(results, results))
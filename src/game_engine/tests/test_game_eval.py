@@ -3,6 +3,8 @@ from game_engine.engine import Engine
 from game_engine.constants import Street
 from game_engine.card import Card
 from game_engine.dealer import Dealer
+from game_engine.table import Table
+from game_engine.constants import PlayerState
 
 class TestGameEval():
     def test_game_eval(self):
@@ -62,15 +64,15 @@ class TestGameEval():
         dealer = Dealer(1000, 1)
         table = dealer.table
 
-        #with these cards you would expect pc to win (high card)
+        #with these cards you would expect pc to win (high card, 8 beats 7 as the 4th card)
         pc_hole_cards = [
-            Card('H', '2'),
-            Card('D', '5'),
+            Card('H', '8'),
+            Card('D', '4'),
         ]
 
         cpu1_hole_cards = [
-            Card('H', '8'),
-            Card('D', '4'),
+            Card('H', '2'),
+            Card('D', '5'),
         ]
 
         community_cards = [
@@ -138,11 +140,102 @@ class TestGameEval():
             assert table.players[0].stack == 1010
             assert table.players[1].stack == 1010
 
+    def test_determine_winners_multiway(self):
+        """
+        only the best hand out of everyone still in the hand wins, folded players are ignored
+        """
+        table = Table()
+        table.init_players(1000, 4)
 
+        table.community_cards = [
+            Card('S', '9'),
+            Card('C', 'J'),
+            Card('H', 'Q'),
+            Card('S', '3'),
+            Card('D', '7'),
+        ]
+        table.players[0].hole_cards = [Card('H', '2'), Card('D', '4')]
+        table.players[1].hole_cards = [Card('H', '9'), Card('D', '3')]
+        table.players[2].hole_cards = [Card('H', '10'), Card('D', '8')]
+        table.players[3].hole_cards = [Card('S', 'Q'), Card('C', 'Q')]
+        table.players[3].state = PlayerState.FOLDED
 
-       
-        
+        # straight beats two pair, the folded trips don't count
+        assert GameEvaluator.determine_winners(table) == [table.players[2]]
 
+    def test_side_pots(self):
+        """
+        a short all in player can only win what each player matched of their stack
+        """
+        table = Table()
+        table.init_players(1000, 3)
+        short, big, folded = table.players
 
+        short.collect_bet(50)
+        big.collect_bet(200)
+        folded.collect_bet(100)
+        folded.state = PlayerState.FOLDED
+        table.pot.value = 350
 
+        contributors, pots = GameEvaluator._get_side_pots(table)
 
+        assert contributors == [short, folded, big]
+        # main pot 50 * 3, then 50 * 2 from folded and big, then big's uncalled 100
+        assert pots == [(150, 0), (100, 1), (100, 2)]
+
+    def test_award_side_pots(self):
+        """
+        the all in player has the best hand so wins the main pot,
+        the side pot goes to the best hand of the players that covered it
+        """
+        table = Table()
+        table.init_players(1000, 3)
+        short, middle, big = table.players
+
+        table.community_cards = [
+            Card('S', '9'),
+            Card('C', 'J'),
+            Card('H', 'Q'),
+            Card('S', '3'),
+            Card('D', '7'),
+        ]
+        short.hole_cards = [Card('H', 'A'), Card('D', 'A')]
+        middle.hole_cards = [Card('H', 'J'), Card('D', '2')]
+        big.hole_cards = [Card('H', '4'), Card('D', '5')]
+
+        for player, amount in ((short, 100), (middle, 300), (big, 300)):
+            player.collect_bet(amount)
+            table.pot.add_to_pot(amount)
+
+        results = GameEvaluator.award_pots(table)
+
+        assert results == [(300, [short]), (400, [middle])]
+        assert short.stack == 900 + 300
+        assert middle.stack == 700 + 400
+        assert big.stack == 700
+
+    def test_award_pots_tie(self):
+        """
+        tied hands split the pot
+        """
+        table = Table()
+        table.init_players(1000, 2)
+        table.community_cards = [
+            Card('S', 'A'),
+            Card('C', 'K'),
+            Card('H', 'Q'),
+            Card('S', 'J'),
+            Card('D', '10'),
+        ]
+        table.players[0].hole_cards = [Card('H', '2'), Card('D', '3')]
+        table.players[1].hole_cards = [Card('S', '2'), Card('C', '3')]
+
+        for player in table.players:
+            player.collect_bet(25)
+            table.pot.add_to_pot(25)
+
+        results = GameEvaluator.award_pots(table)
+
+        assert results == [(50, [table.players[0], table.players[1]])]
+        assert table.players[0].stack == 1000
+        assert table.players[1].stack == 1000
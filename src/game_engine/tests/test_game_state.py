@@ -0,0 +1,142 @@
+"""
+tests for the immutable game state, every line played on a state has to end
+the same way it does on a Dealer
+"""
+import random
+
+import pytest
+
+from game_engine.constants import Action, Street
+from game_engine.dealer import Dealer
+from game_engine.game_state import GameState, SHOWDOWN, FINISHED
+
+
+def start_hand(stacks=(1000, 1000), blind=10):
+    dealer = Dealer(initial_stack=stacks[0], small_blind=blind, num_players=len(stacks), blind_delay=0)
+    dealer.set_up_next_round()
+    for player, stack in zip(dealer.table.players, stacks):
+        player.stack = stack
+    dealer.start_street()
+    return dealer
+
+
+def dealer_apply(dealer, action, amount):
+    """
+    apply an action the way the Engine does, returns True once the hand is over
+    """
+    dealer.apply_action(action, amount)
+    if dealer.is_showdown():
+        dealer.showdown()
+        return True
+    if dealer.is_round_over():
+        return True
+    if dealer.betting_manager.is_betting_over():
+        dealer.next_street()
+        dealer.start_street()
+    return False
+
+
+def assert_same(state, dealer):
+    table = dealer.table
+    assert state.stacks == tuple(player.stack for player in table.players)
+    assert state.round_contributions == tuple(player.round_contribuition for player in table.players)
+    assert state.pot == table.pot.value
+    assert state.board == tuple(card.to_int() for card in table.community_cards)
+
+
+def test_from_dealer_after_the_blinds():
+    dealer = start_hand()
+    state = dealer.game_state()
+
+    assert state.street == Street.PREFLOP.value
+    assert state.stacks == (990, 980) or state.stacks == (980, 990)
+    assert state.current_bet == 20
+    assert state.pot == 30
+    assert state.current == dealer.table.current_player.seat
+    assert state.pending == dealer.betting_manager.pending_mask
+    assert state.board == ()
+    assert len(state.deck) == 48
+    assert state.legal_actions() == (Action.FOLD, Action.CALL, Action.RAISE)
+
+
+def test_apply_does_not_change_the_state():
+    state = start_hand().game_state()
+    copy = tuple(state)
+
+    called = state.apply(Action.CALL)
+    raised = state.apply(Action.RAISE, 40)
+
+    assert tuple(state) == copy
+    assert called.pot == 40
+    assert raised.current_bet == 60
+    # tuples that didn't change are shared
+    assert called.deck is state.deck
+    assert called.holes is state.holes
+
+
+def test_street_is_dealt_when_betting_is_over():
+    state = start_hand().game_state()
+    state = state.apply(Action.CALL).apply(Action.CHECK)
+
+    assert state.street == Street.FLOP.value
+    assert state.board == state.deck[:3]
+    assert state.deck_index == 3
+    assert state.contributions == (0, 0)
+    assert state.current_bet == 0
+    assert state.legal_actions() == (Action.CHECK, Action.RAISE)
+
+
+def test_fold_pays_the_pot():
+    dealer = start_hand()
+    state = dealer.game_state()
+    folded = state.apply(Action.FOLD)
+
+    dealer_apply(dealer, Action.FOLD, None)
+    assert folded.street == FINISHED
+    assert folded.is_terminal
+    assert folded.legal_actions() == ()
+    assert_same(folded, dealer)
+    with pytest.raises(ValueError):
+        folded.apply(Action.CHECK)
+
+
+def test_illegal_actions_raise():
+    state = start_hand().game_state()
+    with pytest.raises(ValueError):
+        state.apply(Action.CHECK)
+    with pytest.raises(ValueError):
+        state.apply(Action.RAISE)
+    with pytest.raises(ValueError):
+        state.apply(Action.SMALL_BLIND)
+
+
+@pytest.mark.parametrize("stacks", [(1000, 1000), (1000, 150), (1000, 300, 600), (400, 1000, 250, 800)])
+def test_random_lines_match_the_dealer(stacks):
+    rng = random.Random(len(stacks) * 1000 + stacks[1])
+    for _ in range(40):
+        random.seed(rng.random())
+        dealer = start_hand(stacks)
+        state = dealer.game_state()
+        over = False
+        while not over:
+            assert state.current == dealer.table.current_player.seat
+            assert not state.is_terminal
+            action = rng.choice(state.legal_actions())
+            amount = rng.choice([10, 40, 200, 2000]) if action is Action.RAISE else None
+            state = state.apply(action, amount)
+            over = dealer_apply(dealer, action, amount)
+            assert_same(state, dealer)
+            assert state.street == dealer.current_street.value or state.is_terminal
+        assert state.is_terminal
+        assert state.street == (SHOWDOWN if dealer.is_showdown() else FINISHED)
+        assert sum(state.stacks) == sum(stacks)
+
+
+def test_resample_keeps_what_the_seat_sees():
+    state = start_hand().game_state().apply(Action.CALL).apply(Action.CHECK)
+    sampled = state.resample(0, random.Random(3))
+
+    assert sampled.holes[0] == state.holes[0]
+    assert sampled.board == state.board
+    cards = [card for hole in sampled.holes for card in hole] + list(sampled.board) + list(sampled.deck)
+    assert sorted(cards) == list(range(52))
@@ -1,6 +1,7 @@
 """
 tests for hand_evaluator module
 """
+import numpy as np
 import pytest
 from ..card import Card
 from ..hand_evaluator import HandEvaluator
@@ -211,7 +212,69 @@ class TestHandEval():
         assert sorted(str(card) for card in hand_info["primary_cards_rank"]) == sorted(str(card) for card in expected_info["primary_cards_rank"])
         assert sorted(str(card) for card in hand_info["kickers"]) == sorted(str(card) for card in expected_info["kickers"])
 
-   
-        
+    @pytest.mark.parametrize("hole_cards, community_cards, expected_info, id", test_cases,
+                              ids=[i[3] for i in test_cases])
+    def test_hand_strength_rank(self, hole_cards, community_cards, expected_info, id):
+        """
+        the hand rank packed in hand_strength should match hand_eval
+        """
+        strength = HandEvaluator.hand_strength(hole_cards, community_cards)
+
+        assert HandEvaluator.strength_hand_rank(strength) == expected_info["hand_rank"]
+
+    def test_hand_strength_order(self):
+        """
+        stronger hands should always have a bigger strength, including kickers
+        """
+        board = [Card('S', '9'), Card('C', 'J'), Card('H', 'Q'), Card('S', '3'), Card('D', '7')]
+
+        ace_high = HandEvaluator.hand_strength([Card('H', 'A'), Card('D', '2')], board)
+        king_high = HandEvaluator.hand_strength([Card('H', 'K'), Card('D', '2')], board)
+        pair_kicker_a = HandEvaluator.hand_strength([Card('H', '9'), Card('D', 'A')], board)
+        pair_kicker_k = HandEvaluator.hand_strength([Card('D', '9'), Card('H', 'K')], board)
+        wheel = HandEvaluator.hand_strength(
+            [Card('H', 'A'), Card('D', '2')],
+            [Card('S', '3'), Card('C', '4'), Card('H', '5'), Card('S', 'K'), Card('D', 'K')])
+        six_high_straight = HandEvaluator.hand_strength(
+            [Card('H', '6'), Card('D', '2')],
+            [Card('S', '3'), Card('C', '4'), Card('H', '5'), Card('S', 'K'), Card('D', 'K')])
+
+        assert ace_high > king_high
+        assert pair_kicker_a > pair_kicker_k > ace_high
+        assert six_high_straight > wheel > pair_kicker_a
+
+    def test_hand_strength_full_house_from_two_trips(self):
+        """
+        with two sets of trips the lower one is used as the pair
+        """
+        strength = HandEvaluator.hand_strength(
+            [Card('H', '9'), Card('D', '9')],
+            [Card('S', '9'), Card('C', '4'), Card('H', '4'), Card('S', '4'), Card('D', 'K')])
+
+        assert HandEvaluator.strength_hand_rank(strength) == HandEvaluator.STRENGTH_MAP["full_house"]
+        assert strength == HandEvaluator._pack(HandEvaluator.STRENGTH_MAP["full_house"], [9, 4])
+
+    @staticmethod
+    def card_from_int(code):
+        suit = "HDCS"[code // 13]
+        rank = code % 13 + 2
+        card_val = {10: "10", 11: "J", 12: "Q", 13: "K", 14: "A"}.get(rank, str(rank))
+        return Card(suit, card_val)
+
+    def test_hand_strength_batch(self):
+        """
+        the numpy batch version gives the same strength as hand_strength,
+        for the test cases and for random hands with fewer than 7 cards
+        """
+        hands = [hole + community for hole, community, _, _ in self.test_cases]
+        rng = np.random.default_rng(0)
+        for size in (5, 6, 7, 7, 7):
+            for _ in range(200):
+                hands.append([self.card_from_int(int(code)) for code in rng.choice(52, size, replace=False)])
+
+        codes = np.full((len(hands), 7), -1, dtype=np.int64)
+        for row, hand in enumerate(hands):
+            codes[row, :len(hand)] = [card.to_int() for card in hand]
 
-       
\ No newline at end of file
+        expected = [HandEvaluator.hand_strength(hand[:2], hand[2:]) for hand in hands]
+        assert HandEvaluator.hand_strength_batch(codes).tolist() == expected
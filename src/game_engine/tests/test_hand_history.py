@@ -0,0 +1,114 @@
+"""
+tests for the binary hand history log
+"""
+import pytest
+
+from game_engine.hand_history import (HandHistoryWriter, HandRecorder, read_hands,
+                                      write_varint, read_varint, NO_CARD)
+from game_engine.constants import ACTION_CODES, CODE_ACTIONS, Action, Street
+from game_engine.dealer import Dealer
+from game_engine.table_manager import TableManager, EquityBatchPolicy
+
+
+def test_varint_round_trip():
+    buffer = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 21, 2 ** 40]
+    for value in values:
+        write_varint(buffer, value)
+
+    pos = 0
+    decoded = []
+    for _ in values:
+        value, pos = read_varint(buffer, pos)
+        decoded.append(value)
+    assert decoded == values
+    assert pos == len(buffer)
+
+
+def test_action_codes():
+    for action in Action:
+        assert CODE_ACTIONS[ACTION_CODES[action]] == action
+
+
+def test_record_fold_hand(tmp_path):
+    """
+    heads up: sb raises, bb folds
+    """
+    path = tmp_path / "hands.bin"
+    dealer = Dealer(initial_stack=1000, small_blind=10, blind_delay=0)
+    with HandHistoryWriter(path) as writer:
+        dealer.set_recorder(HandRecorder(writer))
+        dealer.set_up_next_round()
+        dealer.start_street()
+        hole_cards = [[card.to_int() for card in player.hole_cards] for player in dealer.table.players]
+        dealer.apply_action(Action.RAISE, 40)
+        dealer.apply_action(Action.FOLD)
+
+    hands = list(read_hands(path))
+    assert len(hands) == 1
+    hand = hands[0]
+    assert hand.hand_id == 0
+    assert hand.names == ["pc", "cpu1"]
+    assert hand.blind == 10
+    assert hand.start_stacks == [1000, 1000]
+    assert hand.final_stacks == [1020, 980]
+    assert hand.winnings() == [20, -20]
+    assert [list(cards) for cards in hand.hole_cards] == hole_cards
+    assert hand.community_cards == []
+
+    preflop = Street.PREFLOP.value
+    assert hand.actions == [
+        (preflop, ACTION_CODES[Action.SMALL_BLIND], 0, 10),
+        (preflop, ACTION_CODES[Action.BIG_BLIND], 1, 20),
+        (preflop, ACTION_CODES[Action.RAISE], 0, 50),
+        (preflop, ACTION_CODES[Action.FOLD], 1, 0),
+    ]
+    assert hand.pot() == 80
+
+
+def test_manager_hands_are_logged(tmp_path):
+    """
+    every finished hand from every table is in the log, and no hand makes or loses chips
+    """
+    path = tmp_path / "hands.bin"
+    with HandHistoryWriter(path, fsync_every=50) as writer:
+        manager = TableManager(initial_stack=300, blind=5, history_writer=writer)
+        policy = EquityBatchPolicy()
+        for i in range(10):
+            manager.add_table([policy] * (2 + i % 4))
+        manager.run(200)
+        # the hands still being played aren't written yet
+        unfinished = sum(1 for table in manager.tables.values() if not table.hand_over)
+        hands_written = writer.hands_written
+
+    hands = list(read_hands(path))
+    assert len(hands) == hands_written == manager.hands_played() - unfinished
+    assert [hand.hand_id for hand in hands] == list(range(len(hands)))
+    for hand in hands:
+        assert sum(hand.winnings()) == 0
+        assert all(NO_CARD not in cards for cards in hand.hole_cards)
+        assert len(hand.community_cards) in (0, 3, 4, 5)
+
+
+def test_appending_and_cut_off_record(tmp_path):
+    """
+    a second writer appends to the file, a record cut off at the end is skipped
+    """
+    path = tmp_path / "hands.bin"
+    for _ in range(2):
+        dealer = Dealer(initial_stack=1000, small_blind=10, blind_delay=0)
+        with HandHistoryWriter(path) as writer:
+            dealer.set_recorder(HandRecorder(writer))
+            dealer.set_up_next_round()
+            dealer.start_street()
+            dealer.apply_action(Action.FOLD)
+
+    data = path.read_bytes()
+    assert len(list(read_hands(path))) == 2
+
+    path.write_bytes(data[:-3])
+    assert len(list(read_hands(path))) == 1
+
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        list(read_hands(path))
@@ -0,0 +1,91 @@
+"""
+tests for the memory-mapped hand history index
+"""
+import numpy as np
+
+from game_engine.hand_history import HandHistoryWriter, HandRecorder, read_hands
+from game_engine.hand_history_index import HandHistoryIndex
+from game_engine.constants import ACTION_CODES, Action, Street
+from game_engine.dealer import Dealer
+from game_engine.table_manager import TableManager, EquityBatchPolicy
+
+
+def simulate(path, steps=200):
+    with HandHistoryWriter(path) as writer:
+        manager = TableManager(initial_stack=300, blind=5, history_writer=writer)
+        policy = EquityBatchPolicy()
+        for i in range(8):
+            manager.add_table([policy] * 3, names=["MLCPU", f"bot{i}", "pc"])
+        manager.run(steps)
+
+
+def test_index_matches_log(tmp_path):
+    """
+    every hand and action in the log has a row in the index
+    """
+    log_path = tmp_path / "hands.bin"
+    simulate(log_path)
+    index = HandHistoryIndex.build(log_path, tmp_path / "index")
+    hands = list(read_hands(log_path))
+
+    assert len(index) == len(hands)
+    assert index.hand_pot.tolist() == [hand.pot() for hand in hands]
+    assert len(index.action_hand) == sum(len(hand.actions) for hand in hands)
+    assert isinstance(index.action_code, np.memmap)
+
+    # reading a hand by its offset gives back the same hand
+    for hand_id in (0, len(hands) // 2, len(hands) - 1):
+        hand = index.read_hand(hand_id)
+        assert hand.actions == hands[hand_id].actions
+        assert hand.names == hands[hand_id].names
+        assert index.action_code[index.hand_actions(hand_id)].tolist() == \
+            [action[1] for action in hands[hand_id].actions]
+
+    # the index opens again without building
+    reopened = HandHistoryIndex(tmp_path / "index")
+    assert len(reopened) == len(index)
+    assert index.player_winnings("MLCPU").sum() + index.player_winnings("pc").sum() + \
+        sum(index.player_winnings(f"bot{i}").sum() for i in range(8)) == 0
+
+
+def test_find_hands(tmp_path):
+    """
+    check the query against a scan of the log
+    """
+    log_path = tmp_path / "hands.bin"
+    simulate(log_path, steps=400)
+    index = HandHistoryIndex.build(log_path, tmp_path / "index")
+
+    folds = index.find_hands(player="MLCPU", street=Street.FLOP, action=Action.FOLD)
+    expected = [
+        hand.hand_id for hand in read_hands(log_path)
+        if any(street == Street.FLOP.value and code == ACTION_CODES[Action.FOLD]
+               and hand.names[seat] == "MLCPU" for street, code, seat, _ in hand.actions)
+    ]
+    assert folds.tolist() == expected
+
+    big_pots = index.find_hands(min_pot=100)
+    assert (index.hand_pot[big_pots] >= 100).all()
+    assert len(index.find_hands()) == len(index)
+
+
+def test_facing_raise(tmp_path):
+    """
+    sb raises, bb re raises, sb folds facing the raise
+    """
+    log_path = tmp_path / "hands.bin"
+    dealer = Dealer(initial_stack=1000, small_blind=10, blind_delay=0)
+    with HandHistoryWriter(log_path) as writer:
+        dealer.set_recorder(HandRecorder(writer))
+        dealer.set_up_next_round()
+        dealer.start_street()
+        dealer.apply_action(Action.RAISE, 40)
+        dealer.apply_action(Action.RAISE, 100)
+        dealer.apply_action(Action.FOLD)
+
+    index = HandHistoryIndex.build(log_path, tmp_path / "index")
+    assert index.action_facing_raise.tolist() == [False, False, False, True, True]
+    assert index.action_to_call.tolist() == [0, 10, 10, 40, 100]
+    assert index.action_pot_before.tolist() == [0, 10, 30, 80, 220]
+    assert index.find_hands(player="pc", action=Action.FOLD, facing_raise=True).tolist() == [0]
+    assert index.find_hands(player="cpu1", action=Action.FOLD).tolist() == []
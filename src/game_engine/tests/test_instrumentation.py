@@ -0,0 +1,76 @@
+"""
+tests for the instrumentation timers, counters and chrome trace
+"""
+import json
+
+import pytest
+
+from game_engine import instrumentation
+from game_engine.constants import Action
+from game_engine.dealer import Dealer
+from game_engine.engine import Engine, Difficulty
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def play_hand():
+    dealer = Dealer(initial_stack=1000, small_blind=10, blind_delay=0)
+    dealer.set_up_next_round()
+    dealer.start_street()
+    dealer.apply_action(Action.CALL)
+    dealer.apply_action(Action.CHECK)
+    dealer.next_street()
+    dealer.start_street()
+    dealer.showdown()
+
+
+def test_disabled_records_nothing():
+    play_hand()
+    instrumentation.count("something")
+    instrumentation.event("something_else", value=1)
+
+    assert instrumentation.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_timers_and_counters():
+    instrumentation.enable()
+    play_hand()
+    instrumentation.count("hands")
+    instrumentation.count("hands", 2)
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["counters"]["hands"] == 3
+    assert snapshot["timers"]["dealer.start_street"]["count"] == 2
+    assert snapshot["timers"]["dealer.showdown"]["count"] == 1
+    timer = snapshot["timers"]["dealer.start_street"]
+    assert timer["max_us"] >= timer["mean_us"] > 0
+
+
+def test_engine_events_replace_prints(capsys):
+    instrumentation.enable()
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.set_cpu_difficulty(Difficulty.MEDIUM)
+
+    assert capsys.readouterr().out == ""
+    assert instrumentation.snapshot()["counters"]["engine.set_cpu"] == 1
+
+
+def test_chrome_trace(tmp_path):
+    instrumentation.enable(trace=True)
+    play_hand()
+    instrumentation.event("note", detail="hello")
+
+    path = tmp_path / "trace.json"
+    instrumentation.write_chrome_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+
+    complete = [event for event in events if event["ph"] == "X"]
+    assert {event["name"] for event in complete} >= {"dealer.start_street", "dealer.showdown"}
+    assert all(event["dur"] >= 0 for event in complete)
+    assert [event["args"] for event in events if event["ph"] == "i"] == [{"detail": "hello"}]
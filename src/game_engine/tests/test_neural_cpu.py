@@ -0,0 +1,157 @@
+"""
+tests for the neural network CPU, its batch policy and trainer
+"""
+import numpy as np
+import pytest
+
+from game_engine.cpu.neuralCPU import NeuralCPU, ValueNetwork, count_raises, encode_features, FEATURE_SIZE
+from game_engine.cpu.neural_trainer import collect_samples, fit
+from game_engine.cpu import think_time
+from game_engine.cpu.equityCPU import equityCPU
+from game_engine.engine import Engine, Difficulty
+from game_engine.table_manager import TableManager, NeuralBatchPolicy
+
+
+VALID_ACTIONS = [
+    {"action": "fold", "amount": 0},
+    {"action": "call", "amount": 20},
+    {"action": "raise", "amount": {"min": 40, "max": 980}},
+    {"action": "check", "amount": 0}
+]
+
+ROUND_STATE = {
+    "street": "flop",
+    "community_card": ["2H", "5D", "KC"],
+    "pot": {"main": 60},
+    "seats": [
+        {"name": "pc", "stack": 970, "state": "active"},
+        {"name": "neural_cpu", "stack": 980, "state": "active"},
+    ],
+}
+
+
+def test_encode_features_batch():
+    cards = np.full((3, 7), -1, dtype=np.int16)
+    # preflop pocket aces, a flush on the river, a straight on the turn
+    cards[0, :2] = [12, 25]
+    cards[1, :7] = [0, 1, 2, 3, 5, 20, 30]
+    cards[2, :6] = [0, 14, 28, 42, 17, 50]
+    raises = [[0, 0, 0, 0, 0], [1, 0, 2, 5, 1], [2, 1, 0, 0, 0]]
+    features = encode_features(cards, [0, 3, 2], [30, 200, 100], [10, 0, 50],
+                               [990, 800, 900], [10, 200, 100], [1, 1, 1], [990, 800, 900], raises)
+
+    assert features.shape == (3, FEATURE_SIZE)
+    assert features.dtype == np.float32
+    assert features[0, 3] == 1  # pocket pair
+    assert features[1, 9] == 1  # flush
+    assert features[2, 10] == 1  # straight
+    # one hot street
+    assert features[:, 17:21].argmax(axis=1).tolist() == [0, 3, 2]
+    # raises per street, capped at 3
+    assert np.allclose(features[1, 29:], [1 / 3, 0, 2 / 3, 1, 1 / 3])
+
+
+def test_raise_counts_match_the_engine_histories():
+    """
+    the batch policy counts raises from the action log, NeuralCPU from the
+    Engine's round_state, both see the same hand
+    """
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.dealer.blind_delay = 0
+    cpu = NeuralCPU(1000, network=ValueNetwork.create(seed=4))
+    engine.set_cpu_player(cpu)
+    engine.start_next_round()
+    dealer = engine.dealer
+    # heads up the human (seat 0) is the small blind and acts first preflop
+    assert dealer.table.current_player.seat == 0
+    engine.player_action("raise", 40)
+
+    counts = count_raises(engine.build_round_state()['action_histories'], cpu.name)
+    assert counts == [1, 0, 0, 0, 0]
+    assert counts == dealer.table.action_log.raise_counts(1)
+
+
+def test_neural_cpu_declare_action(tmp_path):
+    enabled = think_time.ENABLED
+    think_time.set_enabled(False)
+    try:
+        path = tmp_path / "neural.npz"
+        ValueNetwork.create(seed=0).save(path)
+        cpu = NeuralCPU(1000, model_path=str(path))
+        action, amount = cpu.declare_action(VALID_ACTIONS, ["AH", "KD"], ROUND_STATE)
+    finally:
+        think_time.set_enabled(enabled)
+
+    assert action in ("fold", "call", "raise")
+    if action == "raise":
+        assert 40 <= amount <= 980
+    loaded = ValueNetwork.load(path)
+    features = cpu.encode_decision(VALID_ACTIONS, ["AH", "KD"], ROUND_STATE)
+    assert np.allclose(loaded.predict(features), cpu.network.predict(features))
+
+
+def test_batch_policy_keeps_chips():
+    """
+    chips only move between players, every finished hand sums to 0
+    """
+    results = []
+    manager = TableManager(initial_stack=1000, blind=10,
+                           on_hand_over=lambda table, chips_won: results.append(chips_won))
+    policy = NeuralBatchPolicy(ValueNetwork.create(seed=1), epsilon=0.2, seed=1)
+    for _ in range(20):
+        manager.add_table([policy, policy])
+    manager.run(200)
+
+    assert len(results) > 20
+    assert all(sum(chips_won) == 0 for chips_won in results)
+
+
+def test_collect_samples_and_fit():
+    network = ValueNetwork.create(seed=2)
+    features, actions, returns = collect_samples(network, 200, num_tables=16, seed=2)
+
+    assert len(features) == len(actions) == len(returns) > 0
+    assert set(actions.tolist()) <= {0, 1, 2}
+    # nobody can win or lose more than a starting stack heads up
+    assert np.abs(returns).max() <= 1
+
+    losses = fit(network, features, actions, returns, epochs=10, seed=2)
+    assert losses[-1] < losses[0]
+
+
+def test_engine_neural_difficulty(tmp_path):
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.neural_model_path = str(tmp_path / "neural.npz")
+    ValueNetwork.create(seed=3).save(engine.neural_model_path)
+    engine.set_cpu_difficulty(Difficulty.NEURAL)
+
+    assert isinstance(engine.cpu_player, NeuralCPU)
+    assert engine.dealer.table.players[1].name == "NeuralCPU"
+
+
+def test_networks_trained_on_other_features_are_refused(tmp_path):
+    path = tmp_path / "neural.npz"
+    assert not ValueNetwork.is_current(path)
+    ValueNetwork.create(seed=5).save(path)
+    assert ValueNetwork.is_current(path)
+
+    # a network from before the raise features
+    network = ValueNetwork.create(seed=5)
+    network.weights[0] = network.weights[0][:29]
+    network.save(path)
+    assert not ValueNetwork.is_current(path)
+    with pytest.raises(ValueError):
+        ValueNetwork.load(path)
+
+
+def test_engine_neural_without_weights(tmp_path):
+    """
+    nothing is trained when the difficulty is picked, the MEDIUM CPU plays instead
+    """
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    assert ValueNetwork.is_current(engine.neural_model_path)
+
+    engine.neural_model_path = str(tmp_path / "missing.npz")
+    engine.set_cpu_difficulty(Difficulty.NEURAL)
+    assert isinstance(engine.cpu_player, equityCPU)
+    assert not (tmp_path / "missing.npz").exists()
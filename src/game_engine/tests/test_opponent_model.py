@@ -0,0 +1,81 @@
+"""
+tests for the running opponent stats the CPUs keep
+"""
+from game_engine.cpu.opponent_model import OpponentModel
+from game_engine.cpu.mlCPU import MLCPU
+
+
+def play(model, actions):
+    """
+    one hand, actions is a list of (name, action, street)
+    """
+    model.start_hand(["pc", "cpu"])
+    for name, action, street in actions:
+        model.update(name, action, street)
+
+
+def test_vpip_pfr_and_aggression():
+    model = OpponentModel()
+    play(model, [("pc", "raise", "preflop"), ("cpu", "call", "preflop"),
+                 ("cpu", "check", "flop"), ("pc", "raise", "flop"), ("cpu", "call", "flop")])
+    play(model, [("pc", "call", "preflop"), ("cpu", "raise", "preflop"), ("pc", "fold", "preflop")])
+    play(model, [("pc", "fold", "preflop")])
+
+    pc = model.get("pc")
+    assert pc.hands == 3
+    assert pc.vpip() == 2 / 3
+    assert pc.pfr() == 1 / 3
+    assert pc.aggression_factor() == 2.0
+    assert pc.aggression_factor("flop") == 1.0
+    assert pc.folds == [2, 0, 0, 0]
+
+    cpu = model.get("cpu")
+    assert cpu.vpip() == 2 / 3
+    assert cpu.aggression_factor() == 0.5
+    assert cpu.aggression_factor("preflop") == 1.0
+
+
+def test_fold_to_cbet():
+    model = OpponentModel()
+    # cbet and fold
+    play(model, [("pc", "raise", "preflop"), ("cpu", "call", "preflop"),
+                 ("cpu", "check", "flop"), ("pc", "raise", "flop"), ("cpu", "fold", "flop")])
+    # cbet and call
+    play(model, [("pc", "raise", "preflop"), ("cpu", "call", "preflop"),
+                 ("cpu", "check", "flop"), ("pc", "raise", "flop"), ("cpu", "call", "flop")])
+    # the caller bets first, not a cbet
+    play(model, [("pc", "raise", "preflop"), ("cpu", "call", "preflop"),
+                 ("cpu", "raise", "flop"), ("pc", "fold", "flop")])
+
+    assert model.get("cpu").cbets_faced == 2
+    assert model.get("cpu").fold_to_cbet() == 0.5
+    assert model.get("pc").cbets_faced == 0
+
+
+def test_save_and_load(tmp_path):
+    model = OpponentModel()
+    play(model, [("pc", "raise", "preflop"), ("cpu", "call", "preflop"),
+                 ("cpu", "check", "flop"), ("pc", "raise", "flop"), ("cpu", "fold", "flop")])
+    path = tmp_path / "opponents.json"
+    model.save(path)
+
+    loaded = OpponentModel.load(path)
+    for name in ("pc", "cpu"):
+        assert loaded.get(name).to_list() == model.get(name).to_list()
+    assert OpponentModel.load(tmp_path / "missing.json").players == {}
+
+
+def test_ml_cpu_aggression_carries_over_rounds(tmp_path):
+    cpu = MLCPU(1000, model_path=str(tmp_path / "model.pkl"), epsilon=0)
+    seats = [{"name": "pc", "stack": 1000}, {"name": "ml_cpu", "stack": 1000}]
+    round_state = {"street": "preflop", "community_card": [], "pot": {"main": 30}}
+
+    for _ in range(3):
+        cpu.receive_round_start_message(1, ["AH", "KD"], seats)
+        cpu.receive_game_update_message({"player_name": "pc", "action": "raise", "amount": 40}, round_state)
+
+    # the stats are kept between rounds, the action list is not
+    assert len(cpu.opponent_actions) == 1
+    assert cpu.opponent_model.get("pc").raises[0] == 3
+    features = cpu.extract_features(cpu.hole_cards, [], 30, 10, round_state)
+    assert features[5] == 5
@@ -0,0 +1,93 @@
+"""
+tests for the gym style poker environments
+"""
+import numpy as np
+import pytest
+
+from game_engine.card_abstraction import CardAbstraction
+from game_engine.cpu.mlCPU import MLCPU
+from game_engine.hand_evaluator import HandEvaluator
+from game_engine.poker_env import (AGENT_SEAT, ALL_IN, CALL, FOLD, NUM_ACTIONS, OBSERVATION_SIZE, PokerEnv,
+                                   SubprocVectorEnv, VectorEnv)
+
+
+@pytest.fixture(scope="module")
+def abstraction():
+    return CardAbstraction.build(samples=2000, runouts=2, opponents=2, seed=0)
+
+
+def test_observations_are_fixed_size_and_bounded(abstraction):
+    env = VectorEnv(4, card_abstraction=abstraction, seed=0)
+    observations, info = env.reset(seed=0)
+    assert observations.shape == (4, OBSERVATION_SIZE)
+    assert observations.dtype == np.int32
+    assert info == {}
+
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        observations, rewards, terminated, truncated, _ = env.step(rng.integers(0, NUM_ACTIONS, 4))
+        assert observations.shape == (4, OBSERVATION_SIZE)
+        assert ((observations >= 0) & (observations < env.observation_high)).all()
+        assert rewards.shape == terminated.shape == truncated.shape == (4,)
+        # only a finished hand has a reward
+        assert (rewards[~terminated] == 0).all()
+
+
+def test_folding_ends_every_hand(abstraction):
+    env = VectorEnv(3, card_abstraction=abstraction, seed=1)
+    env.reset()
+    for _ in range(10):
+        _, rewards, terminated, _, _ = env.step([FOLD] * 3)
+        assert terminated.all()
+        # the blind posted, never more
+        assert ((rewards == -10) | (rewards == -20)).all()
+    # every hand started with fresh stacks (the blinds of the next hand are in the pot)
+    for table in env.tables:
+        stacks = sorted(player.stack for player in table.dealer.table.players)
+        assert stacks == [env.initial_stack - 20, env.initial_stack - 10]
+
+
+def test_all_in_rewards_are_bounded(abstraction):
+    env = PokerEnv(card_abstraction=abstraction, seed=2)
+    observation, _ = env.reset()
+    assert observation.shape == (OBSERVATION_SIZE,)
+    for _ in range(30):
+        observation, reward, terminated, truncated, _ = env.step(ALL_IN)
+        assert abs(reward) <= env.vector.initial_stack
+        assert not truncated
+    assert env.vector.hands > 0
+
+
+def test_observations_match_ml_cpu_features(abstraction):
+    env = VectorEnv(4, card_abstraction=abstraction, seed=3)
+    observations, _ = env.reset()
+    cpu = MLCPU(1000, model_path="does_not_exist.pkl", card_abstraction=abstraction)
+    streets = ("preflop", "flop", "turn", "river")
+    for _ in range(20):
+        for observation, table in zip(observations, env.tables):
+            dealer = table.dealer
+            player = dealer.table.players[AGENT_SEAT]
+            cpu.stack = player.stack
+            position = "small_blind_pos" if dealer.table.blind_pos == AGENT_SEAT else "big_blind_pos"
+            round_state = {"street": streets[dealer.current_street.value], position: 1}
+            features = cpu.extract_features(player.hole_cards, dealer.table.community_cards,
+                                            dealer.table.pot.value,
+                                            dealer.betting_manager.current_bet - player.contribuition, round_state)
+            # MLCPU gets the opponent's aggression from its own opponent model
+            assert observation[:5].tolist() == list(features[:5])
+            # and its hand rank from hand_eval, which misses some flushes and straights
+            strength = HandEvaluator.hand_strength(player.hole_cards, dealer.table.community_cards)
+            assert observation[6] == strength >> 20
+        observations, *_ = env.step([CALL] * 4)
+
+
+def test_subprocess_env(abstraction):
+    with SubprocVectorEnv(4, num_workers=2, seed=0, card_abstraction=abstraction) as env:
+        observations, _ = env.reset(seed=0)
+        assert observations.shape == (4, OBSERVATION_SIZE)
+        for _ in range(5):
+            observations, rewards, terminated, _, _ = env.step([FOLD] * 4)
+            assert terminated.all()
+            assert ((rewards == -10) | (rewards == -20)).all()
+        assert env.hands == 20
+    assert env.closed
@@ -0,0 +1,65 @@
+"""
+tests for the experience replay buffer and MLCPU's replayed Q-learning
+"""
+import numpy as np
+import pytest
+
+from game_engine.cpu.mlCPU import MLCPU
+from game_engine.cpu.replay_buffer import ReplayBuffer
+
+
+def test_ring_keeps_the_last_capacity_transitions():
+    buffer = ReplayBuffer(5, seed=0)
+    nbytes = buffer.nbytes
+    for i in range(12):
+        buffer.add(i, 0, float(i), i + 1, False)
+    assert len(buffer) == 5
+    assert sorted(buffer.states.tolist()) == [7, 8, 9, 10, 11]
+    assert buffer.nbytes == nbytes
+
+    buffer.add_batch(list(range(100, 108)), [1] * 8, [0.0] * 8, [-1] * 8, [True] * 8)
+    assert sorted(buffer.states.tolist()) == [103, 104, 105, 106, 107]
+    assert buffer.dones.all()
+
+
+def test_sampling_follows_priorities():
+    buffer = ReplayBuffer(4, alpha=1.0, seed=1)
+    buffer.add_batch([0, 1, 2, 3], [0, 0, 0, 0], [0.0] * 4, [-1] * 4, [True] * 4)
+    buffer.update_priorities(np.arange(4), np.array([1.0, 1.0, 1.0, 10.0]))
+
+    indices, (states, *_), weights = buffer.sample(1000)
+    assert (states == indices).all()
+    # 10 / 13 of the priority
+    assert 0.7 < np.mean(states == 3) < 0.85
+    assert weights.max() == 1.0
+    # the transition sampled most gets the smallest weight
+    assert weights[states == 3].max() < weights[states != 3].min()
+
+    with pytest.raises(ValueError):
+        ReplayBuffer(4).sample(1)
+
+
+def test_new_transitions_get_the_biggest_priority():
+    buffer = ReplayBuffer(4, seed=2)
+    buffer.add(0, 0, 0.0, -1, True)
+    buffer.update_priorities([0], [5.0])
+    buffer.add(1, 0, 0.0, -1, True)
+    assert buffer.scaled_priorities[1] == buffer.scaled_priorities[0] > 5 ** buffer.alpha
+
+
+def test_ml_cpu_replay_learns_the_round_reward():
+    cpu = MLCPU(1000, model_path="does_not_exist.pkl", learning_rate=0.5, replay_capacity=64,
+                replay_batch_size=8, seed=0)
+    first = (1, 2, 0, 1, 5, 0, 2)
+    last = (4, 0, 0, 2, 3, 0, 2)
+    cpu.current_round_history = [{"state": first, "action": ("call", 10)},
+                                 {"state": None, "action": None},
+                                 {"state": last, "action": ("raise", 20)}]
+    cpu.remember_round(100)
+    assert len(cpu.replay_buffer) == 2
+    assert cpu.replay_buffer.next_states[:2].tolist() == [cpu.state_id(last), -1]
+
+    for _ in range(50):
+        cpu.replay()
+    assert cpu.q_table[last][("raise", 20)] == pytest.approx(100, rel=1e-3)
+    assert cpu.q_table[first][("call", 10)] == pytest.approx(-0.1 + 0.95 * 100, rel=1e-2)
@@ -0,0 +1,120 @@
+"""
+tests for the tree search CPU
+"""
+import random
+import time
+
+import pytest
+
+from game_engine.cpu import think_time
+from game_engine.cpu.baseCPU import parse_card_str
+from game_engine.cpu.searchCPU import SearchCPU
+from game_engine.engine import Engine, Difficulty
+
+
+def valid_actions(call_amount, stack):
+    return [
+        {"action": "fold", "amount": 0},
+        {"action": "call", "amount": call_amount},
+        {"action": "raise", "amount": {"min": call_amount * 2, "max": stack}},
+        {"action": "check", "amount": 0}
+    ]
+
+
+def river_state(pot, stacks, street="river"):
+    return {
+        "street": street,
+        "next_player": 1,
+        "blind_pos": 0,
+        "community_card": [parse_card_str(card) for card in ["2S", "7D", "9C", "JH", "KS"]],
+        "pot": {"main": pot, "side": []},
+        "seats": [{"name": "pc", "stack": stacks[0], "state": "active"},
+                  {"name": "search_cpu", "stack": stacks[1], "state": "active"}],
+        "action_histories": {"preflop": [], "flop": [], "turn": [], "river": []}
+    }
+
+
+@pytest.fixture
+def cpu_engine():
+    random.seed(4)
+    with think_time.disabled():
+        engine = Engine(num_players=2, initial_stack=1000, blind=10)
+        engine.dealer.blind_delay = 0
+        cpu = SearchCPU(1000, max_iterations=200, seed=0)
+        engine.set_cpu_player(cpu)
+        engine.start_next_round()
+        yield engine, cpu
+
+
+def test_game_state_matches_the_dealer(cpu_engine):
+    engine, cpu = cpu_engine
+    dealer = engine.dealer
+    engine.player_action("raise", 30)
+
+    round_state = engine.build_round_state()
+    call_amount = dealer.betting_manager.current_bet - dealer.table.players[1].contribuition
+    decision = cpu.read_decision(valid_actions(call_amount, 1000), dealer.table.players[1].hole_cards, round_state)
+    state = cpu.game_state(decision, round_state)
+    real = dealer.game_state()
+
+    assert state.stacks == real.stacks
+    assert state.round_contributions == real.round_contributions
+    assert (state.pending, state.acting, state.folded) == (real.pending, real.acting, real.folded)
+    assert (state.current, state.pot, state.call_amount()) == (real.current, real.pot, real.call_amount())
+    assert state.holes[1] == real.holes[1]
+
+
+def test_iterations_and_stats():
+    cpu = SearchCPU(1000, time_budget=10, max_iterations=50, seed=1)
+    action, amount = cpu.declare_action(valid_actions(0, 900), ["AH", "AD"], river_state(200, (900, 900)))
+
+    assert action in ("check", "raise")
+    assert cpu.stats["iterations"] == 50
+    assert cpu.stats["nodes"] >= 50
+    assert cpu.stats["nodes_per_second"] > 0
+
+
+def test_stops_at_the_deadline():
+    cpu = SearchCPU(1000, time_budget=0.05, seed=1)
+    start = time.perf_counter()
+    cpu.declare_action(valid_actions(0, 900), ["AH", "AD"], river_state(200, (900, 900), street="flop"))
+
+    assert time.perf_counter() - start < 0.5
+    assert cpu.stats["iterations"] > 1
+
+
+def test_folds_nothing_to_a_big_bet_and_calls_the_nuts():
+    bet = valid_actions(600, 300)
+    weak = SearchCPU(1000, max_iterations=400, seed=2)
+    assert weak.declare_action(bet, ["3H", "4D"], river_state(800, (0, 300)))[0] == "fold"
+
+    strong = SearchCPU(1000, max_iterations=400, seed=2)
+    # three kings on a board with no straight or flush
+    assert strong.declare_action(bet, ["KH", "KD"], river_state(800, (0, 300)))[0] in ("call", "raise")
+
+
+def test_tree_is_reused_in_the_hand(cpu_engine):
+    engine, cpu = cpu_engine
+    dealer = engine.dealer
+    reused = 0
+    for _ in range(30):
+        if dealer.is_round_over():
+            break
+        if dealer.betting_manager.is_betting_over():
+            engine.start_next_street()
+        elif dealer.table.current_player.seat == 0:
+            player = dealer.table.current_player
+            engine.player_action("check" if player.contribuition == dealer.betting_manager.current_bet else "call")
+        else:
+            engine.cpu_action()
+            reused += cpu.stats["reused_visits"]
+    # after the first decision the search starts from the node the hand got to
+    assert reused > 0
+
+
+def test_search_difficulty():
+    engine = Engine(num_players=2, initial_stack=1000, blind=10)
+    engine.set_cpu_difficulty(Difficulty.SEARCH)
+
+    assert isinstance(engine.cpu_player, SearchCPU)
+    assert engine.cpu_player.blind == 10
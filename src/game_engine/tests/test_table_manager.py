@@ -0,0 +1,114 @@
+"""
+tests for the table manager running many games at once
+"""
+import asyncio
+import random
+
+import numpy as np
+
+from game_engine.cpu import think_time
+from game_engine.table_manager import TableManager, EquityBatchPolicy, BotPolicy
+from game_engine.cpu.equityCPU import equityCPU
+from game_engine.deck import Deck
+
+
+def total_chips(table):
+    """
+    chips on the table, this never changes during a game
+    """
+    dealer = table.dealer
+    return sum(player.stack for player in dealer.table.players) + dealer.table.pot.value
+
+
+def test_count_outs_batch_matches_count_outs():
+    """
+    the numpy version counts the same outs as count_outs
+    """
+    random.seed(3)
+    hands = []
+    cards = np.full((200, 7), -1, dtype=np.int16)
+    for i in range(200):
+        deck = Deck()
+        dealt = deck.draw_cards(random.choice([2, 5, 6, 7]))
+        hands.append(dealt)
+        cards[i, :len(dealt)] = [card.to_int() for card in dealt]
+
+    expected = [equityCPU.count_outs(hand[:2], hand[2:]) for hand in hands]
+    assert equityCPU.count_outs_batch(cards).tolist() == expected
+
+
+def test_many_tables_keep_their_chips():
+    """
+    run a lot of tables with different player counts, every table should
+    play hands and no chips should be made or lost
+    """
+    manager = TableManager(initial_stack=500, blind=5)
+    policy = EquityBatchPolicy()
+    for i in range(40):
+        manager.add_table([policy] * (2 + i % 5))
+    manager.add_table([BotPolicy(equityCPU(500)), policy])
+
+    manager.run(300)
+
+    for table in manager.tables.values():
+        assert table.hands_played > 1
+        assert total_chips(table) == 500 * len(table.policies)
+
+
+def test_human_seat_waits_for_action():
+    """
+    a table with a human waits for submit_action, the other tables keep going
+    """
+    turns = []
+    manager = TableManager(on_human_turn=turns.append)
+    policy = EquityBatchPolicy()
+    human_table = manager.add_table([None, policy], table_id="human")
+    cpu_table = manager.add_table([policy, policy], table_id="cpu")
+
+    # heads up the first player to act preflop is the small blind (seat 0)
+    manager.step()
+    assert human_table.waiting_for_human
+    assert turns == [human_table]
+    assert manager.waiting_tables() == [human_table]
+
+    manager.run(5)
+    assert cpu_table.hands_played >= 1
+    assert len(turns) == 1
+
+    manager.submit_action("human", "call")
+    assert not human_table.waiting_for_human
+
+
+def test_run_async():
+    """
+    run_async steps the tables on the event loop
+    """
+    manager = TableManager()
+    policy = EquityBatchPolicy()
+    table = manager.add_table([policy, policy, policy])
+
+    asyncio.run(manager.run_async(steps=50))
+
+    assert table.hands_played >= 1
+    assert not manager.running
+
+
+def test_think_time_is_only_off_while_stepping():
+    """
+    the CPUs don't pause in step, a GUI in the same process keeps its pauses
+    """
+    seen = []
+
+    class RecordingPolicy(EquityBatchPolicy):
+        def decide_batch(self, requests):
+            seen.append(think_time.ENABLED)
+            return super().decide_batch(requests)
+
+    manager = TableManager()
+    assert think_time.ENABLED
+    policy = RecordingPolicy()
+    manager.add_table([policy, policy])
+    manager.run(5)
+
+    assert seen and not any(seen)
+    assert think_time.ENABLED
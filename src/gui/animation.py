@@ -0,0 +1,191 @@
+"""Time based animations for the GUI, run from a fixed pool of tweens"""
+import pygame
+
+# how long things take, in milliseconds
+DEAL_TIME = 250
+DEAL_STAGGER = 80
+CHIP_TIME = 300
+REVEAL_TIME = 240
+
+# frames of a card flip, each side
+FLIP_STEPS = 3
+
+
+def ease_out(t):
+    """
+    Fast at the start and slowing down at the end, t from 0 to 1
+    """
+    return 1 - (1 - t) ** 3
+
+
+class FrameClock:
+    """
+    Milliseconds, read once per frame (tick) so everything in a frame
+    is drawn at the same time
+    """
+    def __init__(self, time_source=pygame.time.get_ticks):
+        self.time_source = time_source
+        self.now = time_source()
+
+
+    def tick(self):
+        self.now = self.time_source()
+        return self.now
+
+
+class Tween:
+    """
+    One sprite moving from start_pos to end_pos. With frames it's a
+    pre-rendered sequence [(surface, x offset), ...] played in place
+    """
+    __slots__ = ("active", "key", "sprite", "frames", "start_pos", "end_pos", "start", "duration")
+
+    def __init__(self):
+        self.active = False
+        self.key = None
+        self.sprite = None
+        self.frames = None
+        self.start_pos = (0, 0)
+        self.end_pos = (0, 0)
+        self.start = 0
+        self.duration = 1
+
+
+# (back surface, face surface) -> flip frames, the surfaces are the cached card faces
+flip_frames_cache = {}
+
+
+def flip_frames(back, face):
+    """
+    A card turning over: the back getting narrower, then the face getting
+    wider. Made once per card face and kept.
+
+    :return: List of (surface, x offset) pairs.
+    """
+    key = (id(back), id(face))
+    frames = flip_frames_cache.get(key)
+    if frames is None:
+        width, height = back.get_size()
+        frames = []
+        for sprite, widths in ((back, range(FLIP_STEPS, 0, -1)), (face, range(1, FLIP_STEPS + 1))):
+            for step in widths:
+                frame_width = max(1, width * step // (FLIP_STEPS + 1))
+                frames.append((pygame.transform.scale(sprite, (frame_width, height)),
+                               (width - frame_width) // 2))
+        frames.append((face, 0))
+        frames = flip_frames_cache[key] = frames
+    return frames
+
+
+class Animations:
+    """
+    Every animation on screen, from a pool of capacity tweens made up front
+    so starting one doesn't allocate. If the pool is full the tween closest
+    to done is finished early. Only the view is animated, the engine never
+    waits on an animation; an element that is animating is left out of the
+    normal drawing (see is_animating) until its tween lands.
+    """
+    def __init__(self, capacity=32, clock=None):
+        self.clock = clock if clock is not None else FrameClock()
+        self.tweens = [Tween() for _ in range(capacity)]
+        # key -> active tween
+        self.active = {}
+
+
+    def tick(self):
+        """
+        Move the clock to this frame and finish the tweens that are done.
+
+        :return: The frame's time in milliseconds.
+        """
+        now = self.clock.tick()
+        if self.active:
+            for tween in self.tweens:
+                if tween.active and now >= tween.start + tween.duration:
+                    self.finish(tween)
+        return now
+
+
+    def finish(self, tween):
+        tween.active = False
+        if self.active.get(tween.key) is tween:
+            del self.active[tween.key]
+        tween.sprite = None
+        tween.frames = None
+
+
+    def clear(self):
+        """
+        Stop every animation (a new screen).
+        """
+        for tween in self.tweens:
+            if tween.active:
+                self.finish(tween)
+
+
+    def is_animating(self, key):
+        return key in self.active
+
+
+    def start(self, key, sprite, start_pos, end_pos, duration, delay=0, frames=None):
+        """
+        Start a tween, replacing the one with the same key.
+
+        :param key: What is animating, like ("community", 3).
+        :param sprite: The cached surface to draw.
+        :param start_pos: Tuple (x, y) it starts at.
+        :param end_pos: Tuple (x, y) it lands on.
+        :param duration: Milliseconds it takes.
+        :param delay: Milliseconds before it starts moving (it isn't drawn until then).
+        :param frames: Pre-rendered frames to play instead of moving the sprite.
+        """
+        tween = self.active.get(key)
+        if tween is None:
+            tween = next((tween for tween in self.tweens if not tween.active), None)
+        if tween is None:
+            tween = min(self.tweens, key=lambda tween: tween.start + tween.duration)
+            self.finish(tween)
+        tween.active = True
+        tween.key = key
+        tween.sprite = sprite
+        tween.frames = frames
+        tween.start_pos = start_pos
+        tween.end_pos = end_pos
+        tween.start = self.clock.now + delay
+        tween.duration = max(1, duration)
+        self.active[key] = tween
+
+
+    def deal(self, key, sprite, start_pos, end_pos, delay=0):
+        self.start(key, sprite, start_pos, end_pos, DEAL_TIME, delay)
+
+
+    def move_chip(self, key, sprite, start_pos, end_pos):
+        self.start(key, sprite, start_pos, end_pos, CHIP_TIME)
+
+
+    def reveal(self, key, back, face, position):
+        self.start(key, face, position, position, REVEAL_TIME, frames=flip_frames(back, face))
+
+
+    def draw(self, screen):
+        """
+        Draw the tweens at this frame's time.
+
+        :param screen: The Pygame surface to draw on.
+        """
+        if not self.active:
+            return
+        now = self.clock.now
+        for tween in self.tweens:
+            if not tween.active or now < tween.start:
+                continue
+            t = min(1.0, (now - tween.start) / tween.duration)
+            if tween.frames is not None:
+                frame, offset = tween.frames[min(len(tween.frames) - 1, int(t * len(tween.frames)))]
+                screen.blit(frame, (tween.start_pos[0] + offset, tween.start_pos[1]))
+            else:
+                t = ease_out(t)
+                x = tween.start_pos[0] + (tween.end_pos[0] - tween.start_pos[0]) * t
+                y = tween.start_pos[1] + (tween.end_pos[1] - tween.start_pos[1]) * t
+                screen.blit(tween.sprite, (int(x), int(y)))
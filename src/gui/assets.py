@@ -0,0 +1,176 @@
+"""Loads the image assets once, on a background thread when started"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+ASSET_DIR = "../assets"
+
+
+def done_future(func, *args):
+    """
+    A future that already has func's result (or exception)
+    """
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+class AssetManager:
+    """
+    Every image is decoded once and shared. After start() the pngs in
+    ASSET_DIR are decoded (and the backgrounds scaled) on a background
+    thread, in the order asked for, so the window can show the first screen
+    while the rest loads. Before start() (or without it, like in the
+    benchmarks) an image is loaded the first time it's asked for.
+
+    Decoding and scaling happen on the thread. Converting to the display's
+    pixel format happens on the main thread the first time an image is
+    used, it needs the display.
+    """
+    def __init__(self, asset_dir=ASSET_DIR):
+        self.asset_dir = asset_dir
+        self.executor = None
+        # path or (path, size) -> Future of the decoded (and scaled) surface
+        self.futures = {}
+        # the same keys -> the converted surface, only touched on the main thread
+        self.surfaces = {}
+        self.lock = threading.Lock()
+
+
+    def start(self, first=()):
+        """
+        Start decoding every png in the asset folder on a background thread.
+        Call it right after pygame.display.set_mode.
+
+        :param first: What the first screen needs, loaded before the rest in
+                      this order. Paths, or (path, size) for an image scaled to size.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+        # one thread, so things are done in the order they are asked for
+        for asset in first:
+            if isinstance(asset, tuple):
+                self.scale(*asset)
+            else:
+                self.load(asset)
+        for name in sorted(os.listdir(self.asset_dir)):
+            if name.endswith(".png"):
+                self.load(os.path.join(self.asset_dir, name))
+
+
+    def stop(self):
+        """
+        Stop the background thread (after what it's doing).
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+    def submit(self, key, func, *args):
+        """
+        The future of key, submitting func to the thread (or running it
+        now when not started) the first time.
+        """
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                if self.executor is None:
+                    future = done_future(func, *args)
+                else:
+                    future = self.executor.submit(func, *args)
+                self.futures[key] = future
+        return future
+
+
+    def load(self, path):
+        """
+        The future of a decoded image.
+
+        :param path: Path to the image.
+        :return: A Future of the pygame.Surface.
+        """
+        return self.submit(os.path.normpath(path), pygame.image.load, path)
+
+
+    def scale(self, path, size):
+        """
+        The future of an image scaled to size, scaled once.
+
+        :param path: Path to the image.
+        :param size: Tuple (width, height).
+        :return: A Future of the pygame.Surface.
+        """
+        source = self.load(path)
+        return self.submit((os.path.normpath(path), tuple(size)),
+                           lambda: pygame.transform.scale(source.result(), size))
+
+
+    def ready(self, futures):
+        """
+        A future that is done when all the futures are.
+
+        :param futures: The futures to wait for.
+        :return: A Future of None (or the first exception).
+        """
+        futures = list(futures)
+        ready = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def one_done(future):
+            error = future.exception() if not future.cancelled() else None
+            with lock:
+                remaining[0] -= 1
+                if ready.done():
+                    return
+                if error is not None:
+                    ready.set_exception(error)
+                elif remaining[0] == 0:
+                    ready.set_result(None)
+
+        if not futures:
+            ready.set_result(None)
+        for future in futures:
+            future.add_done_callback(one_done)
+        return ready
+
+
+    def image(self, path):
+        """
+        An image with its alpha, converted for the display. Waits for it if
+        it's still loading.
+
+        :param path: Path to the image.
+        :return: A pygame.Surface shared by everything that asks for it.
+        """
+        key = os.path.normpath(path)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = self.load(path).result().convert_alpha()
+        return surface
+
+
+    def scaled_image(self, path, size):
+        """
+        An image scaled to size and converted for the display.
+        Waits for it if it's still loading.
+
+        :param path: Path to the image.
+        :param size: Tuple (width, height).
+        :return: A pygame.Surface.
+        """
+        key = (os.path.normpath(path), tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = self.scale(path, size).result().convert_alpha()
+        return surface
+
+
+# shared by every GUI element
+assets = AssetManager()
@@ -1,5 +1,6 @@
 """Class and methods for the Button GUI element"""
 import pygame
+from gui.assets import assets
 
 
 class Button:
@@ -23,7 +24,7 @@ class Button:
                         FUNCTION MUST BE PASSED AS A LAMBDA FUNCTION
         """
         self.clickable = True
-        self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
+        self.spritesheet = assets.image(spritesheet_path)
         self.position = position
         self.scale = scale
         self.sprite_width = sprite_width
@@ -1,5 +1,6 @@
 """Class and methods for the Chip GUI element"""
 import pygame
+from gui.assets import assets
 
 
 class Chip:
@@ -17,7 +18,7 @@ class Chip:
         :param scale: Tuple (scale_x, scale_y) to scale the chip.
         :param color: The color of the chip (e.g., "red", "blue", "green").
         """
-        self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
+        self.spritesheet = assets.image(spritesheet_path)
         self.position = position
         self.scale = scale
         self.color = color
@@ -0,0 +1,116 @@
+"""Routes pygame events to the GUI elements they are meant for"""
+import pygame
+
+NATIVE_SIZE = (200, 150)
+
+# grid cells are this many native pixels square
+CELL_SIZE = 10
+
+POINTER_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT)
+
+
+def element_rect(element):
+    """
+    The screen area of an interactive GUI element.
+
+    :param element: A Button or Slider.
+    :return: A pygame.Rect.
+    """
+    if hasattr(element, "rect"):
+        return element.rect
+    # a slider's thumb only moves inside its base
+    return pygame.Rect(element.position[0], element.position[1],
+                       element.scaled_base_width, element.scaled_base_height)
+
+
+class EventRouter:
+    """
+    Sends mouse events only to the elements under the mouse, found through
+    a grid over the 200x150 screen (each cell lists the elements touching
+    it), so an event costs the same however many elements there are.
+    The elements a mouse button went down on capture the mouse until it
+    comes back up, so a button always gets its release and a slider keeps
+    getting motion while it's dragged off itself. Keyboard events go to
+    the focused element, the last one clicked.
+    """
+    def __init__(self):
+        self.scale = 1
+        self.columns = NATIVE_SIZE[0] // CELL_SIZE
+        self.rows = NATIVE_SIZE[1] // CELL_SIZE
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+        self.captured = []
+        self.capture_button = None
+        self.focus = None
+
+
+    def rebuild(self, scale, *groups):
+        """
+        Index the elements of the current screen, call it when they change.
+
+        :param scale: The scale the elements were made with.
+        :param groups: Lists of interactive elements (buttons, sliders), later ones are on top.
+        """
+        self.scale = scale
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+        cell = CELL_SIZE * scale
+        for group in groups:
+            for element in group:
+                rect = element_rect(element)
+                first_column, first_row = max(0, rect.left // cell), max(0, rect.top // cell)
+                last_column = min(self.columns - 1, (rect.right - 1) // cell)
+                last_row = min(self.rows - 1, (rect.bottom - 1) // cell)
+                for row in range(first_row, last_row + 1):
+                    for column in range(first_column, last_column + 1):
+                        self.cells[row * self.columns + column].append(element)
+        # the old screen's elements are gone
+        self.captured = []
+        self.capture_button = None
+        self.focus = None
+
+
+    def hit(self, pos):
+        """
+        The elements under a screen position.
+
+        :param pos: Tuple (x, y) in the elements' scale.
+        :return: List of elements, bottom to top.
+        """
+        cell = CELL_SIZE * self.scale
+        column, row = pos[0] // cell, pos[1] // cell
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return []
+        return [element for element in self.cells[row * self.columns + column]
+                if element_rect(element).collidepoint(pos)]
+
+
+    def dispatch(self, event):
+        """
+        Send an event to the elements it is for.
+
+        :param event: The pygame event.
+        """
+        if event.type in KEY_EVENTS:
+            if self.focus is not None:
+                self.focus.handle_event(event)
+            return
+        if event.type not in POINTER_EVENTS:
+            return
+
+        targets = self.hit(event.pos)
+        captured = self.captured
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if not captured:
+                self.captured = targets
+                self.capture_button = event.button
+            if event.button == 1:
+                self.focus = targets[-1] if targets else None
+        elif captured:
+            targets = captured + [element for element in targets if element not in captured]
+            if event.type == pygame.MOUSEBUTTONUP and event.button == self.capture_button:
+                self.captured = []
+                self.capture_button = None
+
+        # a click can change the screen (and rebuild the grid), targets is already a new list
+        for element in targets:
+            element.handle_event(event)
@@ -0,0 +1,374 @@
+"""
+frame_benchmark.py is written by us.
+
+headless frame time benchmark for the GUI. replays a scripted sequence of game
+states through update_frame and draw_frame (the same calls main.py makes every
+frame) with the SDL dummy video driver, and records the time of every frame, how
+many surfaces/images/fonts each frame made and how much memory it allocated.
+it can also write a cProfile file and folded stacks (for flamegraph.pl or
+speedscope), and compare against a stored baseline.
+
+run it from the src directory (the asset paths are relative to it):
+
+    python -m gui.frame_benchmark --output frames.json
+    python -m gui.frame_benchmark --compare frames.json
+    python -m gui.frame_benchmark --profile frames.prof --folded frames.folded
+    python -m gui.frame_benchmark --native
+"""
+import os
+
+# no window, must be set before pygame makes a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import cProfile
+import contextlib
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import pygame
+
+from gui import util
+from gui.util import gui_state, change_to_game, update_frame, draw_frame, load_backgrounds
+from gui.renderer import Renderer
+
+SCALE = 4
+SEED = 1234
+
+SUITS = ["H", "D", "C", "S"]
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+class ScriptedEngine:
+    """
+    stands in for the Engine, current_state_of_game returns the scripted
+    states in order (next_frame moves to the next one). only the player's
+    turn is scripted so update_game never waits on a street change
+    """
+    def __init__(self, states):
+        self.states = states
+        self.frame = 0
+
+    def current_state_of_game(self):
+        return self.states[self.frame % len(self.states)]
+
+    def next_frame(self):
+        self.frame += 1
+
+    def set_cpu_difficulty(self, difficulty):
+        pass
+
+    def start_next_round(self):
+        pass
+
+
+def scripted_states(num_states, seed=SEED):
+    """
+    game states like Engine.current_state_of_game, a new hand every 8 states
+    going from preflop to a river showdown
+    """
+    rng = random.Random(seed)
+    states = []
+    for i in range(num_states):
+        if i % 8 == 0:
+            deck = [rank + suit for suit in SUITS for rank in RANKS]
+            rng.shuffle(deck)
+            ply_stack = rng.randint(0, 1000)
+            cpu_stack = rng.randint(0, 1000)
+        num_community = [0, 0, 3, 3, 4, 4, 5, 5][i % 8]
+        pot = rng.randint(0, 400)
+        to_call = rng.choice([0, 10, 40])
+
+        players = [
+            {"name": "pc", "stack": ply_stack, "hole_cards": deck[0:2], "state": "active",
+             "max_bet": ply_stack, "amount_to_call": to_call},
+            {"name": "cpu1", "stack": cpu_stack, "hole_cards": deck[2:4], "state": "active",
+             "max_bet": cpu_stack, "amount_to_call": 0},
+        ]
+        action_histories = {"preflop": [], "flop": [], "turn": [], "river": []}
+        action_histories["preflop"].append(
+            {"name": "cpu1", "action": rng.choice(["call", "raise", "check"]), "amount": to_call,
+             "add_amount": 0, "paid": to_call, "stack": cpu_stack})
+
+        states.append({
+            "player_max_raise": ply_stack,
+            "showdown": i % 8 == 7,
+            "pot": pot,
+            "game_over": False,
+            "players_turn": True,
+            "betting_over": False,
+            "round_over": False,
+            "community_cards": deck[4:4 + num_community],
+            "players": players,
+            "action_histories": action_histories,
+        })
+    return states
+
+
+class SurfaceCounter:
+    """
+    counts the surfaces made, images loaded and fonts created while active
+    by wrapping the pygame functions the GUI elements call
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self._originals = []
+
+    def _wrap(self, module, name, counter):
+        original = getattr(module, name)
+
+        def counted(*args, **kwargs):
+            self.counts[counter] += 1
+            return original(*args, **kwargs)
+
+        self._originals.append((module, name, original))
+        setattr(module, name, counted)
+
+    def __enter__(self):
+        counts = self.counts
+        original_surface = pygame.Surface
+
+        class CountedSurface(original_surface):
+            def __init__(self, *args, **kwargs):
+                counts["surfaces"] += 1
+                super().__init__(*args, **kwargs)
+
+        self._originals.append((pygame, "Surface", original_surface))
+        pygame.Surface = CountedSurface
+        self._wrap(pygame.image, "load", "image_loads")
+        self._wrap(pygame.transform, "scale", "surfaces")
+        self._wrap(pygame.transform, "flip", "surfaces")
+        self._wrap(pygame.font, "SysFont", "fonts")
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in reversed(self._originals):
+            setattr(module, name, original)
+        self._originals.clear()
+
+    def take(self):
+        """
+        returns the counts since the last take and resets them
+        """
+        counts = dict(self.counts)
+        self.counts.clear()
+        return counts
+
+
+class StackSampler(threading.Thread):
+    """
+    samples the main thread's stack every interval seconds and counts the
+    stacks in the folded format flamegraph.pl and speedscope read
+    """
+    def __init__(self, interval=0.001):
+        super().__init__(daemon=True)
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def run_frames(screen, backgrounds, engine, num_frames, on_frame=None, renderer=None):
+    """
+    runs num_frames frames, returns the time of every frame in seconds.
+    on_frame is called after every frame with the frame number. with a
+    renderer the GUI is drawn at native size and upscaled like main.py does
+    """
+    scale = SCALE if renderer is None else 1
+    times = []
+    for frame in range(num_frames):
+        state = engine.current_state_of_game()
+        # what update_gui_state does after every action in the real game
+        gui_state["pot_stack"] = state["pot"]
+        gui_state["ply_stack"] = state["players"][0]["stack"]
+        gui_state["cpu_stack"] = state["players"][1]["stack"]
+
+        start = time.perf_counter()
+        update_frame(scale, engine)
+        draw_frame(screen, backgrounds, renderer)
+        pygame.display.flip()
+        times.append(time.perf_counter() - start)
+
+        if on_frame is not None:
+            on_frame(frame)
+        engine.next_frame()
+    return times
+
+
+def summarize(times):
+    ordered = sorted(times)
+    return {
+        "frames": len(times),
+        "mean_us": statistics.mean(times) * 1e6,
+        "min_us": ordered[0] * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6,
+        "max_us": ordered[-1] * 1e6,
+        "fps": len(times) / sum(times),
+    }
+
+
+def run_benchmark(num_frames=200, warmup=20, profile_path=None, folded_path=None, track_memory=True,
+                  native=False):
+    """
+    runs the benchmark, returns the results as a dict. native draws at
+    200x150 and upscales once per frame (gui/renderer.py)
+    """
+    pygame.init()
+    if native:
+        renderer = Renderer(SCALE, resizable=False)
+        screen = renderer.window
+    else:
+        renderer = None
+        screen = pygame.display.set_mode((200 * SCALE, 150 * SCALE))
+    backgrounds = load_backgrounds(1 if native else SCALE)
+    engine = ScriptedEngine(scripted_states(num_frames))
+
+    # the game still prints, keep it out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        change_to_game(1 if native else SCALE, engine)
+        run_frames(screen, backgrounds, engine, warmup, renderer=renderer)
+
+        # timing pass with nothing else running
+        engine.frame = 0
+        times = run_frames(screen, backgrounds, engine, num_frames, renderer=renderer)
+
+        # counting pass, surfaces made and memory allocated per frame
+        engine.frame = 0
+        per_frame = []
+        with SurfaceCounter() as counter:
+            if track_memory:
+                tracemalloc.start()
+
+            def record(frame):
+                counts = counter.take()
+                if track_memory:
+                    _, peak = tracemalloc.get_traced_memory()
+                    counts["peak_alloc_bytes"] = peak
+                    tracemalloc.reset_peak()
+                per_frame.append(counts)
+
+            if track_memory:
+                tracemalloc.reset_peak()
+            run_frames(screen, backgrounds, engine, num_frames, on_frame=record, renderer=renderer)
+            if track_memory:
+                tracemalloc.stop()
+
+        if profile_path is not None or folded_path is not None:
+            engine.frame = 0
+            profiler = cProfile.Profile() if profile_path is not None else None
+            sampler = StackSampler() if folded_path is not None else None
+            if sampler is not None:
+                sampler.start()
+            if profiler is not None:
+                profiler.enable()
+            run_frames(screen, backgrounds, engine, num_frames, renderer=renderer)
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+            if sampler is not None:
+                sampler.stop()
+                sampler.write(folded_path)
+
+    keys = sorted({key for counts in per_frame for key in counts})
+    counters = {f"{key}_per_frame": statistics.mean(counts.get(key, 0) for counts in per_frame) for key in keys}
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": SEED,
+        "scale": SCALE,
+        "native": native,
+        "frame_time": summarize(times),
+        "counters": counters,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    compare two runs: frame times are a regression if they are more than
+    threshold slower (p50, the least noisy), counters (surfaces, image loads, ...)
+    are a regression if they went up at all
+    """
+    rows = []
+    base = baseline["frame_time"]["p50_us"]
+    ratio = current["frame_time"]["p50_us"] / base if base > 0 else float("inf")
+    rows.append({"name": "frame_time_p50_us", "baseline": base, "current": current["frame_time"]["p50_us"],
+                 "regression": ratio > 1 + threshold})
+
+    for name, value in current["counters"].items():
+        if name == "peak_alloc_bytes_per_frame" or name not in baseline["counters"]:
+            # memory is reported but too noisy to gate on
+            continue
+        rows.append({"name": name, "baseline": baseline["counters"][name], "current": value,
+                     "regression": value > baseline["counters"][name]})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="headless GUI frame benchmark")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="frame time slowdown allowed before it counts as a regression")
+    parser.add_argument("--profile", help="write cProfile stats to this file")
+    parser.add_argument("--folded", help="write sampled stacks in folded format to this file")
+    parser.add_argument("--no-memory", action="store_true", help="don't track allocations with tracemalloc")
+    parser.add_argument("--native", action="store_true", help="draw at 200x150 and upscale once per frame")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.frames, args.warmup, args.profile, args.folded,
+                            track_memory=not args.no_memory, native=args.native)
+    frame_time = results["frame_time"]
+    print(f"frames: {frame_time['frames']}  fps: {frame_time['fps']:.1f}")
+    print(f"frame time us  mean {frame_time['mean_us']:.0f}  p50 {frame_time['p50_us']:.0f}  "
+          f"p95 {frame_time['p95_us']:.0f}  max {frame_time['max_us']:.0f}")
+    for name, value in results["counters"].items():
+        print(f"{name}: {value:.1f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = [row for row in compare(results, baseline, args.threshold) if row["regression"]]
+        for row in regressions:
+            print(f"REGRESSION {row['name']}: {row['baseline']:.1f} -> {row['current']:.1f}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
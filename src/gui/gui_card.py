@@ -1,5 +1,6 @@
 """Class and methods for the Card GUI element"""
 import pygame
+from gui.assets import assets
 from enum import Enum
 
 
@@ -15,56 +16,61 @@ class CardType(Enum):
 
 card_type = [CardType.RED]
 
-
-class GUI_Card:
+SUITE_POSITIONS = {
+    "D": (0, 36),
+    "H": (11, 36),
+    "C": (22, 36),
+    "S": (33, 36),
+}
+
+RANK_POSITIONS = {
+    "A": (0, 31),
+    "K": (5, 31),
+    "Q": (10, 31),
+    "J": (15, 31),
+    "2": (30, 31),
+    "3": (35, 31),
+    "4": (40, 31),
+    "5": (45, 31),
+    "6": (50, 31),
+    "7": (55, 31),
+    "8": (60, 31),
+    "9": (65, 31),
+    "10": (70, 31)
+}
+
+BACK_POSITIONS = {
+    CardType.RED: (19, 0),
+    CardType.BLUE: (38, 0),
+    CardType.GREEN: (57, 0),
+    CardType.BLACK: (76, 0),
+}
+
+
+class CardFaces:
     """
-    Card GUI element. Used for when a card needs to be displayed
-    in the GUI. Meant to be easy to set up and intuitive to use
-    with minimal setup.
+    Every card face (52 ranks x suites) and every card back, each one put
+    together into a single surface at one scale. Made once per scale by
+    get_card_faces, so drawing a card is one blit.
     """
-    def __init__(self, spritesheet_path, position, scale, rank, suite, revealed=False):
+    def __init__(self, spritesheet_path, scale):
         """
-        Initialize the Card.
+        Build the faces and backs.
 
         :param spritesheet_path: Path to the spritesheet image.
-        :param position: Tuple (x, y) for the card's position on the screen.
-        :param scale: Tuple (scale_x, scale_y) to scale the card.
-        :param rank: The rank of the card (e.g., "Ace", "2", "King").
-        :param suite: The suite of the card (e.g., "hearts", "diamonds").
-        :param revealed: Boolean indicating whether the card is revealed.
+        :param scale: Tuple (scale_x, scale_y) the faces are scaled by.
         """
-        self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
-        self.position = position
+        self.spritesheet = assets.image(spritesheet_path)
         self.scale = scale
-        self.rank = rank
-        self.suite = suite
-        self.revealed = revealed
-
         self.card_width = 19
         self.card_height = 31
 
-        self.set_card_color()
-
-        # Load the open card sprite (base of the card when revealed)
-        self.open_sprite = self.get_sprite(0, 0, self.card_width, self.card_height)
-
-        # Load the suite sprite (e.g., hearts, diamonds)
-        self.suite_sprite = self.get_suite_sprite()
-
-        # Load the rank sprite (e.g., Ace, King)
-        self.rank_sprite = self.get_rank_sprite()
-
-
-    def set_card_color(self):
-        match card_type[0]:
-            case CardType.RED:
-                self.back_sprite = self.get_sprite(19, 0, self.card_width, self.card_height)
-            case CardType.BLUE:
-                self.back_sprite = self.get_sprite(38, 0, self.card_width, self.card_height)
-            case CardType.GREEN:
-                self.back_sprite = self.get_sprite(57, 0, self.card_width, self.card_height)
-            case CardType.BLACK:
-                self.back_sprite = self.get_sprite(76, 0, self.card_width, self.card_height)
+        self.backs = {kind: self.get_sprite(x, y, self.card_width, self.card_height)
+                      for kind, (x, y) in BACK_POSITIONS.items()}
+        self.faces = {}
+        for suite in SUITE_POSITIONS:
+            for rank in RANK_POSITIONS:
+                self.faces[(rank, suite)] = self.build_face(rank, suite)
 
 
     def get_sprite(self, x, y, width, height):
@@ -77,50 +83,108 @@ class GUI_Card:
         :param height: Height of the sprite.
         :return: A scaled pygame.Surface representing the sprite.
         """
+        return self.scale_sprite(self.get_native_sprite(x, y, width, height))
+
+
+    def get_native_sprite(self, x, y, width, height):
         sprite = pygame.Surface((width, height), pygame.SRCALPHA)
         sprite.blit(self.spritesheet, (0, 0), (x, y, width, height))
+        return sprite
+
+
+    def scale_sprite(self, sprite):
+        width, height = sprite.get_size()
         return pygame.transform.scale(sprite, (width * self.scale[0], height * self.scale[1]))
 
 
-    def get_suite_sprite(self):
+    def build_face(self, rank, suite):
         """
-        Get the suite sprite based on the card's suite.
+        Put a face together at native size (open card, suite in the middle,
+        rank in the top left and upside down in the bottom right) and scale
+        it once. Unknown ranks or suites get the first sprite like before.
 
-        :return: A pygame.Surface representing the suite sprite.
+        :return: A pygame.Surface of the whole face.
         """
-        suite_positions = {
-            "D": (0, 36),
-            "H": (11, 36),
-            "C": (22, 36),
-            "S": (33, 36),
-        }
-        x, y = suite_positions.get(self.suite, (0, 0))
-        return self.get_sprite(x, y, 11, 11)
+        face = self.get_native_sprite(0, 0, self.card_width, self.card_height)
+
+        x, y = SUITE_POSITIONS.get(suite, (0, 0))
+        suite_sprite = self.get_native_sprite(x, y, 11, 11)
+        face.blit(suite_sprite, ((self.card_width - 11) // 2, (self.card_height - 11) // 2))
+
+        x, y = RANK_POSITIONS.get(rank, (0, 0))
+        rank_sprite = self.get_native_sprite(x, y, 5, 5)
+        face.blit(rank_sprite, (3, 3))
+        face.blit(pygame.transform.flip(rank_sprite, True, True), (16 - 5, 28 - 5))
+        return self.scale_sprite(face)
 
 
-    def get_rank_sprite(self):
+    def face(self, rank, suite):
         """
-        Get the rank sprite based on the card's rank.
+        The face of a card, built and kept the first time for unknown cards.
+        """
+        face = self.faces.get((rank, suite))
+        if face is None:
+            face = self.faces[(rank, suite)] = self.build_face(rank, suite)
+        return face
+
+
+# (spritesheet path, scale) -> CardFaces
+card_faces = {}
 
-        :return: A pygame.Surface representing the rank sprite.
+
+def get_card_faces(spritesheet_path, scale):
+    """
+    The CardFaces for a scale, built the first time a card at that scale is made
+    """
+    key = (spritesheet_path, tuple(scale))
+    faces = card_faces.get(key)
+    if faces is None:
+        faces = card_faces[key] = CardFaces(spritesheet_path, scale)
+    return faces
+
+
+class GUI_Card:
+    """
+    Card GUI element. Used for when a card needs to be displayed
+    in the GUI. Meant to be easy to set up and intuitive to use
+    with minimal setup.
+    """
+    def __init__(self, spritesheet_path, position, scale, rank, suite, revealed=False):
+        """
+        Initialize the Card.
+
+        :param spritesheet_path: Path to the spritesheet image.
+        :param position: Tuple (x, y) for the card's position on the screen.
+        :param scale: Tuple (scale_x, scale_y) to scale the card.
+        :param rank: The rank of the card (e.g., "Ace", "2", "King").
+        :param suite: The suite of the card (e.g., "hearts", "diamonds").
+        :param revealed: Boolean indicating whether the card is revealed.
+        """
+        self.position = position
+        self.scale = scale
+        self.rank = rank
+        self.suite = suite
+        self.revealed = revealed
+
+        self.card_width = 19
+        self.card_height = 31
+
+        # The faces are shared by every card at this scale
+        self.faces = get_card_faces(spritesheet_path, scale)
+
+
+    @property
+    def back_sprite(self):
         """
-        rank_positions = {
-            "A": (0, 31),
-            "K": (5, 31),
-            "Q": (10, 31),
-            "J": (15, 31),
-            "2": (30, 31),
-            "3": (35, 31),
-            "4": (40, 31),
-            "5": (45, 31),
-            "6": (50, 31),
-            "7": (55, 31),
-            "8": (60, 31),
-            "9": (65, 31),
-            "10": (70, 31)
-        }
-        x, y = rank_positions.get(self.rank, (0, 0))
-        return self.get_sprite(x, y, 5, 5)
+        The back of the card in the current card type, so toggle_card_type
+        only changes which cached back is drawn
+        """
+        return self.faces.backs[card_type[0]]
+
+
+    @property
+    def face_sprite(self):
+        return self.faces.face(self.rank, self.suite)
 
 
     def draw(self, screen):
@@ -133,31 +197,8 @@ class GUI_Card:
             # Draw the back of the card
             screen.blit(self.back_sprite, self.position)
         else:
-            # Draw the open card sprite
-            screen.blit(self.open_sprite, self.position)
-
-            # Draw the suite sprite
-            suite_x = self.position[0] + (self.card_width * self.scale[0] -
-                                          self.suite_sprite.get_width()) // 2
-            suite_y = self.position[1] + (self.card_height * self.scale[1] -
-                                          self.suite_sprite.get_height()) // 2
-            screen.blit(self.suite_sprite, (suite_x, suite_y))
-
-            # Draw the top left rank sprite
-            top_left_rank_x = self.position[0] + 3 * self.scale[0]
-            top_left_rank_y = self.position[1] + 3 * self.scale[1]
-            screen.blit(self.rank_sprite, (top_left_rank_x, top_left_rank_y))
-
-            # Draw the bottom right rank sprite
-            flipped_rank_sprite = pygame.transform.flip(self.rank_sprite, True, True)
-
-            sprite_width = flipped_rank_sprite.get_width()
-            sprite_height = flipped_rank_sprite.get_height()
-
-            draw_x = self.position[0] + (16 * self.scale[0]) - sprite_width
-            draw_y = self.position[1] + (28 * self.scale[1]) - sprite_height
-
-            screen.blit(flipped_rank_sprite, (draw_x, draw_y))
+            # Draw the whole face
+            screen.blit(self.face_sprite, self.position)
 
 
     def handle_event(self, event):
@@ -0,0 +1,43 @@
+"""Class and methods for the static layer of a screen"""
+import pygame
+from gui.gui_card import card_type
+
+
+class StaticLayer:
+    """
+    The background and the GUI elements that never change on a screen
+    (like the deck on the game screen), drawn together once into one
+    surface. Every frame is then one blit of that surface before the
+    elements that do change. It is drawn again when the screen's elements
+    change (invalidate), the screen is a different size or the card type
+    changes.
+    """
+    def __init__(self):
+        self.surface = None
+        self.key = None
+
+
+    def invalidate(self):
+        """
+        Draw the layer again next frame, call it when the static elements change.
+        """
+        self.key = None
+
+
+    def draw(self, screen, background, elements):
+        """
+        Draw the layer on the screen, putting it together first if needed.
+
+        :param screen: The Pygame surface to draw on.
+        :param background: The background surface of the current screen.
+        :param elements: The GUI elements that don't change, drawn over the background in order.
+        """
+        key = (id(background), screen.get_size(), card_type[0])
+        if key != self.key:
+            self.surface = pygame.Surface(screen.get_size()).convert()
+            self.surface.fill((0, 0, 0))
+            self.surface.blit(background, (0, 0))
+            for element in elements:
+                element.draw(self.surface)
+            self.key = key
+        screen.blit(self.surface, (0, 0))
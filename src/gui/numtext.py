@@ -1,5 +1,6 @@
 """Class and methods for the NumText GUI element"""
 import pygame
+from gui.assets import assets
 
 
 class NumText:
@@ -19,7 +20,7 @@ class NumText:
         :param scale: Tuple (scale_x, scale_y) to scale each digit.
         :param number: The initial number to display.
         """
-        self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
+        self.spritesheet = assets.image(spritesheet_path)
         self.position = position
         self.scale = scale
         self.number = number
@@ -0,0 +1,96 @@
+"""Renders the GUI at the pixel art's native size and upscales it once per frame"""
+import pygame
+from gui.spritetext import get_font
+
+NATIVE_SIZE = (200, 150)
+
+# the font text is this many native pixels tall, same as SpriteText
+FONT_SIZE = 4
+
+
+class Renderer:
+    """
+    Everything is drawn with scale 1 on a 200x150 canvas, then the canvas is
+    scaled up to the window with one transform.scale. The window can be
+    resized, the canvas is scaled by the biggest whole number that fits and
+    centered. Mouse positions from the window are mapped back to the canvas
+    so the GUI elements only ever see native coordinates.
+    """
+    def __init__(self, scale, resizable=True):
+        """
+        Make the window and the canvas.
+
+        :param scale: Starting window scale (the window is 200x150 times it).
+        :param resizable: Whether the window can be resized.
+        """
+        flags = pygame.RESIZABLE if resizable else 0
+        self.window = pygame.display.set_mode((NATIVE_SIZE[0] * scale, NATIVE_SIZE[1] * scale), flags)
+        self.canvas = pygame.Surface(NATIVE_SIZE).convert()
+        self.scale = scale
+        self.offset = (0, 0)
+        self.scaled = None
+        self.resize(self.window.get_size())
+
+
+    def resize(self, size):
+        """
+        Work out the scale and offset for a new window size.
+
+        :param size: Tuple (width, height) of the window.
+        """
+        self.window = pygame.display.get_surface() or self.window
+        self.scale = max(1, min(size[0] // NATIVE_SIZE[0], size[1] // NATIVE_SIZE[1]))
+        width, height = NATIVE_SIZE[0] * self.scale, NATIVE_SIZE[1] * self.scale
+        self.offset = ((size[0] - width) // 2, (size[1] - height) // 2)
+        # the upscaled frame is drawn into the same surface every frame
+        self.scaled = pygame.Surface((width, height)).convert() if self.scale > 1 else None
+
+
+    def to_native(self, pos):
+        """
+        Map a window position to the canvas.
+
+        :param pos: Tuple (x, y) in window pixels.
+        :return: Tuple (x, y) in canvas pixels.
+        """
+        return ((pos[0] - self.offset[0]) // self.scale, (pos[1] - self.offset[1]) // self.scale)
+
+
+    def map_event(self, event):
+        """
+        Resize on a window resize, and give mouse events canvas positions.
+
+        :param event: The Pygame event from the window.
+        :return: The event the GUI elements should get.
+        """
+        if event.type == pygame.VIDEORESIZE:
+            self.resize(event.size)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
+            attributes = dict(event.dict)
+            attributes["pos"] = self.to_native(event.pos)
+            return pygame.event.Event(event.type, attributes)
+        return event
+
+
+    def present(self, texts=()):
+        """
+        Upscale the canvas to the window. Font text doesn't survive being drawn
+        4 pixels tall, so texts (SpriteTexts made from a font) are drawn on
+        the window afterwards at the window's scale.
+
+        :param texts: The font SpriteTexts of this frame, positions in canvas pixels.
+        """
+        window = self.window
+        if self.offset != (0, 0):
+            window.fill((0, 0, 0))
+        if self.scaled is None:
+            window.blit(self.canvas, self.offset)
+        else:
+            pygame.transform.scale(self.canvas, self.scaled.get_size(), self.scaled)
+            window.blit(self.scaled, self.offset)
+
+        for text in texts:
+            image = get_font(FONT_SIZE * self.scale).render(text.text_type, True, text.color)
+            window.blit(image, (self.offset[0] + text.position[0] * self.scale,
+                                self.offset[1] + text.position[1] * self.scale))
+
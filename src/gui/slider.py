@@ -1,5 +1,6 @@
 """Class and methods for the Slider GUI element"""
 import pygame
+from gui.assets import assets
 
 
 class Slider:
@@ -21,7 +22,7 @@ class Slider:
         :param thumb_width: Width of the slider thumb in the spritesheet.
         :param thumb_height: Height of the slider thumb in the spritesheet.
         """
-        self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
+        self.spritesheet = assets.image(spritesheet_path)
         self.position = position
         self.scale = scale
 
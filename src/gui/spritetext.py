@@ -1,5 +1,6 @@
 # File: gui/spritetext.py
 import pygame
+from gui.assets import assets
 
 SPRITESHEET_PATH = "../assets/poker-spritesheet.png"
 
@@ -13,12 +14,27 @@ TEXT_COORDS = {
     "NA": (199, 0, 1, 1)
 }
 
+TEXT_COLOR = (255, 255, 170)
+
+# SysFont is slow to make, one font per size
+fonts = {}
+
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        font = fonts[size] = pygame.font.SysFont('Arial', size, bold=True)
+    return font
+
 class SpriteText:
     def __init__(self, text_type, position, scale):
-        self.spritesheet = pygame.image.load(SPRITESHEET_PATH).convert_alpha()
+        self.spritesheet = assets.image(SPRITESHEET_PATH)
         self.text_type = text_type
         self.position = position
         self.scale = scale
+        self.color = TEXT_COLOR
+        # no sprite for the text, it's written with a font
+        self.is_font = text_type not in TEXT_COORDS
         self.image = self.load_image()
 
     def load_image(self):
@@ -29,9 +45,8 @@ class SpriteText:
             return pygame.transform.scale(sprite, (w * self.scale, h * self.scale))
         else:
             # Use a small, bold font and white/yellow color, no background
-            font = pygame.font.SysFont('Arial', 4 * self.scale, bold=True)
-            color = (255, 255, 170)
-            text_surface = font.render(self.text_type, True, color)
+            font = get_font(4 * self.scale)
+            text_surface = font.render(self.text_type, True, self.color)
             return text_surface
 
     def draw(self, screen):
@@ -7,6 +7,10 @@ from gui.gui_card import GUI_Card, CardType, card_type
 from gui.chip import Chip
 from gui.numtext import NumText
 from gui.spritetext import SpriteText, TEXT_COORDS
+from gui.layers import StaticLayer
+from gui.event_router import EventRouter
+from gui.assets import assets
+from gui.animation import Animations, DEAL_STAGGER
 from game_engine.engine import Engine, Difficulty
 from game_engine.constants import Action
 import pygame
@@ -22,10 +26,18 @@ class Screen(Enum):
     GAME = 2
 
 
+BACKGROUND_PATHS = {
+    Screen.HOME: "../assets/poker-main-menu.png",
+    Screen.SETTINGS: "../assets/poker-settings.png",
+    Screen.GAME: "../assets/poker-board.png",
+}
+
+
 difficulty = [Difficulty.EASY]
 gui_state = {
         "screen": Screen.HOME,
         "buttons": [],
+        "static": [], # Drawn once into static_layer with the background
         "sliders": [],
         "cards": [],
         "chips": [],
@@ -38,8 +50,16 @@ gui_state = {
         "ply_distribution": [], # Being updated
         "cpu_distribution": [], # Being updated
         "pot_distribution": [], # NOT being updated currently
-        "previewed_bet": 0
+        "previewed_bet": 0,
+        "pending_step": None, # (time, function, hold) of the next engine step
+        "hold_until": 0, # no engine step before this time
+        "view": {} # what the animations last saw of the game state (EMPTY_VIEW)
         }
+static_layer = StaticLayer()
+event_router = EventRouter()
+animations = Animations()
+chip_sprites = {}
+EMPTY_VIEW = {"hole_cards": (), "community": 0, "pot": 0, "show_cpu": False}
 
 
 def get_proper_chip_distribution(user_value):
@@ -100,6 +120,11 @@ def change_to_main_menu(scale, engine):
     gui_state["screen"] = Screen.HOME
 
     gui_state["buttons"].clear()
+    gui_state["static"].clear()
+    static_layer.invalidate()
+    animations.clear()
+    gui_state["pending_step"] = None
+    gui_state["view"] = dict(EMPTY_VIEW)
     gui_state["sliders"].clear()
     gui_state["cards"].clear()
     gui_state["chips"].clear()
@@ -117,6 +142,9 @@ def change_to_main_menu(scale, engine):
     gui_state["buttons"].append(new_game)
     gui_state["buttons"].append(settings)
 
+    # Only the buttons and sliders do anything with events
+    event_router.rebuild(scale, gui_state["buttons"], gui_state["sliders"])
+
 
 def change_to_settings(scale, engine):
     """
@@ -125,6 +153,11 @@ def change_to_settings(scale, engine):
     gui_state["screen"] = Screen.SETTINGS
 
     gui_state["buttons"].clear()
+    gui_state["static"].clear()
+    static_layer.invalidate()
+    animations.clear()
+    gui_state["pending_step"] = None
+    gui_state["view"] = dict(EMPTY_VIEW)
     gui_state["sliders"].clear()
     gui_state["cards"].clear()
     gui_state["chips"].clear()
@@ -143,7 +176,7 @@ def change_to_settings(scale, engine):
                         callback=lambda: change_to_main_menu(scale, engine))
 
     card = GUI_Card(SPRITESHEET_PATH, (96 * scale, 109 * scale), (scale, scale), "A", "S")
-    gui_state["cards"].append(card)
+    gui_state["static"].append(card)
 
     diff_string = "easy"
     match difficulty[0]:
@@ -151,14 +184,24 @@ def change_to_settings(scale, engine):
             diff_string = "medium"
         case Difficulty.HARD:
             diff_string = "hard"
-    difficulty_display = Button(SPRITESHEET_PATH, (96 * scale, 83 * scale),
-                                (scale, scale), 41, 13, diff_string)
-    gui_state["buttons"].append(difficulty_display)
+        case _ if difficulty[0] != Difficulty.EASY:
+            # no sprite for this difficulty, write its name instead
+            diff_string = None
+    if diff_string is not None:
+        difficulty_display = Button(SPRITESHEET_PATH, (96 * scale, 83 * scale),
+                                    (scale, scale), 41, 13, diff_string)
+        gui_state["buttons"].append(difficulty_display)
+    else:
+        gui_state["spritetexts"].append(
+            SpriteText(difficulty[0].name.lower(), (98 * scale, 87 * scale), scale))
 
     gui_state["buttons"].append(difficulty_button)
     gui_state["buttons"].append(change_card)
     gui_state["buttons"].append(back)
 
+    # Only the buttons and sliders do anything with events
+    event_router.rebuild(scale, gui_state["buttons"], gui_state["sliders"])
+
 
 def change_to_game(scale, engine):
     """
@@ -167,6 +210,11 @@ def change_to_game(scale, engine):
     gui_state["screen"] = Screen.GAME
 
     gui_state["buttons"].clear()
+    gui_state["static"].clear()
+    static_layer.invalidate()
+    animations.clear()
+    gui_state["pending_step"] = None
+    gui_state["view"] = dict(EMPTY_VIEW)
     gui_state["sliders"].clear()
     gui_state["cards"].clear()
     gui_state["chips"].clear()
@@ -240,6 +288,12 @@ def change_to_game(scale, engine):
                         #(scale, scale), 23, 9, button_names[i])
         #gui_state["buttons"].append(button)
 
+    # Deck cards, they never move so they are part of the static layer
+    for y in (60, 58, 56):
+        deck_card = GUI_Card(SPRITESHEET_PATH, (20 * scale, y * scale), (scale, scale),
+                             "AS", False)
+        gui_state["static"].append(deck_card)
+
     # Back button
     back = Button(SPRITESHEET_PATH, (1 * scale, 1 * scale),
                         (scale, scale), 13, 13, "back",
@@ -260,6 +314,9 @@ def change_to_game(scale, engine):
     pot_val = NumText(SPRITESHEET_PATH, (184, 40), (scale, scale), 0, label="pot")
     gui_state["numtexts"].append(pot_val)
 
+    # Only the buttons and sliders do anything with events
+    event_router.rebuild(scale, gui_state["buttons"], gui_state["sliders"])
+
 
 def update_game(scale, engine):
     """
@@ -295,21 +352,18 @@ def update_game(scale, engine):
     ply_cards = state["players"][0]["hole_cards"]
     cpu_cards = state["players"][1]["hole_cards"]
 
-    card = GUI_Card(SPRITESHEET_PATH, (80 * scale, 112 * scale),
-                    (scale, scale), ply_cards[0][:-1], ply_cards[0][-1], True)
-    gui_state["cards"].append(card)
-    card = GUI_Card(SPRITESHEET_PATH, (103 * scale, 112 * scale),
-                    (scale, scale), ply_cards[1][:-1], ply_cards[1][-1], True)
-    gui_state["cards"].append(card)
-    
     show_cpu = state["round_over"] or state["showdown"]
 
-    card = GUI_Card(SPRITESHEET_PATH, (80 * scale, 7 * scale), (scale, scale),
-                    cpu_cards[0][:-1], cpu_cards[0][-1], show_cpu)
-    gui_state["cards"].append(card)
-    card = GUI_Card(SPRITESHEET_PATH, (103 * scale, 7 * scale), (scale, scale),
-                    cpu_cards[1][:-1], cpu_cards[1][-1], show_cpu)
-    gui_state["cards"].append(card)
+    hole_cards = [
+        (("hole", 0), GUI_Card(SPRITESHEET_PATH, (80 * scale, 112 * scale),
+                               (scale, scale), ply_cards[0][:-1], ply_cards[0][-1], True)),
+        (("hole", 1), GUI_Card(SPRITESHEET_PATH, (103 * scale, 112 * scale),
+                               (scale, scale), ply_cards[1][:-1], ply_cards[1][-1], True)),
+        (("hole", 2), GUI_Card(SPRITESHEET_PATH, (80 * scale, 7 * scale), (scale, scale),
+                               cpu_cards[0][:-1], cpu_cards[0][-1], show_cpu)),
+        (("hole", 3), GUI_Card(SPRITESHEET_PATH, (103 * scale, 7 * scale), (scale, scale),
+                               cpu_cards[1][:-1], cpu_cards[1][-1], show_cpu)),
+    ]
 
     # Update community cards
     community_cards = state["community_cards"]
@@ -318,19 +372,16 @@ def update_game(scale, engine):
                                 (91 * scale, 59 * scale),
                                 (111 * scale, 59 * scale),
                                 (131 * scale, 59 * scale))
-    
-    # Update deck cards
-    deck_card = GUI_Card(SPRITESHEET_PATH, (20 * scale, 60 * scale), (scale, scale),
-                         "AS", False)
-    gui_state["cards"].append(deck_card)
-    
-    deck_card = GUI_Card(SPRITESHEET_PATH, (20 * scale, 58 * scale), (scale, scale),
-                         "AS", False)
-    gui_state["cards"].append(deck_card)
-    
-    deck_card = GUI_Card(SPRITESHEET_PATH, (20 * scale, 56 * scale), (scale, scale),
-                         "AS", False)
-    gui_state["cards"].append(deck_card)
+    community = [(("community", i), GUI_Card(SPRITESHEET_PATH, community_card_positions[i], (scale, scale),
+                                             community_cards[i][:-1], community_cards[i][-1], True))
+                 for i in range(len(community_cards))]
+
+    # Start animations for whatever changed since the last frame, the cards
+    # that are animating are drawn by the animations until they land
+    animate_changes(scale, state, hole_cards, community)
+    for key, card in hole_cards + community:
+        if not animations.is_animating(key):
+            gui_state["cards"].append(card)
 
     # Update player chips
     ply_value = state["players"][0]["stack"]
@@ -364,11 +415,6 @@ def update_game(scale, engine):
             gui_state["chips"].append(chip)
 
 
-    for i in range(len(community_cards)):
-        card = GUI_Card(SPRITESHEET_PATH, community_card_positions[i],
-                        (scale, scale), community_cards[i][:-1], community_cards[i][-1], True)
-        gui_state["cards"].append(card)
-        
     # Update pot chips
     pot_value = gui_state["pot_stack"]
     gui_state["pot_distribution"] = get_proper_chip_distribution(pot_value)
@@ -399,36 +445,217 @@ def update_game(scale, engine):
     gui_state["numtexts"][2].set_number(gui_state["ply_stack"]) # Player balance
     gui_state["numtexts"][3].set_number(gui_state["pot_stack"]) # Pot
 
-    # Update to next phase of round depending on state
+    # Update to next phase of round depending on state, without waiting
+    # in here so the frames (and animations) keep going
+    step_engine(scale, engine, state)
+
+
+def step_engine(scale, engine, state):
+    """
+    Moves the engine on when the state calls for it. The step happens
+    after a pause and is followed by another one, but the pauses are
+    timed against the frame clock instead of blocking the frame.
+    """
+    now = animations.clock.now
+    pending = gui_state["pending_step"]
+    if pending is not None:
+        due, step, hold = pending
+        if now >= due:
+            gui_state["pending_step"] = None
+            gui_state["hold_until"] = now + hold
+            step()
+        return
+    if now < gui_state["hold_until"]:
+        return
+
+    def after_action(action):
+        def step():
+            action()
+            update_gui_state(engine)
+        return step
+
     if state["round_over"]:
         print("\nRound is over, transitioning to next round...")
-        pygame.time.wait(2000)  # Wait 2 seconds before starting next round
-        engine.start_next_round()
-        update_gui_state(engine)
-        pygame.time.wait(1000)  # Wait 1 second after starting new round
-        return  # Exit the function to prevent further state changes
+        # 2 seconds before starting next round, 1 second after
+        gui_state["pending_step"] = (now + 2000, after_action(engine.start_next_round), 1000)
 
     elif state["betting_over"]:
         print("\nBetting is over, moving to next street...")
-        pygame.time.wait(1500)  # Wait 1.5 seconds before next street
-        engine.start_next_street()
-        update_gui_state(engine)
-        pygame.time.wait(1000)  # Wait 1 second after street transition
-        return  # Exit the function to prevent further state changes
+        # 1.5 seconds before next street, 1 second after
+        gui_state["pending_step"] = (now + 1500, after_action(engine.start_next_street), 1000)
 
     elif not state["players_turn"]:
         print("\nCPU's turn to act...")
-        pygame.time.wait(1500)  # Wait 1.5 seconds before CPU action
-        engine.cpu_action()
-        update_gui_state(engine)
-        pygame.time.wait(1000)  # Wait 1 second after CPU action
-        return  # Exit the function to prevent further state changes
+        # 1.5 seconds before CPU action, 1 second after
+        gui_state["pending_step"] = (now + 1500, after_action(engine.cpu_action), 1000)
 
     elif state["game_over"]:
         print("\nGame is over, returning to main menu...")
-        pygame.time.wait(2000)  # Wait 2 seconds before returning to menu
-        change_to_main_menu(scale, engine)
-        return  # Exit the function to prevent further state changes
+        # 2 seconds before returning to menu
+        gui_state["pending_step"] = (now + 2000, lambda: change_to_main_menu(scale, engine), 0)
+
+
+def animate_changes(scale, state, hole_cards, community):
+    """
+    Compares the game state with what was on screen last frame and starts
+    the animations for the changes: cards dealt from the deck, chips
+    moving to the pot and the CPU's cards turning over at showdown.
+    hole_cards and community are lists of (key, GUI_Card)
+    """
+    view = gui_state["view"]
+    deck_position = (20 * scale, 56 * scale)
+    dealt = tuple(card.rank + card.suite for _, card in hole_cards)
+    show_cpu = hole_cards[2][1].revealed
+    new_hand = dealt != view["hole_cards"]
+
+    if new_hand:
+        for i, (key, card) in enumerate(hole_cards):
+            sprite = card.face_sprite if card.revealed else card.back_sprite
+            animations.deal(key, sprite, deck_position, card.position, delay=i * DEAL_STAGGER)
+    elif show_cpu and not view["show_cpu"]:
+        for key, card in hole_cards[2:]:
+            animations.reveal(key, card.back_sprite, card.face_sprite, card.position)
+
+    first_new = 0 if new_hand else view["community"]
+    for i, (key, card) in enumerate(community[first_new:]):
+        animations.deal(key, card.face_sprite, deck_position, card.position, delay=i * DEAL_STAGGER)
+
+    pot = state["pot"]
+    if not new_hand and pot > view["pot"]:
+        # a chip from whoever put the money in
+        histories = state["action_histories"]
+        last = None
+        for street in ("river", "turn", "flop", "preflop"):
+            actions = histories.get(street, [])
+            if actions:
+                last = actions[-1]
+                break
+        from_player = last is None or last.get("name") == state["players"][0]["name"]
+        start = (9 * scale, (132 if from_player else 27) * scale)
+        animations.move_chip(("pot_chip", pot), chip_sprite("red", scale),
+                             start, (167 * scale, 79 * scale))
+
+    view["hole_cards"] = dealt
+    view["community"] = len(community)
+    view["pot"] = pot
+    view["show_cpu"] = show_cpu
+
+
+def chip_sprite(color, scale):
+    """
+    The sprite of a chip, made once per color and scale
+    """
+    key = (color, scale)
+    sprite = chip_sprites.get(key)
+    if sprite is None:
+        sprite = chip_sprites[key] = Chip(SPRITESHEET_PATH, (0, 0), (scale, scale), color).chip_sprite
+    return sprite
+
+
+class Backgrounds(dict):
+    """
+    Screen -> background, each one waits for its own image the first
+    time it's drawn instead of all of them loading up front
+    """
+    def __init__(self, scale):
+        super().__init__()
+        self.size = (200 * scale, 150 * scale)
+
+    def __missing__(self, screen):
+        background = self[screen] = assets.scaled_image(BACKGROUND_PATHS[screen], self.size)
+        return background
+
+
+def load_backgrounds(scale):
+    """
+    Returns the background for every screen, scaled to the window size
+    (loaded when first used, see screen_assets to load them ahead)
+    """
+    return Backgrounds(scale)
+
+
+def screen_assets(screen, scale):
+    """
+    What a screen needs loaded before it's shown, for assets.start
+    """
+    return [SPRITESHEET_PATH, (BACKGROUND_PATHS[screen], (200 * scale, 150 * scale))]
+
+
+def screen_ready(screen, scale):
+    """
+    A future that is done when everything the screen draws is loaded
+    """
+    return assets.ready([assets.load(SPRITESHEET_PATH),
+                         assets.scale(BACKGROUND_PATHS[screen], (200 * scale, 150 * scale))])
+
+
+def handle_event(event, scale, engine):
+    """
+    Passes a pygame event to the GUI elements on the current screen it is for
+    (escape goes back to the main menu)
+    """
+    if event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_ESCAPE:
+            change_to_main_menu(scale, engine)
+
+    # Mouse events go to the elements under the mouse, keys to the focused one
+    event_router.dispatch(event)
+
+
+def update_frame(scale, engine):
+    """
+    Updates the GUI elements for one frame, only the game screen changes every frame
+    """
+    animations.tick()
+    if gui_state["screen"] == Screen.GAME:
+        update_slider_info()
+        update_game(scale, engine)
+
+        # Toggle button interactivity based on player's turn (and nothing waiting to happen)
+        is_players_turn = engine.current_state_of_game()["players_turn"] and gui_state["pending_step"] is None
+
+        for button in gui_state["buttons"]:
+            button.clickable = is_players_turn
+
+
+def draw_frame(screen, backgrounds, renderer=None):
+    """
+    Draws the current screen's background and GUI elements,
+    backgrounds is the dict from load_backgrounds. With a renderer
+    (gui/renderer.py) everything is drawn on its native canvas
+    and upscaled to the window once at the end
+    """
+    if renderer is not None:
+        screen = renderer.canvas
+
+    # The background and static elements, put together once per screen
+    static_layer.draw(screen, backgrounds[gui_state["screen"]], gui_state["static"])
+
+    # Draw GUI elements
+    for button in list(gui_state["buttons"]):
+        button.draw(screen)
+    for slider in gui_state["sliders"]:
+        slider.draw(screen)
+    for card in list(gui_state["cards"]):
+        card.draw(screen)
+    for chip in gui_state["chips"]:
+        chip.draw(screen)
+    animations.draw(screen)
+    for numtext in gui_state["numtexts"]:
+        numtext.draw(screen)
+    if renderer is None:
+        for spritetext in gui_state["spritetexts"]:
+            spritetext.draw(screen)
+        return
+
+    # Font text is written on the window after upscaling so it stays sharp
+    texts = []
+    for spritetext in gui_state["spritetexts"]:
+        if spritetext.is_font:
+            texts.append(spritetext)
+        else:
+            spritetext.draw(screen)
+    renderer.present(texts)
 
 
 def update_gui_state(engine):
@@ -2,7 +2,10 @@
 
 import sys
 import pygame
-from gui.util import change_to_main_menu, Screen, gui_state, update_game, update_slider_info, difficulty
+from gui.util import (Screen, change_to_main_menu, difficulty, load_backgrounds,
+                      handle_event, update_frame, draw_frame, screen_assets, screen_ready)
+from gui.renderer import Renderer
+from gui.assets import assets
 from game_engine.engine import Engine 
 
 # Connect Gui & Engine
@@ -13,20 +16,31 @@ engine = Engine(num_players=2, initial_stack=500, blind=10)
 pygame.init()
 SCALE = 4
 
+# Draw at the pixel art's 200x150 and upscale the whole frame once (resizable window),
+# False draws every sprite scaled up by SCALE straight to the window
+RENDER_NATIVE = True
+
 # Set up display
-screen = pygame.display.set_mode((200 * SCALE, 150 * SCALE))
+if RENDER_NATIVE:
+    renderer = Renderer(SCALE)
+    screen = renderer.window
+    gui_scale = 1
+else:
+    renderer = None
+    screen = pygame.display.set_mode((200 * SCALE, 150 * SCALE))
+    gui_scale = SCALE
 pygame.display.set_caption("Poker")
 
-# Load backgrounds
-main_menu_background = pygame.transform.scale(pygame.image.load(
-    "../assets/poker-main-menu.png"), (200 * SCALE, 150 * SCALE))
-settings_background = pygame.transform.scale(pygame.image.load(
-    "../assets/poker-settings.png"), (200 * SCALE, 150 * SCALE))
-game_background = pygame.transform.scale(pygame.image.load(
-    "../assets/poker-board.png"), (200 * SCALE, 150 * SCALE))
+# Decode and scale the assets on a background thread, the main menu's first
+assets.start(screen_assets(Screen.HOME, gui_scale) + screen_assets(Screen.SETTINGS, gui_scale)
+             + screen_assets(Screen.GAME, gui_scale))
+
+# Backgrounds, each one is waited for when it's first drawn
+backgrounds = load_backgrounds(gui_scale)
 
-# Initialize GUI elements
-change_to_main_menu(SCALE, engine)
+# Initialize GUI elements as soon as the main menu can be drawn
+screen_ready(Screen.HOME, gui_scale).result()
+change_to_main_menu(gui_scale, engine)
 
 # Set initial CPU difficulty
 engine.set_cpu_difficulty(difficulty[0])
@@ -36,58 +50,15 @@ while RUNNING:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             RUNNING = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                change_to_main_menu(SCALE, engine)
-                
-
-        # Pass events to buttons and other GUI elements
-        for button in list(gui_state["buttons"]):
-            button.handle_event(event)
-        for slider in gui_state["sliders"]:
-            slider.handle_event(event)
-        for card in list(gui_state["cards"]):
-            card.handle_event(event)
-        for chip in gui_state["chips"]:
-            chip.handle_event(event)
-        for numtext in gui_state["numtexts"]:
-            numtext.handle_event(event)
-    
-    if gui_state["screen"] == Screen.GAME:
-        update_slider_info()
-        update_game(SCALE, engine)
-
-        # Toggle button interactivity based on player's turn
-        is_players_turn = engine.current_state_of_game()["players_turn"]
-
-        for button in gui_state["buttons"]:
-            button.clickable = is_players_turn
-
-    # Make sure only one screen is drawn at a time
-    screen.fill((0, 0, 0))  # Clear screen before drawing
-
-    if gui_state["screen"] == Screen.HOME:
-        screen.blit(main_menu_background, (0, 0))
-    elif gui_state["screen"] == Screen.SETTINGS:
-        screen.blit(settings_background, (0, 0))
-    elif gui_state["screen"] == Screen.GAME:
-        screen.blit(game_background, (0, 0))
+        if renderer is not None:
+            event = renderer.map_event(event)
+        handle_event(event, gui_scale, engine)
 
-    # Draw GUI elements
-    for button in list(gui_state["buttons"]):
-        button.draw(screen)
-    for slider in gui_state["sliders"]:
-        slider.draw(screen)
-    for card in list(gui_state["cards"]):
-        card.draw(screen)
-    for chip in gui_state["chips"]:
-        chip.draw(screen)
-    for numtext in gui_state["numtexts"]:
-        numtext.draw(screen)
-    for spritetext in gui_state["spritetexts"]:
-        spritetext.draw(screen)
+    update_frame(gui_scale, engine)
+    draw_frame(screen, backgrounds, renderer)
 
     pygame.display.flip()
 
+assets.stop()
 pygame.quit()
 sys.exit()